@@ -261,16 +261,17 @@ namespace Microsoft.GS.DPSHost.API
                     // Trace: Validation passed, preparing streaming response
                     logger.LogInformation("[{RequestId}] Request validation passed. Preparing streaming response...", requestId);
                     
-                    ctx.Response.ContentType = "text/plain";
+                    //Stream the answer as Server-Sent Events: "token" events carry the text, "done" the final answer.
+                    //A "replace" event before "done" carries the whole text to show when it differs from the streamed one.
+                    ctx.Response.ContentType = "text/event-stream";
+                    ctx.Response.Headers.CacheControl = "no-cache";
 
-                    //Make a response as a stream
-                    var result = chatHost.ChatAsync(request).Result;
-                    var duration = (DateTimeOffset.UtcNow - startTime).TotalSeconds;
+                    var result = await chatHost.ChatAsync(request, ctx.RequestAborted);
                     
                     // Trace: Response metadata ready
                     logger.LogInformation("[{RequestId}] Chat async response ready. Duration: {Duration}s, ChatSessionId: {ChatSessionId}, Documents: {DocumentCount}",
                         requestId,
-                        duration.ToString("F2"),
+                        (DateTimeOffset.UtcNow - startTime).TotalSeconds.ToString("F2"),
                         result.ChatSessionId ?? "unknown",
                         result.DocumentIds?.Length ?? 0);
 
@@ -278,12 +279,51 @@ namespace Microsoft.GS.DPSHost.API
                     var response = new
                     {
                         result.ChatSessionId,
-                        result.DocumentIds,
-                        result.SuggestingQuestions
+                        result.DocumentIds
                     };
 
                     //Add the response to the header
-                    ctx.Response.Headers.Add("RESPONSE", JsonSerializer.Serialize(response));
+                    ctx.Response.Headers.Append("RESPONSE", JsonSerializer.Serialize(response));
+
+                    // Set correlation ID for tracing
+                    if (!string.IsNullOrEmpty(result.ChatSessionId))
+                    {
+                        telemetryHelper.SetActivityTag("chatSessionId", result.ChatSessionId);
+                    }
+
+                    // Trace: Beginning streaming
+                    logger.LogDebug("[{RequestId}] Starting to stream response tokens...", requestId);
+                    
+                    // Stream the response
+                    var chunkCount = 0;
+                    double? timeToFirstToken = null;
+                    await foreach (var text in result.AnswerWords.WithCancellation(ctx.RequestAborted))
+                    {
+                        timeToFirstToken ??= (DateTimeOffset.UtcNow - startTime).TotalSeconds;
+                        await WriteServerSentEventAsync(ctx, "token", new { text });
+                        chunkCount++;
+                    }
+
+                    // The final answer doesn't match the streamed text, send the text to show instead
+                    if (result.AnswerReplaced)
+                    {
+                        await WriteServerSentEventAsync(ctx, "replace", new { text = result.Answer });
+                    }
+
+                    await WriteServerSentEventAsync(ctx, "done", new
+                    {
+                        result.ChatSessionId,
+                        result.Answer,
+                        result.DocumentIds,
+                        result.SuggestingQuestions,
+                        result.Keywords
+                    });
+
+                    var duration = (DateTimeOffset.UtcNow - startTime).TotalSeconds;
+
+                    // Trace: Streaming completed
+                    logger.LogInformation("[{RequestId}] Streaming completed. Duration: {Duration}s, TimeToFirstToken: {TimeToFirstToken}s, Chunks streamed: {ChunkCount}",
+                        requestId, duration.ToString("F2"), (timeToFirstToken ?? duration).ToString("F2"), chunkCount);
 
                     // Track successful chat async request with metrics
                     telemetryHelper.TrackEvent("ChatAsyncRequestSuccess", new Dictionary<string, string>
@@ -297,32 +337,12 @@ namespace Microsoft.GS.DPSHost.API
                     }, new Dictionary<string, double>
                     {
                         { "ResponseTimeSeconds", duration },
+                        { "TimeToFirstTokenSeconds", timeToFirstToken ?? duration },
                         { "DocumentsReferenced", result.DocumentIds?.Length ?? 0 }
                     });
-
-                    // Set correlation ID for tracing
-                    if (!string.IsNullOrEmpty(result.ChatSessionId))
-                    {
-                        telemetryHelper.SetActivityTag("chatSessionId", result.ChatSessionId);
-                    }
-
-                    // Trace: Beginning streaming
-                    logger.LogDebug("[{RequestId}] Starting to stream response words...", requestId);
-                    
-                    // Stream the response
-                    var wordCount = 0;
-                    await foreach (var word in result.AnswerWords)
-                    {
-                        await ctx.Response.WriteAsync(word);
-                        await ctx.Response.WriteAsync(" ");
-                        wordCount++;
-                    }
                     
-                    // Trace: Streaming completed
-                    logger.LogInformation("[{RequestId}] Streaming completed. Total words streamed: {WordCount}",
-                        requestId, wordCount);
-                    
-                    return Results.Ok();
+                    //The body has already been written
+                    return Results.Empty;
                 }
                 catch (TimeoutException ex)
                 {
@@ -381,5 +401,11 @@ namespace Microsoft.GS.DPSHost.API
             })
             .DisableAntiforgery();
         }
+
+        private static async Task WriteServerSentEventAsync(HttpContext ctx, string eventName, object data)
+        {
+            await ctx.Response.WriteAsync($"event: {eventName}\ndata: {JsonSerializer.Serialize(data)}\n\n", ctx.RequestAborted);
+            await ctx.Response.Body.FlushAsync(ctx.RequestAborted);
+        }
     }
 }
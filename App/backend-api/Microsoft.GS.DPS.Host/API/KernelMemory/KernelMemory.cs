@@ -21,6 +21,7 @@ namespace Microsoft.GS.DPSHost.API
             //Registration the files
             app.MapPost("/Documents/ImportDocument", async (HttpContext httpContext,
                                                             IFormFile file,
+                                                            bool? background,
                                                             DPS.API.KernelMemory kernelMemory,
                                                             TelemetryHelper telemetryHelper,
                                                             ILogger<KernelMemory> logger
@@ -132,6 +133,41 @@ namespace Microsoft.GS.DPSHost.API
                         fileExtension,
                         file.Length);
                     
+                    if (background == true)
+                    {
+                        // Store the upload only, keywords and summary are extracted by the background worker
+                        var accepted = await kernelMemory.QueueImportDocument(fileStream, file.FileName, contentType, httpContext.RequestAborted);
+                        var acceptedDuration = (DateTimeOffset.UtcNow - startTime).TotalSeconds;
+
+                        // Trace: Document accepted for background processing
+                        logger.LogInformation("[{RequestId}] Document accepted for background processing. Duration: {Duration}s, DocumentId: {DocumentId}, FileName: {FileName}, FileSize: {FileSize} bytes",
+                            requestId,
+                            acceptedDuration.ToString("F2"),
+                            accepted.DocumentId,
+                            file.FileName,
+                            file.Length);
+
+                        telemetryHelper.TrackEvent("DocumentImportAccepted", new Dictionary<string, string>
+                        {
+                            { "requestId", requestId },
+                            { "endpoint", "/Documents/ImportDocument" },
+                            { "documentId", accepted.DocumentId },
+                            { "fileName", file.FileName },
+                            { "fileExtension", fileExtension },
+                            { "fileSize", file.Length.ToString() },
+                            { "duration", acceptedDuration.ToString("F2") }
+                        }, new Dictionary<string, double>
+                        {
+                            { "FileSizeBytes", file.Length },
+                            { "UploadTimeSeconds", acceptedDuration }
+                        });
+
+                        telemetryHelper.SetActivityTag("documentId", accepted.DocumentId);
+
+                        //Return HTTP 202 with Location Header
+                        return Results.Accepted($"/Documents/CheckStatus/{accepted.DocumentId}", accepted);
+                    }
+
                     var result = await kernelMemory.ImportDocument(fileStream, file.FileName, contentType);
                     var duration = (DateTimeOffset.UtcNow - startTime).TotalSeconds;
                     
@@ -195,11 +231,6 @@ namespace Microsoft.GS.DPSHost.API
                     // Set correlation ID for tracing
                     telemetryHelper.SetActivityTag("documentId", result.DocumentId);
 
-                    //Return HTTP 202 with Location Header
-                    //return Results($"/Documents/CheckProcessStatus/{result.DocumentId}", result);
-                    // Add Document to the Repository
-
-                    //Refresh the Cache
                     return Results.Ok<DocumentImportedResult>(result);
                 }
                 catch (IOException ex)
@@ -457,42 +488,51 @@ namespace Microsoft.GS.DPSHost.API
             //TODO : Implement the SSE for the status of the document
             app.MapGet("/Documents/CheckStatus/{documentId}", async Task (HttpContext ctx,
                                                                           string documentId,
-                                                                          MemoryWebClient kmClient, CancellationToken token) =>
+                                                                          MemoryWebClient kmClient,
+                                                                          DPS.API.DocumentImportQueue importQueue,
+                                                                          CancellationToken token) =>
             {
                 ctx.Response.Headers.Append(HeaderNames.ContentType, "text/event-stream");
 
                 //Creating While Loop with 10 mins timeout
                 var timeout = DateTime.UtcNow.AddMinutes(10);
-                var status = await kmClient.GetDocumentStatusAsync(documentId);
 
                 while (DateTime.UtcNow < timeout)
                 {
                     token.ThrowIfCancellationRequested();
 
+                    // Post-processing progress of the documents imported in background mode
+                    var importProgress = await importQueue.GetProgressAsync(documentId, token);
+                    var status = await kmClient.GetDocumentStatusAsync(documentId, cancellationToken: token);
+
                     //if status is null then return 404 with exit the loop
-                    if (status == null)
+                    if (status == null && importProgress == null)
                     {
                         ctx.Response.StatusCode = 404;
                         return;
                     }
 
-                    if (status.RemainingSteps.Count == 0)
-                    {
-                        break;
-                    }
-                    var totalSteps = status.Steps.Count;
+                    // Ingestion steps count for 90% of the progress, keywords/summary/registration for the rest
+                    var ingested = status == null || status.Steps.Count == 0 ? 0.0 : (double)status.CompletedSteps.Count / status.Steps.Count;
+                    var state = importProgress?.State ?? (status!.Completed ? DocumentImportState.Completed : DocumentImportState.Ingesting);
+                    var completed = state is DocumentImportState.Completed or DocumentImportState.Failed;
                     var statusObject = new
                     {
-                        progress_percentage = status.CompletedSteps.Count / totalSteps * 100,
-                        completed = status.Completed
+                        progress_percentage = state == DocumentImportState.Completed ? 100 : (int)(ingested * 90),
+                        completed = completed,
+                        state = state.ToString(),
+                        error = importProgress?.Error
                     };
 
                     await ctx.Response.WriteAsync($"{JsonSerializer.Serialize(statusObject)}", cancellationToken: token);
                     await ctx.Response.Body.FlushAsync(token);
 
-                    await Task.Delay(new TimeSpan(0, 0, 5));
+                    if (completed)
+                    {
+                        break;
+                    }
 
-                    status = await kmClient.GetDocumentStatusAsync(documentId);
+                    await Task.Delay(new TimeSpan(0, 0, 5), token);
                 }
 
                 await ctx.Response.CompleteAsync();
@@ -96,7 +96,8 @@ namespace Microsoft.GS.DPSHost.API
                                                                      pagingRequestWithSearch.Keyword,
                                                                      pagingRequestWithSearch.Tags,
                                                                      pagingRequestWithSearch.StartDate,
-                                                                     pagingRequestWithSearch.EndDate);
+                                                                     pagingRequestWithSearch.EndDate,
+                                                                     pagingRequestWithSearch.ContinuationToken);
                 return Results.Ok<DocumentQuerySet>(querySet);
             })
             .DisableAntiforgery(); ;
@@ -42,6 +42,8 @@
                 {
                     public ChatHistoryConfig ChatHistory { get; set; }
                     public DocumentStorageConfig DocumentManager { get; set; }
+                    // Optional, defaults to the DocumentImports collection of the DocumentManager database
+                    public DocumentStorageConfig? DocumentImports { get; set; }
 
                     public class ChatHistoryConfig
                     {
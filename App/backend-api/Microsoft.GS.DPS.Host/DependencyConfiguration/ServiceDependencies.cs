@@ -24,6 +24,8 @@ namespace Microsoft.GS.DPSHost.ServiceConfiguration
                 .AddValidatorsFromAssemblyContaining<PagingRequestValidator>()
                 .AddSingleton<TelemetryHelper>()
                 .AddSingleton<Microsoft.GS.DPS.API.KernelMemory>()
+                .AddSingleton<Microsoft.GS.DPS.API.DocumentImportQueue>()
+                .AddHostedService<DocumentImportWorker>()
                 .AddSingleton<Microsoft.GS.DPS.API.ChatHost>()
                 .AddSingleton<Microsoft.GS.DPS.API.UserInterface.Documents>()
                 .AddSingleton<Microsoft.GS.DPS.API.UserInterface.DataCacheManager>()
@@ -43,7 +45,8 @@ namespace Microsoft.GS.DPSHost.ServiceConfiguration
                     return new ChatSessionRepository(
                                                 new MongoClient(services.PersistentStorage.CosmosMongo.ConnectionString ?? "")
                                                                         .GetDatabase(services.PersistentStorage.CosmosMongo.Collections.ChatHistory.Database ?? ""),
-                                                                                        collectionName: services.PersistentStorage.CosmosMongo.Collections.ChatHistory.Collection ?? ""
+                                                                                        collectionName: services.PersistentStorage.CosmosMongo.Collections.ChatHistory.Collection ?? "",
+                                                                                        logger: x.GetService<ILogger<ChatSessionRepository>>()
 
                                                    );
                 })
@@ -57,6 +60,16 @@ namespace Microsoft.GS.DPSHost.ServiceConfiguration
                                                    );
 
 
+                })
+                .AddSingleton<DocumentImportRepository>(x =>
+                {
+                    var services = x.GetRequiredService<IOptions<Services>>().Value;
+                    var collections = services.PersistentStorage.CosmosMongo.Collections;
+                    return new DocumentImportRepository(
+                                                new MongoClient(services.PersistentStorage.CosmosMongo.ConnectionString ?? "")
+                                                                        .GetDatabase(collections.DocumentImports?.Database ?? collections.DocumentManager.Database ?? ""),
+                                                                                    collectionName: collections.DocumentImports?.Collection ?? "DocumentImports"
+                                                   );
                 })
                 .AddSingleton<MemoryWebClient>(x =>
                 {
@@ -64,6 +77,11 @@ namespace Microsoft.GS.DPSHost.ServiceConfiguration
                     return new MemoryWebClient(endpoint: services.KernelMemory.Endpoint ?? "", new HttpClient() { Timeout = new TimeSpan(0, 60, 0) });
 
                 })
+                .AddSingleton<PipelineStatusClient>(x =>
+                {
+                    var services = x.GetRequiredService<IOptions<Services>>().Value;
+                    return new PipelineStatusClient(endpoint: services.KernelMemory.Endpoint ?? "", new HttpClient() { Timeout = new TimeSpan(0, 5, 0) });
+                })
                 .AddSingleton<TagUpdater>(x =>
                 {
                     var services = x.GetRequiredService<IOptions<Services>>().Value;
@@ -0,0 +1,174 @@
+using Microsoft.GS.DPS.API;
+using Microsoft.GS.DPS.Model.KernelMemory;
+
+namespace Microsoft.GS.DPSHost.Helpers
+{
+    /// <summary>
+    /// Background worker completing the documents accepted by the asynchronous import API
+    /// </summary>
+    public class DocumentImportWorker : BackgroundService
+    {
+        // Max number of documents post-processed at the same time
+        private const int MaxConcurrentImports = 4;
+
+        // How often the leases of the imports are renewed, and the abandoned imports resumed
+        private static readonly TimeSpan s_leaseRenewalInterval = DocumentImportQueue.LeaseDuration / 5;
+
+        private readonly DocumentImportQueue _importQueue;
+        private readonly DPS.API.KernelMemory _kernelMemory;
+        private readonly TelemetryHelper _telemetryHelper;
+        private readonly ILogger<DocumentImportWorker> _logger;
+
+        /// <summary>
+        /// Create a new worker consuming the document import queue
+        /// </summary>
+        /// <param name="importQueue">Queue of the uploaded documents</param>
+        /// <param name="kernelMemory">Kernel Memory API used to complete the import</param>
+        /// <param name="telemetryHelper">Telemetry helper</param>
+        /// <param name="logger">Application logger</param>
+        public DocumentImportWorker(DocumentImportQueue importQueue,
+                                    DPS.API.KernelMemory kernelMemory,
+                                    TelemetryHelper telemetryHelper,
+                                    ILogger<DocumentImportWorker> logger)
+        {
+            _importQueue = importQueue;
+            _kernelMemory = kernelMemory;
+            _telemetryHelper = telemetryHelper;
+            _logger = logger;
+        }
+
+        /// <inheritdoc />
+        protected override async Task ExecuteAsync(CancellationToken stoppingToken)
+        {
+            using var slots = new SemaphoreSlim(MaxConcurrentImports);
+            var running = new List<Task>();
+
+            // Resume the imports accepted before the host restarted or abandoned by other instances,
+            // while consuming the queue since it is bounded
+            var maintenance = MaintainLeasesAsync(stoppingToken);
+
+            try
+            {
+                await foreach (var job in _importQueue.ReadAllAsync(stoppingToken))
+                {
+                    await slots.WaitAsync(stoppingToken);
+                    running.RemoveAll(t => t.IsCompleted);
+                    running.Add(Task.Run(async () =>
+                    {
+                        try
+                        {
+                            await ImportAsync(job, stoppingToken);
+                        }
+                        finally
+                        {
+                            slots.Release();
+                        }
+                    }, CancellationToken.None));
+                }
+            }
+            catch (OperationCanceledException) when (stoppingToken.IsCancellationRequested)
+            {
+                // Host shutting down
+            }
+
+            await Task.WhenAll(running);
+            await maintenance;
+        }
+
+        private async Task MaintainLeasesAsync(CancellationToken cancellationToken)
+        {
+            using var timer = new PeriodicTimer(s_leaseRenewalInterval);
+            try
+            {
+                do
+                {
+                    await RenewAndRecoverAsync(cancellationToken);
+                }
+                while (await timer.WaitForNextTickAsync(cancellationToken));
+            }
+            catch (OperationCanceledException) when (cancellationToken.IsCancellationRequested)
+            {
+                // Host shutting down
+            }
+        }
+
+        private async Task RenewAndRecoverAsync(CancellationToken cancellationToken)
+        {
+            try
+            {
+                await _importQueue.RenewLeasesAsync(cancellationToken);
+
+                var recovered = await _importQueue.RecoverAsync(cancellationToken);
+                if (recovered > 0)
+                {
+                    _logger.LogInformation("Resuming {Count} unfinished document imports", recovered);
+                }
+            }
+            catch (OperationCanceledException) when (cancellationToken.IsCancellationRequested)
+            {
+                throw;
+            }
+            #pragma warning disable CA1031 // Must catch all to log and keep the worker alive
+            catch (Exception ex)
+            {
+                _logger.LogError(ex, "Failed to renew or resume the unfinished document imports");
+            }
+            #pragma warning restore CA1031
+        }
+
+        private async Task ImportAsync(DocumentImportJob job, CancellationToken cancellationToken)
+        {
+            _logger.LogInformation("Document post-processing started. DocumentId: {DocumentId}, FileName: {FileName}",
+                job.DocumentId, job.FileName);
+
+            try
+            {
+                var result = await _kernelMemory.CompleteImportDocument(job, cancellationToken);
+                var duration = (DateTime.Now - job.StartTime).TotalSeconds;
+
+                _logger.LogInformation("Document post-processing completed. Duration: {Duration}s, DocumentId: {DocumentId}, FileName: {FileName}",
+                    duration.ToString("F2"), job.DocumentId, job.FileName);
+
+                _telemetryHelper.TrackEvent("DocumentImportSuccess", new Dictionary<string, string>
+                {
+                    { "endpoint", "/Documents/ImportDocument" },
+                    { "documentId", result.DocumentId },
+                    { "fileName", job.FileName },
+                    { "mimeType", result.MimeType ?? "unknown" },
+                    { "mode", "background" },
+                    { "duration", duration.ToString("F2") }
+                }, new Dictionary<string, double>
+                {
+                    { "ProcessingTimeSeconds", duration }
+                });
+            }
+            catch (OperationCanceledException) when (cancellationToken.IsCancellationRequested)
+            {
+                _logger.LogWarning("Document post-processing interrupted by shutdown. DocumentId: {DocumentId}", job.DocumentId);
+            }
+            #pragma warning disable CA1031 // Must catch all to log and keep the worker alive
+            catch (Exception ex)
+            {
+                _logger.LogError(ex, "DOCUMENT IMPORT FAILED: Post-processing error. DocumentId: {DocumentId}, FileName: {FileName}, ErrorType: {ErrorType}, Message: {ErrorMessage}",
+                    job.DocumentId, job.FileName, ex.GetType().Name, ex.Message);
+
+                _telemetryHelper.TrackEvent("DocumentImportFailed", new Dictionary<string, string>
+                {
+                    { "endpoint", "/Documents/ImportDocument" },
+                    { "documentId", job.DocumentId },
+                    { "fileName", job.FileName },
+                    { "mode", "background" },
+                    { "errorType", ex.GetType().Name },
+                    { "errorMessage", ex.Message }
+                });
+                _telemetryHelper.TrackException(ex, new Dictionary<string, string>
+                {
+                    { "endpoint", "/Documents/ImportDocument" },
+                    { "documentId", job.DocumentId },
+                    { "errorType", ex.GetType().Name }
+                });
+            }
+            #pragma warning restore CA1031
+        }
+    }
+}
@@ -0,0 +1,118 @@
+using Microsoft.GS.DPS.Storage.ChatSessions;
+using Microsoft.GS.DPS.Storage.ChatSessions.Entities;
+using Xunit;
+
+namespace Microsoft.GS.DPS.Tests.Storage.ChatSessions
+{
+    public class ChatSessionCacheTests
+    {
+        [Fact]
+        public void ItReturnsTheLastMessagesOfACachedSession()
+        {
+            var cache = new ChatSessionCache(capacity: 10, timeToLive: TimeSpan.FromMinutes(1));
+            cache.Set(CreateSession("s1", 5), windowSize: 5, readVersion: cache.Version);
+
+            Assert.True(cache.TryGet("s1", 3, out var session));
+            Assert.Equal(new[] { "m2", "m3", "m4" }, session!.Messages!.Select(x => x.Content));
+
+            //Larger windows than the cached one must be read from the storage
+            Assert.False(cache.TryGet("s1", 6, out _));
+        }
+
+        [Fact]
+        public void ItRemovesInvalidatedSessions()
+        {
+            var cache = new ChatSessionCache(capacity: 10, timeToLive: TimeSpan.FromMinutes(1));
+            cache.Set(CreateSession("s1", 3), windowSize: 3, readVersion: cache.Version);
+
+            cache.Invalidate("s1");
+
+            Assert.False(cache.TryGet("s1", 3, out _));
+        }
+
+        [Fact]
+        public void ItDoesNotCacheSessionsReadBeforeAnAppend()
+        {
+            var cache = new ChatSessionCache(capacity: 10, timeToLive: TimeSpan.FromMinutes(1));
+
+            //The session is read from the storage while messages are appended
+            var readVersion = cache.Version;
+            cache.Invalidate("s1");
+            cache.Set(CreateSession("s1", 3), windowSize: 3, readVersion: readVersion);
+
+            Assert.False(cache.TryGet("s1", 3, out _));
+
+            //Read again after the append
+            cache.Set(CreateSession("s1", 6), windowSize: 6, readVersion: cache.Version);
+            Assert.True(cache.TryGet("s1", 6, out var session));
+            Assert.Equal(6, session!.Messages!.Count);
+        }
+
+        [Fact]
+        public void ItOnlyIgnoresTheSessionsAppendedDuringTheRead()
+        {
+            var cache = new ChatSessionCache(capacity: 10, timeToLive: TimeSpan.FromMinutes(1));
+
+            var readVersion = cache.Version;
+            cache.Invalidate("s2");
+            cache.Set(CreateSession("s1", 3), windowSize: 3, readVersion: readVersion);
+
+            Assert.True(cache.TryGet("s1", 3, out _));
+        }
+
+        [Fact]
+        public void ItDoesNotCacheOldReadsOnceInvalidationsAreForgotten()
+        {
+            var cache = new ChatSessionCache(capacity: 2, timeToLive: TimeSpan.FromMinutes(1));
+
+            var readVersion = cache.Version;
+            cache.Invalidate("s1");
+            cache.Invalidate("s2");
+            //Past the capacity: the invalidation of s1 is forgotten
+            cache.Invalidate("s3");
+            cache.Set(CreateSession("s1", 3), windowSize: 3, readVersion: readVersion);
+
+            Assert.False(cache.TryGet("s1", 3, out _));
+        }
+
+        [Fact]
+        public void ItKeepsTheRevisionOfCachedSessions()
+        {
+            var cache = new ChatSessionCache(capacity: 10, timeToLive: TimeSpan.FromMinutes(1));
+            var stored = CreateSession("s1", 3);
+            stored.Revision = 7;
+            cache.Set(stored, windowSize: 3, readVersion: cache.Version);
+
+            //The revision is compared with the stored one before the cached session is used
+            Assert.True(cache.TryGet("s1", 3, out var session));
+            Assert.Equal(7, session!.Revision);
+        }
+
+        [Fact]
+        public void ItEvictsTheLeastRecentlyUsedSession()
+        {
+            var cache = new ChatSessionCache(capacity: 2, timeToLive: TimeSpan.FromMinutes(1));
+            cache.Set(CreateSession("s1", 1), windowSize: 1, readVersion: cache.Version);
+            cache.Set(CreateSession("s2", 1), windowSize: 1, readVersion: cache.Version);
+            Assert.True(cache.TryGet("s1", 1, out _));
+
+            cache.Set(CreateSession("s3", 1), windowSize: 1, readVersion: cache.Version);
+
+            Assert.True(cache.TryGet("s1", 1, out _));
+            Assert.False(cache.TryGet("s2", 1, out _));
+            Assert.True(cache.TryGet("s3", 1, out _));
+        }
+
+        private static ChatSession CreateSession(string sessionId, int messageCount)
+        {
+            return new ChatSession
+            {
+                SessionId = sessionId,
+                StartTime = DateTime.UtcNow,
+                Messages = Enumerable.Range(0, messageCount)
+                                     .Select(i => new ChatSessionMessage { Role = "user", Content = $"m{i}", CreatedTime = DateTime.UtcNow })
+                                     .ToList()
+            };
+        }
+    }
+}
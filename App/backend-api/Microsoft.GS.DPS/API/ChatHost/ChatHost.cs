@@ -15,6 +15,7 @@ using System.Text.Json;
 using System.Runtime.CompilerServices;
 using System.Text.Json.Serialization;
 using Microsoft.KernelMemory.Context;
+using Microsoft.Extensions.Logging;
 
 namespace Microsoft.GS.DPS.API
 {
@@ -26,20 +27,36 @@ namespace Microsoft.GS.DPS.API
         };
     }
 
-    public class ChatHost(MemoryWebClient kmClient, Kernel kernel, API.KernelMemory kernelMemory, ChatSessionRepository chatSessions)
+    public class ChatHost(MemoryWebClient kmClient, Kernel kernel, API.KernelMemory kernelMemory, ChatSessionRepository chatSessions, ILogger<ChatHost> logger)
     {
         private readonly MemoryWebClient _kmClient = kmClient;
         private readonly Kernel _kernel = kernel;
         private readonly API.KernelMemory _kernelMemory = kernelMemory;
         private readonly IChatCompletionService _chatCompletionService = kernel.GetRequiredService<IChatCompletionService>();
         private readonly ChatSessionRepository _chatSessions = chatSessions;
+        private readonly ILogger<ChatHost> _logger = logger;
         private static readonly string s_systemPrompt;
         private static readonly string s_assistancePrompt;
         private static readonly string s_additionalPrompt;
+        private const string ContentFilterResponse = "Sorry, your request couldn't be processed as it may contain sensitive or restricted content. Please rephrase your query and try again.";
+        private const string ErrorResponse = "An error occurred while processing request, try again";
 
 
-        ChatHistory chatHistory = null;
-        ChatSession chatSession = null;
+        //Messages sent to the model with each question : the last 3 turns (question, retrieved content and answer)
+        private const int HistoryMessageCount = 9;
+        //Messages kept in the storage per session
+        private const int MaxStoredMessageCount = 300;
+
+        //State of one chat request. ChatHost is a singleton shared by all the requests,
+        //so everything about the request being answered lives here and not in fields.
+        private sealed class ChatTurn
+        {
+            public required ChatSession Session { get; init; }
+            public required ChatHistory History { get; init; }
+            public required MemoryAnswer Answer { get; init; }
+            //Messages of a legacy session, stored in ChatHistoryJson, moved to the message store with this turn
+            public required IReadOnlyList<ChatMessageContent>? LegacyMessages { get; init; }
+        }
 
         //static constructor to load the system prompt text at once
         static ChatHost()
@@ -71,15 +88,10 @@ namespace Microsoft.GS.DPS.API
 
         }
 
-        private async Task<ChatSession> makeNewSession(string? chatSessionId)
+        private static ChatSession makeNewSession(string? chatSessionId)
         {
             var sessionId = string.IsNullOrEmpty(chatSessionId) ? Guid.NewGuid().ToString() : chatSessionId;
 
-            //Create New Chat History
-            this.chatHistory = new ChatHistory();
-            //Add the system prompt to the chat history
-            this.chatHistory.AddSystemMessage(ChatHost.s_systemPrompt);
-
             //Create a new ChatSession Entity for Saving into Azure Cosmos
             return new ChatSession()
             {
@@ -90,42 +102,187 @@ namespace Microsoft.GS.DPS.API
         }
 
 
-        private async IAsyncEnumerable<string> GetAnswerWords(string answer)
+        public async Task<ChatResponseAsync> ChatAsync(ChatRequest chatRequest, CancellationToken cancellationToken = default)
         {
-            var words = answer.Split(' ');
-            foreach (var word in words)
+            var turn = await PrepareChatTurn(chatRequest);
+
+            var chatResponse = new ChatResponseAsync()
             {
-                yield return word;
-                await Task.Delay(30);
-            }
+                ChatSessionId = turn.Session.SessionId,
+                DocumentIds = chatRequest.DocumentIds
+            };
+            //Answer, SuggestingQuestions and Keywords are set once the answer has been streamed
+            chatResponse.AnswerWords = StreamAnswer(chatResponse, turn, cancellationToken);
+
+            return chatResponse;
         }
 
-        public async Task<ChatResponseAsync> ChatAsync(ChatRequest chatRequest)
+        public async Task<ChatResponse> Chat(ChatRequest chatRequest)
         {
-            var chatResponse = await Chat(chatRequest);
-            return new ChatResponseAsync()
+            var turn = await PrepareChatTurn(chatRequest);
+
+            ChatMessageContent returnedChatMessageContent;
+            try
+            {
+
+                //Get Response from ChatCompletionService
+                returnedChatMessageContent = await _chatCompletionService.GetChatMessageContentAsync(turn.History, CreateExecutionSettings());
+            }
+            catch (HttpOperationException ex) when (ex.Message.Contains("content_filter", StringComparison.OrdinalIgnoreCase))
             {
-                ChatSessionId = chatResponse.ChatSessionId,
-                AnswerWords = GetAnswerWords(chatResponse.Answer),
-                Answer = chatResponse.Answer,
-                DocumentIds = chatResponse.DocumentIds,
-                SuggestingQuestions = chatResponse.SuggestingQuestions
+                _logger.LogWarning(ex, "Chat completion blocked by the content filter");
+
+                //if content filter triggered providing fallback response
+                returnedChatMessageContent = new ChatMessageContent
+                {
+                    Content = ContentFilterResponse
+                };
+            }
+            #pragma warning disable CA1031 // Top-level chat-completion safety net: convert any failure to a user-facing fallback response
+            catch(Exception ex)
+            {
+                _logger.LogError(ex, "Chat completion failed");
+
+                returnedChatMessageContent = new ChatMessageContent
+                {
+                    Content = ErrorResponse
+                };
+            }
+            #pragma warning restore CA1031
+            if (returnedChatMessageContent == null)
+            {
+                returnedChatMessageContent = new ChatMessageContent
+                {
+                    Content = "No response"
+                };
+            }
+
+            var (content, answerObject) = ParseAnswer(returnedChatMessageContent.Content);
+
+            await SaveChatHistory(turn, content);
+
+            return new ChatResponse()
+            {
+                ChatSessionId = turn.Session.SessionId,
+                Answer = answerObject.Response,
+                DocumentIds = chatRequest.DocumentIds,
+                SuggestingQuestions = answerObject.Followings,
+                Keywords = answerObject.Keywords
             };
         }
 
-        public async Task<ChatResponse> Chat(ChatRequest chatRequest)
+        //Stream the response text as soon as the chat model produces it
+        private async IAsyncEnumerable<string> StreamAnswer(ChatResponseAsync chatResponse,
+                                                            ChatTurn turn,
+                                                            [EnumeratorCancellation] CancellationToken cancellationToken)
+        {
+            var content = new StringBuilder();
+            var streamed = new StringBuilder();
+            var responseReader = new StreamingJsonFieldReader(nameof(Answer.Response));
+            string? fallback = null;
+
+            var stream = _chatCompletionService.GetStreamingChatMessageContentsAsync(turn.History, CreateExecutionSettings(), cancellationToken: cancellationToken)
+                                               .GetAsyncEnumerator(cancellationToken);
+            try
+            {
+                while (true)
+                {
+                    string? chunk;
+                    try
+                    {
+                        if (!await stream.MoveNextAsync()) break;
+                        chunk = stream.Current.Content;
+                    }
+                    catch (HttpOperationException ex) when (ex.Message.Contains("content_filter", StringComparison.OrdinalIgnoreCase))
+                    {
+                        _logger.LogWarning(ex, "Chat completion blocked by the content filter");
+                        fallback = ContentFilterResponse;
+                        break;
+                    }
+                    #pragma warning disable CA1031 // Top-level chat-completion safety net: convert any failure to a user-facing fallback response
+                    catch (Exception ex) when (ex is not OperationCanceledException)
+                    {
+                        _logger.LogError(ex, "Chat completion failed");
+                        fallback = ErrorResponse;
+                        break;
+                    }
+                    #pragma warning restore CA1031
+
+                    if (string.IsNullOrEmpty(chunk)) continue;
+
+                    content.Append(chunk);
+                    var text = responseReader.Append(chunk);
+                    if (text.Length > 0)
+                    {
+                        streamed.Append(text);
+                        yield return text;
+                    }
+                }
+            }
+            finally
+            {
+                await stream.DisposeAsync();
+            }
+
+            if (fallback != null)
+            {
+                content.Clear().Append(fallback);
+            }
+
+            var (finalContent, answerObject) = ParseAnswer(content.Length > 0 ? content.ToString() : "No response");
+
+            //Nothing streamed yet, e.g. the model didn't answer with the JSON format: stream the whole answer
+            if (streamed.Length == 0 && !string.IsNullOrEmpty(answerObject.Response))
+            {
+                streamed.Append(answerObject.Response);
+                yield return answerObject.Response;
+            }
+
+            //The final answer differs from the streamed text, e.g. after an error or when the answer is
+            //replaced by the "not enough information" message, so the client must replace what it shows
+            chatResponse.AnswerReplaced = !string.Equals(streamed.ToString(), answerObject.Response ?? string.Empty, StringComparison.Ordinal);
+
+            await SaveChatHistory(turn, finalContent);
+
+            chatResponse.Answer = answerObject.Response;
+            chatResponse.SuggestingQuestions = answerObject.Followings;
+            chatResponse.Keywords = answerObject.Keywords;
+        }
+
+        //Load the chat session, retrieve the content from Kernel Memory and add the question to the chat history
+        private async Task<ChatTurn> PrepareChatTurn(ChatRequest chatRequest)
         {
-            this.chatSession = await _chatSessions.GetSessionAsync(chatRequest.ChatSessionId);
+            //Only the last messages needed for the history window are loaded from the storage
+            var chatSession = await _chatSessions.GetSessionAsync(chatRequest.ChatSessionId, HistoryMessageCount);
             //just in case there is no chatSession in persistant storage
             //create a new chatSession
-            if (this.chatSession == null) this.chatSession = await makeNewSession(chatRequest.ChatSessionId);
+            if (chatSession == null) chatSession = makeNewSession(chatRequest.ChatSessionId);
 
-            //Rehydrate the ChatHistory from the ChatSession.ChatHistoryJson Field.
-            //Due to BSON Deserializer issue, we are using JSON Deserializer
-            if (this.chatSession != null && !String.IsNullOrEmpty(this.chatSession.ChatHistoryJson))
+            //Rehydrate the ChatHistory from the stored messages
+            var chatHistory = new ChatHistory();
+            chatHistory.AddSystemMessage(ChatHost.s_systemPrompt);
+
+            IReadOnlyList<ChatMessageContent>? legacyMessages = null;
+            if (chatSession.Messages != null && chatSession.Messages.Count > 0)
+            {
+                foreach (var message in chatSession.Messages)
+                {
+                    chatHistory.AddMessage(new AuthorRole(message.Role), message.Content);
+                }
+            }
+            else if (!String.IsNullOrEmpty(chatSession.ChatHistoryJson))
             {
+                //Sessions saved before the message store keep the whole ChatHistory in ChatHistoryJson.
+                //Due to BSON Deserializer issue, we are using JSON Deserializer
+                //All the messages but the system prompt are migrated, only the last ones go in the prompt.
                 ChatHistory deserializedChatHistory = JsonSerializer.Deserialize<ChatHistory>(chatSession.ChatHistoryJson);
-                this.chatHistory = deserializedChatHistory;
+                legacyMessages = deserializedChatHistory.Skip(1).ToList();
+
+                //The window starts at a user message, so it never starts in the middle of a turn.
+                foreach (var message in legacyMessages.TakeLast(HistoryMessageCount).SkipWhile(x => x.Role != AuthorRole.User))
+                {
+                    chatHistory.AddMessage(message.Role, message.Content ?? string.Empty);
+                }
             }
 
             if (chatRequest.DocumentIds == null) chatRequest.DocumentIds = Array.Empty<string>();
@@ -156,69 +313,43 @@ namespace Microsoft.GS.DPS.API
 
             //UpdateAsync System Prompt with the answer
             //replace {$answer} place holder in s_systemPrompt with the actual answer
-            this.chatHistory[0].Content = s_systemPrompt.Replace("{$answer}", answer.Result);
-            this.chatHistory[0].Role = AuthorRole.System;
+            chatHistory[0].Content = s_systemPrompt.Replace("{$answer}", answer.Result);
+            chatHistory[0].Role = AuthorRole.System;
 
 
             //Add User Message to the Chat History
-            this.chatHistory.AddUserMessage("Currently Selected Documents are as below: \n" + string.Join("\n", answer.RelevantSources.Select(x => x.SourceName)) + "\n" + chatRequest.Question + ChatHost.s_additionalPrompt);
+            chatHistory.AddUserMessage("Currently Selected Documents are as below: \n" + string.Join("\n", answer.RelevantSources.Select(x => x.SourceName)) + "\n" + chatRequest.Question + ChatHost.s_additionalPrompt);
 
-            ////Check History Rows and remove the oldest row if it exceeds max history count
-            var historyCount = 10;
-            // System prompt and first assistant prompt will be always there
-            if (this.chatHistory.Count > historyCount + 2)
+            return new ChatTurn
             {
-                //Remove the oldest rows - Question and Answer
-                this.chatHistory.RemoveRange(2, this.chatHistory.Count - (historyCount));
-            }
+                Session = chatSession,
+                History = chatHistory,
+                Answer = answer,
+                LegacyMessages = legacyMessages
+            };
+        }
 
+        private static PromptExecutionSettings CreateExecutionSettings()
+        {
             //UpdateAsync PromptExecutionSettings with model-specific settings
             // Note: Temperature is not set here to avoid compatibility issues with GPT-5 which requires Temperature=1.0 (default)
-            var executionSettings = new PromptExecutionSettings()
+            return new PromptExecutionSettings()
             {
                 ExtensionData = new Dictionary<string, object>
                                         {
                                             { "MaxTokens", 16384  }
                                         }
             };
+        }
 
-            ChatMessageContent returnedChatMessageContent;
-            try
+        //Parse the JSON answer of the chat model, falling back to the raw content
+        private static (string Content, Answer Answer) ParseAnswer(string? content)
+        {
+            var returnedChatMessageContent = new ChatMessageContent
             {
+                Content = content
+            };
 
-                //Get Response from ChatCompletionService
-                returnedChatMessageContent = await _chatCompletionService.GetChatMessageContentAsync(chatHistory, executionSettings);
-            }
-            catch (HttpOperationException ex) when (ex.Message.Contains("content_filter", StringComparison.OrdinalIgnoreCase))
-            {
-                
-                Console.WriteLine($"Exception Message: {ex.Message}");
-                
-                //if content filter triggered providing fallback response
-                returnedChatMessageContent = new ChatMessageContent
-                {
-                    Content = "Sorry, your request couldn't be processed as it may contain sensitive or restricted content. Please rephrase your query and try again."
-                };
-            }
-            #pragma warning disable CA1031 // Top-level chat-completion safety net: convert any failure to a user-facing fallback response
-            catch(Exception ex)
-            {
-                Console.WriteLine($"unexpected error: {ex.Message}");
-             
-                    returnedChatMessageContent = new ChatMessageContent
-                    {
-                        Content = "An error occurred while processing request, try again"
-                    };
-                
-            }
-            #pragma warning restore CA1031
-            if (returnedChatMessageContent == null)
-            {
-                returnedChatMessageContent = new ChatMessageContent
-                {
-                    Content = "No response"
-                };
-            }
             //Just in case returnedChatMessageContent.Content has ```json ``` block, Strip it first
             if (returnedChatMessageContent.Content != null && returnedChatMessageContent.Content.Contains("```json", StringComparison.OrdinalIgnoreCase))
                 returnedChatMessageContent.Content = returnedChatMessageContent.Content.Replace("```json", "").Replace("```", "");
@@ -258,30 +389,31 @@ namespace Microsoft.GS.DPS.API
                 answerObject.Response = "I don't have enough information to provide an answer. Would you please rephrase your question and ask me again?";
             }
 
+            return (returnedChatMessageContent.Content, answerObject);
+        }
 
+        private async Task SaveChatHistory(ChatTurn turn, string content)
+        {
             //Add Assistant Message and Data to the Chat History
-            this.chatHistory.AddAssistantMessage($"this is the content for creating answer :\n{answer.Result}");
-            this.chatHistory.AddAssistantMessage(returnedChatMessageContent.Content);
-            
-
-            //UpdateAsync last message updated Time
-            this.chatSession.EndTime = DateTime.UtcNow;
-
-            //Hydrate Chathistory back to ChatSession.ChatHistoryJson Field
-            this.chatSession.ChatHistoryJson = JsonSerializer.Serialize<ChatHistory>(chatHistory);
-
-            //UpdateAsync ChatSession Entity
-            await _chatSessions.UpdateSessionAsync(this.chatSession);
-
-
-            return new ChatResponse()
-            {
-                ChatSessionId = this.chatSession.SessionId,
-                Answer = answerObject.Response,
-                DocumentIds = chatRequest.DocumentIds,
-                SuggestingQuestions = answerObject.Followings,
-                Keywords = answerObject.Keywords
-            };
+            turn.History.AddAssistantMessage($"this is the content for creating answer :\n{turn.Answer.Result}");
+            turn.History.AddAssistantMessage(content);
+
+            //Only the new turn (question, retrieved content and answer) is appended to the session.
+            //Legacy sessions move all their messages to the message store on their first new turn,
+            //the repository keeps the last MaxStoredMessageCount.
+            var newMessages = turn.History.TakeLast(3);
+            if (turn.LegacyMessages != null) newMessages = turn.LegacyMessages.Concat(newMessages);
+            var now = DateTime.UtcNow;
+
+            await _chatSessions.AppendMessagesAsync(turn.Session.SessionId,
+                                                    newMessages.Select(x => new ChatSessionMessage
+                                                    {
+                                                        Role = x.Role.Label,
+                                                        Content = x.Content ?? string.Empty,
+                                                        CreatedTime = now
+                                                    }).ToList(),
+                                                    MaxStoredMessageCount,
+                                                    clearChatHistoryJson: turn.LegacyMessages != null);
         }
     }
-}
\ No newline at end of file
+}
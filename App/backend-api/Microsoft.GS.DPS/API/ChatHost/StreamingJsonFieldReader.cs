@@ -0,0 +1,113 @@
+using System;
+using System.Globalization;
+using System.Text;
+using System.Text.RegularExpressions;
+
+namespace Microsoft.GS.DPS.API
+{
+    //Extract the value of one string field from a JSON object while it is being streamed.
+    //The chat model answers with {"response": "...", "followings": [...]}, only the response text is streamed to the client.
+    internal sealed class StreamingJsonFieldReader
+    {
+        private enum State
+        {
+            SearchingField,
+            ReadingValue,
+            Completed
+        }
+
+        private readonly Regex _fieldStart;
+        private readonly StringBuilder _buffer = new StringBuilder();
+        private State _state = State.SearchingField;
+        private int _position;
+        private char? _pendingHighSurrogate;
+
+        public StreamingJsonFieldReader(string fieldName)
+        {
+            _fieldStart = new Regex($"\"{Regex.Escape(fieldName)}\"\\s*:\\s*\"", RegexOptions.IgnoreCase | RegexOptions.CultureInvariant);
+        }
+
+        // True once the field has been found, even if its value is still being read
+        public bool FieldFound => _state != State.SearchingField;
+
+        // Add the next chunk of the JSON text, and return the part of the field value decoded so far
+        public string Append(string chunk)
+        {
+            _buffer.Append(chunk);
+
+            if (_state == State.SearchingField)
+            {
+                var match = _fieldStart.Match(_buffer.ToString());
+                if (!match.Success) return string.Empty;
+
+                _state = State.ReadingValue;
+                _position = match.Index + match.Length;
+            }
+
+            return _state == State.ReadingValue ? ReadValue() : string.Empty;
+        }
+
+        private string ReadValue()
+        {
+            var text = new StringBuilder();
+            if (_pendingHighSurrogate.HasValue)
+            {
+                text.Append(_pendingHighSurrogate.Value);
+                _pendingHighSurrogate = null;
+            }
+
+            while (_position < _buffer.Length)
+            {
+                var c = _buffer[_position];
+
+                if (c == '"')
+                {
+                    _state = State.Completed;
+                    break;
+                }
+
+                if (c != '\\')
+                {
+                    text.Append(c);
+                    _position++;
+                    continue;
+                }
+
+                // Wait for the rest of the escape sequence
+                if (_position + 1 >= _buffer.Length) break;
+
+                var escaped = _buffer[_position + 1];
+                if (escaped == 'u')
+                {
+                    if (_position + 6 > _buffer.Length) break;
+
+                    var hex = _buffer.ToString(_position + 2, 4);
+                    if (!int.TryParse(hex, NumberStyles.HexNumber, CultureInfo.InvariantCulture, out var code)) code = '?';
+                    text.Append((char)code);
+                    _position += 6;
+                    continue;
+                }
+
+                text.Append(escaped switch
+                {
+                    'n' => '\n',
+                    'r' => '\r',
+                    't' => '\t',
+                    'b' => '\b',
+                    'f' => '\f',
+                    _ => escaped
+                });
+                _position += 2;
+            }
+
+            // Don't split a surrogate pair across two chunks
+            if (text.Length > 0 && char.IsHighSurrogate(text[^1]))
+            {
+                _pendingHighSurrogate = text[^1];
+                text.Length--;
+            }
+
+            return text.ToString();
+        }
+    }
+}
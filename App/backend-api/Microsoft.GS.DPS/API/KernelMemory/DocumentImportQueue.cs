@@ -0,0 +1,149 @@
+using Microsoft.GS.DPS.Model.KernelMemory;
+using Microsoft.GS.DPS.Storage.Document;
+using System;
+using System.Collections.Concurrent;
+using System.Collections.Generic;
+using System.Linq;
+using System.Threading;
+using System.Threading.Channels;
+using System.Threading.Tasks;
+
+namespace Microsoft.GS.DPS.API
+{
+    //Queue of uploaded documents waiting for post-processing (keywords, summary, registration).
+    //Documents are consumed by the background import worker, and their progress is kept here
+    //so the status endpoint can report it while the request that uploaded them is long gone.
+    //Each import is stored before being queued, so the worker can resume it after a host restart.
+    //Imports are leased by the instance processing them, and resumed by another instance only
+    //when the lease expires, so an import is not processed twice when running multiple instances.
+    public class DocumentImportQueue
+    {
+        // Finished entries are kept for a while so clients can still read the final state
+        private static readonly TimeSpan s_progressRetention = TimeSpan.FromHours(1);
+
+        // How often the finished entries are removed
+        private static readonly TimeSpan s_progressCleanupInterval = TimeSpan.FromMinutes(1);
+
+        // Imports not renewed for this long are considered abandoned, see RenewLeasesAsync
+        public static readonly TimeSpan LeaseDuration = TimeSpan.FromMinutes(5);
+
+        // Max number of imports waiting in memory, new imports wait for room when the queue is full
+        private const int QueueCapacity = 1000;
+
+        private readonly Channel<DocumentImportJob> _jobs = Channel.CreateBounded<DocumentImportJob>(
+            new BoundedChannelOptions(QueueCapacity) { SingleReader = true, FullMode = BoundedChannelFullMode.Wait });
+
+        private readonly ConcurrentDictionary<string, DocumentImportProgress> _progress = new();
+        private readonly DocumentImportRepository _repository;
+        private readonly string _instanceId = Guid.NewGuid().ToString("N");
+        private long _nextProgressCleanupTicks;
+
+        public DocumentImportQueue(DocumentImportRepository repository)
+        {
+            _repository = repository;
+        }
+
+        public async Task EnqueueAsync(DocumentImportJob job, CancellationToken cancellationToken = default)
+        {
+            ArgumentNullException.ThrowIfNull(job);
+
+            await ReportAsync(job, DocumentImportState.Queued, cancellationToken: cancellationToken);
+
+            await _jobs.Writer.WriteAsync(job, cancellationToken);
+        }
+
+        //Queue again the imports abandoned by a previous run of the host, or by another instance.
+        //Imports still leased by a running instance are left alone.
+        public async Task<int> RecoverAsync(CancellationToken cancellationToken = default)
+        {
+            var count = 0;
+            var leaseExpiration = DateTime.UtcNow - LeaseDuration;
+            while (await _repository.ClaimExpiredAsync(_instanceId, leaseExpiration, cancellationToken) is { } import)
+            {
+                var job = new DocumentImportJob
+                {
+                    DocumentId = import.DocumentId,
+                    FileName = import.FileName,
+                    MimeType = import.MimeType,
+                    StartTime = import.StartTime
+                };
+
+                SetProgress(job, DocumentImportState.Queued, null);
+                await _jobs.Writer.WriteAsync(job, cancellationToken);
+                count++;
+            }
+
+            return count;
+        }
+
+        //Confirm that this instance is still working on its imports, queued or running
+        public Task RenewLeasesAsync(CancellationToken cancellationToken = default)
+        {
+            return _repository.RenewLeasesAsync(_instanceId, cancellationToken);
+        }
+
+        public IAsyncEnumerable<DocumentImportJob> ReadAllAsync(CancellationToken cancellationToken = default)
+        {
+            return _jobs.Reader.ReadAllAsync(cancellationToken);
+        }
+
+        public async Task<DocumentImportProgress?> GetProgressAsync(string documentId, CancellationToken cancellationToken = default)
+        {
+            if (_progress.TryGetValue(documentId, out var progress)) return progress;
+
+            // Imports started by another instance, or before a restart
+            var import = await _repository.GetAsync(documentId, cancellationToken);
+            return import == null
+                ? null
+                : new DocumentImportProgress
+                {
+                    DocumentId = import.DocumentId,
+                    FileName = import.FileName,
+                    State = import.State,
+                    Error = import.Error,
+                    UpdatedTime = import.UpdatedTime
+                };
+        }
+
+        public async Task ReportAsync(DocumentImportJob job, DocumentImportState state, string? error = null, CancellationToken cancellationToken = default)
+        {
+            SetProgress(job, state, error);
+            await _repository.SaveAsync(job, state, _instanceId, error, cancellationToken);
+
+            // Also the synchronous imports are tracked, so the cleanup can't depend on the queue
+            await RemoveExpiredProgressAsync(cancellationToken);
+        }
+
+        private void SetProgress(DocumentImportJob job, DocumentImportState state, string? error)
+        {
+            _progress[job.DocumentId] = new DocumentImportProgress
+            {
+                DocumentId = job.DocumentId,
+                FileName = job.FileName,
+                State = state,
+                Error = error,
+                UpdatedTime = DateTime.UtcNow
+            };
+        }
+
+        private async Task RemoveExpiredProgressAsync(CancellationToken cancellationToken)
+        {
+            var now = DateTime.UtcNow.Ticks;
+            var next = Interlocked.Read(ref _nextProgressCleanupTicks);
+            if (now < next || Interlocked.CompareExchange(ref _nextProgressCleanupTicks, now + s_progressCleanupInterval.Ticks, next) != next) return;
+
+            var expiration = DateTime.UtcNow - s_progressRetention;
+            var expired = _progress.Values
+                .Where(p => (p.State is DocumentImportState.Completed or DocumentImportState.Failed) && p.UpdatedTime < expiration)
+                .Select(p => p.DocumentId)
+                .ToList();
+
+            foreach (var documentId in expired)
+            {
+                _progress.TryRemove(documentId, out _);
+            }
+
+            await _repository.DeleteFinishedAsync(expiration, cancellationToken);
+        }
+    }
+}
@@ -24,9 +24,11 @@ namespace Microsoft.GS.DPS.API
     public class KernelMemory
     {
         private readonly MemoryWebClient _kmClient;
+        private readonly PipelineStatusClient _pipelineStatus;
         private readonly DocumentRepository _documentRepository;
         private readonly DataCacheManager _dataCache;
         private readonly TagUpdater _tagUpdator;
+        private readonly DocumentImportQueue _importQueue;
         private readonly ILogger<KernelMemory>? _logger;
         private static readonly string keywordExtractorPrompt = "";
 
@@ -40,12 +42,14 @@ namespace Microsoft.GS.DPS.API
             KernelMemory.keywordExtractorPrompt = System.IO.File.ReadAllText(systemPromptFilePath);
         }
 
-        public KernelMemory(MemoryWebClient kmClient, DocumentRepository documentRepository, DataCacheManager dataCache, TagUpdater tagUpdator, ILogger<KernelMemory>? logger = null)
+        public KernelMemory(MemoryWebClient kmClient, PipelineStatusClient pipelineStatus, DocumentRepository documentRepository, DataCacheManager dataCache, TagUpdater tagUpdator, DocumentImportQueue importQueue, ILogger<KernelMemory>? logger = null)
         {
             _kmClient = kmClient;
+            _pipelineStatus = pipelineStatus;
             _documentRepository = documentRepository;
             _dataCache = dataCache;
             _tagUpdator = tagUpdator;
+            _importQueue = importQueue;
             _logger = logger;
         }
 
@@ -53,65 +57,126 @@ namespace Microsoft.GS.DPS.API
                                                                  string fileName, 
                                                                  string contentType)
         {
-            // Implementation of the file upload
-            var documentId = await _kmClient.ImportDocumentAsync(documentStream, fileName, steps: [
-                                    Constants.PipelineStepsExtract,
-                                    "keyword_extract",
-                                    Constants.PipelineStepsSummarize,
-                                    Constants.PipelineStepsPartition,
-                                    Constants.PipelineStepsGenEmbeddings,
-                                    Constants.PipelineStepsSaveRecords
-                            ]);
-            // Check the processing status of the document with Timeout 3mins
             var startTime = DateTime.Now;
-            var elapsedTime = DateTime.Now - startTime;
+            var documentId = await UploadDocument(documentStream, fileName);
 
-            // Set Timeout 60 mins - Document Processing Time
-            var timeout = TimeSpan.FromMinutes(60);
-
-            while (true)
+            return await CompleteImportDocument(new DocumentImportJob
             {
-                var isReady = await _kmClient.IsDocumentReadyAsync(documentId);
-                if (isReady) break;
+                DocumentId = documentId,
+                FileName = fileName,
+                MimeType = contentType,
+                StartTime = startTime
+            });
+        }
 
-                await Task.Delay(5000);
-                elapsedTime = DateTime.Now - startTime;
-                if (elapsedTime > timeout)
-                {
-                    throw new TimeoutException("Document processing timeout");
-                }
-            }
+        // Store the upload in Kernel Memory and leave the rest of the import to the background worker
+        public async Task<DocumentImportedResult> QueueImportDocument(Stream documentStream,
+                                                                      string fileName,
+                                                                      string contentType,
+                                                                      CancellationToken cancellationToken = default)
+        {
+            var startTime = DateTime.Now;
+            var documentId = await UploadDocument(documentStream, fileName);
 
-            var importedResult = new DocumentImportedResult
+            // The import is stored before returning, so it is resumed if the host restarts before completing it
+            await _importQueue.EnqueueAsync(new DocumentImportJob
             {
                 DocumentId = documentId,
-                ImportedTime = DateTime.UtcNow,
-                MimeType = contentType,
                 FileName = fileName,
-                ProcessingTime = elapsedTime,
-                Keywords = await getKeywords(documentId, fileName),
-                Summary = await getSummary(documentId, fileName)
-            };
-
+                MimeType = contentType,
+                StartTime = startTime
+            }, cancellationToken);
 
-            // Save the document to the repository
-            Document document = new Document
+            return new DocumentImportedResult
             {
                 DocumentId = documentId,
-                FileName = fileName,
-                ImportedTime = importedResult.ImportedTime,
+                ImportedTime = DateTime.UtcNow,
                 MimeType = contentType,
-                ProcessingTime = importedResult.ProcessingTime,
-                Summary = importedResult.Summary,
-                Keywords = importedResult.Keywords
+                FileName = fileName
             };
+        }
 
-            await _documentRepository.RegisterAsync(document);
+        // Wait for the ingestion pipeline, then extract keywords and summary and register the document
+        public async Task<DocumentImportedResult> CompleteImportDocument(DocumentImportJob job, CancellationToken cancellationToken = default)
+        {
+            var documentId = job.DocumentId;
+            var fileName = job.FileName;
 
-            //Cache Refresh
-            _dataCache.ManualRefresh();
+            try
+            {
+                // Set Timeout 60 mins - Document Processing Time
+                var timeout = TimeSpan.FromMinutes(60);
 
-            return importedResult;
+                // Wait for the pipeline completion notification instead of polling the document status
+                await _importQueue.ReportAsync(job, DocumentImportState.Ingesting, cancellationToken: cancellationToken);
+                var isReady = await _pipelineStatus.WaitForDocumentReadyAsync(documentId, timeout, cancellationToken: cancellationToken);
+                var elapsedTime = DateTime.Now - job.StartTime;
+                if (!isReady)
+                {
+                    throw new TimeoutException("Document processing timeout");
+                }
+
+                await _importQueue.ReportAsync(job, DocumentImportState.PostProcessing, cancellationToken: cancellationToken);
+                var importedResult = new DocumentImportedResult
+                {
+                    DocumentId = documentId,
+                    ImportedTime = DateTime.UtcNow,
+                    MimeType = job.MimeType,
+                    FileName = fileName,
+                    ProcessingTime = elapsedTime,
+                    Keywords = await getKeywords(documentId, fileName, cancellationToken),
+                    Summary = await getSummary(documentId, fileName, cancellationToken)
+                };
+
+
+                // Save the document to the repository
+                Document document = new Document
+                {
+                    DocumentId = documentId,
+                    FileName = fileName,
+                    ImportedTime = importedResult.ImportedTime,
+                    MimeType = job.MimeType,
+                    ProcessingTime = importedResult.ProcessingTime,
+                    Summary = importedResult.Summary,
+                    Keywords = importedResult.Keywords
+                };
+
+                // A resumed import might have registered the document before the host restarted
+                if (await _documentRepository.FindByDocumentIdAsync(documentId) == null)
+                {
+                    await _documentRepository.RegisterAsync(document);
+                }
+
+                //Add the document keywords to the facet cache
+                _dataCache.AddDocument(documentId, document.Keywords);
+
+                await _importQueue.ReportAsync(job, DocumentImportState.Completed, cancellationToken: cancellationToken);
+
+                return importedResult;
+            }
+            catch (OperationCanceledException) when (cancellationToken.IsCancellationRequested)
+            {
+                // Leave the import unfinished, it is resumed when the host restarts
+                throw;
+            }
+            catch (Exception ex)
+            {
+                await _importQueue.ReportAsync(job, DocumentImportState.Failed, ex.Message);
+                throw;
+            }
+        }
+
+        private async Task<string> UploadDocument(Stream documentStream, string fileName)
+        {
+            // Implementation of the file upload
+            return await _kmClient.ImportDocumentAsync(documentStream, fileName, steps: [
+                                    Constants.PipelineStepsExtract,
+                                    "keyword_extract",
+                                    Constants.PipelineStepsSummarize,
+                                    Constants.PipelineStepsPartition,
+                                    Constants.PipelineStepsGenEmbeddings,
+                                    Constants.PipelineStepsSaveRecords
+                            ]);
         }
 
         public async Task<bool> DeleteDocument(string documentId)
@@ -125,6 +190,7 @@ namespace Microsoft.GS.DPS.API
             Document registeredDocument = await _documentRepository.FindByDocumentIdAsync(documentId);
             //var document = registeredDocument.Results.FirstOrDefault();
             if (registeredDocument != null)  await _documentRepository.DeleteAsync(registeredDocument.id);
+            _dataCache.RemoveDocument(documentId);
             
             // DeleteAsync the document from the Kernel Memory
             await _kmClient.DeleteDocumentAsync(documentId);
@@ -133,31 +199,31 @@ namespace Microsoft.GS.DPS.API
         }
 
 
-        private async Task<string> getSummary(string documentId, string fileName)
+        private async Task<string> getSummary(string documentId, string fileName, CancellationToken cancellationToken = default)
         {
             // Summary file
             var summaryFileName = $"{fileName}.summarize.0.txt";
             // Download Summary file
-            var summaryFile = await _kmClient.ExportFileAsync(documentId, summaryFileName);
+            var summaryFile = await _kmClient.ExportFileAsync(documentId, summaryFileName, cancellationToken: cancellationToken);
             var summaryFileStream = await summaryFile.GetStreamAsync();
             // Read Stream to string
             using var reader = new StreamReader(summaryFileStream);
-            return await reader.ReadToEndAsync();
+            return await reader.ReadToEndAsync(cancellationToken);
         }
 
 
-        private async Task<Dictionary<string, string>?> getKeywords(string documentId, string fileName)
+        private async Task<Dictionary<string, string>?> getKeywords(string documentId, string fileName, CancellationToken cancellationToken = default)
         {
             // Get Keyword file
             var keywordFileName = $"{fileName}.tags.json";
             // Download Keyword file
-            var keywordFile = await _kmClient.ExportFileAsync(documentId, keywordFileName);
+            var keywordFile = await _kmClient.ExportFileAsync(documentId, keywordFileName, cancellationToken: cancellationToken);
             var keywordFileStream = await keywordFile.GetStreamAsync();
             // Read Stream to string
             string? keywordContent;
             using (var reader = new StreamReader(keywordFileStream))
             {
-                keywordContent = await reader.ReadToEndAsync();
+                keywordContent = await reader.ReadToEndAsync(cancellationToken);
             }
 
             if (string.IsNullOrEmpty(keywordContent))
@@ -173,7 +239,7 @@ namespace Microsoft.GS.DPS.API
                     if (result.Count == 0)
                     {
                         //Just in case the document is large, get keywords via KM.
-                        var answer = await _kmClient.AskAsync(question: KernelMemory.keywordExtractorPrompt, filters: new List<MemoryFilter> { new MemoryFilter().ByDocument(documentId) });
+                        var answer = await _kmClient.AskAsync(question: KernelMemory.keywordExtractorPrompt, filters: new List<MemoryFilter> { new MemoryFilter().ByDocument(documentId) }, cancellationToken: cancellationToken);
                         result = JsonSerializer.Deserialize<List<Dictionary<string, List<string>>>>(answer.Result);
                         var listKeyValueString = new List<string>();
                         foreach (var dict in result)
@@ -187,7 +253,7 @@ namespace Microsoft.GS.DPS.API
                             }
                         }
                         //Update Azure Search tags collection.
-                        await _tagUpdator.UpdateTags(documentId, listKeyValueString);
+                        await _tagUpdator.UpdateTags(documentId, listKeyValueString, cancellationToken);
                     }
 
                     //convert result to Dictionary<string, string>
@@ -209,7 +275,7 @@ namespace Microsoft.GS.DPS.API
                     return new Dictionary<string, string>();
                 }
                 #pragma warning disable CA1031 // LLM keyword-extraction output may be malformed; fall back to empty result rather than failing the import
-                catch (Exception ex)
+                catch (Exception ex) when (ex is not OperationCanceledException)
                 {
                     _logger?.LogWarning(ex, "Failed to extract keywords for document {DocumentId} ({FileName}); returning empty keyword set.", documentId, fileName);
                     return new Dictionary<string, string>();
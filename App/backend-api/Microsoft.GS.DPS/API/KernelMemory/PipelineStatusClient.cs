@@ -0,0 +1,71 @@
+﻿using Microsoft.KernelMemory;
+using System;
+using System.Globalization;
+using System.Net;
+using System.Net.Http;
+using System.Text.Json;
+using System.Threading;
+using System.Threading.Tasks;
+
+namespace Microsoft.GS.DPS.API
+{
+    //Wait for the Kernel Memory ingestion pipeline completion.
+    //The Kernel Memory service holds each request open and replies as soon as the pipeline completes,
+    //so the document status doesn't need to be polled.
+    //Same logic as MemoryWebClient.WaitForDocumentReadyAsync in the Kernel Memory WebClient: the backend
+    //is built from its own folder against the published WebClient package, which doesn't include it yet.
+    //Remove this class and use MemoryWebClient once the package is updated.
+    public class PipelineStatusClient
+    {
+        private const string UploadStatusWaitEndpoint = "upload-status/wait";
+
+        // Max time a single request is kept open by the Kernel Memory service
+        private static readonly TimeSpan s_maxWaitPerRequest = TimeSpan.FromSeconds(60);
+
+        // Delay before asking again the status of a document not found yet, e.g. right after the upload
+        private static readonly TimeSpan s_notFoundRetryDelay = TimeSpan.FromSeconds(1);
+
+        private readonly HttpClient _httpClient;
+
+        public PipelineStatusClient(string endpoint, HttpClient httpClient)
+        {
+            if (string.IsNullOrWhiteSpace(endpoint))
+            {
+                throw new ArgumentException("Kernel Memory endpoint is empty", nameof(endpoint));
+            }
+
+            _httpClient = httpClient;
+            _httpClient.BaseAddress = new Uri(endpoint.TrimEnd('/') + "/");
+        }
+
+        public async Task<bool> WaitForDocumentReadyAsync(string documentId, TimeSpan timeout, string? index = null, CancellationToken cancellationToken = default)
+        {
+            var deadline = DateTime.UtcNow + timeout;
+
+            while (true)
+            {
+                var remaining = deadline - DateTime.UtcNow;
+                if (remaining <= TimeSpan.Zero) return false;
+
+                var waitSeconds = (int)Math.Ceiling(Math.Min(remaining.TotalSeconds, s_maxWaitPerRequest.TotalSeconds));
+                var url = $"{UploadStatusWaitEndpoint}?index={Uri.EscapeDataString(index ?? string.Empty)}" +
+                          $"&documentId={Uri.EscapeDataString(documentId)}" +
+                          $"&timeout={waitSeconds.ToString(CultureInfo.InvariantCulture)}";
+
+                using var response = await _httpClient.GetAsync(url, cancellationToken);
+                if (response.StatusCode == HttpStatusCode.NotFound)
+                {
+                    // The pipeline status might not be stored yet right after the upload, retry until the deadline
+                    await Task.Delay(s_notFoundRetryDelay < remaining ? s_notFoundRetryDelay : remaining, cancellationToken);
+                    continue;
+                }
+
+                response.EnsureSuccessStatusCode();
+
+                var json = await response.Content.ReadAsStringAsync(cancellationToken);
+                var status = JsonSerializer.Deserialize<DataPipelineStatus>(json);
+                if (status is { Completed: true, Empty: false }) return true;
+            }
+        }
+    }
+}
@@ -1,6 +1,8 @@
 using System;
 using System.Collections.Generic;
+using System.Collections.ObjectModel;
 using System.Linq;
+using System.Threading;
 using System.Threading.Tasks;
 using System.Timers;
 using Microsoft.GS.DPS.Storage.Document;
@@ -8,65 +10,116 @@ using Timers =System.Timers;
 
 namespace Microsoft.GS.DPS.API.UserInterface
 {
+    //Keyword facets of all the registered documents.
+    //The index is updated incrementally when documents are imported or deleted by this instance,
+    //the full rebuild from the repository runs on first use and periodically, to pick up the
+    //documents imported or deleted by the other instances.
     public class DataCacheManager
     {
         private readonly DocumentRepository _documentRepository;
-        private Dictionary<string, List<string>> _keywordCache;
         private readonly Timers.Timer _cacheTimer;
         private readonly object _cacheLock = new object();
+        private readonly SemaphoreSlim _rebuildLock = new SemaphoreSlim(1, 1);
+
+        // Category -> keyword -> number of documents tagged with the keyword
+        private Dictionary<string, SortedDictionary<string, int>> _facets;
+        // DocumentId -> (category, keyword) pairs indexed for the document, used to remove them on delete
+        private Dictionary<string, KeyValuePair<string, string>[]> _documentKeywords;
+        // Deltas received while a rebuild is running, replayed on top of the rebuilt index
+        private List<Action>? _pendingDeltas;
+        private IReadOnlyDictionary<string, IReadOnlyDictionary<string, int>>? _snapshot;
+        private bool _isLoaded;
 
         public DataCacheManager(DocumentRepository documentRepository)
         {
             _documentRepository = documentRepository;
-            _keywordCache = new Dictionary<string, List<string>>();
-            _cacheTimer = new Timers.Timer(5 * 60 * 1000); // 5 minutes
+            _facets = new Dictionary<string, SortedDictionary<string, int>>();
+            _documentKeywords = new Dictionary<string, KeyValuePair<string, string>[]>();
+            _cacheTimer = new Timers.Timer(5 * 60 * 1000); // 5 minutes - max staleness of the changes made by other instances
             _cacheTimer.Elapsed += async (sender, e) => await RefreshCacheAsync();
             _cacheTimer.Start();
         }
 
-        public async Task<Dictionary<string, List<string>>> GetConsolidatedKeywordsAsync()
+        public async Task<IReadOnlyDictionary<string, IReadOnlyDictionary<string, int>>> GetKeywordFacetsAsync()
         {
-            if (_keywordCache.Count == 0)
+            if (!_isLoaded)
             {
                 await RefreshCacheAsync();
             }
 
             lock (_cacheLock)
             {
-                return new Dictionary<string, List<string>>(_keywordCache);
+                // The snapshot is immutable, so it is shared until the next change
+                return _snapshot ??= BuildSnapshot(_facets);
             }
         }
 
-        public async Task RefreshCacheAsync()
+        public void AddDocument(string documentId, Dictionary<string, string>? keywords)
         {
-            var consolidatedKeywords = new Dictionary<string, List<string>>();
-            var documents = await _documentRepository.GetAllDocuments();
+            lock (_cacheLock)
+            {
+                _pendingDeltas?.Add(() => IndexDocument(_facets, _documentKeywords, documentId, keywords));
+                if (IndexDocument(_facets, _documentKeywords, documentId, keywords))
+                {
+                    _snapshot = null;
+                }
+            }
+        }
 
-            foreach (var document in documents.Where(d => d.Keywords != null))
+        public void RemoveDocument(string documentId)
+        {
+            lock (_cacheLock)
             {
-                foreach (var keywordDict in document.Keywords)
+                _pendingDeltas?.Add(() => RemoveDocument(_facets, _documentKeywords, documentId));
+                if (RemoveDocument(_facets, _documentKeywords, documentId))
                 {
-                    if (!consolidatedKeywords.ContainsKey(keywordDict.Key))
-                    {
-                        consolidatedKeywords[keywordDict.Key] = new List<string>();
-                    }
+                    _snapshot = null;
+                }
+            }
+        }
 
-                    var values = keywordDict.Value.Split(',').Select(v => v.Trim()).ToArray();
+        public async Task RefreshCacheAsync()
+        {
+            await _rebuildLock.WaitAsync();
+            try
+            {
+                lock (_cacheLock)
+                {
+                    _pendingDeltas = new List<Action>();
+                }
+
+                var facets = new Dictionary<string, SortedDictionary<string, int>>();
+                var documentKeywords = new Dictionary<string, KeyValuePair<string, string>[]>();
+                var documents = await _documentRepository.GetAllDocuments();
 
-                    foreach (var value in values.Where(v => !consolidatedKeywords[keywordDict.Key].Contains(v)))
+                foreach (var document in documents.Where(d => d.Keywords != null))
+                {
+                    IndexDocument(facets, documentKeywords, document.DocumentId, document.Keywords);
+                }
+
+                lock (_cacheLock)
+                {
+                    _facets = facets;
+                    _documentKeywords = documentKeywords;
+
+                    // Deltas are idempotent per document, replaying the ones already seen by the rebuild is harmless
+                    foreach (var delta in _pendingDeltas)
                     {
-                        consolidatedKeywords[keywordDict.Key].Add(value);
+                        delta();
                     }
 
-                    consolidatedKeywords[keywordDict.Key] = consolidatedKeywords[keywordDict.Key].OrderBy(v => v).ToList();
+                    _snapshot = null;
+                    _isLoaded = true;
                 }
             }
-
-            consolidatedKeywords = consolidatedKeywords.OrderBy(k => k.Key).ToDictionary(k => k.Key, v => v.Value);
-
-            lock (_cacheLock)
+            finally
             {
-                _keywordCache = consolidatedKeywords;
+                lock (_cacheLock)
+                {
+                    _pendingDeltas = null;
+                }
+
+                _rebuildLock.Release();
             }
         }
 
@@ -76,5 +129,82 @@ namespace Microsoft.GS.DPS.API.UserInterface
             _cacheTimer.Start();
             Task.Run(async () => await RefreshCacheAsync());
         }
+
+        private static bool IndexDocument(Dictionary<string, SortedDictionary<string, int>> facets,
+                                          Dictionary<string, KeyValuePair<string, string>[]> documentKeywords,
+                                          string documentId,
+                                          Dictionary<string, string>? keywords)
+        {
+            if (keywords == null || string.IsNullOrEmpty(documentId) || documentKeywords.ContainsKey(documentId))
+            {
+                return false;
+            }
+
+            var pairs = keywords
+                .SelectMany(k => k.Value.Split(',')
+                                        .Select(v => v.Trim())
+                                        .Where(v => v.Length > 0)
+                                        .Select(v => new KeyValuePair<string, string>(k.Key, v)))
+                .Distinct()
+                .ToArray();
+
+            foreach (var pair in pairs)
+            {
+                if (!facets.TryGetValue(pair.Key, out var values))
+                {
+                    values = new SortedDictionary<string, int>();
+                    facets[pair.Key] = values;
+                }
+
+                values[pair.Value] = values.TryGetValue(pair.Value, out var count) ? count + 1 : 1;
+            }
+
+            documentKeywords[documentId] = pairs;
+            return true;
+        }
+
+        private static bool RemoveDocument(Dictionary<string, SortedDictionary<string, int>> facets,
+                                           Dictionary<string, KeyValuePair<string, string>[]> documentKeywords,
+                                           string documentId)
+        {
+            if (!documentKeywords.Remove(documentId, out var pairs))
+            {
+                return false;
+            }
+
+            foreach (var pair in pairs)
+            {
+                if (!facets.TryGetValue(pair.Key, out var values) || !values.TryGetValue(pair.Value, out var count))
+                {
+                    continue;
+                }
+
+                if (count > 1)
+                {
+                    values[pair.Value] = count - 1;
+                    continue;
+                }
+
+                values.Remove(pair.Value);
+                if (values.Count == 0)
+                {
+                    facets.Remove(pair.Key);
+                }
+            }
+
+            return true;
+        }
+
+        private static IReadOnlyDictionary<string, IReadOnlyDictionary<string, int>> BuildSnapshot(Dictionary<string, SortedDictionary<string, int>> facets)
+        {
+            var snapshot = new Dictionary<string, IReadOnlyDictionary<string, int>>(facets.Count);
+
+            foreach (var category in facets.OrderBy(k => k.Key))
+            {
+                snapshot[category.Key] = new ReadOnlyDictionary<string, int>(new Dictionary<string, int>(category.Value));
+            }
+
+            return new ReadOnlyDictionary<string, IReadOnlyDictionary<string, int>>(snapshot);
+        }
     }
 }
@@ -28,30 +28,35 @@ namespace Microsoft.GS.DPS.API.UserInterface
         private async Task<QueryResultSet> GetAllDocumentsByPageAsync(int pageNumber, 
                                                                       int pageSize, 
                                                                       DateTime? startDate, 
-                                                                      DateTime? endDate)
+                                                                      DateTime? endDate,
+                                                                      string? continuationToken)
         {
-            return await _documentRepository.GetAllDocumentsByPageAsync(pageNumber, pageSize, startDate, endDate);
+            return await _documentRepository.GetAllDocumentsByPageAsync(pageNumber, pageSize, startDate, endDate, continuationToken);
         }
 
 
         public async Task<Model.UserInterface.DocumentQuerySet> GetDocuments(int pageNumber, 
                                                                              int pageSize, 
                                                                              DateTime? startDate, 
-                                                                             DateTime? endDate)
+                                                                             DateTime? endDate,
+                                                                             string? continuationToken = null)
         {
-            var resultSet = await this.GetAllDocumentsByPageAsync(pageNumber, pageSize,startDate, endDate);
-            //var keywordFilterInfo = GetConsolidatedKeywords(resultSet.Results);
-            //var keywordFilterInfo = await GetConsolidatedKeywords();
-            var keywordFilterInfo = await _dataCache.GetConsolidatedKeywordsAsync();
+            var resultSet = await this.GetAllDocumentsByPageAsync(pageNumber, pageSize,startDate, endDate, continuationToken);
+
+            //Without date range the whole collection is visible, the facet cache already holds its counts
+            var keywordFacets = startDate.HasValue ? await _documentRepository.GetKeywordFacetsAsync(startDate, endDate)
+                                                   : await _dataCache.GetKeywordFacetsAsync();
 
 
             return new Model.UserInterface.DocumentQuerySet
             {
                 documents = resultSet.Results,
-                keywordFilterInfo = keywordFilterInfo,
+                keywordFilterInfo = GetKeywordFilterInfo(keywordFacets),
+                keywordFacets = keywordFacets,
                 TotalPages = resultSet.TotalPages,
                 CurrentPage = resultSet.CurrentPage,
-                TotalRecords = resultSet.TotalRecords
+                TotalRecords = resultSet.TotalRecords,
+                ContinuationToken = resultSet.ContinuationToken
             };
         }
 
@@ -101,13 +106,15 @@ namespace Microsoft.GS.DPS.API.UserInterface
         /// <param name="pageSize">Page Size (Item Numbers per Page)</param>
         /// <param name="query">Search Keyword</param>
         /// <param name="tags">Tags</param>
+        /// <param name="continuationToken">Token returned with the previous page, to read the next one without skipping (document listing only, search results are paged by number)</param>
         /// <returns></returns>
         public async Task<Model.UserInterface.DocumentQuerySet> GetDocumentsWithQuery(int pageNumber, 
                                                                                       int pageSize, 
                                                                                       string? query, 
                                                                                       Dictionary<string, string>? tags,
                                                                                       DateTime? searchStartDate,
-                                                                                      DateTime? searchEndDate)
+                                                                                      DateTime? searchEndDate,
+                                                                                      string? continuationToken = null)
         {
             //Search from Memory then get the documents
             List<MemoryFilter> filters = new List<MemoryFilter>();
@@ -128,7 +135,7 @@ namespace Microsoft.GS.DPS.API.UserInterface
 
             if ((string.IsNullOrEmpty(query) || query.Contains("*")) && filters.Count == 0)
             {
-                return await this.GetDocuments(pageNumber, pageSize, searchStartDate, searchEndDate);
+                return await this.GetDocuments(pageNumber, pageSize, searchStartDate, searchEndDate, continuationToken);
             }
             else
             {
@@ -146,102 +153,35 @@ namespace Microsoft.GS.DPS.API.UserInterface
                 
                 SearchResult result = await this._memoryWebClient.SearchAsync(query ?? String.Empty, filters: filters, minRelevance: 0.0166666676);
 
-                //Get Document Ids from result
-               var documentIds = result.Results.Select(r => r.DocumentId).ToArray();
+                //Get Document Ids from result, most relevant first without duplicates
+                var documentIds = result.Results.Select(r => r.DocumentId).Distinct().ToArray();
+
+                //Apply the date range in the repository query, then page over the ranked list
+                var rankedDocumentIds = await _documentRepository.FilterDocumentIdsAsync(documentIds, searchStartDate, searchEndDate);
+                var pageDocumentIds = rankedDocumentIds.Skip((pageNumber - 1) * pageSize).Take(pageSize).ToArray();
+
+                //Get only the documents of the requested page from Repository
+                var documents = await _documentRepository.FindByDocumentIdsInOrderAsync(pageDocumentIds);
 
-                //Get Documents from Repository
-                QueryResultSet resultSet = await _documentRepository.FindByDocumentIdsAsync(documentIds, pageNumber, pageSize);
-                var filteredDocuments = resultSet.Results.Where(document => (!searchStartDate.HasValue || document.ImportedTime >= searchStartDate.Value) && (!searchEndDate.HasValue || document.ImportedTime <= searchEndDate.Value)).ToList();
+                //Facets of the search result set only
+                var keywordFacets = await _documentRepository.GetKeywordFacetsByDocumentIdsAsync(rankedDocumentIds);
 
                 return new Model.UserInterface.DocumentQuerySet
                 {
-                    documents = filteredDocuments,
-                    //keywordFilterInfo = GetConsolidatedKeywords(resultSet.Results),
-                    //keywordFilterInfo = await GetConsolidatedKeywords(),
-                    keywordFilterInfo = await _dataCache.GetConsolidatedKeywordsAsync(),
-                    TotalPages = resultSet.TotalPages,
-                    CurrentPage = resultSet.CurrentPage,
-                    TotalRecords = resultSet.TotalRecords
+                    documents = documents,
+                    keywordFilterInfo = GetKeywordFilterInfo(keywordFacets),
+                    keywordFacets = keywordFacets,
+                    TotalPages = (int)Math.Ceiling((double)rankedDocumentIds.Length / pageSize),
+                    CurrentPage = pageNumber,
+                    TotalRecords = rankedDocumentIds.Length
                 };
             }
         }
 
-        public Dictionary<string, List<string>> GetConsolidatedKeywords(IEnumerable<Entities.Document> documents)
+        private static IReadOnlyDictionary<string, IReadOnlyList<string>> GetKeywordFilterInfo(IReadOnlyDictionary<string, IReadOnlyDictionary<string, int>> keywordFacets)
         {
-            //var documents = await this.EntityCollection.GetAllAsync();
-            var consolidatedKeywords = new Dictionary<string, List<string>>();
-
-            foreach (var document in documents.Where(d => d.Keywords != null))
-            {
-                foreach (var keywordDict in document.Keywords)
-                {
-                    if (!consolidatedKeywords.ContainsKey(keywordDict.Key))
-                    {
-                        consolidatedKeywords[keywordDict.Key] = new List<string>();
-                    }
-
-                    //Before adding Value, check the value is already existing
-                    //Split comma separated values and add to the list
-                    var values = keywordDict.Value.Split(',').Select(v => v.Trim()).ToArray();
-
-                    foreach (var value in values)
-                    {
-                        if (!consolidatedKeywords[keywordDict.Key].Contains(value))
-                        {
-                            consolidatedKeywords[keywordDict.Key].Add(value);
-                        }
-
-                        //set order values under same Key by asc.
-                        consolidatedKeywords[keywordDict.Key] = consolidatedKeywords[keywordDict.Key].OrderBy(v => v).ToList();
-                    }
-                }
-            }
-
-            //set order key by asc
-            consolidatedKeywords = consolidatedKeywords.OrderBy(k => k.Key).ToDictionary(k => k.Key, v => v.Value);
-            return consolidatedKeywords;
-        }
-
-        
-
-        public async Task<Dictionary<string, List<string>>> GetConsolidatedKeywords()
-        {
-            //var documents = await this.EntityCollection.GetAllAsync();
-            var consolidatedKeywords = new Dictionary<string, List<string>>();
-
-            //Get All Records only Keywords field.
-            var documents = await _documentRepository.GetAllDocuments();
-
-            foreach (var document in documents.Where(d => d.Keywords != null))
-            {
-                foreach (var keywordDict in document.Keywords)
-                {
-                    if (!consolidatedKeywords.ContainsKey(keywordDict.Key))
-                    {
-                        consolidatedKeywords[keywordDict.Key] = new List<string>();
-                    }
-
-                    //Before adding Value, check the value is already existing
-                    //Split comma separated values and add to the list
-                    var values = keywordDict.Value.Split(',').Select(v => v.Trim()).ToArray();
-
-                    foreach (var value in values)
-                    {
-                        if (!consolidatedKeywords[keywordDict.Key].Contains(value))
-                        {
-                            consolidatedKeywords[keywordDict.Key].Add(value);
-                        }
-
-                        //set order values under same Key by asc.
-                        consolidatedKeywords[keywordDict.Key] = consolidatedKeywords[keywordDict.Key].OrderBy(v => v).ToList();
-
-                    }
-                }
-            }
-
-            //set order key by asc
-            consolidatedKeywords = consolidatedKeywords.OrderBy(k => k.Key).ToDictionary(k => k.Key, v => v.Value);
-            return consolidatedKeywords;
+            //Facets are already ordered by category and value
+            return keywordFacets.ToDictionary(k => k.Key, v => (IReadOnlyList<string>)v.Value.Keys.ToList());
         }
     }
 }
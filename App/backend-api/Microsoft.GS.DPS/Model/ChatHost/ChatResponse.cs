@@ -21,6 +21,8 @@ namespace Microsoft.GS.DPS.Model.ChatHost
         public string ChatSessionId { get; set; }
         public IAsyncEnumerable<string> AnswerWords { get; set; }
         public string Answer { get; set; }
+        // True when Answer differs from the streamed text, which must then be replaced by Answer
+        public bool AnswerReplaced { get; set; }
         public string[] DocumentIds { get; set; }
         public string[] SuggestingQuestions { get; set; }
         public string[] Keywords { get; set; }
@@ -0,0 +1,10 @@
+﻿namespace Microsoft.GS.DPS.Model.KernelMemory
+{
+    public class DocumentImportJob
+    {
+        public string DocumentId { get; set; }
+        public string FileName { get; set; }
+        public string MimeType { get; set; }
+        public DateTime StartTime { get; set; }
+    }
+}
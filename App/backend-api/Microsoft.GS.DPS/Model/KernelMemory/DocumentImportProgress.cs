@@ -0,0 +1,20 @@
+﻿namespace Microsoft.GS.DPS.Model.KernelMemory
+{
+    public enum DocumentImportState
+    {
+        Queued,
+        Ingesting,
+        PostProcessing,
+        Completed,
+        Failed
+    }
+
+    public class DocumentImportProgress
+    {
+        public string DocumentId { get; set; }
+        public string FileName { get; set; }
+        public DocumentImportState State { get; set; }
+        public string? Error { get; set; }
+        public DateTime UpdatedTime { get; set; }
+    }
+}
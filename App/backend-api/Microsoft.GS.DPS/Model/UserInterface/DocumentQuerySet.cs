@@ -9,9 +9,11 @@ namespace Microsoft.GS.DPS.Model.UserInterface
     public class DocumentQuerySet
     {
         public IEnumerable<Entity.Document> documents { get; set; }
-        public Dictionary<string, List<string>> keywordFilterInfo { get; set; }
+        public IReadOnlyDictionary<string, IReadOnlyList<string>> keywordFilterInfo { get; set; }
+        public IReadOnlyDictionary<string, IReadOnlyDictionary<string, int>> keywordFacets { get; set; }
         public int TotalPages { get; set; }
         public int TotalRecords { get; set; }
         public int CurrentPage { get; set; }
+        public string? ContinuationToken { get; set; }
     }
 }
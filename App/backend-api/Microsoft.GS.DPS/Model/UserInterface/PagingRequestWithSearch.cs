@@ -1,4 +1,5 @@
 ﻿using FluentValidation;
+using Microsoft.GS.DPS.Storage.Document;
 using System;
 using System.Collections.Generic;
 using System.Linq;
@@ -14,6 +15,8 @@ namespace Microsoft.GS.DPS.Model.UserInterface
         public Dictionary<string,string> Tags { get; set; }
         [JsonPropertyOrder(3)]
         public string Keyword { get; set; }
+        [JsonPropertyOrder(7)]
+        public string? ContinuationToken { get; set; }
     }
 
     public class PagingRequestWithSearchValidator : AbstractValidator<PagingRequestWithSearch>
@@ -44,6 +47,11 @@ namespace Microsoft.GS.DPS.Model.UserInterface
                 .NotEmpty()
                 .When(x => x.EndDate.HasValue)
                 .WithMessage("Start Date cannot be empty when End Date is provided");
+
+            RuleFor(x => x.ContinuationToken)
+                .Must(token => DocumentCursor.TryDecode(token, out _))
+                .When(x => !string.IsNullOrEmpty(x.ContinuationToken))
+                .WithMessage("Continuation Token is invalid");
         }
     }
 }
@@ -18,7 +18,7 @@ namespace Microsoft.GS.DPS.Storage.AISearch
             _searchClient = new SearchClient(new Uri(searchEndPoint), indexName, tokenCredential);
         }
 
-        public async Task UpdateTags(string documentId, List<string> updatingTags)
+        public async Task UpdateTags(string documentId, List<string> updatingTags, CancellationToken cancellationToken = default)
         {
             // Search for documents where the tags field contains the specified GUID
             var options = new SearchOptions
@@ -26,9 +26,9 @@ namespace Microsoft.GS.DPS.Storage.AISearch
                 Filter = $"tags/any(t: t eq '__document_id:{documentId}')"
             };
 
-            var searchResults = _searchClient.Search<SearchDocument>("*", options);
+            var searchResults = await _searchClient.SearchAsync<SearchDocument>("*", options, cancellationToken);
 
-            await foreach (var result in searchResults.Value.GetResultsAsync())
+            await foreach (var result in searchResults.Value.GetResultsAsync().WithCancellation(cancellationToken))
             {
                 var document = result.Document;
                 var tags = document["tags"] as IEnumerable<object>;
@@ -46,11 +46,11 @@ namespace Microsoft.GS.DPS.Storage.AISearch
 
                     try
                     {
-                        var response = await _searchClient.MergeOrUploadDocumentsAsync(new[] { updateDocument });
+                        var response = await _searchClient.MergeOrUploadDocumentsAsync(new[] { updateDocument }, cancellationToken: cancellationToken);
                         Console.WriteLine($"Document with ID {document["id"]} updated successfully. - {response.GetRawResponse()}");
                     }
                     #pragma warning disable CA1031 // Tag update is best-effort; log and continue with the next document
-                    catch (Exception ex)
+                    catch (Exception ex) when (ex is not OperationCanceledException)
                     {
                         Console.Error.WriteLine($"Error updating document with ID {document["id"]}: {ex.Message}");
                     }
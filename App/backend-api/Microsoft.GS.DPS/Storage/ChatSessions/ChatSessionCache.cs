@@ -0,0 +1,168 @@
+using System;
+using System.Collections.Generic;
+using System.Linq;
+
+namespace Microsoft.GS.DPS.Storage.ChatSessions
+{
+    //Bounded LRU cache of the active chat sessions, with their last messages.
+    //Sessions not used for the time to live are dropped, the least recently used ones are evicted when the cache is full.
+    //Sessions are invalidated when messages are appended, and a session read before an invalidation is not cached,
+    //so a read racing an append can't cache the messages stored before the append.
+    internal sealed class ChatSessionCache
+    {
+        private sealed class Entry
+        {
+            public required Entities.ChatSession Session { get; init; }
+            // Number of messages loaded from the end of the session, the cache can only answer smaller windows
+            public required int WindowSize { get; init; }
+            public required LinkedListNode<string> Node { get; init; }
+            public DateTime LastAccessTime { get; set; }
+        }
+
+        private readonly int _capacity;
+        private readonly TimeSpan _timeToLive;
+        private readonly Dictionary<string, Entry> _entries = new();
+        // Most recently used first
+        private readonly LinkedList<string> _usage = new();
+        // Version of the last invalidation of each session, the oldest ones are forgotten past the capacity
+        private readonly Dictionary<string, long> _invalidations = new();
+        private long _version;
+        // Sessions read before this version may have been invalidated and forgotten since
+        private long _forgottenVersion;
+        private readonly object _lock = new object();
+
+        public ChatSessionCache(int capacity, TimeSpan timeToLive)
+        {
+            _capacity = capacity;
+            _timeToLive = timeToLive;
+        }
+
+        public bool TryGet(string sessionId, int lastMessageCount, out Entities.ChatSession? session)
+        {
+            lock (_lock)
+            {
+                session = null;
+                if (!_entries.TryGetValue(sessionId, out var entry))
+                {
+                    return false;
+                }
+
+                var now = DateTime.UtcNow;
+                if (now - entry.LastAccessTime > _timeToLive)
+                {
+                    RemoveEntry(entry);
+                    return false;
+                }
+
+                if (lastMessageCount > entry.WindowSize)
+                {
+                    return false;
+                }
+
+                entry.LastAccessTime = now;
+                _usage.Remove(entry.Node);
+                _usage.AddFirst(entry.Node);
+
+                session = Copy(entry.Session, lastMessageCount);
+                return true;
+            }
+        }
+
+        //Current version, to take before reading a session from the storage and pass to Set
+        public long Version
+        {
+            get
+            {
+                lock (_lock)
+                {
+                    return _version;
+                }
+            }
+        }
+
+        public void Set(Entities.ChatSession session, int windowSize, long readVersion)
+        {
+            lock (_lock)
+            {
+                //The session changed since it was read
+                if (readVersion < _forgottenVersion ||
+                    (_invalidations.TryGetValue(session.SessionId, out var invalidatedVersion) && invalidatedVersion > readVersion))
+                {
+                    return;
+                }
+
+                if (_entries.TryGetValue(session.SessionId, out var existing))
+                {
+                    RemoveEntry(existing);
+                }
+
+                var entry = new Entry
+                {
+                    Session = Copy(session, windowSize),
+                    WindowSize = windowSize,
+                    Node = _usage.AddFirst(session.SessionId),
+                    LastAccessTime = DateTime.UtcNow
+                };
+                _entries[session.SessionId] = entry;
+
+                while (_entries.Count > _capacity && _usage.Last != null)
+                {
+                    RemoveEntry(_entries[_usage.Last.Value]);
+                }
+            }
+        }
+
+        //Remove the session, and prevent reads started before from caching it
+        public void Invalidate(string sessionId)
+        {
+            lock (_lock)
+            {
+                if (_entries.TryGetValue(sessionId, out var entry))
+                {
+                    RemoveEntry(entry);
+                }
+
+                if (_invalidations.Count >= _capacity)
+                {
+                    _forgottenVersion = _version;
+                    _invalidations.Clear();
+                }
+
+                _invalidations[sessionId] = ++_version;
+            }
+        }
+
+        public void Remove(string sessionId)
+        {
+            lock (_lock)
+            {
+                if (_entries.TryGetValue(sessionId, out var entry))
+                {
+                    RemoveEntry(entry);
+                }
+            }
+        }
+
+        private void RemoveEntry(Entry entry)
+        {
+            _entries.Remove(entry.Session.SessionId);
+            _usage.Remove(entry.Node);
+        }
+
+        // Sessions are handed out as copies, so callers can't change the cached messages
+        private static Entities.ChatSession Copy(Entities.ChatSession session, int lastMessageCount)
+        {
+            return new Entities.ChatSession
+            {
+                id = session.id,
+                __partitionkey = session.__partitionkey,
+                SessionId = session.SessionId,
+                StartTime = session.StartTime,
+                EndTime = session.EndTime,
+                Messages = session.Messages?.TakeLast(lastMessageCount).ToList(),
+                ChatHistoryJson = session.ChatHistoryJson,
+                Revision = session.Revision
+            };
+        }
+    }
+}
@@ -1,4 +1,5 @@
-﻿using Microsoft.GS.DPS.Storage.Components;
+﻿using Microsoft.Extensions.Logging;
+using Microsoft.GS.DPS.Storage.Components;
 using Microsoft.SemanticKernel;
 using Microsoft.SemanticKernel.ChatCompletion;
 using MongoDB.Bson.Serialization;
@@ -7,16 +8,58 @@ using System;
 using System.Collections.Generic;
 using System.Linq;
 using System.Text;
+using System.Threading;
 using System.Threading.Tasks;
+using Timers = System.Timers;
 
 namespace Microsoft.GS.DPS.Storage.ChatSessions
 {
-    public class ChatSessionRepository
+    //Chat sessions are served from an LRU cache of the active sessions. Each change of a session increments
+    //its stored revision, and a cached session is used only while its revision matches the stored one, checked
+    //with a read of the revision alone, so a host doesn't serve a session missing the turns written by another.
+    //New messages are written before the append returns. With write-behind enabled, they are buffered per session
+    //and flushed to the collection in batches instead, at least every flush interval: buffered messages are flushed
+    //when the repository is disposed, on a graceful shutdown, but if the host crashes the messages buffered since
+    //the last flush are lost. Write-behind is then only suited to deployments accepting that loss.
+    //Appends that keep failing are moved to a dead-letter collection, so they don't block the other sessions.
+    public class ChatSessionRepository : IAsyncDisposable
     {
+        private sealed class PendingAppend
+        {
+            public List<Entities.ChatSessionMessage> Messages { get; } = new();
+            public int MaxMessageCount { get; set; }
+            public bool ClearChatHistoryJson { get; set; }
+            public int FailedAttempts { get; set; }
+        }
+
+        // Max number of failed writes of an append before it is moved to the dead-letter collection
+        private const int MaxFlushAttempts = 5;
+
         private readonly IMongoCollection<Entities.ChatSession> _collection;
+        private readonly IMongoCollection<Entities.ChatSession> _deadLetters;
+        private readonly ChatSessionCache _cache;
+        private readonly Dictionary<string, PendingAppend> _pendingAppends = new();
+        private readonly object _pendingLock = new object();
+        private readonly SemaphoreSlim _flushLock = new SemaphoreSlim(1, 1);
+        private readonly Timers.Timer _flushTimer;
+        private readonly int _flushBatchSize;
+        private readonly bool _writeBehind;
+        private readonly ILogger<ChatSessionRepository>? _logger;
 
-        public ChatSessionRepository(IMongoDatabase database, string collectionName)
+        public ChatSessionRepository(IMongoDatabase database,
+                                     string collectionName,
+                                     int cacheCapacity = 1000,
+                                     TimeSpan? cacheTimeToLive = null,
+                                     TimeSpan? flushInterval = null,
+                                     int flushBatchSize = 100,
+                                     bool writeBehind = false,
+                                     ILogger<ChatSessionRepository>? logger = null)
         {
+            _logger = logger;
+            _writeBehind = writeBehind;
+            _cache = new ChatSessionCache(cacheCapacity, cacheTimeToLive ?? TimeSpan.FromMinutes(30));
+            _flushBatchSize = flushBatchSize;
+
             _collection = database.GetCollection<Entities.ChatSession>(collectionName);
 
             if (_collection == null)
@@ -24,6 +67,49 @@ namespace Microsoft.GS.DPS.Storage.ChatSessions
                 database.CreateCollection(collectionName);
                 _collection = database.GetCollection<Entities.ChatSession>(collectionName);
             }
+
+            _deadLetters = database.GetCollection<Entities.ChatSession>($"{collectionName}DeadLetters");
+
+            EnsureUniqueIndexOnSessionId();
+
+            _flushTimer = new Timers.Timer((flushInterval ?? TimeSpan.FromSeconds(2)).TotalMilliseconds);
+            _flushTimer.Elapsed += async (sender, e) => await FlushOnTimerAsync();
+            _flushTimer.Start();
+        }
+
+        // MongoDB error codes returned when creating an index
+        private const int CannotCreateIndex = 67;
+        private const int IndexAlreadyExists = 68;
+        private const int IndexOptionsConflict = 85;
+        private const int IndexKeySpecsConflict = 86;
+
+        private void EnsureUniqueIndexOnSessionId()
+        {
+            var indexKeysDefinition = Builders<Entities.ChatSession>.IndexKeys.Ascending(x => x.SessionId);
+            var indexModel = new CreateIndexModel<Entities.ChatSession>(indexKeysDefinition, new CreateIndexOptions { Unique = true });
+
+            // Check if the index already exists
+            var indexes = _collection.Indexes.List().ToList();
+            var indexExists = indexes.Any(index => index["key"].AsBsonDocument.Contains(nameof(Entities.ChatSession.SessionId)));
+
+            if (!indexExists)
+            {
+                try
+                {
+                    _collection.Indexes.CreateOne(indexModel);
+                }
+                catch (MongoCommandException ex) when (ex.Code is IndexAlreadyExists or IndexOptionsConflict or IndexKeySpecsConflict)
+                {
+                    // Created at the same time by another host, or with other options
+                    _logger?.LogInformation("The index on {Field} already exists: {Message}", nameof(Entities.ChatSession.SessionId), ex.Message);
+                }
+                catch (MongoCommandException ex) when (ex.Code == CannotCreateIndex)
+                {
+                    // Cosmos DB only creates unique indexes on empty collections,
+                    // existing deployments keep working without it.
+                    _logger?.LogWarning(ex, "Unable to create the unique index on {Field}, session ids are not enforced to be unique", nameof(Entities.ChatSession.SessionId));
+                }
+            }
         }
 
         /// <summary>
@@ -45,11 +131,318 @@ namespace Microsoft.GS.DPS.Storage.ChatSessions
         /// <returns></returns>
         public async Task<Entities.ChatSession> GetSessionAsync(string sessionId)
         {
+            await FlushIfPendingAsync(sessionId);
             return await _collection.Find(Builders<Entities.ChatSession>.Filter.Eq(x => x.SessionId, sessionId)).FirstOrDefaultAsync();
         }
 
+        /// <summary>
+        /// Get Registered ChatSession Entity with only the last messages of the session
+        /// </summary>
+        /// <param name="sessionId"></param>
+        /// <param name="lastMessageCount">Number of messages to load from the end of the session</param>
+        /// <returns></returns>
+        public async Task<Entities.ChatSession> GetSessionAsync(string sessionId, int lastMessageCount)
+        {
+            if (_cache.TryGet(sessionId, lastMessageCount, out var cachedSession))
+            {
+                // The session may have been changed by another host
+                var stored = await _collection.Find(Builders<Entities.ChatSession>.Filter.Eq(x => x.SessionId, sessionId))
+                                              .Project<Entities.ChatSession>(Builders<Entities.ChatSession>.Projection.Include(x => x.Revision))
+                                              .FirstOrDefaultAsync();
+                if (stored != null && stored.Revision == cachedSession!.Revision)
+                {
+                    return cachedSession;
+                }
+
+                _cache.Remove(sessionId);
+            }
+
+            // Appends made while the session is read make the result stale, it is then not cached
+            var cacheVersion = _cache.Version;
+
+            // The buffered messages of the session must be stored before it is read back
+            await FlushIfPendingAsync(sessionId);
+
+            var session = await _collection.Find(Builders<Entities.ChatSession>.Filter.Eq(x => x.SessionId, sessionId))
+                                           .Project<Entities.ChatSession>(Builders<Entities.ChatSession>.Projection.Slice(x => x.Messages, -lastMessageCount))
+                                           .FirstOrDefaultAsync();
+
+            // Appends kept for a retry are not in the stored session yet
+            bool hasPending;
+            lock (_pendingLock)
+            {
+                hasPending = _pendingAppends.ContainsKey(sessionId);
+            }
+
+            if (session != null && !hasPending)
+            {
+                _cache.Set(session, lastMessageCount, cacheVersion);
+            }
+
+            return session;
+        }
+
+        /// <summary>
+        /// Append messages to the ChatSession, creating the session if it doesn't exist yet.
+        /// Only the last maxMessageCount messages are kept, so the session document stays bounded.
+        /// The messages are written before returning, or buffered and written with the next batch when
+        /// write-behind is enabled, and the session is removed from the cache.
+        /// </summary>
+        /// <param name="sessionId"></param>
+        /// <param name="messages">Messages of the new turn</param>
+        /// <param name="maxMessageCount">Max number of messages kept in the session</param>
+        /// <param name="clearChatHistoryJson">Remove the legacy serialized ChatHistory once its messages are migrated</param>
+        /// <returns></returns>
+        public async Task AppendMessagesAsync(string sessionId,
+                                        IEnumerable<Entities.ChatSessionMessage> messages,
+                                        int maxMessageCount,
+                                        bool clearChatHistoryJson = false)
+        {
+            var newMessages = messages.ToList();
+
+            bool flushNow;
+            lock (_pendingLock)
+            {
+                if (!_pendingAppends.TryGetValue(sessionId, out var pending))
+                {
+                    pending = new PendingAppend();
+                    _pendingAppends[sessionId] = pending;
+                }
+
+                pending.Messages.AddRange(newMessages);
+                pending.MaxMessageCount = maxMessageCount;
+                pending.ClearChatHistoryJson |= clearChatHistoryJson;
+                TrimMessages(pending);
+
+                flushNow = _pendingAppends.Count >= _flushBatchSize;
+            }
+
+            _cache.Invalidate(sessionId);
+
+            if (!_writeBehind)
+            {
+                // Appends rejected by the database are kept and retried with the next flush
+                await FlushIfPendingAsync(sessionId);
+            }
+            else if (flushNow)
+            {
+                _ = Task.Run(FlushOnTimerAsync);
+            }
+        }
+
+        /// <summary>
+        /// Write all the buffered messages to the collection.
+        /// Appends rejected by the database are kept for the next flush, and moved to the dead-letter
+        /// collection after too many attempts. Other errors, e.g. the database not being reachable, are thrown.
+        /// </summary>
+        /// <returns></returns>
+        public async Task FlushAsync()
+        {
+            await _flushLock.WaitAsync();
+            try
+            {
+                // Appends rejected during this flush are retried with the next one
+                var rejected = new HashSet<string>();
+                while (true)
+                {
+                    List<KeyValuePair<string, PendingAppend>> batch;
+                    lock (_pendingLock)
+                    {
+                        batch = _pendingAppends.Where(x => !rejected.Contains(x.Key)).Take(_flushBatchSize).ToList();
+                        if (batch.Count == 0) return;
+
+                        foreach (var item in batch)
+                        {
+                            _pendingAppends.Remove(item.Key);
+                        }
+                    }
+
+                    foreach (var sessionId in await WriteAsync(batch))
+                    {
+                        rejected.Add(sessionId);
+                    }
+                }
+            }
+            finally
+            {
+                _flushLock.Release();
+            }
+        }
+
+        public async ValueTask DisposeAsync()
+        {
+            _flushTimer.Stop();
+            _flushTimer.Dispose();
+            await FlushAsync();
+        }
+
+        private async Task FlushOnTimerAsync()
+        {
+            #pragma warning disable CA1031 // The buffered messages are kept and retried on the next flush
+            try
+            {
+                await FlushAsync();
+            }
+            catch (Exception ex)
+            {
+                int pendingCount;
+                lock (_pendingLock)
+                {
+                    pendingCount = _pendingAppends.Count;
+                }
+
+                _logger?.LogError(ex, "Unable to write the buffered chat messages, {PendingCount} sessions will be retried with the next flush", pendingCount);
+            }
+            #pragma warning restore CA1031
+        }
+
+        // Write the buffered messages of the session only, so errors of other sessions don't fail the caller
+        private async Task FlushIfPendingAsync(string sessionId)
+        {
+            lock (_pendingLock)
+            {
+                if (!_pendingAppends.ContainsKey(sessionId)) return;
+            }
+
+            await _flushLock.WaitAsync();
+            try
+            {
+                PendingAppend? pending;
+                lock (_pendingLock)
+                {
+                    // Written by a flush while waiting for the lock
+                    if (!_pendingAppends.Remove(sessionId, out pending)) return;
+                }
+
+                await WriteAsync(new List<KeyValuePair<string, PendingAppend>> { new(sessionId, pending) });
+            }
+            finally
+            {
+                _flushLock.Release();
+            }
+        }
+
+        // Write a batch of appends, returning the sessions whose append was rejected and kept for a retry.
+        // Errors not related to specific appends are thrown, after keeping the whole batch for a retry.
+        private async Task<List<string>> WriteAsync(List<KeyValuePair<string, PendingAppend>> batch)
+        {
+            try
+            {
+                await _collection.BulkWriteAsync(batch.Select(x => BuildAppendModel(x.Key, x.Value)),
+                                                 new BulkWriteOptions { IsOrdered = false });
+                return new List<string>();
+            }
+            catch (MongoBulkWriteException<Entities.ChatSession> ex)
+            {
+                // Duplicate keys come from sessions created by two hosts at the same time, they succeed on retry.
+                var failed = new List<KeyValuePair<string, PendingAppend>>();
+                foreach (var error in ex.WriteErrors)
+                {
+                    var item = batch[error.Index];
+                    item.Value.FailedAttempts++;
+                    if (item.Value.FailedAttempts < MaxFlushAttempts)
+                    {
+                        _logger?.LogWarning("Unable to write the messages of chat session {SessionId}, attempt {Attempt}: {Error}",
+                                            item.Key, item.Value.FailedAttempts, error.Message);
+                        failed.Add(item);
+                    }
+                    else
+                    {
+                        await DeadLetterAsync(item.Key, item.Value, error.Message);
+                    }
+                }
+
+                Requeue(failed);
+                return failed.Select(x => x.Key).ToList();
+            }
+            catch
+            {
+                Requeue(batch);
+                throw;
+            }
+        }
+
+        // Keep an append that can't be written aside, it would otherwise be retried forever
+        private async Task DeadLetterAsync(string sessionId, PendingAppend pending, string error)
+        {
+            _logger?.LogError("Unable to write {MessageCount} messages of chat session {SessionId} after {Attempts} attempts, moving them to the dead-letter collection: {Error}",
+                              pending.Messages.Count, sessionId, pending.FailedAttempts, error);
+
+            #pragma warning disable CA1031 // The messages are lost, the error is logged
+            try
+            {
+                await _deadLetters.InsertOneAsync(new Entities.ChatSession
+                {
+                    SessionId = sessionId,
+                    StartTime = DateTime.UtcNow,
+                    Messages = pending.Messages
+                });
+            }
+            catch (Exception ex)
+            {
+                _logger?.LogError(ex, "Unable to store the messages of chat session {SessionId} in the dead-letter collection", sessionId);
+            }
+            #pragma warning restore CA1031
+        }
+
+        private void Requeue(IEnumerable<KeyValuePair<string, PendingAppend>> failed)
+        {
+            lock (_pendingLock)
+            {
+                foreach (var item in failed)
+                {
+                    // Messages appended while the flush was running go after the failed ones
+                    if (_pendingAppends.TryGetValue(item.Key, out var newer))
+                    {
+                        item.Value.Messages.AddRange(newer.Messages);
+                        item.Value.MaxMessageCount = newer.MaxMessageCount;
+                        item.Value.ClearChatHistoryJson |= newer.ClearChatHistoryJson;
+                        TrimMessages(item.Value);
+                    }
+
+                    _pendingAppends[item.Key] = item.Value;
+                }
+            }
+        }
+
+        // Older messages would be removed by the $slice anyway
+        private static void TrimMessages(PendingAppend pending)
+        {
+            if (pending.Messages.Count > pending.MaxMessageCount)
+            {
+                pending.Messages.RemoveRange(0, pending.Messages.Count - pending.MaxMessageCount);
+            }
+        }
+
+        private static UpdateOneModel<Entities.ChatSession> BuildAppendModel(string sessionId, PendingAppend pending)
+        {
+            var now = DateTime.UtcNow;
+            var newId = Guid.NewGuid();
+            var update = Builders<Entities.ChatSession>.Update
+                .PushEach(x => x.Messages, pending.Messages, slice: -pending.MaxMessageCount)
+                .Set(x => x.EndTime, now)
+                .Inc(x => x.Revision, 1)
+                .SetOnInsert(x => x.id, newId)
+                .SetOnInsert(x => x.__partitionkey, CosmosDBEntityBase.GetKey(newId, 9999))
+                .SetOnInsert(x => x.StartTime, now);
+
+            if (pending.ClearChatHistoryJson)
+            {
+                update = update.Unset(x => x.ChatHistoryJson);
+            }
+
+            return new UpdateOneModel<Entities.ChatSession>(Builders<Entities.ChatSession>.Filter.Eq(x => x.SessionId, sessionId), update)
+            {
+                IsUpsert = true
+            };
+        }
+
         public async Task<Entities.ChatSession> UpdateSessionAsync(Entities.ChatSession chatSession)
         {
+            await FlushIfPendingAsync(chatSession.SessionId);
+            _cache.Remove(chatSession.SessionId);
+            chatSession.Revision++;
+
             //return await this.EntityCollection.SaveAsync(chatSession);
             var result = await _collection.ReplaceOneAsync(Builders<Entities.ChatSession>.Filter.Eq(x => x.id, chatSession.id), chatSession);
             if (result.IsAcknowledged && result.ModifiedCount > 0)
@@ -66,7 +459,21 @@ namespace Microsoft.GS.DPS.Storage.ChatSessions
 
         public async Task<bool> DeleteSessionAsync(string sessionId)
         {
-            return _collection.DeleteOne(Builders<Entities.ChatSession>.Filter.Eq(x => x.SessionId, sessionId)).DeletedCount > 0;
+            await _flushLock.WaitAsync();
+            try
+            {
+                lock (_pendingLock)
+                {
+                    _pendingAppends.Remove(sessionId);
+                }
+                _cache.Remove(sessionId);
+
+                return _collection.DeleteOne(Builders<Entities.ChatSession>.Filter.Eq(x => x.SessionId, sessionId)).DeletedCount > 0;
+            }
+            finally
+            {
+                _flushLock.Release();
+            }
         }
 
 
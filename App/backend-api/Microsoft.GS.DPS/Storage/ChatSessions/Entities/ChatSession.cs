@@ -8,6 +8,11 @@ namespace Microsoft.GS.DPS.Storage.ChatSessions.Entities
         public string SessionId { get; set; }
         public DateTime StartTime { get; set; }
         public DateTime? EndTime { get; set; }
-        public string ChatHistoryJson { get; set; }
+        // Messages of the session, appended turn by turn (system prompt excluded)
+        public List<ChatSessionMessage>? Messages { get; set; }
+        // Whole serialized ChatHistory, only kept by sessions created before Messages existed
+        public string? ChatHistoryJson { get; set; }
+        // Incremented by each change of the session, so hosts can check their cached copy is current
+        public long Revision { get; set; }
     }
 }
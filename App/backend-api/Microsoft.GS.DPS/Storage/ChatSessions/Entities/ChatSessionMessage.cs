@@ -0,0 +1,9 @@
+﻿namespace Microsoft.GS.DPS.Storage.ChatSessions.Entities
+{
+    public class ChatSessionMessage
+    {
+        public string Role { get; set; }
+        public string Content { get; set; }
+        public DateTime CreatedTime { get; set; }
+    }
+}
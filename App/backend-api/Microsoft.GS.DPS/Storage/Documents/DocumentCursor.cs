@@ -0,0 +1,48 @@
+﻿using System;
+using System.Globalization;
+using System.Text;
+
+namespace Microsoft.GS.DPS.Storage.Document
+{
+    //Position of the last returned document in the (ImportedTime, id) descending order.
+    //It is handed to the client as an opaque continuation token to fetch the next page without Skip.
+    public class DocumentCursor
+    {
+        public DateTime ImportedTime { get; }
+        public Guid Id { get; }
+
+        public DocumentCursor(DateTime importedTime, Guid id)
+        {
+            ImportedTime = DateTime.SpecifyKind(importedTime.ToUniversalTime(), DateTimeKind.Utc);
+            Id = id;
+        }
+
+        public static string Encode(Entities.Document document)
+        {
+            var cursor = new DocumentCursor(document.ImportedTime, document.id);
+            var value = $"{cursor.ImportedTime.Ticks.ToString(CultureInfo.InvariantCulture)}|{cursor.Id:N}";
+            return Convert.ToBase64String(Encoding.UTF8.GetBytes(value));
+        }
+
+        public static bool TryDecode(string? token, out DocumentCursor? cursor)
+        {
+            cursor = null;
+            if (string.IsNullOrEmpty(token)) return false;
+
+            var buffer = new byte[token.Length];
+            if (!Convert.TryFromBase64String(token, buffer, out var length)) return false;
+
+            var parts = Encoding.UTF8.GetString(buffer, 0, length).Split('|');
+            if (parts.Length != 2
+                || !long.TryParse(parts[0], NumberStyles.Integer, CultureInfo.InvariantCulture, out var ticks)
+                || ticks < DateTime.MinValue.Ticks || ticks > DateTime.MaxValue.Ticks
+                || !Guid.TryParseExact(parts[1], "N", out var id))
+            {
+                return false;
+            }
+
+            cursor = new DocumentCursor(new DateTime(ticks, DateTimeKind.Utc), id);
+            return true;
+        }
+    }
+}
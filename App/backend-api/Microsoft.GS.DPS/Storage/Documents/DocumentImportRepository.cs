@@ -0,0 +1,149 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+// Licensed under the MIT License.
+
+using Microsoft.GS.DPS.Model.KernelMemory;
+using Microsoft.GS.DPS.Storage.Components;
+using MongoDB.Driver;
+
+namespace Microsoft.GS.DPS.Storage.Document
+{
+    //Persistent state of the document imports, written before the import is acknowledged,
+    //so accepted imports are not lost when the host restarts before completing them.
+    public class DocumentImportRepository
+    {
+        private readonly IMongoCollection<Entities.DocumentImport> _collection;
+
+        public DocumentImportRepository(IMongoDatabase database, string collectionName)
+        {
+            _collection = database.GetCollection<Entities.DocumentImport>(collectionName);
+
+            // if Database is empty, create a new collection
+            if (_collection == null)
+            {
+                database.CreateCollection(collectionName);
+                _collection = database.GetCollection<Entities.DocumentImport>(collectionName);
+            }
+
+            EnsureIndexesOnField(nameof(Entities.DocumentImport.DocumentId));
+            EnsureIndexesOnField(nameof(Entities.DocumentImport.State));
+        }
+
+        private void EnsureIndexesOnField(string indexFieldName)
+        {
+            var indexKeysDefinition = Builders<Entities.DocumentImport>.IndexKeys.Ascending(indexFieldName);
+            var indexModel = new CreateIndexModel<Entities.DocumentImport>(indexKeysDefinition);
+
+            // Check if the index already exists
+            var indexes = _collection.Indexes.List().ToList();
+            var indexExists = indexes.Any(index => index["key"].AsBsonDocument.Contains(indexFieldName));
+
+            if (!indexExists)
+            {
+                _collection.Indexes.CreateOne(indexModel);
+            }
+        }
+
+        /// <summary>
+        /// Create or update the import of a document
+        /// </summary>
+        /// <param name="job">Document import</param>
+        /// <param name="state">Current state of the import</param>
+        /// <param name="owner">Instance processing the import</param>
+        /// <param name="error">Error message, when the import failed</param>
+        /// <param name="cancellationToken"></param>
+        /// <returns></returns>
+        public async Task SaveAsync(DocumentImportJob job, DocumentImportState state, string owner, string? error = null, CancellationToken cancellationToken = default)
+        {
+            var newId = Guid.NewGuid();
+            var now = DateTime.UtcNow;
+            var update = Builders<Entities.DocumentImport>.Update
+                .Set(x => x.FileName, job.FileName)
+                .Set(x => x.MimeType, job.MimeType)
+                .Set(x => x.StartTime, job.StartTime)
+                .Set(x => x.State, state)
+                .Set(x => x.Error, error)
+                .Set(x => x.UpdatedTime, now)
+                .Set(x => x.Owner, owner)
+                .Set(x => x.LeaseTime, now)
+                .SetOnInsert(x => x.id, newId)
+                .SetOnInsert(x => x.__partitionkey, CosmosDBEntityBase.GetKey(newId, 9999));
+
+            await _collection.UpdateOneAsync(Builders<Entities.DocumentImport>.Filter.Eq(x => x.DocumentId, job.DocumentId),
+                                             update,
+                                             new UpdateOptions { IsUpsert = true },
+                                             cancellationToken);
+        }
+
+        /// <summary>
+        /// Get the import of a document
+        /// </summary>
+        /// <param name="documentId"></param>
+        /// <param name="cancellationToken"></param>
+        /// <returns></returns>
+        public async Task<Entities.DocumentImport?> GetAsync(string documentId, CancellationToken cancellationToken = default)
+        {
+            return await _collection.Find(Builders<Entities.DocumentImport>.Filter.Eq(x => x.DocumentId, documentId))
+                                    .FirstOrDefaultAsync(cancellationToken);
+        }
+
+        /// <summary>
+        /// Extend the lease of the unfinished imports processed by the given instance
+        /// </summary>
+        /// <param name="owner">Instance processing the imports</param>
+        /// <param name="cancellationToken"></param>
+        /// <returns></returns>
+        public async Task RenewLeasesAsync(string owner, CancellationToken cancellationToken = default)
+        {
+            var filter = Builders<Entities.DocumentImport>.Filter.Eq(x => x.Owner, owner) & Unfinished();
+            await _collection.UpdateManyAsync(filter,
+                                              Builders<Entities.DocumentImport>.Update.Set(x => x.LeaseTime, DateTime.UtcNow),
+                                              cancellationToken: cancellationToken);
+        }
+
+        /// <summary>
+        /// Take over an unfinished import whose lease expired, e.g. because the instance processing it stopped.
+        /// The lease is taken atomically, so the import is resumed by one instance only.
+        /// </summary>
+        /// <param name="owner">Instance resuming the import</param>
+        /// <param name="leaseExpiration">Imports with a lease older than this are taken over</param>
+        /// <param name="cancellationToken"></param>
+        /// <returns>The import taken over, oldest first, or null if there are none left</returns>
+        public async Task<Entities.DocumentImport?> ClaimExpiredAsync(string owner, DateTime leaseExpiration, CancellationToken cancellationToken = default)
+        {
+            // Imports stored before leases were introduced don't have a lease time
+            var filter = Unfinished()
+                         & (Builders<Entities.DocumentImport>.Filter.Lt(x => x.LeaseTime, leaseExpiration)
+                            | Builders<Entities.DocumentImport>.Filter.Exists(x => x.LeaseTime, false));
+            var update = Builders<Entities.DocumentImport>.Update
+                .Set(x => x.Owner, owner)
+                .Set(x => x.LeaseTime, DateTime.UtcNow);
+
+            return await _collection.FindOneAndUpdateAsync(filter,
+                                                           update,
+                                                           new FindOneAndUpdateOptions<Entities.DocumentImport>
+                                                           {
+                                                               Sort = Builders<Entities.DocumentImport>.Sort.Ascending(x => x.StartTime),
+                                                               ReturnDocument = ReturnDocument.After
+                                                           },
+                                                           cancellationToken);
+        }
+
+        private static FilterDefinition<Entities.DocumentImport> Unfinished()
+        {
+            return Builders<Entities.DocumentImport>.Filter.Nin(x => x.State, new[] { DocumentImportState.Completed, DocumentImportState.Failed });
+        }
+
+        /// <summary>
+        /// Delete the imports completed or failed before the given time
+        /// </summary>
+        /// <param name="before"></param>
+        /// <param name="cancellationToken"></param>
+        /// <returns></returns>
+        public async Task DeleteFinishedAsync(DateTime before, CancellationToken cancellationToken = default)
+        {
+            var filter = Builders<Entities.DocumentImport>.Filter.In(x => x.State, new[] { DocumentImportState.Completed, DocumentImportState.Failed })
+                         & Builders<Entities.DocumentImport>.Filter.Lt(x => x.UpdatedTime, before);
+            await _collection.DeleteManyAsync(filter, cancellationToken);
+        }
+    }
+}
@@ -6,6 +6,10 @@ using System.Collections.Specialized;
 using MongoDB.Driver;
 using System.ComponentModel;
 using MongoDB.Bson;
+using System.Collections.Concurrent;
+using System.Collections.ObjectModel;
+using System.Security.Cryptography;
+using System.Text;
 
 namespace Microsoft.GS.DPS.Storage.Document
 {
@@ -13,7 +17,18 @@ namespace Microsoft.GS.DPS.Storage.Document
 
     public class DocumentRepository 
     {
+        // Facet and record counts are cached per filter signature and dropped on every write
+        private static readonly TimeSpan s_facetCacheDuration = TimeSpan.FromMinutes(1);
+        private const int MaxCachedFacetSets = 256;
+        private const string AllDocumentsSignature = "all";
+
+        // Pages are always sorted by (ImportedTime, id) so that continuation tokens can resume from the last document
+        private static readonly SortDefinition<Entities.Document> s_pageOrder = Builders<Entities.Document>.Sort.Descending(x => x.ImportedTime)
+                                                                                                               .Descending(x => x.id);
+
         private readonly IMongoCollection<Entities.Document> _collection;
+        private readonly ConcurrentDictionary<string, (DateTime Expiration, IReadOnlyDictionary<string, IReadOnlyDictionary<string, int>> Facets)> _facetCache = new();
+        private readonly ConcurrentDictionary<string, (DateTime Expiration, int Count)> _countCache = new();
         public DocumentRepository(IMongoDatabase database, string collectionName) 
         {
             _collection = database.GetCollection<Entities.Document>(collectionName);
@@ -29,6 +44,7 @@ namespace Microsoft.GS.DPS.Storage.Document
             EnsureIndexesOnField("ImportedTime");
             EnsureIndexesOnField("DocumentId");
             EnsureIndexesOnField("FileName");
+            EnsureCompoundIndexOnFields("ImportedTime", "_id");
         }
 
         private void EnsureIndexesOnField(string indexFieldName)
@@ -46,16 +62,33 @@ namespace Microsoft.GS.DPS.Storage.Document
             }
         }
 
+        private void EnsureCompoundIndexOnFields(params string[] indexFieldNames)
+        {
+            var indexKeysDefinition = Builders<Entities.Document>.IndexKeys.Combine(
+                indexFieldNames.Select(field => Builders<Entities.Document>.IndexKeys.Descending(field)));
+            var indexModel = new CreateIndexModel<Entities.Document>(indexKeysDefinition);
+
+            // Check if an index with exactly these keys already exists
+            var indexes = _collection.Indexes.List().ToList();
+            var indexExists = indexes.Any(index => index["key"].AsBsonDocument.Names.SequenceEqual(indexFieldNames));
+
+            if (!indexExists)
+            {
+                _collection.Indexes.CreateOne(indexModel);
+            }
+        }
+
         public async Task<IEnumerable<Entities.Document>> GetAllDocuments()
         {
-            //Get All Records then get only Keywords field.
+            //Get All Records then get only DocumentId and Keywords fields.
             //This is to avoid getting the whole document and only get the keywords field
             return await _collection.Find(Builders<Entities.Document>.Filter.Empty)
-                                    .Project<Entities.Document>(Builders<Entities.Document>.Projection.Include(x => x.Keywords))
+                                    .Project<Entities.Document>(Builders<Entities.Document>.Projection.Include(x => x.DocumentId)
+                                                                                                     .Include(x => x.Keywords))
                                     .ToListAsync();
         }
 
-        public async Task<QueryResultSet> GetAllDocumentsByPageAsync(int pageNumber, int pageSize, DateTime? startDate, DateTime? endDate)
+        public async Task<QueryResultSet> GetAllDocumentsByPageAsync(int pageNumber, int pageSize, DateTime? startDate, DateTime? endDate, string? continuationToken = null)
         {
             //Make filter by StartDate and EndDate
             //Just in case StartDate is null and EndDate only, define filter between Current and EndDate
@@ -64,22 +97,11 @@ namespace Microsoft.GS.DPS.Storage.Document
 
             //FilterDefinition<Entities.Document> filter = Builders<Entities.Document>.Filter.Empty;
 
-            List<FilterDefinition<Entities.Document>> filters = new List<FilterDefinition<Entities.Document>>();
-
-            if (startDate.HasValue) {
-                // startDate = startDate?.Date.AddHours(0).AddMinutes(0).AddSeconds(0);
-                // UI itself is calculates the start date so we dont need to add above line -bugID:8948
-                filters.Add(Builders<Entities.Document>.Filter.Gte(x => x.ImportedTime, startDate));
-                filters.Add(Builders<Entities.Document>.Filter.Lte(x => x.ImportedTime, endDate ?? DateTime.Now));
-
-            }
-
-            var combinedFilter = filters.Count > 0 ? Builders<Entities.Document>.Filter.And(filters) : Builders<Entities.Document>.Filter.Empty;
-
-            return await this.GetDocumentsByPageAsync(combinedFilter,
-                                                      Builders<Entities.Document>.Sort.Descending(x => x.ImportedTime),
+            return await this.GetDocumentsByPageAsync(BuildImportedTimeFilter(startDate, endDate),
+                                                      GetImportedTimeSignature(startDate, endDate),
                                                       pageNumber,
-                                                      pageSize);
+                                                      pageSize,
+                                                      continuationToken);
         }
 
         public async Task<QueryResultSet> FindByTagsAsync(Dictionary<string,string> keywords, int pageNumber, int pageSize)
@@ -96,40 +118,81 @@ namespace Microsoft.GS.DPS.Storage.Document
             }
 
             var combinedFilter = Builders<Entities.Document>.Filter.And(filters);
+            var signature = "tags|" + string.Join("|", keywords.OrderBy(k => k.Key, StringComparer.Ordinal).Select(k => $"{k.Key}={k.Value}"));
 
             return await this.GetDocumentsByPageAsync(combinedFilter,
-                                                      Builders<Entities.Document>.Sort.Descending(x => x.ImportedTime),
+                                                      signature,
                                                       pageNumber,
                                                       pageSize);
         }
 
         private async Task<QueryResultSet> GetDocumentsByPageAsync(FilterDefinition<Entities.Document> filterDefinition, 
-                                                                                   SortDefinition<Entities.Document> sortDefinition, 
-                                                                                   int pageNumber, 
-                                                                                   int pageSize)
+                                                                   string filterSignature,
+                                                                   int pageNumber, 
+                                                                   int pageSize,
+                                                                   string? continuationToken = null)
         {
+            var pageFilter = filterDefinition;
             var skip = (pageNumber - 1) * pageSize;
-            var documents = await _collection.Find(filterDefinition)
-                                             .Sort(sortDefinition)
+
+            //With a continuation token, resume right after the last returned document instead of skipping
+            if (!string.IsNullOrEmpty(continuationToken))
+            {
+                if (!DocumentCursor.TryDecode(continuationToken, out var cursor))
+                {
+                    throw new ArgumentException("Invalid continuation token", nameof(continuationToken));
+                }
+
+                pageFilter &= Builders<Entities.Document>.Filter.Lt(x => x.ImportedTime, cursor!.ImportedTime) |
+                              (Builders<Entities.Document>.Filter.Eq(x => x.ImportedTime, cursor.ImportedTime) &
+                               Builders<Entities.Document>.Filter.Lt(x => x.id, cursor.Id));
+                skip = 0;
+            }
+
+            //Read one more document to know if there is a next page
+            var documents = await _collection.Find(pageFilter)
+                                             .Sort(s_pageOrder)
                                              .Skip(skip)
-                                             .Limit(pageSize)
+                                             .Limit(pageSize + 1)
                                              .ToListAsync();
 
-            var totalCount = await GetTotalCountAsync(filterDefinition);
+            var hasMore = documents.Count > pageSize;
+            if (hasMore)
+            {
+                documents.RemoveAt(documents.Count - 1);
+            }
+
+            var totalCount = await GetTotalCountAsync(filterDefinition, filterSignature);
 
             return new QueryResultSet() {
                 Results = documents,
                 TotalPages = GetTotalPages(pageSize, totalCount),
                 TotalRecords = totalCount,
-                CurrentPage = pageNumber
-
+                CurrentPage = pageNumber,
+                ContinuationToken = hasMore ? DocumentCursor.Encode(documents[^1]) : null
             };
 
         }
 
-        private async Task<int> GetTotalCountAsync(FilterDefinition<Entities.Document> filterDefinition)
+        private async Task<int> GetTotalCountAsync(FilterDefinition<Entities.Document> filterDefinition, string filterSignature)
         {
-            return (int)await _collection.CountDocumentsAsync(filterDefinition);
+            if (_countCache.TryGetValue(filterSignature, out var cached) && cached.Expiration > DateTime.UtcNow)
+            {
+                return cached.Count;
+            }
+
+            //The unfiltered count comes from the collection metadata
+            var count = filterSignature == AllDocumentsSignature
+                ? (int)await _collection.EstimatedDocumentCountAsync()
+                : (int)await _collection.CountDocumentsAsync(filterDefinition);
+
+            if (_countCache.Count >= MaxCachedFacetSets)
+            {
+                _countCache.Clear();
+            }
+            _countCache[filterSignature] = (DateTime.UtcNow + s_facetCacheDuration, count);
+
+            return count;
         }
 
         private int GetTotalPages(int pageSize, double recordsCount)
@@ -140,18 +203,21 @@ namespace Microsoft.GS.DPS.Storage.Document
         public async Task<Entities.Document> RegisterAsync(Entities.Document document)
         {
             await _collection.InsertOneAsync(document);
+            InvalidateCaches();
             return document;
         }
 
         public async Task<Entities.Document> UpdateAsync(Entities.Document document)
         {
             var result = await _collection.ReplaceOneAsync(Builders<Entities.Document>.Filter.Eq(x => x.id, document.id), document);
+            InvalidateCaches();
             return (result.IsAcknowledged && result.ModifiedCount > 0) ? document : null;
         }
 
         public async Task DeleteAsync(Guid id)
         {
             await _collection.DeleteOneAsync(Builders<Entities.Document>.Filter.Eq(x => x.id, id));
+            InvalidateCaches();
         }
 
         async public Task<Entities.Document> FindByIdAsync(Guid id)
@@ -167,6 +233,40 @@ namespace Microsoft.GS.DPS.Storage.Document
         }
 
 
+        //Keep only the registered documents imported within the date range, in the given (relevance) order.
+        //Only DocumentId is read, so the whole candidate list costs one narrow query.
+        async public Task<string[]> FilterDocumentIdsAsync(string[] documentIds, DateTime? startDate, DateTime? endDate)
+        {
+            var filterDefinition = Builders<Entities.Document>.Filter.In(x => x.DocumentId, documentIds);
+
+            if (startDate.HasValue)
+            {
+                filterDefinition &= Builders<Entities.Document>.Filter.Gte(x => x.ImportedTime, startDate.Value);
+            }
+
+            if (endDate.HasValue)
+            {
+                filterDefinition &= Builders<Entities.Document>.Filter.Lte(x => x.ImportedTime, endDate.Value);
+            }
+
+            var matches = await _collection.Find(filterDefinition)
+                                           .Project(x => x.DocumentId)
+                                           .ToListAsync();
+
+            var matchSet = new HashSet<string>(matches);
+            return documentIds.Where(matchSet.Contains).ToArray();
+        }
+
+        //Get the documents in the order of the given ids
+        async public Task<List<Entities.Document>> FindByDocumentIdsInOrderAsync(string[] documentIds)
+        {
+            var documents = await _collection.Find(Builders<Entities.Document>.Filter.In(x => x.DocumentId, documentIds))
+                                             .ToListAsync();
+
+            var documentsById = documents.GroupBy(d => d.DocumentId).ToDictionary(g => g.Key, g => g.First());
+            return documentIds.Where(documentsById.ContainsKey).Select(id => documentsById[id]).ToList();
+        }
+
         async public Task<QueryResultSet> FindByDocumentIdsAsync(string[] documentIds)
         {
             return await this.FindByDocumentIdsAsync(documentIds, 1, 100);
@@ -176,7 +276,121 @@ namespace Microsoft.GS.DPS.Storage.Document
                                                                 int pageNumber, 
                                                                 int pageSize, 
                                                                 DateTime? startDate = null, 
-                                                                DateTime? endDate = null)
+                                                                DateTime? endDate = null,
+                                                                string? continuationToken = null)
+        {
+            var filterDefinition = BuildDocumentIdsFilter(documentIds, startDate, endDate);
+            var signature = $"ids|{HashDocumentIds(documentIds)}|{startDate:O}|{endDate:O}";
+
+            return await this.GetDocumentsByPageAsync(filterDefinition, signature, pageNumber, pageSize, continuationToken);
+        }
+
+        public async Task<IReadOnlyDictionary<string, IReadOnlyDictionary<string, int>>> GetKeywordFacetsAsync(DateTime? startDate, DateTime? endDate)
+        {
+            var signature = GetImportedTimeSignature(startDate, endDate);
+            return await this.GetKeywordFacetsAsync(signature, BuildImportedTimeFilter(startDate, endDate));
+        }
+
+        public async Task<IReadOnlyDictionary<string, IReadOnlyDictionary<string, int>>> GetKeywordFacetsByDocumentIdsAsync(string[] documentIds,
+                                                                                                                          DateTime? startDate = null,
+                                                                                                                          DateTime? endDate = null)
+        {
+            var signature = $"ids|{HashDocumentIds(documentIds)}|{startDate:O}|{endDate:O}";
+            return await this.GetKeywordFacetsAsync(signature, BuildDocumentIdsFilter(documentIds, startDate, endDate));
+        }
+
+        private async Task<IReadOnlyDictionary<string, IReadOnlyDictionary<string, int>>> GetKeywordFacetsAsync(string signature,
+                                                                                                               FilterDefinition<Entities.Document> filterDefinition)
+        {
+            if (_facetCache.TryGetValue(signature, out var cached) && cached.Expiration > DateTime.UtcNow)
+            {
+                return cached.Facets;
+            }
+
+            //Count the documents per keyword value in one pass on the server:
+            //Keywords is stored as { Category: "value1, value2" }, so each category is unwound, then each value.
+            //Values are deduplicated per document first, so a value repeated in a document counts once, as in DataCacheManager.
+            var groups = await _collection.Aggregate()
+                                          .Match(filterDefinition)
+                                          .AppendStage<BsonDocument>(new BsonDocument("$match", new BsonDocument("Keywords", new BsonDocument("$type", "object"))))
+                                          .AppendStage<BsonDocument>(new BsonDocument("$project", new BsonDocument
+                                          {
+                                              { "_id", 0 },
+                                              { "document", "$DocumentId" },
+                                              { "keyword", new BsonDocument("$objectToArray", "$Keywords") }
+                                          }))
+                                          .AppendStage<BsonDocument>(new BsonDocument("$unwind", "$keyword"))
+                                          .AppendStage<BsonDocument>(new BsonDocument("$project", new BsonDocument
+                                          {
+                                              { "document", 1 },
+                                              { "category", "$keyword.k" },
+                                              { "value", new BsonDocument("$split", new BsonArray { "$keyword.v", "," }) }
+                                          }))
+                                          .AppendStage<BsonDocument>(new BsonDocument("$unwind", "$value"))
+                                          .AppendStage<BsonDocument>(new BsonDocument("$project", new BsonDocument
+                                          {
+                                              { "document", 1 },
+                                              { "category", 1 },
+                                              { "value", new BsonDocument("$trim", new BsonDocument("input", "$value")) }
+                                          }))
+                                          .AppendStage<BsonDocument>(new BsonDocument("$match", new BsonDocument("value", new BsonDocument("$ne", string.Empty))))
+                                          .AppendStage<BsonDocument>(new BsonDocument("$group", new BsonDocument
+                                          {
+                                              { "_id", new BsonDocument { { "document", "$document" }, { "category", "$category" }, { "value", "$value" } } }
+                                          }))
+                                          .AppendStage<BsonDocument>(new BsonDocument("$group", new BsonDocument
+                                          {
+                                              { "_id", new BsonDocument { { "category", "$_id.category" }, { "value", "$_id.value" } } },
+                                              { "count", new BsonDocument("$sum", 1) }
+                                          }))
+                                          .ToListAsync();
+
+            var facets = groups.GroupBy(g => g["_id"]["category"].AsString)
+                               .OrderBy(g => g.Key)
+                               .ToDictionary(g => g.Key,
+                                             g => (IReadOnlyDictionary<string, int>)new ReadOnlyDictionary<string, int>(
+                                                      g.OrderBy(v => v["_id"]["value"].AsString)
+                                                       .ToDictionary(v => v["_id"]["value"].AsString, v => v["count"].ToInt32())));
+
+            var result = new ReadOnlyDictionary<string, IReadOnlyDictionary<string, int>>(facets);
+
+            if (_facetCache.Count >= MaxCachedFacetSets)
+            {
+                _facetCache.Clear();
+            }
+            _facetCache[signature] = (DateTime.UtcNow + s_facetCacheDuration, result);
+
+            return result;
+        }
+
+        private void InvalidateCaches()
+        {
+            _facetCache.Clear();
+            _countCache.Clear();
+        }
+
+        private static FilterDefinition<Entities.Document> BuildImportedTimeFilter(DateTime? startDate, DateTime? endDate)
+        {
+            List<FilterDefinition<Entities.Document>> filters = new List<FilterDefinition<Entities.Document>>();
+
+            if (startDate.HasValue) {
+                // startDate = startDate?.Date.AddHours(0).AddMinutes(0).AddSeconds(0);
+                // UI itself is calculates the start date so we dont need to add above line -bugID:8948
+                filters.Add(Builders<Entities.Document>.Filter.Gte(x => x.ImportedTime, startDate));
+                filters.Add(Builders<Entities.Document>.Filter.Lte(x => x.ImportedTime, endDate ?? DateTime.Now));
+
+            }
+
+            return filters.Count > 0 ? Builders<Entities.Document>.Filter.And(filters) : Builders<Entities.Document>.Filter.Empty;
+        }
+
+        private static string GetImportedTimeSignature(DateTime? startDate, DateTime? endDate)
+        {
+            //Same condition as BuildImportedTimeFilter: without start date every document is selected
+            return startDate.HasValue ? $"range|{startDate:O}|{endDate:O}" : AllDocumentsSignature;
+        }
+
+        private static FilterDefinition<Entities.Document> BuildDocumentIdsFilter(string[] documentIds, DateTime? startDate, DateTime? endDate)
         {
             var filterDefinition = Builders<Entities.Document>.Filter.In(x => x.DocumentId, documentIds);
 
@@ -193,8 +407,13 @@ namespace Microsoft.GS.DPS.Storage.Document
                 filterDefinition &= timeFilter;
             }
 
+            return filterDefinition;
+        }
 
-            return await this.GetDocumentsByPageAsync(filterDefinition, Builders<Entities.Document>.Sort.Descending(x => x.ImportedTime), pageNumber, pageSize);
+        private static string HashDocumentIds(string[] documentIds)
+        {
+            var ids = string.Join("\n", documentIds.OrderBy(id => id, StringComparer.Ordinal));
+            return Convert.ToHexString(SHA256.HashData(Encoding.UTF8.GetBytes(ids)));
         }
     }
 }
@@ -0,0 +1,26 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+// Licensed under the MIT License.
+
+using System;
+using Microsoft.GS.DPS.Model.KernelMemory;
+using Microsoft.GS.DPS.Storage.Components;
+using MongoDB.Bson.Serialization.Attributes;
+
+namespace Microsoft.GS.DPS.Storage.Document.Entities
+{
+    //Import of an uploaded document, persisted so the post-processing is resumed after a host restart
+    public class DocumentImport : CosmosDBEntityBase
+    {
+        public string DocumentId { get; set; }
+        public string FileName { get; set; }
+        public string MimeType { get; set; }
+        public DateTime StartTime { get; set; }
+        [BsonRepresentation(MongoDB.Bson.BsonType.String)]
+        public DocumentImportState State { get; set; }
+        public string? Error { get; set; }
+        public DateTime UpdatedTime { get; set; }
+        // Instance processing the import, and last time it confirmed it's still working on it
+        public string? Owner { get; set; }
+        public DateTime LeaseTime { get; set; }
+    }
+}
@@ -12,5 +12,6 @@ namespace Microsoft.GS.DPS.Storage.Document
         public int TotalPages { get; set; }
         public int TotalRecords { get; set; }
         public int CurrentPage { get; set; }
+        public string? ContinuationToken { get; set; }
     }
 }
@@ -3,8 +3,10 @@ export interface DocumentResults {
     documents: Document[]
     currentPage: number
     keywordFilterInfo: {[key:string]: string[]}
+    keywordFacets?: {[key:string]: {[value:string]: number}}
     totalPages: number
     totalRecords: number
+    continuationToken?: string
     // indexName: string
     // result: any
     // results: Result[]
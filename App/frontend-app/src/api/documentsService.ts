@@ -12,6 +12,7 @@ export async function searchDocuments(payload: SearchRequest): Promise<DocumentR
         pageNumber: payload.currentPage || 1,
         ...(payload.startDate && { startDate: payload.startDate }),
         ...(payload.endDate && { endDate: payload.endDate }),
+        ...(payload.continuationToken && { continuationToken: payload.continuationToken }),
         pageSize: 10,
         keyword: payload.queryText, // Assuming queryText is a part of your SearchRequest
         tags: {
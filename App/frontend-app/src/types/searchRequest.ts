@@ -11,6 +11,7 @@ export interface SearchRequest {
     };
     startDate?: string;
     endDate?: string;
+    continuationToken?: string;
 }
 
 export interface FacetValue {
@@ -25,6 +25,12 @@ public sealed class MemoryWebClient : IKernelMemory
 {
     private static readonly JsonSerializerOptions s_caseInsensitiveJsonOptions = new() { PropertyNameCaseInsensitive = true };
 
+    // Max time a single status wait request is kept open, below the default HttpClient timeout
+    private const int MaxStatusWaitSecs = 60;
+
+    // Delay before asking again the status of a document not found yet, e.g. right after the upload
+    private static readonly TimeSpan s_statusNotFoundRetryDelay = TimeSpan.FromSeconds(1);
+
     private readonly HttpClient _client;
 
     /// <summary>
@@ -272,6 +278,54 @@ public sealed class MemoryWebClient : IKernelMemory
         return status;
     }
 
+    /// <summary>
+    /// Wait for a document to be ready. The service holds each request open until the ingestion
+    /// pipeline completes, notifying the client as soon as the document is ready, so there is
+    /// no need to poll the document status.
+    /// </summary>
+    /// <param name="documentId">Document ID</param>
+    /// <param name="timeout">Max time to wait</param>
+    /// <param name="index">Optional index name</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    /// <returns>True if the document is ready, False if the timeout expired before the document was ready</returns>
+    public async Task<bool> WaitForDocumentReadyAsync(
+        string documentId,
+        TimeSpan timeout,
+        string? index = null,
+        CancellationToken cancellationToken = default)
+    {
+        DateTimeOffset deadline = DateTimeOffset.UtcNow + timeout;
+        while (true)
+        {
+            TimeSpan remaining = deadline - DateTimeOffset.UtcNow;
+            if (remaining <= TimeSpan.Zero) { return false; }
+
+            int waitSecs = (int)Math.Ceiling(Math.Min(remaining.TotalSeconds, MaxStatusWaitSecs));
+            var url = Constants.HttpUploadStatusWaitEndpointWithParams
+                .Replace(Constants.HttpIndexPlaceholder, index, StringComparison.OrdinalIgnoreCase)
+                .Replace(Constants.HttpDocumentIdPlaceholder, documentId, StringComparison.OrdinalIgnoreCase)
+                .Replace(Constants.HttpTimeoutPlaceholder, waitSecs.ToString(CultureInfo.InvariantCulture), StringComparison.OrdinalIgnoreCase)
+                .CleanUrlPath();
+            using HttpResponseMessage response = await this._client.GetAsync(url, cancellationToken).ConfigureAwait(false);
+            if (response.StatusCode == HttpStatusCode.NotFound)
+            {
+                // The pipeline status might not be stored yet right after the upload, retry until the deadline
+                TimeSpan delay = s_statusNotFoundRetryDelay < remaining ? s_statusNotFoundRetryDelay : remaining;
+                await Task.Delay(delay, cancellationToken).ConfigureAwait(false);
+                continue;
+            }
+
+            response.EnsureSuccessStatusCode();
+
+            var json = await response.Content.ReadAsStringAsync(cancellationToken).ConfigureAwait(false);
+            DataPipelineStatus? status = JsonSerializer.Deserialize<DataPipelineStatus>(json);
+            if (status is { Completed: true, Empty: false })
+            {
+                return true;
+            }
+        }
+    }
+
     /// <inheritdoc />
     public async Task<StreamableFileContent> ExportFileAsync(
         string documentId,
@@ -29,7 +29,7 @@ namespace Microsoft.KernelMemory.MemoryDb.AzureAISearch;
 /// * support custom schema
 /// * support custom Azure AI Search logic
 /// </summary>
-public class AzureAISearchMemory : IMemoryDb, IMemoryDbUpsertBatch
+public class AzureAISearchMemory : IMemoryDb, IMemoryDbUpsertBatch, IMemoryDbKeywordSearch
 {
     private readonly ITextEmbeddingGenerator _embeddingGenerator;
     private readonly ILogger<AzureAISearchMemory> _log;
@@ -242,6 +242,68 @@ public class AzureAISearchMemory : IMemoryDb, IMemoryDbUpsertBatch
         }
     }
 
+    /// <inheritdoc />
+    public async IAsyncEnumerable<(MemoryRecord, double)> GetKeywordMatchesAsync(
+        string index,
+        string text,
+        ICollection<MemoryFilter>? filters = null,
+        int limit = 1,
+        bool withEmbeddings = false,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        var client = this.GetSearchClient(index);
+
+        // Full text search only, ranked by Azure AI Search with BM25. All the text fields are
+        // searchable, restrict the search to the payload, holding the text of the record, so
+        // the terms are not matched against IDs and tags.
+        SearchOptions options = new();
+        options.SearchFields.Add(AzureAISearchMemoryRecord.PayloadField);
+
+        if (limit > 0)
+        {
+            options.Size = limit;
+            this._log.LogDebug("Max results: {0}", limit);
+        }
+
+        // Remove empty filters
+        filters = filters?.Where(f => !f.IsEmpty()).ToList();
+
+        if (filters is { Count: > 0 })
+        {
+            options.Filter = AzureAISearchFiltering.BuildSearchFilter(filters);
+            this._log.LogDebug("Filtering records, condition: {0}", options.Filter);
+        }
+
+        Response<SearchResults<AzureAISearchMemoryRecord>>? searchResult = null;
+        try
+        {
+            searchResult = await client
+                .SearchAsync<AzureAISearchMemoryRecord>(text, options, cancellationToken: cancellationToken)
+                .ConfigureAwait(false);
+        }
+        catch (RequestFailedException e) when (e.Status == 404)
+        {
+            this._log.LogWarning("Not found: {0}", e.Message);
+            // Index not found, no data to return
+        }
+
+        if (searchResult == null) { yield break; }
+
+        var count = 0;
+        await foreach (SearchResult<AzureAISearchMemoryRecord>? doc in searchResult.Value.GetResultsAsync().ConfigureAwait(false))
+        {
+            if (doc == null) { continue; }
+
+            yield return (doc.Document.ToMemoryRecord(withEmbeddings), doc.Score ?? 0);
+
+            // Stop after returning the amount requested, even if storage is returning more records
+            if (limit > 0 && ++count >= limit)
+            {
+                break;
+            }
+        }
+    }
+
     /// <inheritdoc />
     public async IAsyncEnumerable<MemoryRecord> GetListAsync(
         string index,
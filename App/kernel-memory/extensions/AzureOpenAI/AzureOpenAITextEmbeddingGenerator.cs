@@ -17,7 +17,7 @@ using Microsoft.SemanticKernel.Connectors.OpenAI;
 namespace Microsoft.KernelMemory.AI.AzureOpenAI;
 
 [Experimental("KMEXP01")]
-public sealed class AzureOpenAITextEmbeddingGenerator : ITextEmbeddingGenerator, ITextEmbeddingBatchGenerator
+public sealed class AzureOpenAITextEmbeddingGenerator : ITextEmbeddingGenerator, ITextEmbeddingBatchGenerator, ITextEmbeddingModelInfo
 {
     private readonly ITextTokenizer _textTokenizer;
     private readonly AzureOpenAITextEmbeddingGenerationService _client;
@@ -92,6 +92,9 @@ public sealed class AzureOpenAITextEmbeddingGenerator : ITextEmbeddingGenerator,
     /// <inheritdoc/>
     public int MaxBatchSize { get; }
 
+    /// <inheritdoc/>
+    public string ModelId => this._deployment;
+
     /// <inheritdoc/>
     public int CountTokens(string text)
     {
@@ -19,7 +19,7 @@ using Microsoft.KernelMemory.Diagnostics;
 namespace Microsoft.KernelMemory.AI.AzureOpenAI;
 
 [Experimental("KMEXP01")]
-public sealed class AzureOpenAITextGenerator : ITextGenerator
+public sealed class AzureOpenAITextGenerator : ITextGenerator, ITextGenerationModelInfo
 {
     private readonly ITextTokenizer _textTokenizer;
     private readonly OpenAIClient _client;
@@ -101,6 +101,9 @@ public sealed class AzureOpenAITextGenerator : ITextGenerator
     /// <inheritdoc/>
     public int MaxTokenTotal { get; }
 
+    /// <inheritdoc/>
+    public string ModelId => this._deployment;
+
     /// <inheritdoc/>
     public int CountTokens(string text)
     {
@@ -20,7 +20,7 @@ namespace Microsoft.KernelMemory.AI.OpenAI;
 /// supporting OpenAI HTTP schema.
 /// </summary>
 [Experimental("KMEXP01")]
-public sealed class OpenAITextEmbeddingGenerator : ITextEmbeddingGenerator, ITextEmbeddingBatchGenerator
+public sealed class OpenAITextEmbeddingGenerator : ITextEmbeddingGenerator, ITextEmbeddingBatchGenerator, ITextEmbeddingModelInfo
 {
     private readonly ITextEmbeddingGenerationService _client = null!;
     private readonly ITextTokenizer _textTokenizer;
@@ -91,6 +91,9 @@ public sealed class OpenAITextEmbeddingGenerator : ITextEmbeddingGenerator, ITex
     /// <inheritdoc/>
     public int MaxBatchSize { get; }
 
+    /// <inheritdoc/>
+    public string ModelId => this._model;
+
     /// <inheritdoc/>
     public int CountTokens(string text)
     {
@@ -18,7 +18,7 @@ namespace Microsoft.KernelMemory.AI.OpenAI;
 /// supporting OpenAI HTTP schema, such as LM Studio HTTP API.
 /// </summary>
 [Experimental("KMEXP01")]
-public sealed class OpenAITextGenerator : ITextGenerator
+public sealed class OpenAITextGenerator : ITextGenerator, ITextGenerationModelInfo
 {
     private readonly OpenAIClient _client;
     private readonly ITextTokenizer _textTokenizer;
@@ -43,6 +43,9 @@ public sealed class OpenAITextGenerator : ITextGenerator
     /// <inheritdoc/>
     public int MaxTokenTotal { get; }
 
+    /// <inheritdoc/>
+    public string ModelId => this._model ?? string.Empty;
+
     /// <summary>
     /// Create a new instance.
     /// </summary>
@@ -0,0 +1,16 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Interface for embedding generators able to identify the model generating the embeddings,
+/// used to key the embeddings cached, so that changing model doesn't reuse incompatible vectors.
+/// The interface is not mandatory and not implemented by all generators.
+/// </summary>
+public interface ITextEmbeddingModelInfo
+{
+    /// <summary>
+    /// Identifier of the embedding model, e.g. the model name or the deployment name.
+    /// </summary>
+    string ModelId { get; }
+}
@@ -0,0 +1,16 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Interface for text generators able to identify the model generating the text, used to key
+/// the content generated and cached, e.g. summaries, so that changing model doesn't reuse it.
+/// The interface is not mandatory and not implemented by all generators.
+/// </summary>
+public interface ITextGenerationModelInfo
+{
+    /// <summary>
+    /// Identifier of the text generation model, e.g. the model name or the deployment name.
+    /// </summary>
+    string ModelId { get; }
+}
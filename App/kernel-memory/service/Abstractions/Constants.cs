@@ -23,6 +23,9 @@ public static class Constants
 
         // Form field containing the optional arguments JSON string
         public const string ArgsField = "args";
+
+        // Query param containing the max number of seconds to wait
+        public const string TimeoutField = "timeout";
     }
 
     public static class CustomContext
@@ -43,6 +46,9 @@ public static class Constants
         {
             // Used to override MaxBatchSize embedding generators config
             public const string BatchSize = "custom_embedding_generation_batch_size_int";
+
+            // Used to override the max number of tokens per batch of the parallel embedding handler
+            public const string BatchMaxTokens = "custom_embedding_generation_batch_max_tokens_int";
         }
 
         public static class Rag
@@ -110,6 +116,7 @@ public static class Constants
     public const string ReservedPayloadLastUpdateField = "last_update";
     public const string ReservedPayloadVectorProviderField = "vector_provider";
     public const string ReservedPayloadVectorGeneratorField = "vector_generator";
+    public const string ReservedPayloadTokenCountField = "token_count";
 
     // Endpoints
     public const string HttpAskEndpoint = "/ask";
@@ -117,15 +124,18 @@ public static class Constants
     public const string HttpDownloadEndpoint = "/download";
     public const string HttpUploadEndpoint = "/upload";
     public const string HttpUploadStatusEndpoint = "/upload-status";
+    public const string HttpUploadStatusWaitEndpoint = "/upload-status/wait";
     public const string HttpDocumentsEndpoint = "/documents";
     public const string HttpIndexesEndpoint = "/indexes";
     public const string HttpDeleteDocumentEndpointWithParams = $"{HttpDocumentsEndpoint}?{WebService.IndexField}={HttpIndexPlaceholder}&{WebService.DocumentIdField}={HttpDocumentIdPlaceholder}";
     public const string HttpDeleteIndexEndpointWithParams = $"{HttpIndexesEndpoint}?{WebService.IndexField}={HttpIndexPlaceholder}";
     public const string HttpUploadStatusEndpointWithParams = $"{HttpUploadStatusEndpoint}?{WebService.IndexField}={HttpIndexPlaceholder}&{WebService.DocumentIdField}={HttpDocumentIdPlaceholder}";
+    public const string HttpUploadStatusWaitEndpointWithParams = $"{HttpUploadStatusWaitEndpoint}?{WebService.IndexField}={HttpIndexPlaceholder}&{WebService.DocumentIdField}={HttpDocumentIdPlaceholder}&{WebService.TimeoutField}={HttpTimeoutPlaceholder}";
     public const string HttpDownloadEndpointWithParams = $"{HttpDownloadEndpoint}?{WebService.IndexField}={HttpIndexPlaceholder}&{WebService.DocumentIdField}={HttpDocumentIdPlaceholder}&{WebService.FilenameField}={HttpFilenamePlaceholder}";
     public const string HttpIndexPlaceholder = "{index}";
     public const string HttpDocumentIdPlaceholder = "{documentId}";
     public const string HttpFilenamePlaceholder = "{filename}";
+    public const string HttpTimeoutPlaceholder = "{timeout}";
 
     // Pipeline Handlers, Step names
     public const string PipelineStepsExtract = "extract";
@@ -219,4 +219,14 @@ public static class CustomContextExtensions
 
         return defaultValue;
     }
+
+    public static int GetCustomEmbeddingGenerationBatchMaxTokensOrDefault(this IContext? context, int defaultValue)
+    {
+        if (context.TryGetArg<int>(Constants.CustomContext.EmbeddingGeneration.BatchMaxTokens, out var customValue))
+        {
+            return customValue;
+        }
+
+        return defaultValue;
+    }
 }
@@ -0,0 +1,35 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+using System.Threading;
+
+namespace Microsoft.KernelMemory.MemoryStorage;
+
+/// <summary>
+/// Interface for memory DB adapters supporting vector search with an embedding provided by the client.
+/// The interface is not mandatory and not implemented by all connectors.
+/// Clients already holding the embedding of the text searched, e.g. to look up a cache, should check
+/// if the interface is available and leverage it to avoid generating the embedding twice.
+/// </summary>
+public interface IMemoryDbEmbeddingSearch
+{
+    /// <summary>
+    /// Get list of similar vectors (+payload), given an embedding of the text searched.
+    /// </summary>
+    /// <param name="index">Index/Collection name</param>
+    /// <param name="embedding">Embedding of the text searched, generated with the same model used by the memory DB</param>
+    /// <param name="filters">Values to match in the field used for tagging records (the field must be a list of strings)</param>
+    /// <param name="minRelevance">Minimum Cosine Similarity required</param>
+    /// <param name="limit">Max number of results</param>
+    /// <param name="withEmbeddings">Whether to include vector in the result</param>
+    /// <param name="cancellationToken">Task cancellation token</param>
+    /// <returns>List of similar vectors, starting from the most similar</returns>
+    IAsyncEnumerable<(MemoryRecord, double)> GetSimilarListAsync(
+        string index,
+        Embedding embedding,
+        ICollection<MemoryFilter>? filters = null,
+        double minRelevance = 0,
+        int limit = 1,
+        bool withEmbeddings = false,
+        CancellationToken cancellationToken = default);
+}
@@ -0,0 +1,33 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+using System.Threading;
+
+namespace Microsoft.KernelMemory.MemoryStorage;
+
+/// <summary>
+/// Interface for memory DB adapters supporting keyword (lexical) search, e.g. BM25 full text search.
+/// The interface is not mandatory and not implemented by all connectors.
+/// Clients should check if the interface is available and leverage it to combine keyword and vector search.
+/// </summary>
+public interface IMemoryDbKeywordSearch
+{
+    /// <summary>
+    /// Get list of records containing the words of the given text, ranked by lexical relevance.
+    /// </summary>
+    /// <param name="index">Index/Collection name</param>
+    /// <param name="text">Text being searched</param>
+    /// <param name="filters">Values to match in the field used for tagging records (the field must be a list of strings)</param>
+    /// <param name="limit">Max number of results</param>
+    /// <param name="withEmbeddings">Whether to include vector in the result</param>
+    /// <param name="cancellationToken">Task cancellation token</param>
+    /// <returns>List of records and relevance score, from the most relevant. The score scale depends on the implementation,
+    /// and is not comparable with vector similarity.</returns>
+    IAsyncEnumerable<(MemoryRecord, double)> GetKeywordMatchesAsync(
+        string index,
+        string text,
+        ICollection<MemoryFilter>? filters = null,
+        int limit = 1,
+        bool withEmbeddings = false,
+        CancellationToken cancellationToken = default);
+}
@@ -186,6 +186,23 @@ public sealed class DataPipeline
         [JsonPropertyOrder(16)]
         [JsonPropertyName("content_sha256")]
         public string ContentSHA256 { get; set; } = string.Empty;
+
+        /// <summary>
+        /// Number of tokens in the partition used to generate this file, if known.
+        /// </summary>
+        [JsonPropertyOrder(19)]
+        [JsonPropertyName("token_count")]
+        [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingDefault)]
+        public int TokenCount { get; set; } = 0;
+
+        /// <summary>
+        /// Embedding model whose tokenizer counted <see cref="TokenCount"/>, empty when
+        /// the model is not known, e.g. when using the default tokenizer.
+        /// </summary>
+        [JsonPropertyOrder(20)]
+        [JsonPropertyName("token_count_model")]
+        [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingDefault)]
+        public string TokenCountModel { get; set; } = string.Empty;
     }
 
     public class FileDetails : FileDetailsBase
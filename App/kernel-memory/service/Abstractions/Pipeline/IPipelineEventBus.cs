@@ -0,0 +1,39 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Threading;
+using System.Threading.Tasks;
+
+namespace Microsoft.KernelMemory.Pipeline;
+
+/// <summary>
+/// Channel used by the orchestrators to notify pipeline progress, e.g. to
+/// unblock clients waiting for a document to be ready.
+/// </summary>
+public interface IPipelineEventBus
+{
+    /// <summary>
+    /// Notify subscribers and waiters about a pipeline status change
+    /// </summary>
+    /// <param name="pipelineEvent">Event details</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    Task PublishAsync(PipelineEvent pipelineEvent, CancellationToken cancellationToken = default);
+
+    /// <summary>
+    /// Register a callback invoked for every event published.
+    /// </summary>
+    /// <param name="handler">Callback to invoke</param>
+    /// <returns>Subscription, dispose it to stop receiving events</returns>
+    IDisposable Subscribe(Action<PipelineEvent> handler);
+
+    /// <summary>
+    /// Wait for the completion of the given pipeline. The waiter is registered synchronously,
+    /// before the method returns, so callers can check the persisted status after calling
+    /// this method without the risk of missing the completion event.
+    /// </summary>
+    /// <param name="index">Index where the pipeline is running</param>
+    /// <param name="documentId">Document ID</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    /// <returns>The completion event</returns>
+    Task<PipelineEvent> WaitForCompletionAsync(string index, string documentId, CancellationToken cancellationToken = default);
+}
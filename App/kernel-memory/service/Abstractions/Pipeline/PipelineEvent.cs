@@ -0,0 +1,72 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Text.Json.Serialization;
+
+namespace Microsoft.KernelMemory.Pipeline;
+
+public enum PipelineEventTypes
+{
+    /// <summary>
+    /// A pipeline step completed and the new status has been persisted.
+    /// </summary>
+    StepCompleted = 0,
+
+    /// <summary>
+    /// All the pipeline steps completed and the final status has been persisted.
+    /// </summary>
+    PipelineCompleted = 1,
+}
+
+/// <summary>
+/// Notification published by the orchestrators every time the status of a pipeline changes,
+/// allowing clients to react to progress without polling the pipeline status file.
+/// </summary>
+public sealed class PipelineEvent
+{
+    [JsonPropertyOrder(0)]
+    [JsonPropertyName("type")]
+    public PipelineEventTypes Type { get; set; } = PipelineEventTypes.StepCompleted;
+
+    [JsonPropertyOrder(1)]
+    [JsonPropertyName("index")]
+    public string Index { get; set; } = string.Empty;
+
+    [JsonPropertyOrder(2)]
+    [JsonPropertyName("document_id")]
+    public string DocumentId { get; set; } = string.Empty;
+
+    [JsonPropertyOrder(3)]
+    [JsonPropertyName("execution_id")]
+    public string ExecutionId { get; set; } = string.Empty;
+
+    /// <summary>
+    /// Name of the last step completed, empty if no step has been executed yet.
+    /// </summary>
+    [JsonPropertyOrder(4)]
+    [JsonPropertyName("step")]
+    public string StepName { get; set; } = string.Empty;
+
+    [JsonPropertyOrder(5)]
+    [JsonPropertyName("remaining_steps")]
+    public int RemainingSteps { get; set; } = 0;
+
+    [JsonPropertyOrder(6)]
+    [JsonPropertyName("time")]
+    public DateTimeOffset Time { get; set; } = DateTimeOffset.UtcNow;
+
+    public PipelineEvent()
+    {
+    }
+
+    public PipelineEvent(DataPipeline pipeline)
+    {
+        this.Type = pipeline.Complete ? PipelineEventTypes.PipelineCompleted : PipelineEventTypes.StepCompleted;
+        this.Index = pipeline.Index;
+        this.DocumentId = pipeline.DocumentId;
+        this.ExecutionId = pipeline.ExecutionId;
+        this.StepName = pipeline.CompletedSteps.Count > 0 ? pipeline.CompletedSteps[^1] : string.Empty;
+        this.RemainingSteps = pipeline.RemainingSteps.Count;
+        this.Time = pipeline.LastUpdate;
+    }
+}
@@ -1,5 +1,6 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System;
 using System.Collections.Generic;
 
 #pragma warning disable IDE0130 // reduce number of "using" statements
@@ -89,6 +90,84 @@ public class SearchClientConfig
     /// </summary>
     public Dictionary<int, float> TokenSelectionBiases { get; set; } = new();
 
+    /// <summary>
+    /// Whether to combine vector search with keyword search, when the memory DB supports it
+    /// (see IMemoryDbKeywordSearch). The two searches run concurrently, and their results
+    /// are merged with Reciprocal Rank Fusion, deciding the order of the results. The relevance
+    /// of the results is still the vector similarity, used for the citations and the min relevance.
+    /// For records found only by keyword search it is computed from the record embedding and the
+    /// question embedding, and records below the min relevance requested by clients are dropped.
+    /// Without an embedding generator, keyword results can't be scored: they are dropped when a
+    /// min relevance is requested, and have relevance 0 otherwise.
+    /// </summary>
+    public bool UseHybridSearch { get; set; } = false;
+
+    /// <summary>
+    /// Max number of records retrieved by the vector search, when using hybrid search.
+    /// </summary>
+    public int HybridVectorSearchLimit { get; set; } = 50;
+
+    /// <summary>
+    /// Max number of records retrieved by the keyword search, when using hybrid search.
+    /// </summary>
+    public int HybridKeywordSearchLimit { get; set; } = 50;
+
+    /// <summary>
+    /// How long to wait for the vector search, when using hybrid search.
+    /// After the timeout, only the keyword search results are used.
+    /// </summary>
+    public TimeSpan HybridVectorSearchTimeout { get; set; } = TimeSpan.FromSeconds(10);
+
+    /// <summary>
+    /// How long to wait for the keyword search, when using hybrid search.
+    /// After the timeout, only the vector search results are used.
+    /// </summary>
+    public TimeSpan HybridKeywordSearchTimeout { get; set; } = TimeSpan.FromSeconds(10);
+
+    /// <summary>
+    /// Reciprocal Rank Fusion constant, added to the rank of each result. Higher values
+    /// reduce the advantage of the top ranked results. 60 is the value used in the original
+    /// RRF paper, and by most search engines.
+    /// </summary>
+    public int RrfK { get; set; } = 60;
+
+    /// <summary>
+    /// Whether to reuse the answers generated by AskAsync for similar questions, asked on the
+    /// same index, with the same filters. Cached answers are removed when the documents
+    /// searched change. The question embedding is generated before searching memories, so
+    /// the cache works best with the embedding cache, which avoids generating it twice.
+    /// </summary>
+    public bool UseAnswerCache { get; set; } = false;
+
+    /// <summary>
+    /// Min cosine similarity between two questions, to reuse the answer of the first.
+    /// </summary>
+    public double AnswerCacheMinSimilarity { get; set; } = 0.97;
+
+    /// <summary>
+    /// Max number of answers cached. When the cache is full, the least recently used answers are removed.
+    /// </summary>
+    public int AnswerCacheMaxEntries { get; set; } = 1000;
+
+    /// <summary>
+    /// How long answers are reused, after being generated.
+    /// </summary>
+    public TimeSpan AnswerCacheTimeToLive { get; set; } = TimeSpan.FromHours(1);
+
+    /// <summary>
+    /// How to choose the facts included in the prompt by AskAsync, when not all the relevant
+    /// memories fit in the prompt. When enabled, the facts with the highest total relevance
+    /// fitting in the prompt are used, trading large facts for multiple smaller ones when more
+    /// relevant. When disabled, facts are added from the most relevant, stopping at the first
+    /// fact that doesn't fit.
+    /// The selection needs the size of all the candidates, so it is used only when all of them
+    /// carry the token count stored during the import, and facts are added in order otherwise,
+    /// e.g. for records imported by older versions. The stored count comes from the tokenizer
+    /// used to partition the documents, enable this only when it matches the tokenizer of the
+    /// text generator, otherwise the facts selected can exceed the prompt size.
+    /// </summary>
+    public bool UseKnapsackFactPacking { get; set; } = false;
+
     /// <summary>
     /// Verify that the current state is valid.
     /// </summary>
@@ -133,5 +212,45 @@ public class SearchClientConfig
         {
             throw new ConfigurationException($"SearchClient: {nameof(this.FrequencyPenalty)} must be between -2 and 2");
         }
+
+        if (this.HybridVectorSearchLimit < 1)
+        {
+            throw new ConfigurationException($"SearchClient: {nameof(this.HybridVectorSearchLimit)} cannot be less than 1");
+        }
+
+        if (this.HybridKeywordSearchLimit < 1)
+        {
+            throw new ConfigurationException($"SearchClient: {nameof(this.HybridKeywordSearchLimit)} cannot be less than 1");
+        }
+
+        if (this.HybridVectorSearchTimeout <= TimeSpan.Zero)
+        {
+            throw new ConfigurationException($"SearchClient: {nameof(this.HybridVectorSearchTimeout)} must be greater than zero");
+        }
+
+        if (this.HybridKeywordSearchTimeout <= TimeSpan.Zero)
+        {
+            throw new ConfigurationException($"SearchClient: {nameof(this.HybridKeywordSearchTimeout)} must be greater than zero");
+        }
+
+        if (this.RrfK < 0)
+        {
+            throw new ConfigurationException($"SearchClient: {nameof(this.RrfK)} cannot be less than 0");
+        }
+
+        if (this.AnswerCacheMinSimilarity is <= 0 or > 1)
+        {
+            throw new ConfigurationException($"SearchClient: {nameof(this.AnswerCacheMinSimilarity)} must be greater than 0 and not greater than 1");
+        }
+
+        if (this.AnswerCacheMaxEntries < 1)
+        {
+            throw new ConfigurationException($"SearchClient: {nameof(this.AnswerCacheMaxEntries)} cannot be less than 1");
+        }
+
+        if (this.AnswerCacheTimeToLive <= TimeSpan.Zero)
+        {
+            throw new ConfigurationException($"SearchClient: {nameof(this.AnswerCacheTimeToLive)} must be greater than zero");
+        }
     }
 }
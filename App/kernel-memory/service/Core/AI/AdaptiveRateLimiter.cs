@@ -0,0 +1,373 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Concurrent;
+using System.Globalization;
+using System.Net;
+using System.Net.Http;
+using System.Threading;
+using System.Threading.Tasks;
+using Azure;
+using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.Diagnostics;
+using Microsoft.SemanticKernel;
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Limiter shared by the AI generators, keeping the requests sent to each model deployment
+/// within the deployment quota. For each deployment the limiter allows a number of concurrent
+/// requests, increased additively while the limit is used and requests succeed, and reduced
+/// multiplicatively when the deployment is throttled (HTTP 429), pausing the deployment for
+/// the time requested by the service (Retry-After). Optionally, requests are also limited by
+/// tokens and requests per minute.
+/// </summary>
+public sealed class AdaptiveRateLimiter
+{
+    private static readonly AsyncLocal<Lease?> s_currentLease = new();
+
+    private readonly AdaptiveRateLimiterConfig _config;
+    private readonly ILogger<AdaptiveRateLimiter> _log;
+    private readonly ConcurrentDictionary<string, DeploymentState> _deployments = new(StringComparer.OrdinalIgnoreCase);
+
+    /// <summary>
+    /// Create a new instance
+    /// </summary>
+    /// <param name="config">Limiter settings</param>
+    /// <param name="loggerFactory">Application logger factory</param>
+    public AdaptiveRateLimiter(AdaptiveRateLimiterConfig? config = null, ILoggerFactory? loggerFactory = null)
+    {
+        this._config = config ?? new AdaptiveRateLimiterConfig();
+        this._config.Validate();
+        this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<AdaptiveRateLimiter>();
+    }
+
+    /// <summary>
+    /// Max number of concurrent requests per deployment
+    /// </summary>
+    public int MaxConcurrency => this._config.MaxConcurrency;
+
+    /// <summary>
+    /// Lease of the request in progress in the current async flow, if any. Used to report
+    /// throttling from the HTTP pipeline, including requests retried by the AI clients.
+    /// </summary>
+    public static Lease? CurrentLease => s_currentLease.Value;
+
+    /// <summary>
+    /// Name used to identify the deployment called by a generator: the model or deployment name
+    /// when the generator exposes it (see ITextEmbeddingModelInfo and ITextGenerationModelInfo),
+    /// otherwise the generator class name.
+    /// </summary>
+    public static string GetDeploymentName(object generator)
+    {
+        string? model = generator switch
+        {
+            ITextEmbeddingModelInfo x => x.ModelId,
+            ITextGenerationModelInfo x => x.ModelId,
+            _ => null
+        };
+
+        return string.IsNullOrEmpty(model) ? generator.GetType().Name : model;
+    }
+
+    /// <summary>
+    /// Current number of concurrent requests allowed for a deployment
+    /// </summary>
+    public int GetConcurrencyLimit(string deployment)
+    {
+        return this.GetState(deployment).ConcurrencyLimit;
+    }
+
+    /// <summary>
+    /// Wait until a request can be sent to the deployment. The lease must be disposed when the request completes.
+    /// </summary>
+    /// <param name="deployment">Deployment name</param>
+    /// <param name="tokens">Tokens used by the request, counted against the tokens per minute quota</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    public async Task<Lease> AcquireAsync(string deployment, int tokens, CancellationToken cancellationToken = default)
+    {
+        return await this.GetState(deployment).AcquireAsync(Math.Max(0, tokens), cancellationToken).ConfigureAwait(false);
+    }
+
+    /// <summary>
+    /// Set the lease of the request in progress, visible to the code called by the current async method.
+    /// Note: the value doesn't flow back to the callers, so it must be set by the method sending the request.
+    /// </summary>
+    internal static void SetCurrentLease(Lease? lease)
+    {
+        s_currentLease.Value = lease;
+    }
+
+    /// <summary>
+    /// Check whether an exception is caused by throttling, e.g. HTTP 429 errors, and
+    /// extract the time to wait before retrying, when provided by the service.
+    /// </summary>
+    public static bool IsThrottling(Exception exception, out TimeSpan? retryAfter)
+    {
+        retryAfter = null;
+        for (Exception? e = exception; e != null; e = e.InnerException)
+        {
+            switch (e)
+            {
+                case RequestFailedException { Status: (int)HttpStatusCode.TooManyRequests } x:
+                    Response? response = x.GetRawResponse();
+                    if (response != null)
+                    {
+                        response.Headers.TryGetValue("retry-after-ms", out string? retryAfterMs);
+                        response.Headers.TryGetValue("Retry-After", out string? retryAfterValue);
+                        retryAfter = ParseRetryAfter(retryAfterMs, retryAfterValue);
+                    }
+
+                    return true;
+
+                case HttpOperationException { StatusCode: HttpStatusCode.TooManyRequests }:
+                case HttpRequestException { StatusCode: HttpStatusCode.TooManyRequests }:
+                    return true;
+            }
+        }
+
+        return false;
+    }
+
+    /// <summary>
+    /// Parse the time to wait, from the "retry-after-ms" and "Retry-After" HTTP headers.
+    /// </summary>
+    public static TimeSpan? ParseRetryAfter(string? retryAfterMs, string? retryAfter)
+    {
+        if (double.TryParse(retryAfterMs, NumberStyles.Float, CultureInfo.InvariantCulture, out double msecs) && msecs >= 0)
+        {
+            return TimeSpan.FromMilliseconds(msecs);
+        }
+
+        if (string.IsNullOrWhiteSpace(retryAfter)) { return null; }
+
+        if (double.TryParse(retryAfter, NumberStyles.Float, CultureInfo.InvariantCulture, out double secs) && secs >= 0)
+        {
+            return TimeSpan.FromSeconds(secs);
+        }
+
+        if (DateTimeOffset.TryParse(retryAfter, CultureInfo.InvariantCulture, DateTimeStyles.AssumeUniversal, out DateTimeOffset date))
+        {
+            TimeSpan delay = date - DateTimeOffset.UtcNow;
+            return delay > TimeSpan.Zero ? delay : TimeSpan.Zero;
+        }
+
+        return null;
+    }
+
+    /// <summary>
+    /// Permission to send one request to a deployment
+    /// </summary>
+    public sealed class Lease : IDisposable
+    {
+        private readonly DeploymentState _state;
+        private int _throttled;
+        private int _disposed;
+
+        internal Lease(DeploymentState state, long generation, bool limitReached)
+        {
+            this._state = state;
+            this.Generation = generation;
+            this.LimitReached = limitReached;
+        }
+
+        /// <summary>
+        /// Name of the deployment
+        /// </summary>
+        public string Deployment => this._state.Name;
+
+        // Number of throttling events seen before the lease was granted
+        internal long Generation { get; }
+
+        // Whether all the requests allowed were in flight when the lease was granted
+        internal bool LimitReached { get; }
+
+        /// <summary>
+        /// Report that the deployment throttled the request, reducing the concurrency
+        /// and pausing the deployment for the time requested by the service.
+        /// </summary>
+        /// <param name="retryAfter">Time to wait before sending new requests, if known</param>
+        public void ReportThrottling(TimeSpan? retryAfter)
+        {
+            Interlocked.Exchange(ref this._throttled, 1);
+            this._state.OnThrottled(this, retryAfter);
+        }
+
+        /// <summary>
+        /// Release the lease, allowing another request to be sent
+        /// </summary>
+        public void Dispose()
+        {
+            if (Interlocked.Exchange(ref this._disposed, 1) != 0) { return; }
+
+            this._state.Release(this, succeeded: Volatile.Read(ref this._throttled) == 0);
+        }
+    }
+
+    #region private
+
+    private DeploymentState GetState(string deployment)
+    {
+        return this._deployments.GetOrAdd(deployment, name =>
+        {
+            this._config.Deployments.TryGetValue(name, out AdaptiveRateLimiterConfig.DeploymentQuota? quota);
+            return new DeploymentState(name, this._config, quota, this._log);
+        });
+    }
+
+    // Concurrency limit, pause and rate limits of one deployment
+    internal sealed class DeploymentState
+    {
+        private readonly AdaptiveRateLimiterConfig _config;
+        private readonly ILogger _log;
+        private readonly TokenBucket? _tokens;
+        private readonly TokenBucket? _requests;
+        private readonly object _lock = new();
+
+        private double _limit;
+        private int _inFlight;
+        private long _generation;
+        private DateTimeOffset _pausedUntil = DateTimeOffset.MinValue;
+
+        // Completed when a request completes, to wake up the requests waiting for a free slot
+        private TaskCompletionSource _released = new(TaskCreationOptions.RunContinuationsAsynchronously);
+
+        public DeploymentState(string name, AdaptiveRateLimiterConfig config, AdaptiveRateLimiterConfig.DeploymentQuota? quota, ILogger log)
+        {
+            this.Name = name;
+            this._config = config;
+            this._log = log;
+            this._limit = config.InitialConcurrency;
+            if (quota is { TokensPerMinute: > 0 }) { this._tokens = new TokenBucket(quota.TokensPerMinute); }
+
+            if (quota is { RequestsPerMinute: > 0 }) { this._requests = new TokenBucket(quota.RequestsPerMinute); }
+        }
+
+        public string Name { get; }
+
+        public int ConcurrencyLimit
+        {
+            get
+            {
+                lock (this._lock) { return (int)this._limit; }
+            }
+        }
+
+        public async Task<Lease> AcquireAsync(int tokens, CancellationToken cancellationToken)
+        {
+            while (true)
+            {
+                cancellationToken.ThrowIfCancellationRequested();
+
+                Task? released = null;
+                TimeSpan delay = TimeSpan.Zero;
+                lock (this._lock)
+                {
+                    DateTimeOffset now = DateTimeOffset.UtcNow;
+                    if (now < this._pausedUntil)
+                    {
+                        delay = this._pausedUntil - now;
+                    }
+                    else if (this._inFlight >= (int)this._limit)
+                    {
+                        released = this._released.Task;
+                    }
+                    else
+                    {
+                        TimeSpan tokensDelay = this._tokens?.GetDelay(tokens, now) ?? TimeSpan.Zero;
+                        TimeSpan requestsDelay = this._requests?.GetDelay(1, now) ?? TimeSpan.Zero;
+                        delay = tokensDelay > requestsDelay ? tokensDelay : requestsDelay;
+                        if (delay == TimeSpan.Zero)
+                        {
+                            this._tokens?.Take(tokens);
+                            this._requests?.Take(1);
+                            this._inFlight++;
+                            return new Lease(this, this._generation, limitReached: this._inFlight >= (int)this._limit);
+                        }
+                    }
+                }
+
+                if (released != null)
+                {
+                    await released.WaitAsync(cancellationToken).ConfigureAwait(false);
+                }
+                else
+                {
+                    await Task.Delay(delay, cancellationToken).ConfigureAwait(false);
+                }
+            }
+        }
+
+        public void OnThrottled(Lease lease, TimeSpan? retryAfter)
+        {
+            lock (this._lock)
+            {
+                DateTimeOffset pausedUntil = DateTimeOffset.UtcNow + (retryAfter ?? this._config.DefaultRetryAfter);
+                if (pausedUntil > this._pausedUntil) { this._pausedUntil = pausedUntil; }
+
+                // Requests sent before the last decrease don't reduce the limit again
+                if (lease.Generation != this._generation) { return; }
+
+                this._generation++;
+                this._limit = Math.Max(this._config.MinConcurrency, Math.Floor(this._limit * this._config.DecreaseFactor));
+                this._log.LogWarning("Deployment '{0}' throttled, concurrency reduced to {1}, paused for {2} msecs",
+                    this.Name, (int)this._limit, (long)(this._pausedUntil - DateTimeOffset.UtcNow).TotalMilliseconds);
+            }
+        }
+
+        public void Release(Lease lease, bool succeeded)
+        {
+            TaskCompletionSource released;
+            lock (this._lock)
+            {
+                this._inFlight--;
+
+                // Grow only when the limit is used, i.e. when the deployment could handle more requests
+                if (succeeded && lease.LimitReached && lease.Generation == this._generation && this._limit < this._config.MaxConcurrency)
+                {
+                    this._limit = Math.Min(this._config.MaxConcurrency, this._limit + this._config.IncreaseStep / Math.Floor(this._limit));
+                }
+
+                released = this._released;
+                this._released = new TaskCompletionSource(TaskCreationOptions.RunContinuationsAsynchronously);
+            }
+
+            released.TrySetResult();
+        }
+    }
+
+    // Tokens refilled continuously, up to the quota per minute. Not thread safe.
+    private sealed class TokenBucket
+    {
+        private readonly double _capacity;
+        private readonly double _refillPerSecond;
+        private double _available;
+        private DateTimeOffset _lastRefill = DateTimeOffset.UtcNow;
+
+        public TokenBucket(int perMinute)
+        {
+            this._capacity = perMinute;
+            this._refillPerSecond = perMinute / 60.0;
+            this._available = perMinute;
+        }
+
+        public TimeSpan GetDelay(int count, DateTimeOffset now)
+        {
+            this._available = Math.Min(this._capacity, this._available + (now - this._lastRefill).TotalSeconds * this._refillPerSecond);
+            this._lastRefill = now;
+
+            // Requests larger than the quota are allowed when the bucket is full
+            double needed = Math.Min(count, this._capacity);
+            if (this._available >= needed) { return TimeSpan.Zero; }
+
+            return TimeSpan.FromSeconds((needed - this._available) / this._refillPerSecond);
+        }
+
+        public void Take(int count)
+        {
+            this._available -= count;
+        }
+    }
+
+    #endregion
+}
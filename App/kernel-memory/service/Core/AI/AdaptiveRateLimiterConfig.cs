@@ -0,0 +1,120 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Settings of the limiter shared by the embedding and text generators calling the same
+/// model deployment, e.g. Azure OpenAI, to stay within the deployment quota. The number
+/// of concurrent requests grows while requests succeed and is reduced on throttling (AIMD).
+/// </summary>
+public class AdaptiveRateLimiterConfig
+{
+    /// <summary>
+    /// Quota of a model deployment.
+    /// </summary>
+    public class DeploymentQuota
+    {
+        /// <summary>
+        /// Max number of tokens per minute, 0 for no limit. For text generation
+        /// the count includes the prompt and the max tokens to generate.
+        /// </summary>
+        public int TokensPerMinute { get; set; } = 0;
+
+        /// <summary>
+        /// Max number of requests per minute, 0 for no limit.
+        /// </summary>
+        public int RequestsPerMinute { get; set; } = 0;
+    }
+
+    /// <summary>
+    /// Whether the service should limit the calls to the AI services.
+    /// When using KernelMemoryBuilder, the limiter is enabled by WithAdaptiveRateLimiting().
+    /// </summary>
+    public bool Enabled { get; set; } = false;
+
+    /// <summary>
+    /// Number of concurrent requests allowed per deployment, when starting.
+    /// </summary>
+    public int InitialConcurrency { get; set; } = 4;
+
+    /// <summary>
+    /// Min number of concurrent requests allowed per deployment, after throttling.
+    /// </summary>
+    public int MinConcurrency { get; set; } = 1;
+
+    /// <summary>
+    /// Max number of concurrent requests allowed per deployment. This is also
+    /// the degree of parallelism used by the parallel handlers.
+    /// </summary>
+    public int MaxConcurrency { get; set; } = 32;
+
+    /// <summary>
+    /// How much the concurrency limit grows, for every window of requests completed
+    /// without throttling while all the requests allowed are in flight.
+    /// </summary>
+    public double IncreaseStep { get; set; } = 1;
+
+    /// <summary>
+    /// Factor applied to the concurrency limit when the deployment is throttled, e.g. 0.5 halves the limit.
+    /// </summary>
+    public double DecreaseFactor { get; set; } = 0.5;
+
+    /// <summary>
+    /// How long to pause a deployment after throttling, when the service doesn't send a Retry-After header.
+    /// </summary>
+    public TimeSpan DefaultRetryAfter { get; set; } = TimeSpan.FromSeconds(2);
+
+    /// <summary>
+    /// Quotas of the deployments, by deployment name. The name is the model or deployment
+    /// name exposed by the generator, e.g. the Azure OpenAI deployment, or the class name of
+    /// generators not exposing it, see <see cref="AdaptiveRateLimiter.GetDeploymentName"/>.
+    /// </summary>
+    public Dictionary<string, DeploymentQuota> Deployments { get; set; } = new(StringComparer.OrdinalIgnoreCase);
+
+    /// <summary>
+    /// Verify that the current state is valid.
+    /// </summary>
+    public void Validate()
+    {
+        if (this.MinConcurrency < 1)
+        {
+            throw new ConfigurationException($"Rate limiting: {nameof(this.MinConcurrency)} cannot be less than 1");
+        }
+
+        if (this.MaxConcurrency < this.MinConcurrency)
+        {
+            throw new ConfigurationException($"Rate limiting: {nameof(this.MaxConcurrency)} cannot be less than {nameof(this.MinConcurrency)}");
+        }
+
+        if (this.InitialConcurrency < this.MinConcurrency || this.InitialConcurrency > this.MaxConcurrency)
+        {
+            throw new ConfigurationException($"Rate limiting: {nameof(this.InitialConcurrency)} must be between {nameof(this.MinConcurrency)} and {nameof(this.MaxConcurrency)}");
+        }
+
+        if (this.IncreaseStep <= 0)
+        {
+            throw new ConfigurationException($"Rate limiting: {nameof(this.IncreaseStep)} must be greater than zero");
+        }
+
+        if (this.DecreaseFactor is <= 0 or >= 1)
+        {
+            throw new ConfigurationException($"Rate limiting: {nameof(this.DecreaseFactor)} must be between 0 and 1");
+        }
+
+        if (this.DefaultRetryAfter < TimeSpan.Zero)
+        {
+            throw new ConfigurationException($"Rate limiting: {nameof(this.DefaultRetryAfter)} cannot be negative");
+        }
+
+        foreach (KeyValuePair<string, DeploymentQuota> x in this.Deployments)
+        {
+            if (x.Value.TokensPerMinute < 0 || x.Value.RequestsPerMinute < 0)
+            {
+                throw new ConfigurationException($"Rate limiting: the quota of deployment '{x.Key}' cannot be negative");
+            }
+        }
+    }
+}
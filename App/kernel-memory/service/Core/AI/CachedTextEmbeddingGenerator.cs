@@ -0,0 +1,146 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+using System.Text.RegularExpressions;
+using System.Threading;
+using System.Threading.Tasks;
+using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.Diagnostics;
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Embedding generator decorator, caching the embeddings generated by another generator,
+/// e.g. to avoid a round trip to the embedding service when a question or a search is repeated.
+/// Embeddings are cached by generator type, model and text, after normalizing the text
+/// whitespace and Unicode representation.
+/// </summary>
+public sealed class CachedTextEmbeddingGenerator : ITextEmbeddingGenerator, ITextEmbeddingBatchGenerator, ITextEmbeddingModelInfo
+{
+    private static readonly Regex s_whitespaceRegex = new(@"\s+", RegexOptions.Compiled);
+
+    private readonly ITextEmbeddingGenerator _generator;
+    private readonly EmbeddingCache _cache;
+    private readonly string _generatorType;
+    private readonly string _modelId;
+    private readonly ILogger<CachedTextEmbeddingGenerator> _log;
+
+    /// <summary>
+    /// Create a new instance
+    /// </summary>
+    /// <param name="generator">Embedding generator to decorate</param>
+    /// <param name="config">Cache settings</param>
+    /// <param name="loggerFactory">Application logger factory</param>
+    public CachedTextEmbeddingGenerator(
+        ITextEmbeddingGenerator generator,
+        EmbeddingCacheConfig config,
+        ILoggerFactory? loggerFactory = null)
+    {
+        this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<CachedTextEmbeddingGenerator>();
+        this._generator = generator;
+        this._generatorType = generator.GetType().FullName ?? generator.GetType().Name;
+        this._modelId = string.IsNullOrEmpty(config.ModelId) ? this.ModelId : config.ModelId;
+        this._cache = new EmbeddingCache("query", config, this._log);
+    }
+
+    /// <inheritdoc />
+    public int MaxTokens => this._generator.MaxTokens;
+
+    /// <inheritdoc />
+    public int MaxBatchSize => (this._generator as ITextEmbeddingBatchGenerator)?.MaxBatchSize ?? 1;
+
+    /// <inheritdoc />
+    public string ModelId => (this._generator as ITextEmbeddingModelInfo)?.ModelId ?? string.Empty;
+
+    /// <summary>
+    /// Number of embeddings found in the cache
+    /// </summary>
+    public long CacheHits => this._cache.Hits;
+
+    /// <summary>
+    /// Number of embeddings not found in the cache, and generated
+    /// </summary>
+    public long CacheMisses => this._cache.Misses;
+
+    /// <summary>
+    /// Share of the embeddings found in the cache, between 0 and 1
+    /// </summary>
+    public double CacheHitRate => this._cache.HitRate;
+
+    /// <inheritdoc />
+    public int CountTokens(string text)
+    {
+        return this._generator.CountTokens(text);
+    }
+
+    /// <inheritdoc />
+    public IReadOnlyList<string> GetTokens(string text)
+    {
+        return this._generator.GetTokens(text);
+    }
+
+    /// <inheritdoc />
+    public async Task<Embedding> GenerateEmbeddingAsync(string text, CancellationToken cancellationToken = default)
+    {
+        string key = this.GetKey(text);
+        Embedding? cached = await this._cache.GetAsync(key, cancellationToken).ConfigureAwait(false);
+        if (cached.HasValue) { return cached.Value; }
+
+        Embedding embedding = await this._generator.GenerateEmbeddingAsync(text, cancellationToken).ConfigureAwait(false);
+        await this._cache.SetAsync(key, embedding, cancellationToken).ConfigureAwait(false);
+        this._log.LogTrace("Embedding cache hit rate: {0:P1}", this._cache.HitRate);
+        return embedding;
+    }
+
+    /// <inheritdoc />
+    public async Task<Embedding[]> GenerateEmbeddingBatchAsync(IEnumerable<string> textList, CancellationToken cancellationToken = default)
+    {
+        var texts = textList.ToList();
+        var keys = texts.Select(this.GetKey).ToList();
+        var result = new Embedding[texts.Count];
+        var missing = new List<int>();
+        for (int i = 0; i < texts.Count; i++)
+        {
+            Embedding? cached = await this._cache.GetAsync(keys[i], cancellationToken).ConfigureAwait(false);
+            if (cached.HasValue) { result[i] = cached.Value; }
+            else { missing.Add(i); }
+        }
+
+        if (missing.Count == 0) { return result; }
+
+        Embedding[] embeddings;
+        if (this._generator is ITextEmbeddingBatchGenerator batchGenerator)
+        {
+            embeddings = await batchGenerator.GenerateEmbeddingBatchAsync(missing.Select(i => texts[i]), cancellationToken).ConfigureAwait(false);
+        }
+        else
+        {
+            embeddings = new Embedding[missing.Count];
+            for (int i = 0; i < missing.Count; i++)
+            {
+                embeddings[i] = await this._generator.GenerateEmbeddingAsync(texts[missing[i]], cancellationToken).ConfigureAwait(false);
+            }
+        }
+
+        for (int i = 0; i < missing.Count; i++)
+        {
+            result[missing[i]] = embeddings[i];
+            await this._cache.SetAsync(keys[missing[i]], embeddings[i], cancellationToken).ConfigureAwait(false);
+        }
+
+        return result;
+    }
+
+    #region private
+
+    private string GetKey(string text)
+    {
+        string normalized = s_whitespaceRegex.Replace(text.Normalize(NormalizationForm.FormC).Trim(), " ");
+        return EmbeddingCache.GetKey(this._generatorType, this._modelId, normalized);
+    }
+
+    #endregion
+}
@@ -1,6 +1,7 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
 using Microsoft.Extensions.DependencyInjection;
+using Microsoft.Extensions.Logging;
 using Microsoft.KernelMemory.AI;
 
 // ReSharper disable once CheckNamespace - reduce number of "using" statements
@@ -30,6 +31,46 @@ public static partial class KernelMemoryBuilderExtensions
         builder.Services.AddNoTextGenerator();
         return builder;
     }
+
+    /// <summary>
+    /// Cache the embeddings generated for search queries and questions, wrapping
+    /// the embedding generator used for retrieval with a cache, when the memory is built.
+    /// </summary>
+    /// <param name="builder">KM builder</param>
+    /// <param name="config">Cache settings</param>
+    public static IKernelMemoryBuilder WithEmbeddingCache(this IKernelMemoryBuilder builder, EmbeddingCacheConfig? config = null)
+    {
+        config ??= new EmbeddingCacheConfig();
+        config.Validate();
+        builder.Services.AddSingleton<EmbeddingCacheConfig>(config);
+        return builder;
+    }
+
+    /// <summary>
+    /// Send the requests of the embedding and text generators through an adaptive rate limiter,
+    /// keeping the requests sent to each deployment within its quota. The generators are wrapped
+    /// when the memory is built.
+    /// </summary>
+    /// <param name="builder">KM builder</param>
+    /// <param name="config">Limiter settings</param>
+    public static IKernelMemoryBuilder WithAdaptiveRateLimiting(this IKernelMemoryBuilder builder, AdaptiveRateLimiterConfig? config = null)
+    {
+        builder.Services.AddAdaptiveRateLimiter(config);
+        return builder;
+    }
+
+    /// <summary>
+    /// Cache the embeddings generated for document partitions during ingestion, so the
+    /// partitions with the same text, e.g. unchanged parts of updated documents, are not
+    /// embedded again.
+    /// </summary>
+    /// <param name="builder">KM builder</param>
+    /// <param name="config">Cache settings</param>
+    public static IKernelMemoryBuilder WithPartitionEmbeddingCache(this IKernelMemoryBuilder builder, EmbeddingCacheConfig? config = null)
+    {
+        builder.Services.AddPartitionEmbeddingCache(config);
+        return builder;
+    }
 }
 
 /// <summary>
@@ -54,4 +95,30 @@ public static partial class DependencyInjection
     {
         return services.AddSingleton<ITextGenerator, NoTextGenerator>();
     }
+
+    /// <summary>
+    /// Add the adaptive rate limiter shared by the AI generators
+    /// </summary>
+    /// <param name="services">.NET services</param>
+    /// <param name="config">Limiter settings</param>
+    public static IServiceCollection AddAdaptiveRateLimiter(this IServiceCollection services, AdaptiveRateLimiterConfig? config = null)
+    {
+        config ??= new AdaptiveRateLimiterConfig();
+        config.Validate();
+        return services.AddSingleton<AdaptiveRateLimiter>(serviceProvider
+            => new AdaptiveRateLimiter(config, serviceProvider.GetService<ILoggerFactory>()));
+    }
+
+    /// <summary>
+    /// Cache the embeddings generated for document partitions during ingestion
+    /// </summary>
+    /// <param name="services">.NET services</param>
+    /// <param name="config">Cache settings</param>
+    public static IServiceCollection AddPartitionEmbeddingCache(this IServiceCollection services, EmbeddingCacheConfig? config = null)
+    {
+        config ??= new EmbeddingCacheConfig();
+        config.Validate();
+        return services.AddSingleton<PartitionEmbeddingCache>(serviceProvider
+            => new PartitionEmbeddingCache(config, serviceProvider.GetService<ILoggerFactory>()));
+    }
 }
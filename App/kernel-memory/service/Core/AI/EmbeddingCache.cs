@@ -0,0 +1,370 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Buffers.Binary;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.Diagnostics.Metrics;
+using System.IO;
+using System.Runtime.InteropServices;
+using System.Security.Cryptography;
+using System.Text;
+using System.Threading;
+using System.Threading.Tasks;
+using Microsoft.Extensions.Logging;
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Bounded cache of embeddings, with time based expiration. The most recently used
+/// embeddings are kept in memory, and optionally stored on disk, one file per embedding,
+/// so they can be reused after a restart. Expired files are removed periodically, and when
+/// the disk entries exceed the configured limit the least recently used files are removed.
+/// Hits and misses are published as metrics, through the "Microsoft.KernelMemory" meter,
+/// tagged with the cache name and the tier.
+/// </summary>
+internal sealed class EmbeddingCache
+{
+    private const string FileExtension = ".emb";
+    private const string TmpFileExtension = ".tmp";
+
+    // Disk entry: expiration (Unix ms), vector length, vector values
+    private const int FileHeaderSize = sizeof(long) + sizeof(int);
+
+    // How often expired and exceeding files are removed from disk
+    private static readonly TimeSpan s_diskCleanupInterval = TimeSpan.FromHours(1);
+
+    // Temporary files older than this are left behind by a crash or a failed delete, not being written
+    private static readonly TimeSpan s_tmpFileMaxAge = TimeSpan.FromMinutes(10);
+
+    private static readonly Meter s_meter = new("Microsoft.KernelMemory");
+    private static readonly Counter<long> s_hits = s_meter.CreateCounter<long>("km.embedding_cache.hits", description: "Embeddings found in the cache");
+    private static readonly Counter<long> s_misses = s_meter.CreateCounter<long>("km.embedding_cache.misses", description: "Embeddings not found in the cache");
+
+    private readonly string _name;
+    private readonly int _maxEntries;
+    private readonly TimeSpan _timeToLive;
+    private readonly string? _directory;
+    private readonly int _maxDiskEntries;
+    private readonly ILogger _log;
+    private readonly object _lock = new();
+
+    // Entries in memory, the list is sorted from the most recently used
+    private readonly Dictionary<string, LinkedListNode<Entry>> _entries = new(StringComparer.Ordinal);
+    private readonly LinkedList<Entry> _recentlyUsed = new();
+
+    private long _hits;
+    private long _misses;
+    private long _nextCleanup;
+    private int _cleanupRunning;
+
+    private sealed record Entry(string Key, Embedding Embedding, DateTimeOffset Expiration);
+
+    public EmbeddingCache(string name, EmbeddingCacheConfig config, ILogger log)
+    {
+        config.Validate();
+
+        this._name = name;
+        this._maxEntries = config.MaxEntries;
+        this._timeToLive = config.TimeToLive;
+        this._directory = string.IsNullOrWhiteSpace(config.Directory) ? null : config.Directory;
+        this._maxDiskEntries = config.MaxDiskEntries;
+        this._log = log;
+
+        if (this._directory != null) { Directory.CreateDirectory(this._directory); }
+    }
+
+    public long Hits => Interlocked.Read(ref this._hits);
+
+    public long Misses => Interlocked.Read(ref this._misses);
+
+    /// <summary>
+    /// Share of the lookups served by the cache, between 0 and 1
+    /// </summary>
+    public double HitRate
+    {
+        get
+        {
+            long hits = this.Hits;
+            long total = hits + this.Misses;
+            return total == 0 ? 0 : (double)hits / total;
+        }
+    }
+
+    /// <summary>
+    /// Cache key of a list of values, e.g. model and text
+    /// </summary>
+    public static string GetKey(params string[] values)
+    {
+        var key = new StringBuilder();
+        foreach (string value in values)
+        {
+            // Length prefix, so values can contain any char
+            key.Append(value.Length).Append(':').Append(value);
+        }
+
+        return Convert.ToHexString(SHA256.HashData(Encoding.UTF8.GetBytes(key.ToString())));
+    }
+
+    public async Task<Embedding?> GetAsync(string key, CancellationToken cancellationToken = default)
+    {
+        lock (this._lock)
+        {
+            if (this._entries.TryGetValue(key, out LinkedListNode<Entry>? node))
+            {
+                if (node.Value.Expiration > DateTimeOffset.UtcNow)
+                {
+                    this._recentlyUsed.Remove(node);
+                    this._recentlyUsed.AddFirst(node);
+                    this.CountHit("memory");
+                    return node.Value.Embedding;
+                }
+
+                this._entries.Remove(key);
+                this._recentlyUsed.Remove(node);
+            }
+        }
+
+        Entry? entry = await this.ReadFileAsync(key, cancellationToken).ConfigureAwait(false);
+        if (entry == null)
+        {
+            Interlocked.Increment(ref this._misses);
+            s_misses.Add(1, new KeyValuePair<string, object?>("cache", this._name));
+            return null;
+        }
+
+        this.AddToMemory(entry);
+        this.CountHit("disk");
+        return entry.Embedding;
+    }
+
+    public async Task SetAsync(string key, Embedding embedding, CancellationToken cancellationToken = default)
+    {
+        var entry = new Entry(key, embedding, DateTimeOffset.UtcNow + this._timeToLive);
+        this.AddToMemory(entry);
+        await this.WriteFileAsync(entry, cancellationToken).ConfigureAwait(false);
+    }
+
+    #region private
+
+    private void CountHit(string tier)
+    {
+        Interlocked.Increment(ref this._hits);
+        s_hits.Add(1, new KeyValuePair<string, object?>("cache", this._name), new KeyValuePair<string, object?>("tier", tier));
+    }
+
+    private void AddToMemory(Entry entry)
+    {
+        lock (this._lock)
+        {
+            if (this._entries.Remove(entry.Key, out LinkedListNode<Entry>? previous))
+            {
+                this._recentlyUsed.Remove(previous);
+            }
+
+            this._entries[entry.Key] = this._recentlyUsed.AddFirst(entry);
+
+            while (this._entries.Count > this._maxEntries)
+            {
+                LinkedListNode<Entry> oldest = this._recentlyUsed.Last!;
+                this._recentlyUsed.RemoveLast();
+                this._entries.Remove(oldest.Value.Key);
+            }
+        }
+    }
+
+    private async Task<Entry?> ReadFileAsync(string key, CancellationToken cancellationToken)
+    {
+        if (this._directory == null) { return null; }
+
+        string path = Path.Join(this._directory, key + FileExtension);
+        byte[] data;
+        try
+        {
+            data = await File.ReadAllBytesAsync(path, cancellationToken).ConfigureAwait(false);
+        }
+        catch (Exception e) when (e is FileNotFoundException or DirectoryNotFoundException)
+        {
+            return null;
+        }
+        catch (Exception e) when (e is IOException or UnauthorizedAccessException)
+        {
+            this._log.LogWarning(e, "Unable to read cached embedding {0}", path);
+            return null;
+        }
+
+        if (!TryDecode(data, out DateTimeOffset expiration, out float[] vector))
+        {
+            this._log.LogWarning("Invalid cached embedding {0}, the file will be replaced", path);
+            return null;
+        }
+
+        if (expiration <= DateTimeOffset.UtcNow)
+        {
+            TryDeleteFile(path);
+            return null;
+        }
+
+        // Track usage, so the files used recently are the last to be removed
+        TryTouchFile(path);
+
+        return new Entry(key, new Embedding(vector), expiration);
+    }
+
+    private async Task WriteFileAsync(Entry entry, CancellationToken cancellationToken)
+    {
+        if (this._directory == null) { return; }
+
+        byte[] data = Encode(entry);
+
+        // Write to a temporary file first, so concurrent readers never see a partial file
+        string path = Path.Join(this._directory, entry.Key + FileExtension);
+        string tmpPath = $"{path}.{Guid.NewGuid():N}{TmpFileExtension}";
+        try
+        {
+            await File.WriteAllBytesAsync(tmpPath, data, cancellationToken).ConfigureAwait(false);
+            File.Move(tmpPath, path, overwrite: true);
+        }
+        catch (Exception e) when (e is IOException or UnauthorizedAccessException)
+        {
+            this._log.LogWarning(e, "Unable to store cached embedding {0}", path);
+            TryDeleteFile(tmpPath);
+        }
+
+        // Remove old files in the background, periodically
+        long now = DateTimeOffset.UtcNow.Ticks;
+        if (now >= Interlocked.Read(ref this._nextCleanup) && Interlocked.Exchange(ref this._cleanupRunning, 1) == 0)
+        {
+            Interlocked.Exchange(ref this._nextCleanup, now + s_diskCleanupInterval.Ticks);
+            _ = Task.Run(this.RemoveOldFiles, CancellationToken.None);
+        }
+    }
+
+    private void RemoveOldFiles()
+    {
+        var watch = Stopwatch.StartNew();
+        int expiredCount = 0;
+        int evictedCount = 0;
+        int tmpCount = 0;
+        try
+        {
+            DateTimeOffset now = DateTimeOffset.UtcNow;
+
+            // Remove the temporary files orphaned by writes that didn't complete
+            foreach (string path in Directory.EnumerateFiles(this._directory!, "*" + FileExtension + ".*" + TmpFileExtension))
+            {
+                if (File.GetLastWriteTimeUtc(path) < now.UtcDateTime - s_tmpFileMaxAge && TryDeleteFile(path)) { tmpCount++; }
+            }
+
+            var validFiles = new List<(string Path, DateTime LastUsed)>();
+            Span<byte> header = stackalloc byte[FileHeaderSize];
+            foreach (string path in Directory.EnumerateFiles(this._directory!, "*" + FileExtension))
+            {
+                bool expired;
+                DateTime lastUsed;
+                try
+                {
+                    using FileStream file = File.OpenRead(path);
+                    expired = file.Read(header) < FileHeaderSize
+                              || DateTimeOffset.FromUnixTimeMilliseconds(BinaryPrimitives.ReadInt64LittleEndian(header)) <= now;
+                    lastUsed = File.GetLastWriteTimeUtc(path);
+                }
+                catch (FileNotFoundException)
+                {
+                    // Replaced or removed concurrently
+                    continue;
+                }
+
+                if (!expired)
+                {
+                    validFiles.Add((path, lastUsed));
+                }
+                else if (TryDeleteFile(path)) { expiredCount++; }
+            }
+
+            // Remove the least recently used files exceeding the limit
+            if (this._maxDiskEntries > 0 && validFiles.Count > this._maxDiskEntries)
+            {
+                validFiles.Sort((a, b) => a.LastUsed.CompareTo(b.LastUsed));
+                for (int i = 0; i < validFiles.Count - this._maxDiskEntries; i++)
+                {
+                    if (TryDeleteFile(validFiles[i].Path)) { evictedCount++; }
+                }
+            }
+        }
+        catch (Exception e) when (e is IOException or UnauthorizedAccessException)
+        {
+            this._log.LogWarning(e, "Unable to remove old embeddings from {0}", this._directory);
+        }
+        finally
+        {
+            Interlocked.Exchange(ref this._cleanupRunning, 0);
+        }
+
+        this._log.LogDebug("{0} expired and {1} least recently used embeddings, and {2} temporary files, removed from the cache in {3} msecs",
+            expiredCount, evictedCount, tmpCount, watch.ElapsedMilliseconds);
+    }
+
+    private static byte[] Encode(Entry entry)
+    {
+        ReadOnlySpan<float> vector = entry.Embedding.Data.Span;
+        var data = new byte[FileHeaderSize + vector.Length * sizeof(float)];
+        BinaryPrimitives.WriteInt64LittleEndian(data, entry.Expiration.ToUnixTimeMilliseconds());
+        BinaryPrimitives.WriteInt32LittleEndian(data.AsSpan(sizeof(long)), vector.Length);
+        for (int i = 0; i < vector.Length; i++)
+        {
+            BinaryPrimitives.WriteSingleLittleEndian(data.AsSpan(FileHeaderSize + i * sizeof(float)), vector[i]);
+        }
+
+        return data;
+    }
+
+    private static bool TryDecode(byte[] data, out DateTimeOffset expiration, out float[] vector)
+    {
+        expiration = default;
+        vector = Array.Empty<float>();
+        if (data.Length < FileHeaderSize) { return false; }
+
+        int length = BinaryPrimitives.ReadInt32LittleEndian(data.AsSpan(sizeof(long)));
+        if (length < 0 || data.Length != FileHeaderSize + (long)length * sizeof(float)) { return false; }
+
+        expiration = DateTimeOffset.FromUnixTimeMilliseconds(BinaryPrimitives.ReadInt64LittleEndian(data));
+        vector = MemoryMarshal.Cast<byte, float>(data.AsSpan(FileHeaderSize)).ToArray();
+        if (!BitConverter.IsLittleEndian)
+        {
+            for (int i = 0; i < vector.Length; i++)
+            {
+                vector[i] = BinaryPrimitives.ReadSingleLittleEndian(data.AsSpan(FileHeaderSize + i * sizeof(float)));
+            }
+        }
+
+        return true;
+    }
+
+    private static void TryTouchFile(string path)
+    {
+        try
+        {
+            File.SetLastWriteTimeUtc(path, DateTime.UtcNow);
+        }
+        catch (Exception e) when (e is IOException or UnauthorizedAccessException)
+        {
+            // Not critical, the file is removed earlier when exceeding the limit
+        }
+    }
+
+    private static bool TryDeleteFile(string path)
+    {
+        try
+        {
+            File.Delete(path);
+            return true;
+        }
+        catch (Exception e) when (e is IOException or UnauthorizedAccessException)
+        {
+            return false;
+        }
+    }
+
+    #endregion
+}
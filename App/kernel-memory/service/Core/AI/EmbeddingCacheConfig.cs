@@ -0,0 +1,72 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Settings of a cache of embeddings, used for the embeddings generated for search queries
+/// and questions, and for the embeddings generated for document partitions during ingestion.
+/// </summary>
+public class EmbeddingCacheConfig
+{
+    /// <summary>
+    /// Whether the service should cache the embeddings.
+    /// When using KernelMemoryBuilder, the caches are enabled by WithEmbeddingCache()
+    /// for search queries and questions, and by WithPartitionEmbeddingCache() for ingestion.
+    /// </summary>
+    public bool Enabled { get; set; } = false;
+
+    /// <summary>
+    /// Max number of embeddings kept in memory. When the cache is full, the least
+    /// recently used embeddings are removed.
+    /// </summary>
+    public int MaxEntries { get; set; } = 10000;
+
+    /// <summary>
+    /// How long embeddings are reused, after being generated.
+    /// </summary>
+    public TimeSpan TimeToLive { get; set; } = TimeSpan.FromHours(24);
+
+    /// <summary>
+    /// Identifier of the embedding model, e.g. the model deployment name, included in the
+    /// cache key. When empty, the id reported by each generator is used, if available, e.g.
+    /// by the OpenAI and Azure OpenAI generators. Set it for generators not reporting it, and
+    /// change it when changing model, to avoid reusing incompatible vectors.
+    /// </summary>
+    public string ModelId { get; set; } = string.Empty;
+
+    /// <summary>
+    /// Optional directory where to store the embeddings, so the cache survives restarts.
+    /// Embeddings are always cached in memory, and the directory is used only when not empty.
+    /// </summary>
+    public string Directory { get; set; } = string.Empty;
+
+    /// <summary>
+    /// Max number of embeddings stored on disk, 0 for no limit. When the limit is exceeded,
+    /// the least recently used files are removed, periodically. Each file takes 4 bytes per
+    /// dimension, e.g. about 600 MB for 100,000 embeddings with 1536 dimensions.
+    /// </summary>
+    public int MaxDiskEntries { get; set; } = 100000;
+
+    /// <summary>
+    /// Verify that the current state is valid.
+    /// </summary>
+    public void Validate()
+    {
+        if (this.MaxEntries < 1)
+        {
+            throw new ConfigurationException($"Embedding cache: {nameof(this.MaxEntries)} cannot be less than 1");
+        }
+
+        if (this.TimeToLive <= TimeSpan.Zero)
+        {
+            throw new ConfigurationException($"Embedding cache: {nameof(this.TimeToLive)} must be greater than zero");
+        }
+
+        if (this.MaxDiskEntries < 0)
+        {
+            throw new ConfigurationException($"Embedding cache: {nameof(this.MaxDiskEntries)} cannot be negative");
+        }
+    }
+}
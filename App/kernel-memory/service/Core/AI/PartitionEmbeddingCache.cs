@@ -0,0 +1,97 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Globalization;
+using System.Security.Cryptography;
+using System.Text;
+using System.Threading;
+using System.Threading.Tasks;
+using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.Diagnostics;
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Cache of the embeddings generated for document partitions (text chunks), keyed by embedding
+/// model and by the hash of the chunk text. Used by the embedding handlers to avoid generating
+/// again the embeddings of chunks already processed, e.g. the unchanged parts of an updated document.
+/// </summary>
+public sealed class PartitionEmbeddingCache
+{
+    private readonly EmbeddingCache _cache;
+    private readonly string _configModelId;
+
+    /// <summary>
+    /// Create a new instance
+    /// </summary>
+    /// <param name="config">Cache settings</param>
+    /// <param name="loggerFactory">Application logger factory</param>
+    public PartitionEmbeddingCache(EmbeddingCacheConfig config, ILoggerFactory? loggerFactory = null)
+    {
+        this._configModelId = config.ModelId;
+        this._cache = new EmbeddingCache("partition", config, (loggerFactory ?? DefaultLogger.Factory).CreateLogger<PartitionEmbeddingCache>());
+    }
+
+    /// <summary>
+    /// Number of embeddings found in the cache
+    /// </summary>
+    public long Hits => this._cache.Hits;
+
+    /// <summary>
+    /// Number of embeddings not found in the cache
+    /// </summary>
+    public long Misses => this._cache.Misses;
+
+    /// <summary>
+    /// Share of the embeddings found in the cache, between 0 and 1
+    /// </summary>
+    public double HitRate => this._cache.HitRate;
+
+    /// <summary>
+    /// Get the embedding previously generated by the given generator for the same text, if available.
+    /// </summary>
+    /// <param name="generator">Embedding generator used to generate the embedding</param>
+    /// <param name="text">Text of the partition</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    /// <returns>The cached embedding, or null if not found</returns>
+    public Task<Embedding?> GetAsync(ITextEmbeddingGenerator generator, string text, CancellationToken cancellationToken = default)
+    {
+        return this._cache.GetAsync(this.GetKey(generator, text), cancellationToken);
+    }
+
+    /// <summary>
+    /// Store the embedding generated by the given generator for a text.
+    /// </summary>
+    /// <param name="generator">Embedding generator used to generate the embedding</param>
+    /// <param name="text">Text of the partition</param>
+    /// <param name="embedding">Embedding to store</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    public Task SetAsync(ITextEmbeddingGenerator generator, string text, Embedding embedding, CancellationToken cancellationToken = default)
+    {
+        return this._cache.SetAsync(this.GetKey(generator, text), embedding, cancellationToken);
+    }
+
+    #region private
+
+    private string GetKey(ITextEmbeddingGenerator generator, string text)
+    {
+        // Partitions are embedded as is, so the text is not normalized
+        string textHash = Convert.ToHexString(SHA256.HashData(Encoding.UTF8.GetBytes(text)));
+        return EmbeddingCache.GetKey(
+            generator.GetType().FullName ?? generator.GetType().Name,
+            this.GetModelId(generator),
+            generator.MaxTokens.ToString(CultureInfo.InvariantCulture),
+            textHash);
+    }
+
+    // Ingestion can use multiple generators, so the model is taken from each generator,
+    // unless set explicitly in the config, e.g. for generators not exposing it.
+    private string GetModelId(ITextEmbeddingGenerator generator)
+    {
+        return string.IsNullOrEmpty(this._configModelId)
+            ? (generator as ITextEmbeddingModelInfo)?.ModelId ?? string.Empty
+            : this._configModelId;
+    }
+
+    #endregion
+}
@@ -0,0 +1,102 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Threading;
+using System.Threading.Tasks;
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Embedding generator decorator, sending requests through the adaptive rate limiter
+/// shared by the generators calling the same deployment.
+/// </summary>
+public sealed class RateLimitedTextEmbeddingGenerator : ITextEmbeddingGenerator, ITextEmbeddingBatchGenerator, ITextEmbeddingModelInfo
+{
+    private readonly ITextEmbeddingGenerator _generator;
+    private readonly AdaptiveRateLimiter _limiter;
+    private readonly string _deployment;
+
+    /// <summary>
+    /// Create a new instance
+    /// </summary>
+    /// <param name="generator">Embedding generator to decorate</param>
+    /// <param name="limiter">Rate limiter shared by the generators</param>
+    /// <param name="deployment">Name of the deployment called by the generator, by default the generator model or class name</param>
+    public RateLimitedTextEmbeddingGenerator(
+        ITextEmbeddingGenerator generator,
+        AdaptiveRateLimiter limiter,
+        string? deployment = null)
+    {
+        this._generator = generator;
+        this._limiter = limiter;
+        this._deployment = deployment ?? AdaptiveRateLimiter.GetDeploymentName(generator);
+    }
+
+    /// <inheritdoc />
+    public int MaxTokens => this._generator.MaxTokens;
+
+    /// <inheritdoc />
+    public int MaxBatchSize => (this._generator as ITextEmbeddingBatchGenerator)?.MaxBatchSize ?? 1;
+
+    /// <inheritdoc />
+    public string ModelId => (this._generator as ITextEmbeddingModelInfo)?.ModelId ?? string.Empty;
+
+    /// <inheritdoc />
+    public int CountTokens(string text)
+    {
+        return this._generator.CountTokens(text);
+    }
+
+    /// <inheritdoc />
+    public IReadOnlyList<string> GetTokens(string text)
+    {
+        return this._generator.GetTokens(text);
+    }
+
+    /// <inheritdoc />
+    public async Task<Embedding> GenerateEmbeddingAsync(string text, CancellationToken cancellationToken = default)
+    {
+        using AdaptiveRateLimiter.Lease lease = await this._limiter.AcquireAsync(this._deployment, this.CountTokens(text), cancellationToken).ConfigureAwait(false);
+        AdaptiveRateLimiter.SetCurrentLease(lease);
+        try
+        {
+            return await this._generator.GenerateEmbeddingAsync(text, cancellationToken).ConfigureAwait(false);
+        }
+        catch (Exception e) when (AdaptiveRateLimiter.IsThrottling(e, out TimeSpan? retryAfter))
+        {
+            lease.ReportThrottling(retryAfter);
+            throw;
+        }
+    }
+
+    /// <inheritdoc />
+    public async Task<Embedding[]> GenerateEmbeddingBatchAsync(IEnumerable<string> textList, CancellationToken cancellationToken = default)
+    {
+        var texts = textList.ToList();
+        if (this._generator is not ITextEmbeddingBatchGenerator batchGenerator)
+        {
+            var result = new Embedding[texts.Count];
+            for (int i = 0; i < texts.Count; i++)
+            {
+                result[i] = await this.GenerateEmbeddingAsync(texts[i], cancellationToken).ConfigureAwait(false);
+            }
+
+            return result;
+        }
+
+        int tokens = texts.Sum(this.CountTokens);
+        using AdaptiveRateLimiter.Lease lease = await this._limiter.AcquireAsync(this._deployment, tokens, cancellationToken).ConfigureAwait(false);
+        AdaptiveRateLimiter.SetCurrentLease(lease);
+        try
+        {
+            return await batchGenerator.GenerateEmbeddingBatchAsync(texts, cancellationToken).ConfigureAwait(false);
+        }
+        catch (Exception e) when (AdaptiveRateLimiter.IsThrottling(e, out TimeSpan? retryAfter))
+        {
+            lease.ReportThrottling(retryAfter);
+            throw;
+        }
+    }
+}
@@ -0,0 +1,85 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Runtime.CompilerServices;
+using System.Threading;
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// Text generator decorator, sending requests through the adaptive rate limiter
+/// shared by the generators calling the same deployment.
+/// </summary>
+public sealed class RateLimitedTextGenerator : ITextGenerator, ITextGenerationModelInfo
+{
+    private readonly ITextGenerator _generator;
+    private readonly AdaptiveRateLimiter _limiter;
+    private readonly string _deployment;
+
+    /// <summary>
+    /// Create a new instance
+    /// </summary>
+    /// <param name="generator">Text generator to decorate</param>
+    /// <param name="limiter">Rate limiter shared by the generators</param>
+    /// <param name="deployment">Name of the deployment called by the generator, by default the generator model or class name</param>
+    public RateLimitedTextGenerator(
+        ITextGenerator generator,
+        AdaptiveRateLimiter limiter,
+        string? deployment = null)
+    {
+        this._generator = generator;
+        this._limiter = limiter;
+        this._deployment = deployment ?? AdaptiveRateLimiter.GetDeploymentName(generator);
+    }
+
+    /// <inheritdoc />
+    public int MaxTokenTotal => this._generator.MaxTokenTotal;
+
+    /// <inheritdoc />
+    public string ModelId => (this._generator as ITextGenerationModelInfo)?.ModelId ?? string.Empty;
+
+    /// <inheritdoc />
+    public int CountTokens(string text)
+    {
+        return this._generator.CountTokens(text);
+    }
+
+    /// <inheritdoc />
+    public IReadOnlyList<string> GetTokens(string text)
+    {
+        return this._generator.GetTokens(text);
+    }
+
+    /// <inheritdoc />
+    public async IAsyncEnumerable<string> GenerateTextAsync(
+        string prompt,
+        TextGenerationOptions options,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        // The quota counts the prompt and the tokens requested, not the tokens actually generated
+        int promptTokens = this.CountTokens(prompt);
+        int tokens = promptTokens + (options.MaxTokens ?? Math.Max(0, this.MaxTokenTotal - promptTokens));
+
+        using AdaptiveRateLimiter.Lease lease = await this._limiter.AcquireAsync(this._deployment, tokens, cancellationToken).ConfigureAwait(false);
+        AdaptiveRateLimiter.SetCurrentLease(lease);
+
+        // The lease is held until the whole answer is received
+        IAsyncEnumerator<string> enumerator = this._generator.GenerateTextAsync(prompt, options, cancellationToken).GetAsyncEnumerator(cancellationToken);
+        await using ConfiguredAsyncDisposable _ = enumerator.ConfigureAwait(false);
+        while (true)
+        {
+            try
+            {
+                if (!await enumerator.MoveNextAsync().ConfigureAwait(false)) { break; }
+            }
+            catch (Exception e) when (AdaptiveRateLimiter.IsThrottling(e, out TimeSpan? retryAfter))
+            {
+                lease.ReportThrottling(retryAfter);
+                throw;
+            }
+
+            yield return enumerator.Current;
+        }
+    }
+}
@@ -0,0 +1,41 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Linq;
+using System.Net;
+using System.Net.Http;
+using System.Threading;
+using System.Threading.Tasks;
+
+namespace Microsoft.KernelMemory.AI;
+
+/// <summary>
+/// HTTP handler reporting throttling (HTTP 429) to the adaptive rate limiter, for the HTTP clients
+/// used by the AI generators. Throttling is reported also for the requests retried internally by
+/// the AI clients, so the limiter reduces the concurrency before the retries are exhausted.
+/// The deployment is identified by the rate limiter lease of the request in progress.
+/// </summary>
+public sealed class ThrottlingSignalHttpHandler : DelegatingHandler
+{
+    /// <summary>
+    /// Create a new instance
+    /// </summary>
+    /// <param name="innerHandler">Handler sending the requests, by default a new HttpClientHandler</param>
+    public ThrottlingSignalHttpHandler(HttpMessageHandler? innerHandler = null)
+        : base(innerHandler ?? new HttpClientHandler())
+    {
+    }
+
+    /// <inheritdoc />
+    protected override async Task<HttpResponseMessage> SendAsync(HttpRequestMessage request, CancellationToken cancellationToken)
+    {
+        HttpResponseMessage response = await base.SendAsync(request, cancellationToken).ConfigureAwait(false);
+        if (response.StatusCode == HttpStatusCode.TooManyRequests)
+        {
+            AdaptiveRateLimiter.CurrentLease?.ReportThrottling(AdaptiveRateLimiter.ParseRetryAfter(
+                response.Headers.TryGetValues("retry-after-ms", out var retryAfterMs) ? retryAfterMs.FirstOrDefault() : null,
+                response.Headers.TryGetValues("Retry-After", out var retryAfter) ? retryAfter.FirstOrDefault() : null));
+        }
+
+        return response;
+    }
+}
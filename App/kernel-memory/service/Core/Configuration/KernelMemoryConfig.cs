@@ -4,7 +4,11 @@ using System;
 using System.Collections.Generic;
 using System.Linq;
 using Microsoft.Extensions.Configuration;
+using Microsoft.KernelMemory.AI;
 using Microsoft.KernelMemory.Configuration;
+using Microsoft.KernelMemory.DataFormats.Office;
+using Microsoft.KernelMemory.DataFormats.Pdf;
+using Microsoft.KernelMemory.Pipeline;
 
 #pragma warning disable IDE0130 // reduce number of "using" statements
 // ReSharper disable once CheckNamespace - reduce number of "using" statements
@@ -71,6 +75,28 @@ public class KernelMemoryConfig
         /// </summary>
         public TextPartitioningOptions TextPartitioning { get; set; } = new();
 
+        /// <summary>
+        /// Settings used when extracting text from PDF files.
+        /// </summary>
+        public PdfDecoderConfig PdfDecoder { get; set; } = new();
+
+        /// <summary>
+        /// Settings used when extracting text from PowerPoint files.
+        /// </summary>
+        public MsPowerPointDecoderConfig MsPowerPointDecoder { get; set; } = new();
+
+        /// <summary>
+        /// Settings of the cache used to reuse text, summaries, tags and embeddings
+        /// when ingesting content already processed.
+        /// </summary>
+        public PipelineArtifactCacheConfig ArtifactCache { get; set; } = new();
+
+        /// <summary>
+        /// Settings of the cache of the embeddings generated for partitions, used to avoid
+        /// embedding again the chunks with the same text, e.g. the unchanged parts of updated documents.
+        /// </summary>
+        public EmbeddingCacheConfig EmbeddingCache { get; set; } = new();
+
         /// <summary>
         /// Default document ingestion pipeline steps.
         /// * extract: extract text from files
@@ -116,6 +142,11 @@ public class KernelMemoryConfig
         /// Settings for the default search client
         /// </summary>
         public SearchClientConfig SearchClient { get; set; } = new();
+
+        /// <summary>
+        /// Settings of the cache of the embeddings generated for questions and searches
+        /// </summary>
+        public EmbeddingCacheConfig EmbeddingCache { get; set; } = new();
     }
 
     /// <summary>
@@ -177,6 +208,12 @@ public class KernelMemoryConfig
     /// </summary>
     public RetrievalConfig Retrieval { get; set; } = new();
 
+    /// <summary>
+    /// Settings of the rate limiter shared by the embedding and text generators,
+    /// keeping the requests sent to each AI deployment within its quota.
+    /// </summary>
+    public AdaptiveRateLimiterConfig AIRateLimiting { get; set; } = new();
+
     /// <summary>
     /// Dependencies settings, e.g. credentials, endpoints, etc.
     /// </summary>
@@ -1,6 +1,7 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
 using Microsoft.Extensions.DependencyInjection;
+using Microsoft.Extensions.Logging;
 using Microsoft.KernelMemory.DataFormats;
 using Microsoft.KernelMemory.DataFormats.Image;
 using Microsoft.KernelMemory.DataFormats.Office;
@@ -37,6 +38,30 @@ public static partial class KernelMemoryBuilderExtensions
         return builder;
     }
 
+    /// <summary>
+    /// Customize the PDF decoder, e.g. to extract pages in parallel.
+    /// </summary>
+    /// <param name="builder">KM builder instance</param>
+    /// <param name="config">PDF decoder settings</param>
+    public static IKernelMemoryBuilder WithPdfDecoderConfig(
+        this IKernelMemoryBuilder builder, PdfDecoderConfig config)
+    {
+        builder.Services.AddPdfDecoderConfig(config);
+        return builder;
+    }
+
+    /// <summary>
+    /// Customize the PowerPoint decoder, e.g. to extract slides in parallel.
+    /// </summary>
+    /// <param name="builder">KM builder instance</param>
+    /// <param name="config">PowerPoint decoder settings</param>
+    public static IKernelMemoryBuilder WithMsPowerPointDecoderConfig(
+        this IKernelMemoryBuilder builder, MsPowerPointDecoderConfig config)
+    {
+        builder.Services.AddMsPowerPointDecoderConfig(config);
+        return builder;
+    }
+
     public static IKernelMemoryBuilder WithDefaultWebScraper(
         this IKernelMemoryBuilder builder)
     {
@@ -84,17 +109,36 @@ public static partial class DependencyInjection
         services.AddSingleton<IContentDecoder, TextDecoder>();
         services.AddSingleton<IContentDecoder, MarkDownDecoder>();
         services.AddSingleton<IContentDecoder, HtmlDecoder>();
-        services.AddSingleton<IContentDecoder, PdfDecoder>();
         services.AddSingleton<IContentDecoder, PdfMarkdownDecoder>();
+        // After PdfMarkdownDecoder, so it's used for PDF files when the parallel extraction is enabled
+        services.AddSingleton<IContentDecoder>(serviceProvider => new PdfDecoder(
+            serviceProvider.GetService<PdfDecoderConfig>(), serviceProvider.GetService<ILoggerFactory>()));
         services.AddSingleton<IContentDecoder, ImageDecoder>();
         services.AddSingleton<IContentDecoder, ImageContextDecoder>();
         services.AddSingleton<IContentDecoder, MsExcelDecoder>();
-        services.AddSingleton<IContentDecoder, MsPowerPointDecoder>();
+        services.AddSingleton<IContentDecoder>(serviceProvider => new MsPowerPointDecoder(
+            serviceProvider.GetService<MsPowerPointDecoderConfig>(), serviceProvider.GetService<ILoggerFactory>()));
         services.AddSingleton<IContentDecoder, MsWordDecoder>();
 
         return services;
     }
 
+    public static IServiceCollection AddPdfDecoderConfig(
+        this IServiceCollection services, PdfDecoderConfig config)
+    {
+        config = config ?? throw new ConfigurationException("Memory Builder: the given PDF decoder config is NULL");
+        config.Validate();
+        return services.AddSingleton<PdfDecoderConfig>(config);
+    }
+
+    public static IServiceCollection AddMsPowerPointDecoderConfig(
+        this IServiceCollection services, MsPowerPointDecoderConfig config)
+    {
+        config = config ?? throw new ConfigurationException("Memory Builder: the given PowerPoint decoder config is NULL");
+        config.Validate();
+        return services.AddSingleton<MsPowerPointDecoderConfig>(config);
+    }
+
     public static IServiceCollection AddDefaultWebScraper(
         this IServiceCollection services)
     {
@@ -5,6 +5,7 @@ using System.Collections.Generic;
 using System.Diagnostics.CodeAnalysis;
 using System.IO;
 using System.Linq;
+using System.Runtime.CompilerServices;
 using System.Text;
 using System.Threading;
 using System.Threading.Tasks;
@@ -25,6 +26,7 @@ public sealed class MsPowerPointDecoder : IContentDecoder
     public MsPowerPointDecoder(MsPowerPointDecoderConfig? config = null, ILoggerFactory? loggerFactory = null)
     {
         this._config = config ?? new MsPowerPointDecoderConfig();
+        this._config.Validate();
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<MsPowerPointDecoder>();
     }
 
@@ -35,89 +37,156 @@ public sealed class MsPowerPointDecoder : IContentDecoder
     }
 
     /// <inheritdoc />
-    public Task<FileContent> DecodeAsync(string filename, CancellationToken cancellationToken = default)
+    public async Task<FileContent> DecodeAsync(string filename, CancellationToken cancellationToken = default)
     {
         using var stream = File.OpenRead(filename);
-        return this.DecodeAsync(stream, cancellationToken);
+        return await this.DecodeAsync(stream, cancellationToken).ConfigureAwait(false);
     }
 
     /// <inheritdoc />
-    public Task<FileContent> DecodeAsync(BinaryData data, CancellationToken cancellationToken = default)
+    public async Task<FileContent> DecodeAsync(BinaryData data, CancellationToken cancellationToken = default)
     {
         using var stream = data.ToStream();
-        return this.DecodeAsync(stream, cancellationToken);
+        return await this.DecodeAsync(stream, cancellationToken).ConfigureAwait(false);
     }
 
     /// <inheritdoc />
-    public Task<FileContent> DecodeAsync(Stream data, CancellationToken cancellationToken = default)
+    public async Task<FileContent> DecodeAsync(Stream data, CancellationToken cancellationToken = default)
     {
         this._log.LogDebug("Extracting text from MS PowerPoint file");
 
         var result = new FileContent(MimeTypes.PlainText);
-        using PresentationDocument presentationDocument = PresentationDocument.Open(data, false);
-        var sb = new StringBuilder();
+        await foreach (FileSection section in this.DecodeSlidesAsync(data, cancellationToken).ConfigureAwait(false))
+        {
+            result.Sections.Add(section);
+        }
 
-        if (presentationDocument.PresentationPart is PresentationPart presentationPart
-            && presentationPart.Presentation is Presentation presentation
-            && presentation.SlideIdList is SlideIdList slideIdList
-            && slideIdList.Elements<SlideId>().ToList() is List<SlideId> slideIds and { Count: > 0 })
+        return result;
+    }
+
+    /// <summary>
+    /// Extract the text of each slide, returning slides in order as soon as they are available.
+    /// When the parallel extraction mode is enabled, slides are extracted by multiple workers.
+    /// </summary>
+    /// <param name="data">Content of the PowerPoint file</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    /// <returns>Text of each slide</returns>
+    public async IAsyncEnumerable<FileSection> DecodeSlidesAsync(Stream data, [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        // In parallel mode each worker parses its own copy of the document, sharing the same bytes
+        byte[]? bytes = null;
+        if (this._config.ParallelExtraction.MaxDegreeOfParallelism > 1)
         {
-            var slideNumber = 0;
-            foreach (SlideId slideId in slideIds)
-            {
-                slideNumber++;
+            using var buffer = new MemoryStream();
+            await data.CopyToAsync(buffer, cancellationToken).ConfigureAwait(false);
+            bytes = buffer.ToArray();
+        }
+
+        using var slides = new Slides(bytes == null ? data : new MemoryStream(bytes, writable: false));
+        if (slides.Count == 0) { yield break; }
+
+        IAsyncEnumerable<FileSection> sections = ParallelPageExtractor.ExtractAsync(
+            slides,
+            slides.Count,
+            // Used only in parallel mode, when the bytes are available
+            () => new Slides(new MemoryStream(bytes!, writable: false)),
+            this.ExtractSlide,
+            this._config.ParallelExtraction,
+            cancellationToken);
+
+        await foreach (FileSection section in sections.ConfigureAwait(false))
+        {
+            yield return section;
+        }
+    }
+
+    #region private
+
+    private FileSection? ExtractSlide(Slides slides, int index)
+    {
+        var slideNumber = index + 1;
+        var sb = new StringBuilder();
+
 #pragma warning disable CA1508 // code taken from official MS docs
-                if ((string?)slideId.RelationshipId is string relationshipId
-                    && presentationPart.GetPartById(relationshipId) is SlidePart slidePart
-                    && slidePart != null
-                    && slidePart.Slide?.Descendants<DocumentFormat.OpenXml.Drawing.Text>().ToList() is List<DocumentFormat.OpenXml.Drawing.Text> texts and { Count: > 0 })
+        if ((string?)slides.SlideIds[index].RelationshipId is string relationshipId
+            && slides.PresentationPart.GetPartById(relationshipId) is SlidePart slidePart
+            && slidePart != null
+            && slidePart.Slide?.Descendants<DocumentFormat.OpenXml.Drawing.Text>().ToList() is List<DocumentFormat.OpenXml.Drawing.Text> texts and { Count: > 0 })
 #pragma warning restore CA1508
+        {
+            // Check if the slide is hidden and whether to skip it
+            // PowerPoint does not set the value of this property, in general, unless the slide is to be hidden
+            // The only way the Show property would exist and have a value of true would be if the slide had been hidden and then unhidden
+            // - Show is null: default, slide is visible
+            // - Show is false: the slide is hidden
+            // - Show is true: the slide is visible
+            bool isVisible = slidePart.Slide.Show ?? true;
+            if (this._config.SkipHiddenSlides && !isVisible) { return null; }
+
+            var currentSlideContent = new StringBuilder();
+            for (var i = 0; i < texts.Count; i++)
+            {
+                var text = texts[i];
+                currentSlideContent.Append(text.Text);
+                if (i < texts.Count - 1)
                 {
-                    // Check if the slide is hidden and whether to skip it
-                    // PowerPoint does not set the value of this property, in general, unless the slide is to be hidden
-                    // The only way the Show property would exist and have a value of true would be if the slide had been hidden and then unhidden
-                    // - Show is null: default, slide is visible
-                    // - Show is false: the slide is hidden
-                    // - Show is true: the slide is visible
-                    bool isVisible = slidePart.Slide.Show ?? true;
-                    if (this._config.SkipHiddenSlides && !isVisible) { continue; }
-
-                    var currentSlideContent = new StringBuilder();
-                    for (var i = 0; i < texts.Count; i++)
-                    {
-                        var text = texts[i];
-                        currentSlideContent.Append(text.Text);
-                        if (i < texts.Count - 1)
-                        {
-                            currentSlideContent.Append(' ');
-                        }
-                    }
-
-                    // Skip the slide if there is no text
-                    if (currentSlideContent.Length < 1) { continue; }
-
-                    // Prepend slide number before the slide text
-                    if (this._config.WithSlideNumber)
-                    {
-                        sb.AppendLine(this._config.SlideNumberTemplate.Replace("{number}", $"{slideNumber}", StringComparison.OrdinalIgnoreCase));
-                    }
-
-                    sb.Append(currentSlideContent);
-                    sb.AppendLine();
-
-                    // Append the end of slide marker
-                    if (this._config.WithEndOfSlideMarker)
-                    {
-                        sb.AppendLine(this._config.EndOfSlideMarkerTemplate.Replace("{number}", $"{slideNumber}", StringComparison.OrdinalIgnoreCase));
-                    }
+                    currentSlideContent.Append(' ');
                 }
+            }
 
-                string slideContent = sb.ToString().Trim();
-                sb.Clear();
-                result.Sections.Add(new FileSection(slideNumber, slideContent, true));
+            // Skip the slide if there is no text
+            if (currentSlideContent.Length < 1) { return null; }
+
+            // Prepend slide number before the slide text
+            if (this._config.WithSlideNumber)
+            {
+                sb.AppendLine(this._config.SlideNumberTemplate.Replace("{number}", $"{slideNumber}", StringComparison.OrdinalIgnoreCase));
+            }
+
+            sb.Append(currentSlideContent);
+            sb.AppendLine();
+
+            // Append the end of slide marker
+            if (this._config.WithEndOfSlideMarker)
+            {
+                sb.AppendLine(this._config.EndOfSlideMarkerTemplate.Replace("{number}", $"{slideNumber}", StringComparison.OrdinalIgnoreCase));
             }
         }
 
-        return Task.FromResult(result);
+        string slideContent = sb.ToString().Trim();
+        return new FileSection(slideNumber, slideContent, true);
     }
+
+    /// <summary>
+    /// Presentation opened for reading, with the list of slides
+    /// </summary>
+    private sealed class Slides : IDisposable
+    {
+        private readonly PresentationDocument _document;
+
+        public PresentationPart PresentationPart { get; } = null!;
+
+        public List<SlideId> SlideIds { get; } = new();
+
+        public int Count => this.SlideIds.Count;
+
+        public Slides(Stream data)
+        {
+            this._document = PresentationDocument.Open(data, false);
+            if (this._document.PresentationPart is PresentationPart presentationPart
+                && presentationPart.Presentation is Presentation presentation
+                && presentation.SlideIdList is SlideIdList slideIdList)
+            {
+                this.PresentationPart = presentationPart;
+                this.SlideIds = slideIdList.Elements<SlideId>().ToList();
+            }
+        }
+
+        public void Dispose()
+        {
+            this._document.Dispose();
+        }
+    }
+
+    #endregion
 }
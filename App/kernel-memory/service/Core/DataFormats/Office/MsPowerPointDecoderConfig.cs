@@ -28,4 +28,17 @@ public class MsPowerPointDecoderConfig
     /// Whether to skip hidden slides.
     /// </summary>
     public bool SkipHiddenSlides { get; set; } = true;
+
+    /// <summary>
+    /// Settings of the parallel extraction mode, disabled by default.
+    /// </summary>
+    public ParallelExtractionConfig ParallelExtraction { get; set; } = new();
+
+    /// <summary>
+    /// Verify that the current state is valid.
+    /// </summary>
+    public void Validate()
+    {
+        this.ParallelExtraction.Validate();
+    }
 }
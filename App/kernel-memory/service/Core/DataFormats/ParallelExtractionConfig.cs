@@ -0,0 +1,51 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+namespace Microsoft.KernelMemory.DataFormats;
+
+/// <summary>
+/// Settings of the parallel extraction mode of the decoders supporting it, e.g. PDF and PowerPoint.
+/// Pages are extracted in ranges by a pool of workers, each one working on its own copy of the
+/// document, and returned in order.
+/// </summary>
+public class ParallelExtractionConfig
+{
+    /// <summary>
+    /// Max number of workers extracting pages of the same document.
+    /// 1 disables the parallel mode, extracting pages sequentially.
+    /// </summary>
+    public int MaxDegreeOfParallelism { get; set; } = 1;
+
+    /// <summary>
+    /// Number of consecutive pages assigned to a worker at a time.
+    /// Documents with fewer pages than this are always extracted sequentially.
+    /// </summary>
+    public int PagesPerRange { get; set; } = 8;
+
+    /// <summary>
+    /// Max number of pages extracted ahead of the page being returned, to cap the memory used
+    /// per document when some pages are slower than others. Each worker also holds a parsed
+    /// copy of the document, so the memory used grows with MaxDegreeOfParallelism.
+    /// </summary>
+    public int MaxBufferedPages { get; set; } = 64;
+
+    /// <summary>
+    /// Verify that the current state is valid.
+    /// </summary>
+    public void Validate()
+    {
+        if (this.MaxDegreeOfParallelism < 1)
+        {
+            throw new ConfigurationException($"Parallel extraction: {nameof(this.MaxDegreeOfParallelism)} cannot be less than 1");
+        }
+
+        if (this.PagesPerRange < 1)
+        {
+            throw new ConfigurationException($"Parallel extraction: {nameof(this.PagesPerRange)} cannot be less than 1");
+        }
+
+        if (this.MaxBufferedPages < 1)
+        {
+            throw new ConfigurationException($"Parallel extraction: {nameof(this.MaxBufferedPages)} cannot be less than 1");
+        }
+    }
+}
@@ -0,0 +1,123 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Runtime.CompilerServices;
+using System.Threading;
+using System.Threading.Tasks;
+
+namespace Microsoft.KernelMemory.DataFormats;
+
+/// <summary>
+/// Extracts the pages of a document using a pool of workers, returning pages in order as soon as
+/// they are available. Document parsers are usually not thread safe, so each worker opens its own
+/// copy of the document, and takes ranges of consecutive pages, in order. Workers don't extract
+/// pages too far ahead of the page being returned, to cap the memory used.
+/// </summary>
+internal static class ParallelPageExtractor
+{
+    /// <summary>
+    /// Extract the pages of a document
+    /// </summary>
+    /// <param name="document">Document already opened by the caller, used by the first worker and not disposed</param>
+    /// <param name="pageCount">Number of pages in the document</param>
+    /// <param name="openDocument">Function opening a new copy of the document, for the other workers</param>
+    /// <param name="extractPage">Function extracting a page, given the 0-based page index. Null values are skipped.</param>
+    /// <param name="config">Parallel extraction settings</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    /// <returns>Pages content, in order</returns>
+    public static async IAsyncEnumerable<FileSection> ExtractAsync<TDocument>(
+        TDocument document,
+        int pageCount,
+        Func<TDocument> openDocument,
+        Func<TDocument, int, FileSection?> extractPage,
+        ParallelExtractionConfig config,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default) where TDocument : IDisposable
+    {
+        int rangeCount = (pageCount + config.PagesPerRange - 1) / config.PagesPerRange;
+        int workerCount = Math.Min(config.MaxDegreeOfParallelism, rangeCount);
+        if (workerCount <= 1)
+        {
+            for (int i = 0; i < pageCount; i++)
+            {
+                cancellationToken.ThrowIfCancellationRequested();
+                FileSection? section = extractPage(document, i);
+                if (section != null) { yield return section; }
+            }
+
+            yield break;
+        }
+
+        // Pages extracted, and pages allowed to start, i.e. not too far ahead of the page being returned
+        var pages = new TaskCompletionSource<FileSection?>[pageCount];
+        var canStart = new TaskCompletionSource[pageCount];
+        for (int i = 0; i < pageCount; i++)
+        {
+            pages[i] = new TaskCompletionSource<FileSection?>(TaskCreationOptions.RunContinuationsAsynchronously);
+            canStart[i] = new TaskCompletionSource(TaskCreationOptions.RunContinuationsAsynchronously);
+            if (i < config.MaxBufferedPages) { canStart[i].SetResult(); }
+        }
+
+        using var cts = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+        int nextRange = -1;
+        Exception? failure = null;
+
+        async Task RunWorkerAsync(int worker)
+        {
+            // Leave the current thread to the consumer
+            await Task.Yield();
+
+            TDocument? copy = default;
+            try
+            {
+                TDocument doc = worker == 0 ? document : (copy = openDocument());
+                int range;
+                while ((range = Interlocked.Increment(ref nextRange)) < rangeCount)
+                {
+                    int end = Math.Min(pageCount, (range + 1) * config.PagesPerRange);
+                    for (int page = range * config.PagesPerRange; page < end; page++)
+                    {
+                        await canStart[page].Task.WaitAsync(cts.Token).ConfigureAwait(false);
+                        pages[page].TrySetResult(extractPage(doc, page));
+                    }
+                }
+            }
+            catch (Exception e)
+            {
+                // Stop the other workers and fail all the pages not extracted yet with the first error,
+                // so the consumer doesn't wait for pages that won't be extracted.
+                Exception error = Interlocked.CompareExchange(ref failure, e, null) ?? e;
+                foreach (TaskCompletionSource<FileSection?>? x in pages) { x?.TrySetException(error); }
+
+                // ReSharper disable once AccessToDisposedClosure
+                await cts.CancelAsync().ConfigureAwait(false);
+            }
+            finally
+            {
+                copy?.Dispose();
+            }
+        }
+
+        Task[] workers = Enumerable.Range(0, workerCount).Select(RunWorkerAsync).ToArray();
+        try
+        {
+            for (int i = 0; i < pageCount; i++)
+            {
+                FileSection? section = await pages[i].Task.WaitAsync(cancellationToken).ConfigureAwait(false);
+
+                // Release the page content and allow one more page to start
+                pages[i] = null!;
+                if (i + config.MaxBufferedPages < pageCount) { canStart[i + config.MaxBufferedPages].TrySetResult(); }
+
+                if (section != null) { yield return section; }
+            }
+        }
+        finally
+        {
+            // Stop the workers if the consumer stops early, and wait for them to release the documents
+            await cts.CancelAsync().ConfigureAwait(false);
+            await Task.WhenAll(workers).ConfigureAwait(false);
+        }
+    }
+}
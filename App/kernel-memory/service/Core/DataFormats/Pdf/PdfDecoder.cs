@@ -1,9 +1,10 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
 using System;
+using System.Collections.Generic;
 using System.Diagnostics.CodeAnalysis;
 using System.IO;
-using System.Linq;
+using System.Runtime.CompilerServices;
 using System.Threading;
 using System.Threading.Tasks;
 using Microsoft.Extensions.Logging;
@@ -18,50 +19,100 @@ namespace Microsoft.KernelMemory.DataFormats.Pdf;
 [Experimental("KMEXP00")]
 public sealed class PdfDecoder : IContentDecoder
 {
+    private readonly PdfDecoderConfig _config;
     private readonly ILogger<PdfDecoder> _log;
 
-    public PdfDecoder(ILoggerFactory? loggerFactory = null)
+    public PdfDecoder(PdfDecoderConfig? config = null, ILoggerFactory? loggerFactory = null)
     {
+        this._config = config ?? new PdfDecoderConfig();
+        this._config.Validate();
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<PdfDecoder>();
     }
 
-    /// <inheritdoc />
+    /// <summary>
+    /// PDF files are decoded by PdfMarkdownDecoder, using Azure AI Document Intelligence, unless
+    /// the parallel extraction mode is enabled, in which case this decoder extracts the text locally.
+    /// </summary>
     public bool SupportsMimeType(string mimeType)
     {
-        //return mimeType != null && mimeType.StartsWith(MimeTypes.Pdf, StringComparison.OrdinalIgnoreCase);
-        return false;
+        return this._config.ParallelExtraction.MaxDegreeOfParallelism > 1
+               && mimeType != null && mimeType.StartsWith(MimeTypes.Pdf, StringComparison.OrdinalIgnoreCase);
     }
 
     /// <inheritdoc />
-    public Task<FileContent> DecodeAsync(string filename, CancellationToken cancellationToken = default)
+    public async Task<FileContent> DecodeAsync(string filename, CancellationToken cancellationToken = default)
     {
         using var stream = File.OpenRead(filename);
-        return this.DecodeAsync(stream, cancellationToken);
+        return await this.DecodeAsync(stream, cancellationToken).ConfigureAwait(false);
     }
 
     /// <inheritdoc />
-    public Task<FileContent> DecodeAsync(BinaryData data, CancellationToken cancellationToken = default)
+    public async Task<FileContent> DecodeAsync(BinaryData data, CancellationToken cancellationToken = default)
     {
         using var stream = data.ToStream();
-        return this.DecodeAsync(stream, cancellationToken);
+        return await this.DecodeAsync(stream, cancellationToken).ConfigureAwait(false);
     }
 
     /// <inheritdoc />
-    public Task<FileContent> DecodeAsync(Stream data, CancellationToken cancellationToken = default)
+    public async Task<FileContent> DecodeAsync(Stream data, CancellationToken cancellationToken = default)
     {
         this._log.LogDebug("Extracting text from PDF file");
 
         var result = new FileContent(MimeTypes.PlainText);
-        using PdfDocument? pdfDocument = PdfDocument.Open(data);
-        if (pdfDocument == null) { return Task.FromResult(result); }
+        await foreach (FileSection section in this.DecodePagesAsync(data, cancellationToken).ConfigureAwait(false))
+        {
+            result.Sections.Add(section);
+        }
+
+        return result;
+    }
 
-        foreach (Page? page in pdfDocument.GetPages().Where(x => x != null))
+    /// <summary>
+    /// Extract the text of each page, returning pages in order as soon as they are available.
+    /// When the parallel extraction mode is enabled, pages are extracted by multiple workers.
+    /// </summary>
+    /// <param name="data">Content of the PDF file</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    /// <returns>Text of each page</returns>
+    public async IAsyncEnumerable<FileSection> DecodePagesAsync(Stream data, [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        // In parallel mode each worker parses its own copy of the document, sharing the same bytes
+        byte[]? bytes = null;
+        if (this._config.ParallelExtraction.MaxDegreeOfParallelism > 1)
         {
-            // Note: no trimming, use original spacing
-            string pageContent = ContentOrderTextExtractor.GetText(page) ?? string.Empty;
-            result.Sections.Add(new FileSection(page.Number, pageContent, false));
+            using var buffer = new MemoryStream();
+            await data.CopyToAsync(buffer, cancellationToken).ConfigureAwait(false);
+            bytes = buffer.ToArray();
         }
 
-        return Task.FromResult(result);
+        using PdfDocument? pdfDocument = bytes == null ? PdfDocument.Open(data) : PdfDocument.Open(bytes);
+        if (pdfDocument == null) { yield break; }
+
+        this._log.LogTrace("PDF file with {0} pages, max degree of parallelism {1}",
+            pdfDocument.NumberOfPages, this._config.ParallelExtraction.MaxDegreeOfParallelism);
+
+        IAsyncEnumerable<FileSection> pages = ParallelPageExtractor.ExtractAsync(
+            pdfDocument,
+            pdfDocument.NumberOfPages,
+            // Used only in parallel mode, when the bytes are available
+            () => PdfDocument.Open(bytes!),
+            ExtractPage,
+            this._config.ParallelExtraction,
+            cancellationToken);
+
+        await foreach (FileSection section in pages.ConfigureAwait(false))
+        {
+            yield return section;
+        }
+    }
+
+    private static FileSection? ExtractPage(PdfDocument pdfDocument, int index)
+    {
+        Page? page = pdfDocument.GetPage(index + 1);
+        if (page == null) { return null; }
+
+        // Note: no trimming, use original spacing
+        string pageContent = ContentOrderTextExtractor.GetText(page) ?? string.Empty;
+        return new FileSection(page.Number, pageContent, false);
     }
 }
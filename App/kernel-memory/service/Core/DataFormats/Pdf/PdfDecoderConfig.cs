@@ -0,0 +1,21 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+namespace Microsoft.KernelMemory.DataFormats.Pdf;
+
+public class PdfDecoderConfig
+{
+    /// <summary>
+    /// Settings of the parallel extraction mode, disabled by default. When enabled, PDF files
+    /// are decoded by PdfDecoder, extracting the text locally with PdfPig, instead of
+    /// PdfMarkdownDecoder, using Azure AI Document Intelligence.
+    /// </summary>
+    public ParallelExtractionConfig ParallelExtraction { get; set; } = new();
+
+    /// <summary>
+    /// Verify that the current state is valid.
+    /// </summary>
+    public void Validate()
+    {
+        this.ParallelExtraction.Validate();
+    }
+}
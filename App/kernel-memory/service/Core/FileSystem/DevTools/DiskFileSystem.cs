@@ -292,6 +292,35 @@ internal sealed class DiskFileSystem : IFileSystem
         return result;
     }
 
+    /// <summary>
+    /// Full path of a file, for callers accessing the file directly, e.g. to memory map it.
+    /// </summary>
+    public string GetFilePath(string volume, string relPath, string fileName)
+    {
+        volume = ValidateVolumeName(volume);
+        relPath = ValidatePath(relPath);
+        fileName = ValidateFileName(fileName);
+        return Path.Join(this._dataPath, volume, relPath, fileName);
+    }
+
+    /// <summary>
+    /// Last write time of the files in a directory, by file name, e.g. to find the files changed after a given time.
+    /// </summary>
+    public IDictionary<string, DateTimeOffset> GetLastWriteTimes(string volume, string relPath)
+    {
+        volume = ValidateVolumeName(volume);
+        relPath = ValidatePath(relPath);
+        var path = Path.Join(this._dataPath, volume, relPath);
+        if (!Directory.Exists(path))
+        {
+            throw new DirectoryNotFoundException($"Directory not found: {path}");
+        }
+
+        // Note: the list doesn't include files in sub dirs
+        return new DirectoryInfo(path).EnumerateFiles()
+            .ToDictionary(x => x.Name, x => new DateTimeOffset(x.LastWriteTimeUtc), StringComparer.Ordinal);
+    }
+
     #endregion
 
     #region private
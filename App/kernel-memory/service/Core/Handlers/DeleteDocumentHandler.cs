@@ -8,6 +8,7 @@ using Microsoft.KernelMemory.Diagnostics;
 using Microsoft.KernelMemory.DocumentStorage;
 using Microsoft.KernelMemory.MemoryStorage;
 using Microsoft.KernelMemory.Pipeline;
+using Microsoft.KernelMemory.Search;
 
 namespace Microsoft.KernelMemory.Handlers;
 
@@ -15,6 +16,7 @@ public sealed class DeleteDocumentHandler : IPipelineStepHandler
 {
     private readonly List<IMemoryDb> _memoryDbs;
     private readonly IDocumentStorage _documentStorage;
+    private readonly AnswerCache? _answerCache;
     private readonly ILogger<DeleteDocumentHandler> _log;
 
     public string StepName { get; }
@@ -23,11 +25,13 @@ public sealed class DeleteDocumentHandler : IPipelineStepHandler
         string stepName,
         IDocumentStorage documentStorage,
         List<IMemoryDb> memoryDbs,
+        AnswerCache? answerCache = null,
         ILoggerFactory? loggerFactory = null)
     {
         this.StepName = stepName;
         this._documentStorage = documentStorage;
         this._memoryDbs = memoryDbs;
+        this._answerCache = answerCache;
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<DeleteDocumentHandler>();
 
         this._log.LogInformation("Handler '{0}' ready", stepName);
@@ -39,6 +43,9 @@ public sealed class DeleteDocumentHandler : IPipelineStepHandler
     {
         this._log.LogDebug("Deleting document, pipeline '{0}/{1}'", pipeline.Index, pipeline.DocumentId);
 
+        // Tags of the records deleted, to invalidate only the cached answers affected
+        var deletedTags = new List<TagCollection>();
+
         // Delete embeddings
         foreach (IMemoryDb db in this._memoryDbs)
         {
@@ -51,9 +58,12 @@ public sealed class DeleteDocumentHandler : IPipelineStepHandler
             await foreach (var record in records.WithCancellation(cancellationToken).ConfigureAwait(false))
             {
                 await db.DeleteAsync(index: pipeline.Index, record, cancellationToken: cancellationToken).ConfigureAwait(false);
+                deletedTags.Add(record.Tags);
             }
         }
 
+        if (deletedTags.Count > 0) { this._answerCache?.Invalidate(pipeline.Index, deletedTags); }
+
         // Delete files, leaving the status file
         await this._documentStorage.EmptyDocumentDirectoryAsync(
             index: pipeline.Index,
@@ -8,6 +8,7 @@ using Microsoft.KernelMemory.Diagnostics;
 using Microsoft.KernelMemory.DocumentStorage;
 using Microsoft.KernelMemory.MemoryStorage;
 using Microsoft.KernelMemory.Pipeline;
+using Microsoft.KernelMemory.Search;
 
 namespace Microsoft.KernelMemory.Handlers;
 
@@ -15,6 +16,7 @@ public sealed class DeleteIndexHandler : IPipelineStepHandler
 {
     private readonly List<IMemoryDb> _memoryDbs;
     private readonly IDocumentStorage _documentStorage;
+    private readonly AnswerCache? _answerCache;
     private readonly ILogger<DeleteIndexHandler> _log;
 
     public string StepName { get; }
@@ -23,11 +25,13 @@ public sealed class DeleteIndexHandler : IPipelineStepHandler
         string stepName,
         IDocumentStorage documentStorage,
         List<IMemoryDb> memoryDbs,
+        AnswerCache? answerCache = null,
         ILoggerFactory? loggerFactory = null)
     {
         this.StepName = stepName;
         this._documentStorage = documentStorage;
         this._memoryDbs = memoryDbs;
+        this._answerCache = answerCache;
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<DeleteIndexHandler>();
 
         this._log.LogInformation("Handler '{0}' ready", stepName);
@@ -45,6 +49,8 @@ public sealed class DeleteIndexHandler : IPipelineStepHandler
             await db.DeleteIndexAsync(index: pipeline.Index, cancellationToken: cancellationToken).ConfigureAwait(false);
         }
 
+        this._answerCache?.Invalidate(pipeline.Index);
+
         // Delete index from file storage
         await this._documentStorage.DeleteIndexDirectoryAsync(
             index: pipeline.Index,
@@ -0,0 +1,67 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+
+namespace Microsoft.KernelMemory.Handlers;
+
+/// <summary>
+/// Groups text chunks in batches for the embedding generators, up to a max number of items
+/// and a max number of tokens per batch. Chunks from different documents are interleaved,
+/// so the batches processed in parallel cover all the documents, rather than one at a time.
+/// </summary>
+internal static class EmbeddingBatcher
+{
+    /// <summary>
+    /// Group items in batches
+    /// </summary>
+    /// <param name="items">Items to group, in order</param>
+    /// <param name="getTokens">Function returning the size of each item, in tokens</param>
+    /// <param name="getGroup">Function returning the document of each item, used to interleave documents</param>
+    /// <param name="maxItems">Max number of items per batch</param>
+    /// <param name="maxTokens">Max number of tokens per batch. Items larger than this are sent alone.</param>
+    /// <returns>List of batches, with the size of each batch in tokens</returns>
+    public static List<(T[] Items, int Tokens)> CreateBatches<T>(
+        IReadOnlyList<T> items,
+        Func<T, int> getTokens,
+        Func<T, string> getGroup,
+        int maxItems,
+        int maxTokens)
+    {
+        var batches = new List<(List<T> Items, int Tokens)>();
+
+        // First fit: each item goes in the first batch with room, so small items fill the gaps left by large ones
+        foreach (T item in Interleave(items, getGroup))
+        {
+            int tokens = getTokens(item);
+            int index = batches.FindIndex(b => b.Items.Count < maxItems && b.Tokens + tokens <= maxTokens);
+            if (index < 0)
+            {
+                batches.Add((new List<T> { item }, tokens));
+            }
+            else
+            {
+                batches[index].Items.Add(item);
+                batches[index] = (batches[index].Items, batches[index].Tokens + tokens);
+            }
+        }
+
+        return batches.Select(b => (b.Items.ToArray(), b.Tokens)).ToList();
+    }
+
+    // Take one item from each document in turn, keeping the order of the items of each document
+    private static IEnumerable<T> Interleave<T>(IReadOnlyList<T> items, Func<T, string> getGroup)
+    {
+        List<Queue<T>> groups = items.GroupBy(getGroup).Select(g => new Queue<T>(g)).ToList();
+        while (groups.Count > 0)
+        {
+            foreach (Queue<T> group in groups)
+            {
+                yield return group.Dequeue();
+            }
+
+            groups.RemoveAll(g => g.Count == 0);
+        }
+    }
+}
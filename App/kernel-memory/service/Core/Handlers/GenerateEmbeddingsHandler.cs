@@ -1,6 +1,8 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System;
 using System.Collections.Generic;
+using System.Globalization;
 using System.Linq;
 using System.Threading;
 using System.Threading.Tasks;
@@ -20,6 +22,7 @@ public sealed class GenerateEmbeddingsHandler : GenerateEmbeddingsHandlerBase, I
     private readonly ILogger<GenerateEmbeddingsHandler> _log;
     private readonly List<ITextEmbeddingGenerator> _embeddingGenerators;
     private readonly bool _embeddingGenerationEnabled;
+    private readonly PipelineArtifactCache? _artifactCache;
 
     /// <inheritdoc />
     public string StepName { get; }
@@ -30,14 +33,19 @@ public sealed class GenerateEmbeddingsHandler : GenerateEmbeddingsHandlerBase, I
     /// </summary>
     /// <param name="stepName">Pipeline step for which the handler will be invoked</param>
     /// <param name="orchestrator">Current orchestrator used by the pipeline, giving access to content and other helps.</param>
+    /// <param name="artifactCache">Optional cache of the embeddings generated for files already processed</param>
+    /// <param name="embeddingCache">Optional cache of the embeddings generated for partitions already processed</param>
     /// <param name="loggerFactory">Application logger factory</param>
     public GenerateEmbeddingsHandler(
         string stepName,
         IPipelineOrchestrator orchestrator,
+        PipelineArtifactCache? artifactCache = null,
+        PartitionEmbeddingCache? embeddingCache = null,
         ILoggerFactory? loggerFactory = null)
-        : base(orchestrator, (loggerFactory ?? DefaultLogger.Factory).CreateLogger<GenerateEmbeddingsHandler>())
+        : base(orchestrator, (loggerFactory ?? DefaultLogger.Factory).CreateLogger<GenerateEmbeddingsHandler>(), embeddingCache)
     {
         this.StepName = stepName;
+        this._artifactCache = artifactCache;
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<GenerateEmbeddingsHandler>();
         this._embeddingGenerationEnabled = orchestrator.EmbeddingGenerationEnabled;
         this._embeddingGenerators = orchestrator.GetEmbeddingGenerators();
@@ -72,15 +80,30 @@ public sealed class GenerateEmbeddingsHandler : GenerateEmbeddingsHandlerBase, I
             var subStepName = GetSubStepName(generator);
             var partitions = await this.GetListOfPartitionsToProcessAsync(pipeline, subStepName, cancellationToken).ConfigureAwait(false);
 
+            // Reuse the embeddings of files with the same content, generated by the same generator and model
+            string fingerprint = PipelineArtifactCache.GetFingerprint(
+                GetEmbeddingProviderName(generator), GetEmbeddingModelId(generator), generator.MaxTokens.ToString(CultureInfo.InvariantCulture));
+            partitions = await this.ReuseCachedEmbeddingsAsync(pipeline, generator, fingerprint, partitions, cancellationToken).ConfigureAwait(false);
+
+            // Reuse the embeddings of single partitions with the same text, e.g. unchanged chunks of updated files
+            Dictionary<PartitionInfo, Embedding> embeddings = await this.ReuseCachedPartitionEmbeddingsAsync(pipeline, generator, partitions, cancellationToken).ConfigureAwait(false);
+            List<PartitionInfo> partitionsToEmbed = partitions.Where(x => !embeddings.ContainsKey(x)).ToList();
+
+            List<Embedding> newEmbeddings;
             int batchSize = pipeline.GetContext().GetCustomEmbeddingGenerationBatchSizeOrDefault((generator as ITextEmbeddingBatchGenerator)?.MaxBatchSize ?? 1);
             if (batchSize > 1 && generator is ITextEmbeddingBatchGenerator batchGenerator)
             {
-                await this.GenerateEmbeddingsWithBatchingAsync(pipeline, batchGenerator, batchSize, partitions, cancellationToken).ConfigureAwait(false);
+                newEmbeddings = await this.GenerateEmbeddingsWithBatchingAsync(pipeline, batchGenerator, batchSize, partitionsToEmbed, cancellationToken).ConfigureAwait(false);
             }
             else
             {
-                await this.GenerateEmbeddingsOneAtATimeAsync(pipeline, generator, partitions, cancellationToken).ConfigureAwait(false);
+                newEmbeddings = await this.GenerateEmbeddingsOneAtATimeAsync(pipeline, generator, partitionsToEmbed, cancellationToken).ConfigureAwait(false);
             }
+
+            await this.CachePartitionEmbeddingsAsync(generator, partitionsToEmbed, newEmbeddings, cancellationToken).ConfigureAwait(false);
+            for (int i = 0; i < partitionsToEmbed.Count; i++) { embeddings[partitionsToEmbed[i]] = newEmbeddings[i]; }
+
+            await this.CacheEmbeddingsAsync(fingerprint, partitions, embeddings, cancellationToken).ConfigureAwait(false);
         }
 
         return (true, pipeline);
@@ -89,7 +112,7 @@ public sealed class GenerateEmbeddingsHandler : GenerateEmbeddingsHandlerBase, I
     protected override IPipelineStepHandler ActualInstance => this;
 
     // Generate and save embeddings, one batch at a time
-    private async Task GenerateEmbeddingsWithBatchingAsync(
+    private async Task<List<Embedding>> GenerateEmbeddingsWithBatchingAsync(
         DataPipeline pipeline,
         ITextEmbeddingBatchGenerator generator,
         int batchSize,
@@ -102,6 +125,7 @@ public sealed class GenerateEmbeddingsHandler : GenerateEmbeddingsHandlerBase, I
             pipeline.Index, pipeline.DocumentId, generator.GetType().FullName, generator.MaxBatchSize, batches.Length);
 
         // One batch at a time
+        var result = new List<Embedding>(partitions.Count);
         foreach (PartitionInfo[] partitionsInfo in batches)
         {
             string[] strings = partitionsInfo.Select(x => x.PartitionContent).ToArray();
@@ -114,11 +138,14 @@ public sealed class GenerateEmbeddingsHandler : GenerateEmbeddingsHandlerBase, I
             await this.SaveEmbeddingsToDocumentStorageAsync(
                     pipeline, partitionsInfo, embeddings, GetEmbeddingProviderName(generator), GetEmbeddingGeneratorName(generator), cancellationToken)
                 .ConfigureAwait(false);
+            result.AddRange(embeddings);
         }
+
+        return result;
     }
 
     // Generate and save embeddings, one chunk at a time
-    private async Task GenerateEmbeddingsOneAtATimeAsync(
+    private async Task<List<Embedding>> GenerateEmbeddingsOneAtATimeAsync(
         DataPipeline pipeline,
         ITextEmbeddingGenerator generator,
         List<PartitionInfo> partitions,
@@ -128,6 +155,7 @@ public sealed class GenerateEmbeddingsHandler : GenerateEmbeddingsHandlerBase, I
             pipeline.Index, pipeline.DocumentId, generator.GetType().FullName, partitions.Count);
 
         // One partition at a time
+        var result = new List<Embedding>(partitions.Count);
         foreach (PartitionInfo partitionInfo in partitions)
         {
             this._log.LogTrace("Generating embedding, pipeline '{0}/{1}', generator '{2}', content size {3} tokens",
@@ -136,6 +164,70 @@ public sealed class GenerateEmbeddingsHandler : GenerateEmbeddingsHandlerBase, I
             await this.SaveEmbeddingToDocumentStorageAsync(
                     pipeline, partitionInfo, embedding, GetEmbeddingProviderName(generator), GetEmbeddingGeneratorName(generator), cancellationToken)
                 .ConfigureAwait(false);
+            result.Add(embedding);
+        }
+
+        return result;
+    }
+
+    // Save the embeddings cached for files having exactly the same partitions, returning the partitions still to process.
+    // Files are compared as a whole, e.g. a document uploaded again, while files with only some partitions changed are processed again.
+    private async Task<List<PartitionInfo>> ReuseCachedEmbeddingsAsync(
+        DataPipeline pipeline,
+        ITextEmbeddingGenerator generator,
+        string fingerprint,
+        List<PartitionInfo> partitions,
+        CancellationToken cancellationToken)
+    {
+        if (this._artifactCache == null) { return partitions; }
+
+        var partitionsToProcess = new List<PartitionInfo>();
+        foreach (PartitionInfo[] filePartitions in GroupByFile(partitions))
+        {
+            BinaryData? cachedEmbeddings = await this._artifactCache.GetAsync(
+                Constants.PipelineStepsGenEmbeddings, GetContentHash(filePartitions), fingerprint, "embeddings", cancellationToken).ConfigureAwait(false);
+            float[][]? vectors = cachedEmbeddings?.ToObjectFromJson<float[][]>();
+            if (vectors == null || vectors.Length != filePartitions.Length)
+            {
+                partitionsToProcess.AddRange(filePartitions);
+                continue;
+            }
+
+            this._log.LogDebug("Reusing {0} embeddings previously generated for the same content, pipeline '{1}/{2}', file '{3}'",
+                vectors.Length, pipeline.Index, pipeline.DocumentId, filePartitions[0].UploadedFile.Name);
+            await this.SaveEmbeddingsToDocumentStorageAsync(
+                    pipeline, filePartitions, vectors.Select(x => new Embedding(x)).ToArray(),
+                    GetEmbeddingProviderName(generator), GetEmbeddingGeneratorName(generator), cancellationToken)
+                .ConfigureAwait(false);
+        }
+
+        return partitionsToProcess;
+    }
+
+    private async Task CacheEmbeddingsAsync(
+        string fingerprint,
+        List<PartitionInfo> partitions,
+        Dictionary<PartitionInfo, Embedding> embeddings,
+        CancellationToken cancellationToken)
+    {
+        if (this._artifactCache == null) { return; }
+
+        foreach (PartitionInfo[] filePartitions in GroupByFile(partitions))
+        {
+            float[][] vectors = filePartitions.Select(x => embeddings[x].Data.ToArray()).ToArray();
+            await this._artifactCache.SetAsync(
+                Constants.PipelineStepsGenEmbeddings, GetContentHash(filePartitions), fingerprint, "embeddings", BinaryData.FromObjectAsJson(vectors), cancellationToken).ConfigureAwait(false);
         }
     }
+
+    private static IEnumerable<PartitionInfo[]> GroupByFile(List<PartitionInfo> partitions)
+    {
+        return partitions.GroupBy(x => x.UploadedFile.Id).Select(x => x.ToArray());
+    }
+
+    // Hash of the content of all the partitions of a file
+    private static string GetContentHash(PartitionInfo[] filePartitions)
+    {
+        return PipelineArtifactCache.GetContentHash(string.Join('\n', filePartitions.Select(x => PipelineArtifactCache.GetContentHash(x.PartitionContent))));
+    }
 }
@@ -7,6 +7,7 @@ using System.Text.Json;
 using System.Threading;
 using System.Threading.Tasks;
 using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.AI;
 using Microsoft.KernelMemory.DocumentStorage;
 using Microsoft.KernelMemory.Pipeline;
 
@@ -16,13 +17,15 @@ public abstract class GenerateEmbeddingsHandlerBase
 {
     private readonly IPipelineOrchestrator _orchestrator;
     private readonly ILogger _log;
+    private readonly PartitionEmbeddingCache? _embeddingCache;
 
     protected abstract IPipelineStepHandler ActualInstance { get; }
 
-    protected GenerateEmbeddingsHandlerBase(IPipelineOrchestrator orchestrator, ILogger log)
+    protected GenerateEmbeddingsHandlerBase(IPipelineOrchestrator orchestrator, ILogger log, PartitionEmbeddingCache? embeddingCache = null)
     {
         this._orchestrator = orchestrator;
         this._log = log;
+        this._embeddingCache = embeddingCache;
     }
 
     protected async Task<List<PartitionInfo>> GetListOfPartitionsToProcessAsync(
@@ -55,7 +58,7 @@ public abstract class GenerateEmbeddingsHandlerBase
                     continue;
                 }
 
-                // TODO: cost/perf: if the partition SHA256 is the same and the embedding exists, avoid generating it again
+                // Note: partitions with the same text are not embedded again, see ReuseCachedPartitionEmbeddingsAsync
                 switch (partitionFile.MimeType)
                 {
                     case MimeTypes.PlainText:
@@ -75,6 +78,52 @@ public abstract class GenerateEmbeddingsHandlerBase
         return partitionsToProcess;
     }
 
+    // Save the embeddings cached for partitions with the same text, e.g. the unchanged chunks of an updated document,
+    // returning the embeddings found. The embeddings of the other partitions need to be generated.
+    protected async Task<Dictionary<PartitionInfo, Embedding>> ReuseCachedPartitionEmbeddingsAsync(
+        DataPipeline pipeline,
+        ITextEmbeddingGenerator generator,
+        List<PartitionInfo> partitions,
+        CancellationToken cancellationToken)
+    {
+        var result = new Dictionary<PartitionInfo, Embedding>();
+        if (this._embeddingCache == null) { return result; }
+
+        foreach (PartitionInfo partition in partitions)
+        {
+            Embedding? embedding = await this._embeddingCache.GetAsync(generator, partition.PartitionContent, cancellationToken).ConfigureAwait(false);
+            if (embedding == null) { continue; }
+
+            await this.SaveEmbeddingToDocumentStorageAsync(
+                    pipeline, partition, embedding.Value, GetEmbeddingProviderName(generator), GetEmbeddingGeneratorName(generator), cancellationToken)
+                .ConfigureAwait(false);
+            result[partition] = embedding.Value;
+        }
+
+        if (result.Count > 0)
+        {
+            this._log.LogDebug("Reusing {0} cached embeddings out of {1} partitions, pipeline '{2}/{3}'",
+                result.Count, partitions.Count, pipeline.Index, pipeline.DocumentId);
+        }
+
+        return result;
+    }
+
+    // Store the embeddings generated, so partitions with the same text can reuse them
+    protected async Task CachePartitionEmbeddingsAsync(
+        ITextEmbeddingGenerator generator,
+        IReadOnlyList<PartitionInfo> partitions,
+        IReadOnlyList<Embedding> embeddings,
+        CancellationToken cancellationToken)
+    {
+        if (this._embeddingCache == null) { return; }
+
+        for (int i = 0; i < partitions.Count; i++)
+        {
+            await this._embeddingCache.SetAsync(generator, partitions[i].PartitionContent, embeddings[i], cancellationToken).ConfigureAwait(false);
+        }
+    }
+
     // Store embeddings in Azure Blobs/Disk/S3
     protected async Task SaveEmbeddingsToDocumentStorageAsync(
         DataPipeline pipeline,
@@ -156,6 +205,12 @@ public abstract class GenerateEmbeddingsHandlerBase
         return "TODO";
     }
 
+    // Model or deployment of the generator, when the generator exposes it, see ITextEmbeddingModelInfo
+    protected static string GetEmbeddingModelId(object generator)
+    {
+        return (generator as ITextEmbeddingModelInfo)?.ModelId ?? string.Empty;
+    }
+
     protected class PartitionInfo(
         KeyValuePair<string, DataPipeline.GeneratedFileDetails> generatedFile,
         DataPipeline.FileDetails uploadedFile,
@@ -187,6 +242,7 @@ public abstract class GenerateEmbeddingsHandlerBase
             PartitionNumber = sourcePartitionFile.PartitionNumber,
             SectionNumber = sourcePartitionFile.SectionNumber,
             Tags = sourcePartitionFile.Tags,
+            TokenCount = sourcePartitionFile.TokenCount,
         };
 
         newFileDetails.MarkProcessedBy(this.ActualInstance);
@@ -1,6 +1,8 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System;
 using System.Collections.Generic;
+using System.Diagnostics;
 using System.Linq;
 using System.Threading;
 using System.Threading.Tasks;
@@ -17,9 +19,13 @@ namespace Microsoft.KernelMemory.Handlers;
 /// </summary>
 public sealed class GenerateEmbeddingsParallelHandler : GenerateEmbeddingsHandlerBase, IPipelineStepHandler
 {
+    // Max tokens per batch, well below the request limits of the OpenAI embedding API (300K tokens)
+    private const int DefaultBatchMaxTokens = 50_000;
+
     private readonly ILogger<GenerateEmbeddingsParallelHandler> _log;
     private readonly List<ITextEmbeddingGenerator> _embeddingGenerators;
     private readonly bool _embeddingGenerationEnabled;
+    private readonly int _maxDegreeOfParallelism;
 
     /// <inheritdoc />
     public string StepName { get; }
@@ -30,18 +36,25 @@ public sealed class GenerateEmbeddingsParallelHandler : GenerateEmbeddingsHandle
     /// </summary>
     /// <param name="stepName">Pipeline step for which the handler will be invoked</param>
     /// <param name="orchestrator">Current orchestrator used by the pipeline, giving access to content and other helps.</param>
+    /// <param name="embeddingCache">Optional cache of the embeddings generated for partitions already processed</param>
+    /// <param name="rateLimiter">Optional rate limiter of the AI requests, setting the max number of requests in parallel</param>
     /// <param name="loggerFactory">Application logger factory</param>
     public GenerateEmbeddingsParallelHandler(
         string stepName,
         IPipelineOrchestrator orchestrator,
+        PartitionEmbeddingCache? embeddingCache = null,
+        AdaptiveRateLimiter? rateLimiter = null,
         ILoggerFactory? loggerFactory = null)
-        : base(orchestrator, (loggerFactory ?? DefaultLogger.Factory).CreateLogger<GenerateEmbeddingsHandler>())
+        : base(orchestrator, (loggerFactory ?? DefaultLogger.Factory).CreateLogger<GenerateEmbeddingsHandler>(), embeddingCache)
     {
         this.StepName = stepName;
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<GenerateEmbeddingsParallelHandler>();
         this._embeddingGenerationEnabled = orchestrator.EmbeddingGenerationEnabled;
         this._embeddingGenerators = orchestrator.GetEmbeddingGenerators();
 
+        // When the AI requests are rate limited, the limiter decides how many requests run concurrently
+        this._maxDegreeOfParallelism = rateLimiter?.MaxConcurrency ?? Environment.ProcessorCount;
+
         if (this._embeddingGenerationEnabled)
         {
             if (this._embeddingGenerators.Count < 1)
@@ -72,10 +85,15 @@ public sealed class GenerateEmbeddingsParallelHandler : GenerateEmbeddingsHandle
             var subStepName = GetSubStepName(generator);
             var partitions = await this.GetListOfPartitionsToProcessAsync(pipeline, subStepName, cancellationToken).ConfigureAwait(false);
 
+            // Reuse the embeddings of partitions with the same text, e.g. unchanged chunks of updated files
+            var cachedEmbeddings = await this.ReuseCachedPartitionEmbeddingsAsync(pipeline, generator, partitions, cancellationToken).ConfigureAwait(false);
+            partitions = partitions.Where(x => !cachedEmbeddings.ContainsKey(x)).ToList();
+
             int batchSize = pipeline.GetContext().GetCustomEmbeddingGenerationBatchSizeOrDefault((generator as ITextEmbeddingBatchGenerator)?.MaxBatchSize ?? 1);
             if (batchSize > 1 && generator is ITextEmbeddingBatchGenerator batchGenerator)
             {
-                await this.GenerateEmbeddingsWithBatchingAsync(pipeline, batchGenerator, batchSize, partitions, cancellationToken).ConfigureAwait(false);
+                int batchMaxTokens = pipeline.GetContext().GetCustomEmbeddingGenerationBatchMaxTokensOrDefault(DefaultBatchMaxTokens);
+                await this.GenerateEmbeddingsWithBatchingAsync(pipeline, batchGenerator, batchSize, batchMaxTokens, partitions, cancellationToken).ConfigureAwait(false);
             }
             else
             {
@@ -88,33 +106,61 @@ public sealed class GenerateEmbeddingsParallelHandler : GenerateEmbeddingsHandle
 
     protected override IPipelineStepHandler ActualInstance => this;
 
-    // Generate and save embeddings, one batch at a time
+    // Generate and save embeddings, batches in parallel. Batches are sized by number of partitions and tokens,
+    // and mix the partitions of all the files in the pipeline.
     private async Task GenerateEmbeddingsWithBatchingAsync(
         DataPipeline pipeline,
         ITextEmbeddingBatchGenerator generator,
         int batchSize,
+        int batchMaxTokens,
         List<PartitionInfo> partitions,
         CancellationToken cancellationToken)
     {
-        PartitionInfo[][] batches = partitions.Chunk(batchSize).ToArray();
+        if (partitions.Count == 0) { return; }
+
+        List<(PartitionInfo[] Items, int Tokens)> batches = EmbeddingBatcher.CreateBatches(
+            partitions,
+            x => GetTokenCount((ITextEmbeddingGenerator)generator, x),
+            x => x.UploadedFile.Id,
+            maxItems: batchSize,
+            maxTokens: batchMaxTokens);
 
-        this._log.LogTrace("Generating embeddings, pipeline '{0}/{1}', batch generator '{2}', batch size {3}, batch count {4}",
-            pipeline.Index, pipeline.DocumentId, generator.GetType().FullName, generator.MaxBatchSize, batches.Length);
+        this._log.LogTrace("Generating embeddings, pipeline '{0}/{1}', batch generator '{2}', batch size {3}, max tokens {4}, batch count {5}",
+            pipeline.Index, pipeline.DocumentId, generator.GetType().FullName, batchSize, batchMaxTokens, batches.Count);
 
         // Multiple batches in parallel
-        await Parallel.ForEachAsync(batches, cancellationToken, async (partitionsInfo, ct) =>
+        var watch = Stopwatch.StartNew();
+        var options = new ParallelOptions { CancellationToken = cancellationToken, MaxDegreeOfParallelism = this._maxDegreeOfParallelism };
+        await Parallel.ForEachAsync(batches, options, async (batch, ct) =>
         {
+            PartitionInfo[] partitionsInfo = batch.Items;
             string[] strings = partitionsInfo.Select(x => x.PartitionContent).ToArray();
 
-            int totalTokens = strings.Sum(s => ((ITextEmbeddingGenerator)generator).CountTokens(s));
             this._log.LogTrace("Generating embeddings, pipeline '{0}/{1}', generator '{2}', batch size {3}, total {4} tokens",
-                pipeline.Index, pipeline.DocumentId, generator.GetType().FullName, strings.Length, totalTokens);
+                pipeline.Index, pipeline.DocumentId, generator.GetType().FullName, strings.Length, batch.Tokens);
 
             Embedding[] embeddings = await generator.GenerateEmbeddingBatchAsync(strings, cancellationToken).ConfigureAwait(false);
             await this.SaveEmbeddingsToDocumentStorageAsync(
                     pipeline, partitionsInfo, embeddings, GetEmbeddingProviderName(generator), GetEmbeddingGeneratorName(generator), cancellationToken)
                 .ConfigureAwait(false);
+            await this.CachePartitionEmbeddingsAsync((ITextEmbeddingGenerator)generator, partitionsInfo, embeddings, ct).ConfigureAwait(false);
         }).ConfigureAwait(false);
+
+        long totalTokens = batches.Sum(x => (long)x.Tokens);
+        double seconds = Math.Max(watch.Elapsed.TotalSeconds, 0.001);
+        this._log.LogInformation("Generated {0} embeddings in {1} batches, pipeline '{2}/{3}', {4} tokens in {5:F1} secs, {6:F0} tokens/sec",
+            partitions.Count, batches.Count, pipeline.Index, pipeline.DocumentId, totalTokens, seconds, totalTokens / seconds);
+    }
+
+    // Use the token count stored by the partitioning handler when available, to avoid tokenizing the text again.
+    // The count is reused only if it comes from the tokenizer of the same model, e.g. not when there are
+    // multiple generators, because the partitioning handler counts tokens with one of them.
+    private static int GetTokenCount(ITextEmbeddingGenerator generator, PartitionInfo partition)
+    {
+        DataPipeline.GeneratedFileDetails file = partition.GeneratedFile.Value;
+        return file.TokenCount > 0 && string.Equals(file.TokenCountModel, GetEmbeddingModelId(generator), StringComparison.Ordinal)
+            ? file.TokenCount
+            : generator.CountTokens(partition.PartitionContent);
     }
 
     // Generate and save embeddings, one chunk at a time
@@ -128,7 +174,8 @@ public sealed class GenerateEmbeddingsParallelHandler : GenerateEmbeddingsHandle
             pipeline.Index, pipeline.DocumentId, generator.GetType().FullName, partitions.Count);
 
         // Multiple partitions in parallel
-        await Parallel.ForEachAsync(partitions, cancellationToken, async (partitionInfo, ct) =>
+        var options = new ParallelOptions { CancellationToken = cancellationToken, MaxDegreeOfParallelism = this._maxDegreeOfParallelism };
+        await Parallel.ForEachAsync(partitions, options, async (partitionInfo, ct) =>
             {
                 this._log.LogTrace("Generating embedding, pipeline '{0}/{1}', generator '{2}', content size {3} tokens",
                     pipeline.Index, pipeline.DocumentId, generator.GetType().FullName, generator.CountTokens(partitionInfo.PartitionContent));
@@ -136,6 +183,7 @@ public sealed class GenerateEmbeddingsParallelHandler : GenerateEmbeddingsHandle
                 await this.SaveEmbeddingToDocumentStorageAsync(
                         pipeline, partitionInfo, embedding, GetEmbeddingProviderName(generator), GetEmbeddingGeneratorName(generator), ct)
                     .ConfigureAwait(false);
+                await this.CachePartitionEmbeddingsAsync(generator, [partitionInfo], [embedding], ct).ConfigureAwait(false);
             })
             .ConfigureAwait(false);
     }
@@ -22,11 +22,13 @@ public sealed class KeywordExtractingHandler : IPipelineStepHandler
     private readonly IPipelineOrchestrator _orchestrator;
     private readonly Kernel _kernel;
     private readonly KernelMemoryConfig? _config = null;
+    private readonly PipelineArtifactCache? _artifactCache;
 
     public KeywordExtractingHandler(
         string stepName,
         IPipelineOrchestrator orchestrator,
         KernelMemoryConfig config = null,
+        PipelineArtifactCache? artifactCache = null,
         ILoggerFactory? loggerFactory = null
         )
     {
@@ -34,6 +36,7 @@ public sealed class KeywordExtractingHandler : IPipelineStepHandler
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<KeywordExtractingHandler>();
         this._orchestrator = orchestrator;
         this._config = config;
+        this._artifactCache = artifactCache;
 
         //init Semantic Kernel
         this._kernel = Kernel.CreateBuilder()
@@ -114,18 +117,42 @@ public sealed class KeywordExtractingHandler : IPipelineStepHandler
                                 }
                     };
 
+                    //Reuse the tags extracted from the same content, with the same deployment and prompt
+                    string contentHash = PipelineArtifactCache.GetContentHash(extactedFileContent);
+                    string fingerprint = PipelineArtifactCache.GetFingerprint(
+                        (string)this._config.Services["AzureOpenAIText"]["Deployment"], systemMessage, "Temperature=1");
+                    BinaryData? cachedTags = this._artifactCache == null
+                        ? null
+                        : await this._artifactCache.GetAsync(Constants.PipelineStepsKeywordExtraction, contentHash, fingerprint, "tags", cancellationToken).ConfigureAwait(false);
+
                     ChatMessageContent response = null;
 
                     try
                     {
-                        response = await chat.GetChatMessageContentAsync(chatHistory: chatHistory, executionSettings: executionParam, cancellationToken: cancellationToken).ConfigureAwait(true);
+                        string tagsJson;
+                        if (cachedTags != null)
+                        {
+                            this._log.LogDebug("Reusing tags previously extracted from the same content, file {FileName}", file.Name);
+                            tagsJson = cachedTags.ToString();
+                        }
+                        else
+                        {
+                            response = await chat.GetChatMessageContentAsync(chatHistory: chatHistory, executionSettings: executionParam, cancellationToken: cancellationToken).ConfigureAwait(true);
+                            tagsJson = response.ToString();
+                        }
 
                         //Make BinaryData from response
-                        BinaryData responseBinaryData = new(response.ToString());
+                        BinaryData responseBinaryData = new(tagsJson);
                         await this._orchestrator.WriteFileAsync(pipeline, destFile, responseBinaryData, cancellationToken).ConfigureAwait(false);
 
                         //Add Tags from Extracted Keywords
-                        List<Dictionary<string, List<string>>> tags = JsonSerializer.Deserialize<List<Dictionary<string, List<string>>>>(response.ToString());
+                        List<Dictionary<string, List<string>>> tags = JsonSerializer.Deserialize<List<Dictionary<string, List<string>>>>(tagsJson);
+
+                        //Cache only responses in the expected format
+                        if (cachedTags == null && this._artifactCache != null)
+                        {
+                            await this._artifactCache.SetAsync(Constants.PipelineStepsKeywordExtraction, contentHash, fingerprint, "tags", responseBinaryData, cancellationToken).ConfigureAwait(false);
+                        }
 
                         Dictionary<string, List<string>> keyValueCollection = new Dictionary<string, List<string>>();
 
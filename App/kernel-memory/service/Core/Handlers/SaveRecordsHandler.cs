@@ -12,6 +12,7 @@ using Microsoft.KernelMemory.DocumentStorage;
 using Microsoft.KernelMemory.FileSystem.DevTools;
 using Microsoft.KernelMemory.MemoryStorage;
 using Microsoft.KernelMemory.Pipeline;
+using Microsoft.KernelMemory.Search;
 
 namespace Microsoft.KernelMemory.Handlers;
 
@@ -47,6 +48,7 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
     private readonly List<IMemoryDb> _memoryDbs;
     private readonly List<IMemoryDb> _memoryDbsWithSingleUpsert;
     private readonly List<IMemoryDb> _memoryDbsWithBatchUpsert;
+    private readonly AnswerCache? _answerCache;
     private readonly ILogger<SaveRecordsHandler> _log;
     private readonly bool _embeddingGenerationEnabled;
     private readonly int _upsertBatchSize;
@@ -62,14 +64,17 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
     /// <param name="stepName">Pipeline step for which the handler will be invoked</param>
     /// <param name="orchestrator">Current orchestrator used by the pipeline, giving access to content and other helps.</param>
     /// <param name="config">Configuration settings</param>
+    /// <param name="answerCache">Optional cache of the answers to invalidate when records change</param>
     /// <param name="loggerFactory">Application logger factory</param>
     public SaveRecordsHandler(
         string stepName,
         IPipelineOrchestrator orchestrator,
         KernelMemoryConfig? config = null,
+        AnswerCache? answerCache = null,
         ILoggerFactory? loggerFactory = null)
     {
         this.StepName = stepName;
+        this._answerCache = answerCache;
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<SaveRecordsHandler>();
         this._embeddingGenerationEnabled = orchestrator.EmbeddingGenerationEnabled;
 
@@ -108,11 +113,16 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
     {
         this._log.LogDebug("Saving memory records, pipeline '{0}/{1}'", pipeline.Index, pipeline.DocumentId);
 
+        // The tags of the records deleted are unknown, so all the cached answers of the index are affected
+        bool previousRecordsDeleted = pipeline.PreviousExecutionsToPurge.Count > 0;
         await this.DeletePreviousRecordsAsync(pipeline, cancellationToken).ConfigureAwait(false);
         pipeline.PreviousExecutionsToPurge = new List<DataPipeline>();
 
         var recordsFound = false;
 
+        // Tags of the records saved, to invalidate only the cached answers affected
+        var savedTags = new List<TagCollection>();
+
         // TODO: replace with ConditionalWeakTable indexing on this._memoryDbs
         var createdIndexes = new HashSet<string>();
 
@@ -169,6 +179,7 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
                         partitionEmbedding: embeddingData.Vector,
                         embeddingGeneratorProvider: embeddingData.GeneratorProvider,
                         embeddingGeneratorName: embeddingData.GeneratorName,
+                        tokenCount: file.File.TokenCount,
                         file.File.Tags);
                 }
                 else
@@ -196,6 +207,7 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
                                 partitionEmbedding: new Embedding(),
                                 embeddingGeneratorProvider: "",
                                 embeddingGeneratorName: "",
+                                tokenCount: file.File.TokenCount,
                                 file.File.Tags);
                             break;
 
@@ -207,6 +219,7 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
                 }
 
                 records.Add(record);
+                savedTags.Add(record.Tags);
 
                 foreach (IMemoryDb db in this._memoryDbsWithSingleUpsert)
                 {
@@ -241,6 +254,9 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
             this._log.LogWarning("Pipeline '{0}/{1}': step {2}: no records found, cannot save, moving to next pipeline step.", pipeline.Index, pipeline.DocumentId, this.StepName);
         }
 
+        if (previousRecordsDeleted) { this._answerCache?.Invalidate(pipeline.Index); }
+        else if (savedTags.Count > 0) { this._answerCache?.Invalidate(pipeline.Index, savedTags); }
+
         return (true, pipeline);
     }
 
@@ -370,6 +386,7 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
     /// <param name="partitionEmbedding">Embedding vector calculated from the partition content</param>
     /// <param name="embeddingGeneratorProvider">Name of the embedding provider (e.g. Azure), for future use when using multiple embedding types concurrently</param>
     /// <param name="embeddingGeneratorName">Name of the model used to generate embeddings, for future use</param>
+    /// <param name="tokenCount">Number of tokens of the partition content, zero if unknown</param>
     /// <param name="tags">Collection of tags assigned to the record</param>
     /// <returns>Memory record ready to be saved</returns>
     private static MemoryRecord PrepareRecord(
@@ -385,6 +402,7 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
         Embedding partitionEmbedding,
         string embeddingGeneratorProvider,
         string embeddingGeneratorName,
+        int tokenCount,
         TagCollection tags)
     {
         var record = new MemoryRecord { Id = recordId };
@@ -422,6 +440,9 @@ public sealed class SaveRecordsHandler : IPipelineStepHandler
         record.Payload[Constants.ReservedPayloadVectorProviderField] = embeddingGeneratorProvider;
         record.Payload[Constants.ReservedPayloadVectorGeneratorField] = embeddingGeneratorName;
 
+        // Partition size, so prompts can be assembled without counting tokens again
+        if (tokenCount > 0) { record.Payload[Constants.ReservedPayloadTokenCountField] = tokenCount; }
+
         // Partition ID. Filtering used for purge.
         record.Tags.Add(Constants.ReservedFilePartitionTag, partitionFileId);
 
@@ -2,6 +2,7 @@
 
 using System;
 using System.Collections.Generic;
+using System.Globalization;
 using System.Text;
 using System.Threading;
 using System.Threading.Tasks;
@@ -23,6 +24,7 @@ public sealed class SummarizationHandler : IPipelineStepHandler
     private readonly IPipelineOrchestrator _orchestrator;
     private readonly ILogger<SummarizationHandler> _log;
     private readonly string _summarizationPrompt;
+    private readonly PipelineArtifactCache? _artifactCache;
 
     /// <inheritdoc />
     public string StepName { get; }
@@ -35,15 +37,18 @@ public sealed class SummarizationHandler : IPipelineStepHandler
     /// <param name="stepName">Pipeline step for which the handler will be invoked</param>
     /// <param name="orchestrator">Current orchestrator used by the pipeline, giving access to content and other helps.</param>
     /// <param name="promptProvider">Class responsible for providing a given prompt</param>
+    /// <param name="artifactCache">Optional cache of the summaries generated for content already processed</param>
     /// <param name="loggerFactory">Application logger factory</param>
     public SummarizationHandler(
         string stepName,
         IPipelineOrchestrator orchestrator,
         IPromptProvider? promptProvider = null,
+        PipelineArtifactCache? artifactCache = null,
         ILoggerFactory? loggerFactory = null)
     {
         this.StepName = stepName;
         this._orchestrator = orchestrator;
+        this._artifactCache = artifactCache;
 
         promptProvider ??= new EmbeddedPromptProvider();
         this._summarizationPrompt = promptProvider.ReadPrompt(Constants.PromptNamesSummarize);
@@ -87,7 +92,7 @@ public sealed class SummarizationHandler : IPipelineStepHandler
                     case MimeTypes.MarkDown:
                         this._log.LogDebug("Summarizing text file {0}", file.Name);
                         string content = (await this._orchestrator.ReadFileAsync(pipeline, file.Name, cancellationToken).ConfigureAwait(false)).ToString();
-                        (string summary, bool success) = await this.SummarizeAsync(content, pipeline.GetContext()).ConfigureAwait(false);
+                        (string summary, bool success) = await this.SummarizeWithCacheAsync(content, pipeline.GetContext(), cancellationToken).ConfigureAwait(false);
                         if (success)
                         {
                             var summaryData = new BinaryData(summary);
@@ -128,6 +133,43 @@ public sealed class SummarizationHandler : IPipelineStepHandler
         return (true, pipeline);
     }
 
+    // Reuse the summary generated for the same content, with the same model and settings.
+    // Summaries are not cached when the generator doesn't identify its model, see ITextGenerationModelInfo.
+    private async Task<(string summary, bool success)> SummarizeWithCacheAsync(string content, IContext context, CancellationToken cancellationToken)
+    {
+        ITextGenerator textGenerator = this._orchestrator.GetTextGenerator();
+        string model = (textGenerator as ITextGenerationModelInfo)?.ModelId ?? string.Empty;
+        if (this._artifactCache == null || string.IsNullOrEmpty(model))
+        {
+            return await this.SummarizeAsync(content, context).ConfigureAwait(false);
+        }
+
+        string contentHash = PipelineArtifactCache.GetContentHash(content);
+        string fingerprint = PipelineArtifactCache.GetFingerprint(
+            model,
+            textGenerator.MaxTokenTotal.ToString(CultureInfo.InvariantCulture),
+            context.GetCustomSummaryPromptOrDefault(this._summarizationPrompt),
+            context.GetCustomSummaryTargetTokenSizeOrDefault(-1).ToString(CultureInfo.InvariantCulture),
+            context.GetCustomSummaryOverlappingTokensOrDefault(-1).ToString(CultureInfo.InvariantCulture));
+
+        BinaryData? cachedSummary = await this._artifactCache.GetAsync(
+            Constants.PipelineStepsSummarize, contentHash, fingerprint, "summary", cancellationToken).ConfigureAwait(false);
+        if (cachedSummary != null)
+        {
+            this._log.LogDebug("Reusing summary previously generated for the same content");
+            return (cachedSummary.ToString(), true);
+        }
+
+        (string summary, bool success) = await this.SummarizeAsync(content, context).ConfigureAwait(false);
+        if (success)
+        {
+            await this._artifactCache.SetAsync(
+                Constants.PipelineStepsSummarize, contentHash, fingerprint, "summary", new BinaryData(summary), cancellationToken).ConfigureAwait(false);
+        }
+
+        return (summary, success);
+    }
+
     private async Task<(string summary, bool skip)> SummarizeAsync(string content, IContext context)
     {
         ITextGenerator textGenerator = this._orchestrator.GetTextGenerator();
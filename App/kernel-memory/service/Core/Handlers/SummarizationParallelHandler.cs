@@ -22,6 +22,7 @@ public sealed class SummarizationParallelHandler : IPipelineStepHandler
     private readonly IPipelineOrchestrator _orchestrator;
     private readonly ILogger<SummarizationParallelHandler> _log;
     private readonly string _summarizationPrompt;
+    private readonly int _maxDegreeOfParallelism;
 
     /// <inheritdoc />
     public string StepName { get; }
@@ -34,16 +35,21 @@ public sealed class SummarizationParallelHandler : IPipelineStepHandler
     /// <param name="stepName">Pipeline step for which the handler will be invoked</param>
     /// <param name="orchestrator">Current orchestrator used by the pipeline, giving access to content and other helps.</param>
     /// <param name="promptProvider">Class responsible for providing a given prompt</param>
+    /// <param name="rateLimiter">Optional rate limiter of the AI requests, setting the max number of requests in parallel</param>
     /// <param name="loggerFactory">Application logger factory</param>
     public SummarizationParallelHandler(
         string stepName,
         IPipelineOrchestrator orchestrator,
         IPromptProvider? promptProvider = null,
+        AdaptiveRateLimiter? rateLimiter = null,
         ILoggerFactory? loggerFactory = null)
     {
         this.StepName = stepName;
         this._orchestrator = orchestrator;
 
+        // When the AI requests are rate limited, the limiter decides how many requests run concurrently
+        this._maxDegreeOfParallelism = rateLimiter?.MaxConcurrency ?? Environment.ProcessorCount;
+
         promptProvider ??= new EmbeddedPromptProvider();
         this._summarizationPrompt = promptProvider.ReadPrompt(Constants.PromptNamesSummarize);
 
@@ -66,7 +72,7 @@ public sealed class SummarizationParallelHandler : IPipelineStepHandler
             var options = new ParallelOptions()
             {
                 CancellationToken = cancellationToken,
-                MaxDegreeOfParallelism = Environment.ProcessorCount
+                MaxDegreeOfParallelism = this._maxDegreeOfParallelism
             };
 
             await Parallel.ForEachAsync(uploadedFile.GeneratedFiles, options, async (generatedFile, token) =>
@@ -9,6 +9,8 @@ using System.Threading;
 using System.Threading.Tasks;
 using Microsoft.Extensions.Logging;
 using Microsoft.KernelMemory.DataFormats;
+using Microsoft.KernelMemory.DataFormats.Office;
+using Microsoft.KernelMemory.DataFormats.Pdf;
 using Microsoft.KernelMemory.DataFormats.WebPages;
 using Microsoft.KernelMemory.Diagnostics;
 using Microsoft.KernelMemory.Pipeline;
@@ -23,6 +25,7 @@ public sealed class TextExtractionHandler : IPipelineStepHandler, IDisposable
     private readonly IPipelineOrchestrator _orchestrator;
     private readonly IEnumerable<IContentDecoder> _decoders;
     private readonly IWebScraper _webScraper;
+    private readonly PipelineArtifactCache? _artifactCache;
     private readonly ILogger<TextExtractionHandler> _log;
 
     /// <inheritdoc />
@@ -36,17 +39,20 @@ public sealed class TextExtractionHandler : IPipelineStepHandler, IDisposable
     /// <param name="orchestrator">Current orchestrator used by the pipeline, giving access to content and other helps.</param>
     /// <param name="decoders">The list of content decoders for extracting content</param>
     /// <param name="webScraper">Web scraper instance used to fetch web pages</param>
+    /// <param name="artifactCache">Optional cache of the text extracted from files already processed</param>
     /// <param name="loggerFactory">Application logger factory</param>
     public TextExtractionHandler(
         string stepName,
         IPipelineOrchestrator orchestrator,
         IEnumerable<IContentDecoder> decoders,
         IWebScraper? webScraper = null,
+        PipelineArtifactCache? artifactCache = null,
         ILoggerFactory? loggerFactory = null)
     {
         this.StepName = stepName;
         this._orchestrator = orchestrator;
         this._decoders = decoders;
+        this._artifactCache = artifactCache;
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<TextExtractionHandler>();
         this._webScraper = webScraper ?? new WebScraper();
 
@@ -89,7 +95,7 @@ public sealed class TextExtractionHandler : IPipelineStepHandler, IDisposable
                 }
                 else
                 {
-                    (text, content, skipFile) = await this.ExtractTextAsync(uploadedFile, fileContent, cancellationToken).ConfigureAwait(false);
+                    (text, content, skipFile) = await this.ExtractTextWithCacheAsync(uploadedFile, fileContent, cancellationToken).ConfigureAwait(false);
                 }
             }
 
@@ -182,6 +188,45 @@ public sealed class TextExtractionHandler : IPipelineStepHandler, IDisposable
         return (result, urlDownloadResult.Content, skip: false);
     }
 
+    // Reuse the text extracted from the same file content, when the same decoder is in use.
+    // Web pages are not cached, their content can change at any time.
+    private async Task<(string text, FileContent content, bool skipFile)> ExtractTextWithCacheAsync(
+        DataPipeline.FileDetails uploadedFile,
+        BinaryData fileContent,
+        CancellationToken cancellationToken)
+    {
+        var decoder = string.IsNullOrEmpty(uploadedFile.MimeType)
+            ? null
+            : this._decoders.LastOrDefault(d => d.SupportsMimeType(uploadedFile.MimeType));
+        if (this._artifactCache == null || decoder == null)
+        {
+            return await this.ExtractTextAsync(uploadedFile, fileContent, cancellationToken).ConfigureAwait(false);
+        }
+
+        string contentHash = PipelineArtifactCache.GetContentHash(fileContent);
+        string fingerprint = PipelineArtifactCache.GetFingerprint(uploadedFile.MimeType, decoder.GetType().FullName);
+
+        BinaryData? cachedText = await this._artifactCache.GetAsync(Constants.PipelineStepsExtract, contentHash, fingerprint, "text", cancellationToken).ConfigureAwait(false);
+        BinaryData? cachedContent = cachedText == null
+            ? null
+            : await this._artifactCache.GetAsync(Constants.PipelineStepsExtract, contentHash, fingerprint, "content", cancellationToken).ConfigureAwait(false);
+        FileContent? content = cachedContent?.ToObjectFromJson<FileContent>();
+        if (cachedText != null && content != null)
+        {
+            this._log.LogDebug("Reusing text previously extracted from the same content, file '{0}'", uploadedFile.Name);
+            return (cachedText.ToString(), content, skipFile: false);
+        }
+
+        (string text, content, bool skipFile) = await this.ExtractTextAsync(uploadedFile, fileContent, cancellationToken).ConfigureAwait(false);
+        if (!skipFile)
+        {
+            await this._artifactCache.SetAsync(Constants.PipelineStepsExtract, contentHash, fingerprint, "text", new BinaryData(text), cancellationToken).ConfigureAwait(false);
+            await this._artifactCache.SetAsync(Constants.PipelineStepsExtract, contentHash, fingerprint, "content", new BinaryData(content), cancellationToken).ConfigureAwait(false);
+        }
+
+        return (text, content, skipFile);
+    }
+
     private async Task<(string text, FileContent content, bool skipFile)> ExtractTextAsync(
         DataPipeline.FileDetails uploadedFile,
         BinaryData fileContent,
@@ -200,32 +245,38 @@ public sealed class TextExtractionHandler : IPipelineStepHandler, IDisposable
         // Checks if there is a decoder that supports the file MIME type. If multiple decoders support this type, it means that
         // the decoder has been redefined, so it takes the last one.
         var decoder = this._decoders.LastOrDefault(d => d.SupportsMimeType(uploadedFile.MimeType));
-        if (decoder is not null)
-        {
-            this._log.LogDebug("Extracting text from file '{0}' mime type '{1}' using extractor '{2}'",
-                uploadedFile.Name, uploadedFile.MimeType, decoder.GetType().FullName);
-            content = await decoder.DecodeAsync(fileContent, cancellationToken).ConfigureAwait(false);
-        }
-        else
+        if (decoder is null)
         {
             uploadedFile.Log(this, $"File MIME type not supported: {uploadedFile.MimeType}. Ignoring the file {uploadedFile.Name}.");
             this._log.LogWarning("File MIME type not supported: {0} - ignoring the file {1}", uploadedFile.MimeType, uploadedFile.Name);
             return (text: string.Empty, content, skipFile: true);
         }
 
-        var textBuilder = new StringBuilder();
-        foreach (var section in content.Sections)
-        {
-            var sectionContent = section.Content.Trim();
-            if (string.IsNullOrEmpty(sectionContent)) { continue; }
+        this._log.LogDebug("Extracting text from file '{0}' mime type '{1}' using extractor '{2}'",
+            uploadedFile.Name, uploadedFile.MimeType, decoder.GetType().FullName);
 
-            textBuilder.Append(sectionContent);
+        // Decoders extracting pages in parallel return them as soon as they are available,
+        // so the text of the first pages is appended while the next ones are extracted.
+        using var stream = fileContent.ToStream();
+        IAsyncEnumerable<FileSection>? pages = decoder switch
+        {
+            PdfDecoder pdf => pdf.DecodePagesAsync(stream, cancellationToken),
+            MsPowerPointDecoder powerPoint => powerPoint.DecodeSlidesAsync(stream, cancellationToken),
+            _ => null
+        };
 
-            // Add a clean page separation
-            if (section.SentencesAreComplete)
+        var textBuilder = new StringBuilder();
+        if (pages == null)
+        {
+            content = await decoder.DecodeAsync(fileContent, cancellationToken).ConfigureAwait(false);
+            foreach (var section in content.Sections) { AppendSection(textBuilder, section); }
+        }
+        else
+        {
+            await foreach (var section in pages.ConfigureAwait(false))
             {
-                textBuilder.AppendLine();
-                textBuilder.AppendLine();
+                content.Sections.Add(section);
+                AppendSection(textBuilder, section);
             }
         }
 
@@ -233,4 +284,19 @@ public sealed class TextExtractionHandler : IPipelineStepHandler, IDisposable
 
         return (text, content, skipFile: false);
     }
+
+    private static void AppendSection(StringBuilder textBuilder, FileSection section)
+    {
+        var sectionContent = section.Content.Trim();
+        if (string.IsNullOrEmpty(sectionContent)) { return; }
+
+        textBuilder.Append(sectionContent);
+
+        // Add a clean page separation
+        if (section.SentencesAreComplete)
+        {
+            textBuilder.AppendLine();
+            textBuilder.AppendLine();
+        }
+    }
 }
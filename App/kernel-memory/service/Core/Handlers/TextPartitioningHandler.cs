@@ -5,6 +5,7 @@ using System.Collections.Generic;
 using System.Threading;
 using System.Threading.Tasks;
 using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.AI;
 using Microsoft.KernelMemory.AI.OpenAI;
 using Microsoft.KernelMemory.Configuration;
 using Microsoft.KernelMemory.Context;
@@ -21,6 +22,7 @@ public sealed class TextPartitioningHandler : IPipelineStepHandler
     private readonly TextPartitioningOptions _options;
     private readonly ILogger<TextPartitioningHandler> _log;
     private readonly TextChunker.TokenCounter _tokenCounter;
+    private readonly string _tokenCountModel = string.Empty;
     private readonly int _maxTokensPerPartition = int.MaxValue;
 
     /// <inheritdoc />
@@ -56,6 +58,7 @@ public sealed class TextPartitioningHandler : IPipelineStepHandler
             {
                 // Use the last tokenizer (TODO: revisit)
                 this._tokenCounter = s => gen.CountTokens(s);
+                this._tokenCountModel = (gen as ITextEmbeddingModelInfo)?.ModelId ?? string.Empty;
                 this._maxTokensPerPartition = Math.Min(gen.MaxTokens, this._maxTokensPerPartition);
             }
 
@@ -182,6 +185,8 @@ public sealed class TextPartitioningHandler : IPipelineStepHandler
                         SectionNumber = sectionNumber,
                         Tags = pipeline.Tags,
                         ContentSHA256 = textData.CalculateSHA256(),
+                        TokenCount = tokenCount,
+                        TokenCountModel = this._tokenCountModel,
                     };
                     newFiles.Add(destFile, destFileDetails);
                     destFileDetails.MarkProcessedBy(this);
@@ -2,7 +2,9 @@
 
 using System;
 using System.Collections.Generic;
+using System.Linq;
 using Microsoft.Extensions.DependencyInjection;
+using Microsoft.Extensions.Logging;
 using Microsoft.KernelMemory.AI;
 using Microsoft.KernelMemory.AppBuilders;
 using Microsoft.KernelMemory.Context;
@@ -56,6 +58,12 @@ public sealed class KernelMemoryBuilder : IKernelMemoryBuilder
     /// </summary>
     private bool _useDefaultHandlers = true;
 
+    // Whether the retrieval embedding generator has been wrapped with the embedding cache
+    private bool _embeddingCacheAdded = false;
+
+    // Whether the AI generators have been wrapped with the adaptive rate limiter
+    private bool _rateLimiterAdded = false;
+
     /// <summary>
     /// Proxy to the internal service collections, used to (optionally) inject
     /// dependencies into the user application space
@@ -111,6 +119,7 @@ public sealed class KernelMemoryBuilder : IKernelMemoryBuilder
         // Default dependencies, can be overridden
         this.WithDefaultMimeTypeDetection();
         this.WithDefaultPromptProvider();
+        this.WithDefaultPipelineEventBus();
         this.WithDefaultWebScraper();
         this.WithDefaultContentDecoders();
     }
@@ -231,10 +240,11 @@ public sealed class KernelMemoryBuilder : IKernelMemoryBuilder
         try
         {
             ServiceProvider serviceProvider = this._memoryServiceCollection.BuildServiceProvider();
-            this.CompleteServerlessClient(serviceProvider);
 
-            // In case the user didn't set the embedding generator and memory DB to use for ingestion, use the values set for retrieval
+            // In case the user didn't set the embedding generator and memory DB to use for ingestion, use the values set for retrieval.
+            // The generator is reused before completing the client, so the rate limiter wraps it like the other ingestion generators.
             this.ReuseRetrievalEmbeddingGeneratorIfNecessary(serviceProvider);
+            this.CompleteServerlessClient(serviceProvider);
             this.ReuseRetrievalMemoryDbIfNecessary(serviceProvider);
             this.CheckForMissingDependencies();
 
@@ -273,10 +283,11 @@ public sealed class KernelMemoryBuilder : IKernelMemoryBuilder
         }
 
         ServiceProvider serviceProvider = this._memoryServiceCollection.BuildServiceProvider();
-        this.CompleteAsyncClient(serviceProvider);
 
-        // In case the user didn't set the embedding generator and memory DB to use for ingestion, use the values set for retrieval
+        // In case the user didn't set the embedding generator and memory DB to use for ingestion, use the values set for retrieval.
+        // The generator is reused before completing the client, so the rate limiter wraps it like the other ingestion generators.
         this.ReuseRetrievalEmbeddingGeneratorIfNecessary(serviceProvider);
+        this.CompleteAsyncClient(serviceProvider);
         this.ReuseRetrievalMemoryDbIfNecessary(serviceProvider);
         this.CheckForMissingDependencies();
 
@@ -288,6 +299,9 @@ public sealed class KernelMemoryBuilder : IKernelMemoryBuilder
     private KernelMemoryBuilder CompleteServerlessClient(ServiceProvider serviceProvider)
     {
         this.UseDefaultSearchClientIfNecessary(serviceProvider);
+        this.UseRateLimiterIfNecessary(serviceProvider);
+        this.UseEmbeddingCacheIfNecessary(serviceProvider);
+        this.UseAnswerCacheIfNecessary(serviceProvider);
         this.AddSingleton<IPipelineOrchestrator, InProcessPipelineOrchestrator>();
         this.AddSingleton<InProcessPipelineOrchestrator, InProcessPipelineOrchestrator>();
         return this;
@@ -296,6 +310,9 @@ public sealed class KernelMemoryBuilder : IKernelMemoryBuilder
     private KernelMemoryBuilder CompleteAsyncClient(ServiceProvider serviceProvider)
     {
         this.UseDefaultSearchClientIfNecessary(serviceProvider);
+        this.UseRateLimiterIfNecessary(serviceProvider);
+        this.UseEmbeddingCacheIfNecessary(serviceProvider);
+        this.UseAnswerCacheIfNecessary(serviceProvider);
         this.AddSingleton<IPipelineOrchestrator, DistributedPipelineOrchestrator>();
         this.AddSingleton<DistributedPipelineOrchestrator, DistributedPipelineOrchestrator>();
         return this;
@@ -340,6 +357,84 @@ public sealed class KernelMemoryBuilder : IKernelMemoryBuilder
         }
     }
 
+    /// <summary>
+    /// Wrap the retrieval embedding generator with a cache, when the cache is configured.
+    /// The embedding generators used for ingestion are not affected.
+    /// </summary>
+    private void UseEmbeddingCacheIfNecessary(ServiceProvider serviceProvider)
+    {
+        EmbeddingCacheConfig? config = serviceProvider.GetService<EmbeddingCacheConfig>();
+        if (config == null || this._embeddingCacheAdded) { return; }
+
+        ServiceDescriptor? generator = this._memoryServiceCollection.LastOrDefault(x => x.ServiceType == typeof(ITextEmbeddingGenerator) && !x.IsKeyedService);
+        if (generator == null) { return; }
+
+        // The last registration is the one injected, e.g. into memory DB constructors
+        this._memoryServiceCollection.AddSingleton<ITextEmbeddingGenerator>(sp => new CachedTextEmbeddingGenerator(
+            CreateInstance<ITextEmbeddingGenerator>(sp, generator),
+            config,
+            sp.GetService<ILoggerFactory>()));
+        this._embeddingCacheAdded = true;
+    }
+
+    /// <summary>
+    /// Send the requests of the AI generators through the adaptive rate limiter, when the limiter
+    /// is configured. The retrieval and ingestion embedding generators and the text generator are
+    /// wrapped, so handlers and search client share the limits of the deployments they call.
+    /// Note: the limiter wraps the generators before the embedding cache, so cache hits are not limited.
+    /// </summary>
+    private void UseRateLimiterIfNecessary(ServiceProvider serviceProvider)
+    {
+        AdaptiveRateLimiter? limiter = serviceProvider.GetService<AdaptiveRateLimiter>();
+        if (limiter == null || this._rateLimiterAdded) { return; }
+
+        // One instance shared by the generators and the handlers, e.g. running as hosted services
+        this.AddSingleton<AdaptiveRateLimiter>(limiter);
+
+        ServiceDescriptor? embeddingGenerator = this._memoryServiceCollection.LastOrDefault(x => x.ServiceType == typeof(ITextEmbeddingGenerator) && !x.IsKeyedService);
+        if (embeddingGenerator != null)
+        {
+            this._memoryServiceCollection.AddSingleton<ITextEmbeddingGenerator>(sp => new RateLimitedTextEmbeddingGenerator(
+                CreateInstance<ITextEmbeddingGenerator>(sp, embeddingGenerator), limiter));
+        }
+
+        // Text generation is used also by the handlers, e.g. running as hosted services
+        ServiceDescriptor? textGenerator = this._memoryServiceCollection.LastOrDefault(x => x.ServiceType == typeof(ITextGenerator) && !x.IsKeyedService);
+        if (textGenerator != null)
+        {
+            this.Services.AddSingleton<ITextGenerator>(sp => new RateLimitedTextGenerator(
+                CreateInstance<ITextGenerator>(sp, textGenerator), limiter));
+        }
+
+        for (int i = 0; i < this._embeddingGenerators.Count; i++)
+        {
+            if (this._embeddingGenerators[i] is RateLimitedTextEmbeddingGenerator) { continue; }
+
+            this._embeddingGenerators[i] = new RateLimitedTextEmbeddingGenerator(this._embeddingGenerators[i], limiter);
+        }
+
+        this._rateLimiterAdded = true;
+    }
+
+    private static T CreateInstance<T>(IServiceProvider serviceProvider, ServiceDescriptor descriptor)
+    {
+        return (T)(descriptor.ImplementationInstance
+                   ?? descriptor.ImplementationFactory?.Invoke(serviceProvider)
+                   ?? ActivatorUtilities.CreateInstance(serviceProvider, descriptor.ImplementationType!));
+    }
+
+    /// <summary>
+    /// Share one answer cache between the search client, storing answers, and the handlers,
+    /// invalidating them. The instance is added to both the memory and the host services.
+    /// </summary>
+    private void UseAnswerCacheIfNecessary(ServiceProvider serviceProvider)
+    {
+        SearchClientConfig? config = serviceProvider.GetService<SearchClientConfig>();
+        if (config is not { UseAnswerCache: true } || this._memoryServiceCollection.HasService<AnswerCache>()) { return; }
+
+        this.AddSingleton<AnswerCache>(new AnswerCache(config, serviceProvider.GetService<ILoggerFactory>()));
+    }
+
     private void ReuseRetrievalEmbeddingGeneratorIfNecessary(IServiceProvider serviceProvider)
     {
         if (this._embeddingGenerators.Count == 0 && this._memoryServiceCollection.HasService<ITextEmbeddingGenerator>())
@@ -23,4 +23,13 @@ public static partial class KernelMemoryBuilderExtensions
         builder.AddSingleton<IPromptProvider, EmbeddedPromptProvider>();
         return builder;
     }
+
+    public static IKernelMemoryBuilder WithDefaultPipelineEventBus(
+        this IKernelMemoryBuilder builder)
+    {
+        // Register an instance, so orchestrators and web endpoints share the same bus
+        // across the service providers created by the builder and the host app.
+        builder.AddSingleton<IPipelineEventBus>(new InProcessPipelineEventBus());
+        return builder;
+    }
 }
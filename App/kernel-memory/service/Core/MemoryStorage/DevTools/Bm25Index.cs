@@ -0,0 +1,216 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Inverted index of the terms of a set of documents, ranking documents with Okapi BM25.
+/// Documents are identified by an ordinal, assigned in insertion order, and each term
+/// has a posting list of the documents containing it, sorted by ordinal, with the term frequency.
+/// See https://en.wikipedia.org/wiki/Okapi_BM25
+/// Note: the class is not thread safe, callers must synchronize writes with reads.
+/// </summary>
+internal sealed class Bm25Index
+{
+    // Common Okapi BM25 parameters, used by the indexes not exposing them in their configuration
+    public const double DefaultK1 = 1.2;
+    public const double DefaultB = 0.75;
+
+    private readonly record struct Posting(int Ordinal, int Frequency);
+
+    private readonly double _k1;
+    private readonly double _b;
+    private readonly Dictionary<string, List<Posting>> _postings = new(StringComparer.Ordinal);
+
+    // Terms and frequencies of each document, null when the document is deleted
+    private List<(string Term, int Frequency)[]?> _documents = new();
+    private List<int> _lengths = new();
+    private long _totalLength;
+    private int _documentCount;
+
+    public Bm25Index(double k1, double b)
+    {
+        this._k1 = k1;
+        this._b = b;
+    }
+
+    /// <summary>
+    /// Terms of a text, with their frequency
+    /// </summary>
+    public static (string Term, int Frequency)[] Analyze(string? text)
+    {
+        return TextTokenizer.Tokenize(text)
+            .GroupBy(term => term, StringComparer.Ordinal)
+            .Select(group => (group.Key, group.Count()))
+            .ToArray();
+    }
+
+    /// <summary>
+    /// Add a document, at the next ordinal
+    /// </summary>
+    public void Add(int ordinal, (string Term, int Frequency)[] terms)
+    {
+        if (ordinal != this._documents.Count)
+        {
+            throw new ArgumentOutOfRangeException(nameof(ordinal), $"Documents must be added in order, the next ordinal is {this._documents.Count}");
+        }
+
+        int length = 0;
+        foreach ((string term, int frequency) in terms)
+        {
+            if (!this._postings.TryGetValue(term, out List<Posting>? postings))
+            {
+                postings = new List<Posting>(1);
+                this._postings[term] = postings;
+            }
+
+            postings.Add(new Posting(ordinal, frequency));
+            length += frequency;
+        }
+
+        this._documents.Add(terms);
+        this._lengths.Add(length);
+        this._totalLength += length;
+        this._documentCount++;
+    }
+
+    public void Remove(int ordinal)
+    {
+        (string Term, int Frequency)[]? terms = this._documents[ordinal];
+        if (terms == null) { return; }
+
+        foreach ((string term, _) in terms)
+        {
+            if (!this._postings.TryGetValue(term, out List<Posting>? postings)) { continue; }
+
+            int position = FindPosting(postings, ordinal);
+            if (position >= 0) { postings.RemoveAt(position); }
+
+            if (postings.Count == 0) { this._postings.Remove(term); }
+        }
+
+        this._documents[ordinal] = null;
+        this._totalLength -= this._lengths[ordinal];
+        this._documentCount--;
+    }
+
+    /// <summary>
+    /// Find the documents most relevant to the query terms.
+    /// </summary>
+    /// <param name="query">Query text</param>
+    /// <param name="candidates">Optional documents that can be returned, e.g. matching a filter</param>
+    /// <param name="minScore">Min BM25 score of the results</param>
+    /// <param name="limit">Max number of results</param>
+    /// <returns>Documents and BM25 score, from the most relevant</returns>
+    public List<(int Ordinal, double Score)> Search(string query, TagBitmap? candidates, double minScore, int limit)
+    {
+        if (this._documentCount == 0) { return new List<(int, double)>(); }
+
+        double averageLength = Math.Max(1, (double)this._totalLength / this._documentCount);
+        var scores = new Dictionary<int, double>();
+        foreach (string term in TextTokenizer.Tokenize(query).Distinct(StringComparer.Ordinal))
+        {
+            if (!this._postings.TryGetValue(term, out List<Posting>? postings)) { continue; }
+
+            double idf = Math.Log(1 + (this._documentCount - postings.Count + 0.5) / (postings.Count + 0.5));
+            foreach (Posting posting in postings)
+            {
+                if (candidates != null && !candidates.Contains(posting.Ordinal)) { continue; }
+
+                double norm = this._k1 * (1 - this._b + this._b * this._lengths[posting.Ordinal] / averageLength);
+                double score = idf * posting.Frequency * (this._k1 + 1) / (posting.Frequency + norm);
+                scores[posting.Ordinal] = scores.TryGetValue(posting.Ordinal, out double total) ? total + score : score;
+            }
+        }
+
+        var best = new TopKHeap<int>(limit);
+        foreach (KeyValuePair<int, double> score in scores)
+        {
+            if (score.Value < minScore) { continue; }
+
+            best.Add(score.Key, score.Value, score.Key);
+        }
+
+        return best.ToSortedList();
+    }
+
+    /// <summary>
+    /// Renumber the documents after the index is compacted, keeping only the given ordinals,
+    /// which must be sorted, and include all the documents not deleted.
+    /// </summary>
+    public void Compact(IReadOnlyList<int> ordinals)
+    {
+        var newOrdinals = new int[this._documents.Count];
+        var documents = new List<(string Term, int Frequency)[]?>(ordinals.Count);
+        var lengths = new List<int>(ordinals.Count);
+        foreach (int ordinal in ordinals)
+        {
+            newOrdinals[ordinal] = documents.Count;
+            documents.Add(this._documents[ordinal]);
+            lengths.Add(this._lengths[ordinal]);
+        }
+
+        // Ordinals keep their order, so posting lists stay sorted
+        foreach (List<Posting> postings in this._postings.Values)
+        {
+            for (int i = 0; i < postings.Count; i++)
+            {
+                postings[i] = postings[i] with { Ordinal = newOrdinals[postings[i].Ordinal] };
+            }
+        }
+
+        this._documents = documents;
+        this._lengths = lengths;
+    }
+
+    /// <summary>
+    /// Write the terms of one document. Posting lists are not stored, they are rebuilt on load.
+    /// </summary>
+    public void WriteDocument(BinaryWriter writer, int ordinal)
+    {
+        (string Term, int Frequency)[]? terms = this._documents[ordinal];
+        writer.Write(terms?.Length ?? 0);
+        if (terms == null) { return; }
+
+        foreach ((string term, int frequency) in terms)
+        {
+            writer.Write(term);
+            writer.Write(frequency);
+        }
+    }
+
+    public static (string Term, int Frequency)[] ReadDocument(BinaryReader reader)
+    {
+        var terms = new (string Term, int Frequency)[reader.ReadInt32()];
+        for (int i = 0; i < terms.Length; i++)
+        {
+            terms[i] = (reader.ReadString(), reader.ReadInt32());
+        }
+
+        return terms;
+    }
+
+    #region private
+
+    private static int FindPosting(List<Posting> postings, int ordinal)
+    {
+        int low = 0, high = postings.Count - 1;
+        while (low <= high)
+        {
+            int middle = low + ((high - low) >> 1);
+            int compare = postings[middle].Ordinal.CompareTo(ordinal);
+            if (compare == 0) { return middle; }
+
+            if (compare < 0) { low = middle + 1; }
+            else { high = middle - 1; }
+        }
+
+        return -1;
+    }
+
+    #endregion
+}
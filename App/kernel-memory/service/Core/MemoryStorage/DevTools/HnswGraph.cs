@@ -0,0 +1,314 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Numerics.Tensors;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Access to the normalized vector stored at the given ordinal.
+/// </summary>
+internal delegate ReadOnlySpan<float> VectorAccessor(int ordinal);
+
+/// <summary>
+/// Hierarchical Navigable Small World graph, used for approximate nearest neighbour search.
+/// Nodes are identified by the ordinal of their vector, and vectors are expected to be
+/// normalized, so the dot product is the cosine similarity.
+/// See "Efficient and robust approximate nearest neighbor search using HNSW graphs", https://arxiv.org/abs/1603.09320
+/// Note: the class is not thread safe, callers must synchronize writes with reads.
+/// </summary>
+internal sealed class HnswGraph
+{
+    private const int FormatVersion = 1;
+
+    private readonly VectorAccessor _vectors;
+    private readonly int _maxNeighbors;
+    private readonly int _maxNeighborsLayer0;
+    private readonly int _efConstruction;
+    private readonly double _levelMultiplier;
+    private readonly Random _random = new(42);
+
+    // Node ordinal => neighbours on each layer of the node
+    private readonly List<List<int>[]> _nodes = new();
+    private int _entryPoint = -1;
+    private int _maxLevel = -1;
+
+    public HnswGraph(VectorAccessor vectors, int maxNeighbors, int efConstruction)
+    {
+        if (maxNeighbors < 2) { throw new ArgumentOutOfRangeException(nameof(maxNeighbors), "The number of neighbours must be at least 2"); }
+
+        this._vectors = vectors;
+        this._maxNeighbors = maxNeighbors;
+        this._maxNeighborsLayer0 = 2 * maxNeighbors;
+        this._efConstruction = Math.Max(efConstruction, maxNeighbors);
+        this._levelMultiplier = 1 / Math.Log(maxNeighbors);
+    }
+
+    /// <summary>
+    /// Number of nodes in the graph, including the ones the caller considers deleted
+    /// </summary>
+    public int Count => this._nodes.Count;
+
+    /// <summary>
+    /// Add the vector stored at the next ordinal, i.e. ordinal == Count
+    /// </summary>
+    public void Add(int ordinal)
+    {
+        if (ordinal != this._nodes.Count)
+        {
+            throw new ArgumentOutOfRangeException(nameof(ordinal), $"Nodes must be added in order, the next ordinal is {this._nodes.Count}");
+        }
+
+        int level = this.RandomLevel();
+        var layers = new List<int>[level + 1];
+        for (int layer = 0; layer <= level; layer++)
+        {
+            layers[layer] = new List<int>(this.MaxNeighbors(layer) + 1);
+        }
+
+        this._nodes.Add(layers);
+
+        if (this._entryPoint < 0)
+        {
+            this._entryPoint = ordinal;
+            this._maxLevel = level;
+            return;
+        }
+
+        ReadOnlySpan<float> vector = this._vectors(ordinal);
+        int entryPoint = this._entryPoint;
+        float entryScore = this.Score(vector, entryPoint);
+
+        // Greedy descent through the layers above the new node
+        for (int layer = this._maxLevel; layer > level; layer--)
+        {
+            (entryPoint, entryScore) = this.GreedySearch(vector, entryPoint, entryScore, layer);
+        }
+
+        for (int layer = Math.Min(level, this._maxLevel); layer >= 0; layer--)
+        {
+            List<(int Ordinal, float Score)> candidates = this.SearchLayer(vector, entryPoint, entryScore, this._efConstruction, layer, null);
+            List<int> neighbors = this.SelectNeighbors(candidates, this._maxNeighbors);
+            layers[layer].AddRange(neighbors);
+
+            foreach (int neighbor in neighbors)
+            {
+                this.Connect(neighbor, ordinal, layer);
+            }
+
+            (entryPoint, entryScore) = candidates[0];
+        }
+
+        if (level > this._maxLevel)
+        {
+            this._maxLevel = level;
+            this._entryPoint = ordinal;
+        }
+    }
+
+    /// <summary>
+    /// Find the nodes most similar to the given normalized vector.
+    /// </summary>
+    /// <param name="query">Normalized query vector</param>
+    /// <param name="limit">Max number of results</param>
+    /// <param name="ef">Size of the dynamic candidate list, higher values increase recall and latency</param>
+    /// <param name="accept">Optional predicate selecting the nodes that can be returned, e.g. to skip deleted nodes</param>
+    /// <returns>Nodes and similarity, from the most similar</returns>
+    public List<(int Ordinal, float Score)> Search(ReadOnlySpan<float> query, int limit, int ef, Func<int, bool>? accept)
+    {
+        if (this._entryPoint < 0 || limit <= 0) { return new List<(int, float)>(); }
+
+        int entryPoint = this._entryPoint;
+        float entryScore = this.Score(query, entryPoint);
+        for (int layer = this._maxLevel; layer > 0; layer--)
+        {
+            (entryPoint, entryScore) = this.GreedySearch(query, entryPoint, entryScore, layer);
+        }
+
+        List<(int Ordinal, float Score)> result = this.SearchLayer(query, entryPoint, entryScore, Math.Max(ef, limit), 0, accept);
+        if (result.Count > limit) { result.RemoveRange(limit, result.Count - limit); }
+
+        return result;
+    }
+
+    public void Write(BinaryWriter writer)
+    {
+        writer.Write(FormatVersion);
+        writer.Write(this._nodes.Count);
+        writer.Write(this._entryPoint);
+        writer.Write(this._maxLevel);
+        foreach (List<int>[] layers in this._nodes)
+        {
+            writer.Write(layers.Length);
+            foreach (List<int> neighbors in layers)
+            {
+                writer.Write(neighbors.Count);
+                foreach (int neighbor in neighbors) { writer.Write(neighbor); }
+            }
+        }
+    }
+
+    public static HnswGraph Read(BinaryReader reader, VectorAccessor vectors, int maxNeighbors, int efConstruction)
+    {
+        int version = reader.ReadInt32();
+        if (version != FormatVersion) { throw new InvalidDataException($"Unsupported HNSW graph format version {version}"); }
+
+        var graph = new HnswGraph(vectors, maxNeighbors, efConstruction);
+        int count = reader.ReadInt32();
+        graph._entryPoint = reader.ReadInt32();
+        graph._maxLevel = reader.ReadInt32();
+        graph._nodes.Capacity = count;
+        for (int node = 0; node < count; node++)
+        {
+            var layers = new List<int>[reader.ReadInt32()];
+            for (int layer = 0; layer < layers.Length; layer++)
+            {
+                int neighborCount = reader.ReadInt32();
+                layers[layer] = new List<int>(neighborCount);
+                for (int i = 0; i < neighborCount; i++) { layers[layer].Add(reader.ReadInt32()); }
+            }
+
+            graph._nodes.Add(layers);
+        }
+
+        return graph;
+    }
+
+    #region private
+
+    private int MaxNeighbors(int layer) => layer == 0 ? this._maxNeighborsLayer0 : this._maxNeighbors;
+
+    private int RandomLevel()
+    {
+        // Exponentially decaying probability, so higher layers are sparser
+        return (int)Math.Floor(-Math.Log(1 - this._random.NextDouble()) * this._levelMultiplier);
+    }
+
+    private float Score(ReadOnlySpan<float> vector, int ordinal)
+    {
+        return TensorPrimitives.Dot(vector, this._vectors(ordinal));
+    }
+
+    private (int Ordinal, float Score) GreedySearch(ReadOnlySpan<float> query, int entryPoint, float entryScore, int layer)
+    {
+        bool changed = true;
+        while (changed)
+        {
+            changed = false;
+            foreach (int neighbor in this._nodes[entryPoint][layer])
+            {
+                float score = this.Score(query, neighbor);
+                if (score > entryScore)
+                {
+                    entryScore = score;
+                    entryPoint = neighbor;
+                    changed = true;
+                }
+            }
+        }
+
+        return (entryPoint, entryScore);
+    }
+
+    // Best-first search on one layer, returns up to ef accepted nodes, from the most similar
+    private List<(int Ordinal, float Score)> SearchLayer(
+        ReadOnlySpan<float> query, int entryPoint, float entryScore, int ef, int layer, Func<int, bool>? accept)
+    {
+        var visited = new HashSet<int> { entryPoint };
+
+        // Candidates to expand, most similar first
+        var candidates = new PriorityQueue<int, float>();
+        candidates.Enqueue(entryPoint, -entryScore);
+
+        // Best results found so far, least similar first so it can be evicted
+        var results = new PriorityQueue<int, float>();
+        if (accept == null || accept(entryPoint)) { results.Enqueue(entryPoint, entryScore); }
+
+        while (candidates.TryDequeue(out int candidate, out float negativeScore))
+        {
+            if (results.Count >= ef && results.TryPeek(out _, out float worstScore) && -negativeScore < worstScore)
+            {
+                break;
+            }
+
+            foreach (int neighbor in this._nodes[candidate][layer])
+            {
+                if (!visited.Add(neighbor)) { continue; }
+
+                float score = this.Score(query, neighbor);
+                bool isFull = results.Count >= ef;
+                if (isFull && results.TryPeek(out _, out float lowest) && score <= lowest) { continue; }
+
+                // Rejected nodes are still expanded, to reach the accepted nodes behind them
+                candidates.Enqueue(neighbor, -score);
+                if (accept != null && !accept(neighbor)) { continue; }
+
+                results.Enqueue(neighbor, score);
+                if (results.Count > ef) { results.Dequeue(); }
+            }
+        }
+
+        var list = new List<(int Ordinal, float Score)>(results.Count);
+        while (results.TryDequeue(out int ordinal, out float score)) { list.Add((ordinal, score)); }
+
+        list.Reverse();
+        return list;
+    }
+
+    // Neighbour selection heuristic: prefer candidates closer to the node than to the neighbours already selected,
+    // which keeps links in different directions. Candidates must be sorted from the most similar.
+    private List<int> SelectNeighbors(List<(int Ordinal, float Score)> candidates, int max)
+    {
+        var selected = new List<int>(max);
+        var pruned = new List<int>();
+        foreach ((int candidate, float score) in candidates)
+        {
+            if (selected.Count >= max) { break; }
+
+            ReadOnlySpan<float> vector = this._vectors(candidate);
+            bool keep = true;
+            foreach (int other in selected)
+            {
+                if (this.Score(vector, other) > score)
+                {
+                    keep = false;
+                    break;
+                }
+            }
+
+            if (keep) { selected.Add(candidate); }
+            else { pruned.Add(candidate); }
+        }
+
+        // Fill the remaining slots with the closest pruned candidates, to keep the graph well connected
+        for (int i = 0; i < pruned.Count && selected.Count < max; i++)
+        {
+            selected.Add(pruned[i]);
+        }
+
+        return selected;
+    }
+
+    private void Connect(int node, int neighbor, int layer)
+    {
+        List<int> links = this._nodes[node][layer];
+        links.Add(neighbor);
+
+        int max = this.MaxNeighbors(layer);
+        if (links.Count <= max) { return; }
+
+        // Too many links, keep the best ones according to the selection heuristic
+        ReadOnlySpan<float> vector = this._vectors(node);
+        var candidates = new List<(int Ordinal, float Score)>(links.Count);
+        foreach (int link in links) { candidates.Add((link, this.Score(vector, link))); }
+
+        candidates.Sort((a, b) => b.Score.CompareTo(a.Score));
+        List<int> selected = this.SelectNeighbors(candidates, max);
+        links.Clear();
+        links.AddRange(selected);
+    }
+
+    #endregion
+}
@@ -0,0 +1,63 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.IO;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Create the vector matrix of an index. When count is zero a new empty matrix is created,
+/// otherwise the stored matrix is opened, keeping its first "count" rows, and must have the
+/// given generation.
+/// </summary>
+internal delegate IVectorMatrix VectorMatrixFactory(int dimensions, int count, long generation);
+
+/// <summary>
+/// Contiguous matrix of float32 vectors, one row per record ordinal.
+/// Storage format: a 32 bytes header (magic, version, dimensions, generation), followed by
+/// the rows as little-endian float32 values.
+/// Note: implementations are not thread safe, callers must synchronize writes with reads.
+/// </summary>
+internal interface IVectorMatrix : IDisposable
+{
+    /// <summary>
+    /// Number of values in each row
+    /// </summary>
+    int Dimensions { get; }
+
+    /// <summary>
+    /// Number of rows
+    /// </summary>
+    int Count { get; }
+
+    /// <summary>
+    /// Incremented every time existing rows are moved, to detect snapshots referring to old row positions
+    /// </summary>
+    long Generation { get; }
+
+    ReadOnlySpan<float> GetRow(int ordinal);
+
+    /// <summary>
+    /// Contiguous block of rows, e.g. to score many rows in one pass
+    /// </summary>
+    ReadOnlySpan<float> GetRows(int start, int count);
+
+    void Append(ReadOnlySpan<float> row);
+
+    /// <summary>
+    /// Keep only the given rows, in the given order. Ordinals must be sorted.
+    /// Stored rows are moved to a new generation, the storage of the previous one is left
+    /// in place for the snapshots referring to it.
+    /// </summary>
+    void Compact(ReadOnlySpan<int> ordinals);
+
+    /// <summary>
+    /// Make sure the rows are persisted
+    /// </summary>
+    void Flush();
+
+    /// <summary>
+    /// Write header and rows, in the storage format
+    /// </summary>
+    void WriteTo(Stream stream);
+}
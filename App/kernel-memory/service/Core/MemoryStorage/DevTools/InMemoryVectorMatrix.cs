@@ -0,0 +1,159 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Buffers.Binary;
+using System.IO;
+using System.Runtime.InteropServices;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Vector matrix stored in a single array, used with volatile storage, where the matrix
+/// is saved with the index snapshot.
+/// </summary>
+internal sealed class InMemoryVectorMatrix : IVectorMatrix
+{
+    private const int MinCapacity = 1024;
+
+    // Max values written at a time, spans can't be longer than int.MaxValue bytes
+    private const int WriteChunkSize = 1 << 28;
+
+    private float[] _values;
+    private int _count;
+
+    public InMemoryVectorMatrix(int dimensions)
+    {
+        this.Dimensions = dimensions;
+        this._values = Array.Empty<float>();
+    }
+
+    /// <inheritdoc />
+    public int Dimensions { get; }
+
+    /// <inheritdoc />
+    public int Count => this._count;
+
+    /// <inheritdoc />
+    public long Generation { get; private set; }
+
+    /// <summary>
+    /// Load a matrix saved with <see cref="WriteTo"/>, keeping the first "count" rows
+    /// </summary>
+    public static InMemoryVectorMatrix Read(ReadOnlySpan<byte> data, int dimensions, int count, long generation)
+    {
+        (int storedDimensions, long storedGeneration) = VectorMatrixFormat.ReadHeader(data);
+        VectorMatrixFormat.Validate(storedDimensions, storedGeneration, dimensions, generation);
+
+        ReadOnlySpan<byte> rows = data.Slice(VectorMatrixFormat.HeaderSize);
+        if (rows.Length < (long)count * dimensions * sizeof(float))
+        {
+            throw new InvalidDataException($"The vector matrix contains less than {count} rows");
+        }
+
+        var matrix = new InMemoryVectorMatrix(dimensions) { Generation = generation };
+        matrix.EnsureCapacity(count);
+        ReadOnlySpan<float> values = MemoryMarshal.Cast<byte, float>(rows.Slice(0, count * dimensions * sizeof(float)));
+        values.CopyTo(matrix._values);
+        if (!BitConverter.IsLittleEndian)
+        {
+            Span<int> raw = MemoryMarshal.Cast<float, int>(matrix._values.AsSpan(0, values.Length));
+            BinaryPrimitives.ReverseEndianness(raw, raw);
+        }
+
+        matrix._count = count;
+        return matrix;
+    }
+
+    /// <inheritdoc />
+    public ReadOnlySpan<float> GetRow(int ordinal)
+    {
+        if ((uint)ordinal >= (uint)this._count) { throw new ArgumentOutOfRangeException(nameof(ordinal)); }
+
+        return this._values.AsSpan(ordinal * this.Dimensions, this.Dimensions);
+    }
+
+    /// <inheritdoc />
+    public ReadOnlySpan<float> GetRows(int start, int count)
+    {
+        if (start < 0 || count < 0 || start > this._count - count) { throw new ArgumentOutOfRangeException(nameof(count)); }
+
+        return this._values.AsSpan(start * this.Dimensions, count * this.Dimensions);
+    }
+
+    /// <inheritdoc />
+    public void Append(ReadOnlySpan<float> row)
+    {
+        if (row.Length != this.Dimensions) { throw new ArgumentException($"The row must contain {this.Dimensions} values", nameof(row)); }
+
+        this.EnsureCapacity(this._count + 1);
+        row.CopyTo(this._values.AsSpan(this._count * this.Dimensions));
+        this._count++;
+    }
+
+    /// <inheritdoc />
+    public void Compact(ReadOnlySpan<int> ordinals)
+    {
+        // Ordinals are sorted, so rows only move towards the beginning
+        for (int i = 0; i < ordinals.Length; i++)
+        {
+            if (ordinals[i] == i) { continue; }
+
+            this.GetRow(ordinals[i]).CopyTo(this._values.AsSpan(i * this.Dimensions, this.Dimensions));
+        }
+
+        this._count = ordinals.Length;
+        this.Generation++;
+    }
+
+    /// <inheritdoc />
+    public void Flush()
+    {
+        // Nothing to do, the matrix is saved with the snapshot
+    }
+
+    /// <inheritdoc />
+    public void WriteTo(Stream stream)
+    {
+        Span<byte> header = stackalloc byte[VectorMatrixFormat.HeaderSize];
+        VectorMatrixFormat.WriteHeader(header, this.Dimensions, this.Generation);
+        stream.Write(header);
+
+        ReadOnlySpan<float> values = this._values.AsSpan(0, this._count * this.Dimensions);
+        if (BitConverter.IsLittleEndian)
+        {
+            for (int offset = 0; offset < values.Length; offset += WriteChunkSize)
+            {
+                stream.Write(MemoryMarshal.AsBytes(values.Slice(offset, Math.Min(WriteChunkSize, values.Length - offset))));
+            }
+
+            return;
+        }
+
+        Span<byte> value = stackalloc byte[sizeof(float)];
+        foreach (float x in values)
+        {
+            BinaryPrimitives.WriteSingleLittleEndian(value, x);
+            stream.Write(value);
+        }
+    }
+
+    /// <inheritdoc />
+    public void Dispose()
+    {
+        this._values = Array.Empty<float>();
+        this._count = 0;
+    }
+
+    #region private
+
+    private void EnsureCapacity(int rows)
+    {
+        long required = (long)rows * this.Dimensions;
+        if (required <= this._values.Length) { return; }
+
+        long capacity = Math.Max(Math.Max(required, 2L * this._values.Length), (long)MinCapacity * this.Dimensions);
+        Array.Resize(ref this._values, (int)Math.Min(capacity, Array.MaxLength));
+    }
+
+    #endregion
+}
@@ -0,0 +1,209 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.IO;
+using System.IO.MemoryMappedFiles;
+using System.Runtime.InteropServices;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Vector matrix stored in a memory mapped file, used with disk storage: rows are read
+/// directly from the mapped file, without copies, and the OS pages them in and out as needed.
+/// The file grows geometrically, so its size can exceed the rows in use, the number of valid
+/// rows is tracked by the index snapshot. Each generation has its own file: compacting the
+/// matrix writes a new file, so the last snapshot stays valid until a new one replaces it.
+/// Note: rows are mapped as native floats, so the class requires a little-endian platform.
+/// </summary>
+internal sealed unsafe class MemoryMappedVectorMatrix : IVectorMatrix
+{
+    private const int MinCapacity = 1024;
+
+    // Max bytes written at a time, spans can't be longer than int.MaxValue
+    private const int WriteChunkSize = 1 << 30;
+
+    private readonly Func<long, string> _getPath;
+    private readonly long _rowSize;
+    private string _path;
+    private MemoryMappedFile? _file;
+    private MemoryMappedViewAccessor? _view;
+    private byte* _pointer;
+    private long _capacity;
+    private int _count;
+
+    private MemoryMappedVectorMatrix(Func<long, string> getPath, int dimensions, long generation)
+    {
+        if (!BitConverter.IsLittleEndian) { throw new PlatformNotSupportedException("Memory mapped vectors require a little-endian platform"); }
+
+        this._getPath = getPath;
+        this._path = getPath(generation);
+        this.Generation = generation;
+        this.Dimensions = dimensions;
+        this._rowSize = (long)dimensions * sizeof(float);
+    }
+
+    /// <inheritdoc />
+    public int Dimensions { get; }
+
+    /// <inheritdoc />
+    public int Count => this._count;
+
+    /// <inheritdoc />
+    public long Generation { get; private set; }
+
+    /// <summary>
+    /// Create a new empty matrix, replacing the file of the first generation if it exists
+    /// </summary>
+    /// <param name="getPath">Path of the file storing the given generation</param>
+    /// <param name="dimensions">Number of values in each row</param>
+    public static MemoryMappedVectorMatrix Create(Func<long, string> getPath, int dimensions)
+    {
+        string path = getPath(0);
+        Directory.CreateDirectory(Path.GetDirectoryName(path)!);
+        using (var stream = new FileStream(path, FileMode.Create, FileAccess.Write))
+        {
+            Span<byte> header = stackalloc byte[VectorMatrixFormat.HeaderSize];
+            VectorMatrixFormat.WriteHeader(header, dimensions, 0);
+            stream.Write(header);
+        }
+
+        var matrix = new MemoryMappedVectorMatrix(getPath, dimensions, 0);
+        matrix.Map(MinCapacity);
+        return matrix;
+    }
+
+    /// <summary>
+    /// Open an existing matrix, keeping the first "count" rows
+    /// </summary>
+    public static MemoryMappedVectorMatrix Open(Func<long, string> getPath, int dimensions, int count, long generation)
+    {
+        string path = getPath(generation);
+        var fileInfo = new FileInfo(path);
+        if (!fileInfo.Exists) { throw new InvalidDataException($"The vector matrix file {path} doesn't exist"); }
+
+        Span<byte> header = stackalloc byte[VectorMatrixFormat.HeaderSize];
+        using (var stream = new FileStream(path, FileMode.Open, FileAccess.Read))
+        {
+            stream.ReadExactly(header);
+        }
+
+        (int storedDimensions, long storedGeneration) = VectorMatrixFormat.ReadHeader(header);
+        VectorMatrixFormat.Validate(storedDimensions, storedGeneration, dimensions, generation);
+
+        var matrix = new MemoryMappedVectorMatrix(getPath, dimensions, generation);
+        long storedRows = (fileInfo.Length - VectorMatrixFormat.HeaderSize) / matrix._rowSize;
+        if (storedRows < count) { throw new InvalidDataException($"The vector matrix contains less than {count} rows"); }
+
+        matrix.Map(Math.Max(storedRows, MinCapacity));
+        matrix._count = count;
+        return matrix;
+    }
+
+    /// <inheritdoc />
+    public ReadOnlySpan<float> GetRow(int ordinal)
+    {
+        if ((uint)ordinal >= (uint)this._count) { throw new ArgumentOutOfRangeException(nameof(ordinal)); }
+
+        return new ReadOnlySpan<float>(this.RowPointer(ordinal), this.Dimensions);
+    }
+
+    /// <inheritdoc />
+    public ReadOnlySpan<float> GetRows(int start, int count)
+    {
+        if (start < 0 || count < 0 || start > this._count - count) { throw new ArgumentOutOfRangeException(nameof(count)); }
+
+        return new ReadOnlySpan<float>(this.RowPointer(start), checked(count * this.Dimensions));
+    }
+
+    /// <inheritdoc />
+    public void Append(ReadOnlySpan<float> row)
+    {
+        if (row.Length != this.Dimensions) { throw new ArgumentException($"The row must contain {this.Dimensions} values", nameof(row)); }
+
+        if (this._count == this._capacity) { this.Map(2 * this._capacity); }
+
+        row.CopyTo(new Span<float>(this.RowPointer(this._count), this.Dimensions));
+        this._count++;
+    }
+
+    /// <inheritdoc />
+    public void Compact(ReadOnlySpan<int> ordinals)
+    {
+        long generation = this.Generation + 1;
+        string path = this._getPath(generation);
+        using (var stream = new FileStream(path, FileMode.Create, FileAccess.Write))
+        {
+            Span<byte> header = stackalloc byte[VectorMatrixFormat.HeaderSize];
+            VectorMatrixFormat.WriteHeader(header, this.Dimensions, generation);
+            stream.Write(header);
+            foreach (int ordinal in ordinals)
+            {
+                stream.Write(MemoryMarshal.AsBytes(this.GetRow(ordinal)));
+            }
+        }
+
+        // The previous file is left in place, the last snapshot refers to it
+        this.Unmap();
+        this._path = path;
+        this._count = ordinals.Length;
+        this.Generation = generation;
+        this.Map(Math.Max(this._count, MinCapacity));
+    }
+
+    /// <inheritdoc />
+    public void Flush()
+    {
+        this._view?.Flush();
+    }
+
+    /// <inheritdoc />
+    public void WriteTo(Stream stream)
+    {
+        long length = VectorMatrixFormat.HeaderSize + this._count * this._rowSize;
+        for (long offset = 0; offset < length; offset += WriteChunkSize)
+        {
+            stream.Write(new ReadOnlySpan<byte>(this._pointer + offset, (int)Math.Min(WriteChunkSize, length - offset)));
+        }
+    }
+
+    /// <inheritdoc />
+    public void Dispose()
+    {
+        this.Unmap();
+        this._count = 0;
+    }
+
+    #region private
+
+    private byte* RowPointer(int ordinal) => this._pointer + VectorMatrixFormat.HeaderSize + ordinal * this._rowSize;
+
+    // Map the file with space for the given number of rows, extending the file if needed
+    private void Map(long capacity)
+    {
+        this.Flush();
+        this.Unmap();
+
+        long size = VectorMatrixFormat.HeaderSize + capacity * this._rowSize;
+        this._file = MemoryMappedFile.CreateFromFile(this._path, FileMode.Open, null, size, MemoryMappedFileAccess.ReadWrite);
+        this._view = this._file.CreateViewAccessor(0, size, MemoryMappedFileAccess.ReadWrite);
+        this._view.SafeMemoryMappedViewHandle.AcquirePointer(ref this._pointer);
+        this._pointer += this._view.PointerOffset;
+        this._capacity = capacity;
+    }
+
+    private void Unmap()
+    {
+        if (this._view != null)
+        {
+            this._view.SafeMemoryMappedViewHandle.ReleasePointer();
+            this._view.Dispose();
+            this._view = null;
+        }
+
+        this._file?.Dispose();
+        this._file = null;
+        this._pointer = null;
+    }
+
+    #endregion
+}
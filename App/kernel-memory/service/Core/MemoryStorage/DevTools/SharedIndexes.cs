@@ -0,0 +1,94 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Concurrent;
+using System.Collections.Generic;
+using System.IO;
+using System.Threading;
+using Microsoft.KernelMemory.FileSystem.DevTools;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Search structures of the indexes stored in a directory, shared by all the memory db instances
+/// using that directory in the process, e.g. the ingestion and the retrieval instances created by
+/// the service, so the records written through one instance are visible to the others.
+/// The structures are released when the last instance using them releases its reference.
+/// </summary>
+internal sealed class SharedIndexes<TIndex> where TIndex : class
+{
+    private static readonly Dictionary<string, SharedIndexes<TIndex>> s_instances = new(StringComparer.Ordinal);
+
+    private readonly string _key;
+    private int _references;
+
+    /// <summary>
+    /// Search structures of the indexes loaded so far
+    /// </summary>
+    public ConcurrentDictionary<string, TIndex> Indexes { get; } = new(StringComparer.Ordinal);
+
+    /// <summary>
+    /// Lock held while loading an index, so it's loaded only once
+    /// </summary>
+    public SemaphoreSlim LoadLock { get; } = new(1, 1);
+
+    /// <summary>
+    /// Lock held while writing a snapshot
+    /// </summary>
+    public SemaphoreSlim SnapshotLock { get; } = new(1, 1);
+
+    /// <summary>
+    /// Whether all the indexes stored in the directory have been loaded, e.g. to migrate them once
+    /// </summary>
+    public bool AllIndexesLoaded { get; set; }
+
+    /// <summary>
+    /// Get the structures of a directory, adding a reference to release when done
+    /// </summary>
+    public static SharedIndexes<TIndex> Acquire(FileSystemTypes storageType, string directory)
+    {
+        string key = GetKey(storageType, directory);
+        lock (s_instances)
+        {
+            if (!s_instances.TryGetValue(key, out SharedIndexes<TIndex>? shared))
+            {
+                shared = new SharedIndexes<TIndex>(key);
+                s_instances[key] = shared;
+            }
+
+            shared._references++;
+            return shared;
+        }
+    }
+
+    /// <summary>
+    /// Release a reference, disposing the indexes when it was the last one
+    /// </summary>
+    public void Release()
+    {
+        lock (s_instances)
+        {
+            if (--this._references > 0) { return; }
+
+            s_instances.Remove(this._key);
+        }
+
+        foreach (string index in this.Indexes.Keys)
+        {
+            if (this.Indexes.TryRemove(index, out TIndex? value)) { (value as IDisposable)?.Dispose(); }
+        }
+    }
+
+    private SharedIndexes(string key)
+    {
+        this._key = key;
+    }
+
+    // Directories are compared the way the file systems share their state
+    private static string GetKey(FileSystemTypes storageType, string directory)
+    {
+        return storageType == FileSystemTypes.Disk
+            ? $"{storageType}:{Path.GetFullPath(directory)}"
+            : $"{storageType}:{directory.Trim('/').Trim('\\').ToLowerInvariant()}";
+    }
+}
@@ -3,6 +3,7 @@
 using System;
 using System.Collections.Generic;
 using System.Diagnostics.CodeAnalysis;
+using System.IO;
 using System.Linq;
 using System.Runtime.CompilerServices;
 using System.Text;
@@ -20,17 +21,37 @@ namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
 /// Development only implementation of IMemoryDb, used to test KM
 /// without dependencies on embedding generators.
 /// This is NOT meant for real scenarios, only for code development.
+/// Records are stored as JSON files. Each index keeps in memory a tag index, used to evaluate filters,
+/// and an inverted index of the record text, used to rank records with BM25. The indexes are saved
+/// as a snapshot under the index "_index" directory, so they don't need to be rebuilt from the
+/// JSON files on startup.
+/// The in memory structures are shared by the instances using the same directory in the process.
+/// Records written by other processes are only seen when the index is loaded, using the record
+/// file times to find the records written or updated after the snapshot.
 /// </summary>
 [Experimental("KMEXP03")]
-public class SimpleTextDb : IMemoryDb
+public class SimpleTextDb : IMemoryDb, IMemoryDbKeywordSearch, IDisposable
 {
+    private const string SnapshotDir = "_index";
+    private const string SnapshotRecordsFile = "records.bin";
+
+    // Records written this long before a snapshot started are indexed again when loading it,
+    // to allow for the precision of the file times
+    private static readonly TimeSpan s_fileTimePrecision = TimeSpan.FromSeconds(2);
+
     private readonly IFileSystem _fileSystem;
+    private readonly SimpleTextDbConfig _config;
     private readonly ILogger<SimpleTextDb> _log;
 
+    // Search structures of the indexes loaded so far, shared with the instances using the same directory
+    private readonly SharedIndexes<SimpleTextIndex> _shared;
+    private int _disposed;
+
     public SimpleTextDb(
         SimpleTextDbConfig config,
         ILoggerFactory? loggerFactory = null)
     {
+        this._config = config;
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<SimpleTextDb>();
         switch (config.StorageType)
         {
@@ -45,6 +66,8 @@ public class SimpleTextDb : IMemoryDb
             default:
                 throw new ArgumentException($"Unknown storage type {config.StorageType}");
         }
+
+        this._shared = SharedIndexes<SimpleTextIndex>.Acquire(config.StorageType, config.Directory);
     }
 
     /// <inheritdoc />
@@ -64,6 +87,7 @@ public class SimpleTextDb : IMemoryDb
     public Task DeleteIndexAsync(string index, CancellationToken cancellationToken = default)
     {
         index = NormalizeIndexName(index);
+        this._shared.Indexes.TryRemove(index, out _);
         return this._fileSystem.DeleteVolumeAsync(index, cancellationToken);
     }
 
@@ -71,7 +95,11 @@ public class SimpleTextDb : IMemoryDb
     public async Task<string> UpsertAsync(string index, MemoryRecord record, CancellationToken cancellationToken = default)
     {
         index = NormalizeIndexName(index);
+        SimpleTextIndex textIndex = await this.GetIndexAsync(index, cancellationToken).ConfigureAwait(false);
+        // Index first, so the file of a record missing from a snapshot is always written after the snapshot started
+        textIndex.Upsert(record.Id, record.Tags, GetText(record));
         await this._fileSystem.WriteFileAsync(index, "", EncodeId(record.Id), JsonSerializer.Serialize(record), cancellationToken).ConfigureAwait(false);
+        await this.SnapshotIfNeededAsync(index, textIndex, cancellationToken).ConfigureAwait(false);
         return record.Id;
     }
 
@@ -89,48 +117,31 @@ public class SimpleTextDb : IMemoryDb
 
         index = NormalizeIndexName(index);
 
-        var list = this.GetListAsync(index, filters, limit, withEmbeddings, cancellationToken);
-        var records = new Dictionary<string, MemoryRecord>();
-        await foreach (MemoryRecord r in list.ConfigureAwait(false))
-        {
-            records[r.Id] = r;
-        }
-
-        var words = Regex.Replace(text, "[^a-zA-Z0-9_]+", " ")
-            .Split(' ').Select(x => x.Trim()).Where(x => !string.IsNullOrEmpty(x)).ToList();
+        // Remove empty filters
+        filters = filters?.Where(f => !f.IsEmpty()).ToList();
 
-        var similarity = new Dictionary<string, int>();
-        foreach (var record in records)
+        // Only the best <limit> records are read from the storage
+        SimpleTextIndex textIndex = await this.GetIndexAsync(index, cancellationToken).ConfigureAwait(false);
+        foreach ((string id, double score) in textIndex.Search(text, filters, minRelevance, limit))
         {
-            similarity[record.Value.Id] = 0;
-            var storedText = record.Value.Payload[Constants.ReservedPayloadTextField].ToString();
-            if (string.IsNullOrEmpty(storedText)) { continue; }
+            MemoryRecord? record = await this.ReadRecordAsync(index, id, cancellationToken).ConfigureAwait(false);
+            if (record == null) { continue; }
 
-            foreach (var word in words)
-            {
-                if (storedText.Contains(word, StringComparison.OrdinalIgnoreCase))
-                {
-                    similarity[record.Value.Id] += 1;
-                }
-            }
+            yield return (record, score);
         }
+    }
 
-        // Sort distances, from closest to most distant, and filter out irrelevant results
-        IEnumerable<string> sorted =
-            from entry in similarity
-            where entry.Value >= minRelevance
-            orderby entry.Value descending
-            select entry.Key;
-
-        // Return <count> records, including the calculated distance
-        var count = 0;
-        foreach (string id in sorted)
-        {
-            if (count++ < limit)
-            {
-                yield return (records[id], similarity[id]);
-            }
-        }
+    /// <inheritdoc />
+    public IAsyncEnumerable<(MemoryRecord, double)> GetKeywordMatchesAsync(
+        string index,
+        string text,
+        ICollection<MemoryFilter>? filters = null,
+        int limit = 1,
+        bool withEmbeddings = false,
+        CancellationToken cancellationToken = default)
+    {
+        // Similarity search is already a keyword search
+        return this.GetSimilarListAsync(index, text, filters, minRelevance: 0, limit, withEmbeddings, cancellationToken);
     }
 
     /// <inheritdoc />
@@ -148,36 +159,44 @@ public class SimpleTextDb : IMemoryDb
         // Remove empty filters
         filters = filters?.Where(f => !f.IsEmpty()).ToList();
 
-        IDictionary<string, string> list;
-        try
-        {
-            list = await this._fileSystem.ReadAllFilesAsTextAsync(index, "", cancellationToken).ConfigureAwait(false);
-        }
-        catch (System.IO.DirectoryNotFoundException)
+        // Only the records matching the filters are read from the storage
+        SimpleTextIndex textIndex = await this.GetIndexAsync(index, cancellationToken).ConfigureAwait(false);
+        foreach (string id in textIndex.List(filters, limit))
         {
-            // Index doesn't exist
-            list = new Dictionary<string, string>();
-        }
-
-        foreach (KeyValuePair<string, string> v in list)
-        {
-            var record = JsonSerializer.Deserialize<MemoryRecord>(v.Value);
+            MemoryRecord? record = await this.ReadRecordAsync(index, id, cancellationToken).ConfigureAwait(false);
             if (record == null) { continue; }
 
-            if (TagsMatchFilters(record.Tags, filters))
-            {
-                if (limit-- <= 0) { yield break; }
-
-                yield return record;
-            }
+            yield return record;
         }
     }
 
     /// <inheritdoc />
-    public Task DeleteAsync(string index, MemoryRecord record, CancellationToken cancellationToken = default)
+    public async Task DeleteAsync(string index, MemoryRecord record, CancellationToken cancellationToken = default)
     {
         index = NormalizeIndexName(index);
-        return this._fileSystem.DeleteFileAsync(index, "", EncodeId(record.Id), cancellationToken);
+        SimpleTextIndex textIndex = await this.GetIndexAsync(index, cancellationToken).ConfigureAwait(false);
+        await this._fileSystem.DeleteFileAsync(index, "", EncodeId(record.Id), cancellationToken).ConfigureAwait(false);
+        if (textIndex.Remove(record.Id))
+        {
+            await this.SnapshotIfNeededAsync(index, textIndex, cancellationToken).ConfigureAwait(false);
+        }
+    }
+
+    /// <inheritdoc />
+    public void Dispose()
+    {
+        this.Dispose(true);
+        GC.SuppressFinalize(this);
+    }
+
+    /// <summary>
+    /// Release the indexes loaded, unless other instances are using them
+    /// </summary>
+    protected virtual void Dispose(bool disposing)
+    {
+        if (!disposing || Interlocked.Exchange(ref this._disposed, 1) != 0) { return; }
+
+        this._shared.Release();
     }
 
     #region private
@@ -194,29 +213,171 @@ public class SimpleTextDb : IMemoryDb
         return index.Trim();
     }
 
-    private static bool TagsMatchFilters(TagCollection tags, ICollection<MemoryFilter>? filters)
+    private async Task<SimpleTextIndex> GetIndexAsync(string index, CancellationToken cancellationToken)
+    {
+        if (this._shared.Indexes.TryGetValue(index, out SimpleTextIndex? textIndex)) { return textIndex; }
+
+        await this._shared.LoadLock.WaitAsync(cancellationToken).ConfigureAwait(false);
+        try
+        {
+            if (this._shared.Indexes.TryGetValue(index, out textIndex)) { return textIndex; }
+
+            textIndex = await this.LoadIndexAsync(index, cancellationToken).ConfigureAwait(false);
+            this._shared.Indexes[index] = textIndex;
+            return textIndex;
+        }
+        finally
+        {
+            this._shared.LoadLock.Release();
+        }
+    }
+
+    // Load the index snapshot, and align it with the record files, which are the source of truth:
+    // records written after the snapshot are indexed again, and records deleted are removed.
+    private async Task<SimpleTextIndex> LoadIndexAsync(string index, CancellationToken cancellationToken)
+    {
+        Dictionary<string, DateTimeOffset?> storedIds;
+        try
+        {
+            storedIds = await this.GetStoredIdsAsync(index, cancellationToken).ConfigureAwait(false);
+        }
+        catch (DirectoryNotFoundException)
+        {
+            // Index doesn't exist
+            return new SimpleTextIndex(this._config);
+        }
+
+        SimpleTextIndex? textIndex = await this.ReadSnapshotAsync(index, cancellationToken).ConfigureAwait(false);
+        bool changed = textIndex == null;
+        textIndex ??= new SimpleTextIndex(this._config);
+
+        var indexedIds = new HashSet<string>(textIndex.GetIds(), StringComparer.Ordinal);
+        foreach (string id in indexedIds.Where(id => !storedIds.ContainsKey(id)))
+        {
+            changed |= textIndex.Remove(id);
+        }
+
+        // Records missing from the snapshot, or updated after it. Without file times, e.g. with volatile
+        // storage, records can't be updated behind the shared index, and only missing records are added.
+        DateTimeOffset updatedAfter = textIndex.SnapshotTime == default ? default : textIndex.SnapshotTime - s_fileTimePrecision;
+        foreach (string id in storedIds.Where(x => !indexedIds.Contains(x.Key) || x.Value >= updatedAfter).Select(x => x.Key))
+        {
+            MemoryRecord? record = await this.ReadRecordAsync(index, id, cancellationToken).ConfigureAwait(false);
+            if (record == null) { continue; }
+
+            textIndex.Upsert(record.Id, record.Tags, GetText(record));
+            changed = true;
+        }
+
+        if (changed && storedIds.Count > 0)
+        {
+            await this.WriteSnapshotAsync(index, textIndex, cancellationToken).ConfigureAwait(false);
+        }
+
+        return textIndex;
+    }
+
+    // Ids of the records stored in the index, with the last write time of their file when available
+    private async Task<Dictionary<string, DateTimeOffset?>> GetStoredIdsAsync(string index, CancellationToken cancellationToken)
     {
-        if (filters == null || filters.Count == 0) { return true; }
+        var result = new Dictionary<string, DateTimeOffset?>(StringComparer.Ordinal);
+        if (this._fileSystem is DiskFileSystem disk)
+        {
+            foreach (KeyValuePair<string, DateTimeOffset> file in disk.GetLastWriteTimes(index, ""))
+            {
+                string? id = TryDecodeId(file.Key);
+                if (id != null) { result[id] = file.Value; }
+            }
+
+            return result;
+        }
 
-        // Verify that at least one filter matches (OR logic)
-        foreach (MemoryFilter filter in filters)
+        foreach (string fileName in await this._fileSystem.GetAllFileNamesAsync(index, "", cancellationToken).ConfigureAwait(false))
         {
-            var match = true;
+            string? id = TryDecodeId(fileName);
+            if (id != null) { result[id] = null; }
+        }
+
+        return result;
+    }
 
-            // Verify that all conditions are met (AND logic)
-            foreach (KeyValuePair<string, List<string?>> condition in filter)
+    private async Task<SimpleTextIndex?> ReadSnapshotAsync(string index, CancellationToken cancellationToken)
+    {
+        try
+        {
+            if (!await this._fileSystem.FileExistsAsync(index, SnapshotDir, SnapshotRecordsFile, cancellationToken).ConfigureAwait(false))
             {
-                // Check if the tag name + value is present
-                for (int index = 0; match && index < condition.Value.Count; index++)
-                {
-                    match = match && (tags.ContainsKey(condition.Key) && tags[condition.Key].Contains(condition.Value[index]));
-                }
+                return null;
             }
 
-            if (match) { return true; }
+            BinaryData records = await this._fileSystem.ReadFileAsBinaryAsync(index, SnapshotDir, SnapshotRecordsFile, cancellationToken).ConfigureAwait(false);
+            using Stream recordsStream = records.ToStream();
+            return SimpleTextIndex.ReadSnapshot(recordsStream, this._config);
         }
+        catch (Exception e) when (e is InvalidDataException or EndOfStreamException or IOException)
+        {
+            this._log.LogWarning(e, "Unable to read the snapshot of index {0}, the index will be rebuilt from the records", index);
+            return null;
+        }
+    }
 
-        return false;
+    private async Task SnapshotIfNeededAsync(string index, SimpleTextIndex textIndex, CancellationToken cancellationToken)
+    {
+        if (textIndex.ChangesSinceSnapshot < this._config.SnapshotInterval) { return; }
+
+        // Skip if another snapshot is being written, the changes will be included in the next one
+        if (!await this._shared.SnapshotLock.WaitAsync(0, cancellationToken).ConfigureAwait(false)) { return; }
+
+        try
+        {
+            await this.WriteSnapshotAsync(index, textIndex, cancellationToken).ConfigureAwait(false);
+        }
+        finally
+        {
+            this._shared.SnapshotLock.Release();
+        }
+    }
+
+    private async Task WriteSnapshotAsync(string index, SimpleTextIndex textIndex, CancellationToken cancellationToken)
+    {
+        using var records = new MemoryStream();
+        textIndex.WriteSnapshot(records);
+        records.Position = 0;
+
+        await this._fileSystem.CreateDirectoryAsync(index, SnapshotDir, cancellationToken).ConfigureAwait(false);
+        await this._fileSystem.WriteFileAsync(index, SnapshotDir, SnapshotRecordsFile, records, cancellationToken).ConfigureAwait(false);
+    }
+
+    internal static string? GetText(MemoryRecord record)
+    {
+        return record.Payload.TryGetValue(Constants.ReservedPayloadTextField, out object? text) ? text?.ToString() : null;
+    }
+
+    private async Task<MemoryRecord?> ReadRecordAsync(string index, string id, CancellationToken cancellationToken)
+    {
+        try
+        {
+            string json = await this._fileSystem.ReadFileAsTextAsync(index, "", EncodeId(id), cancellationToken).ConfigureAwait(false);
+            return JsonSerializer.Deserialize<MemoryRecord>(json);
+        }
+        catch (FileNotFoundException)
+        {
+            // Deleted after the search
+            return null;
+        }
+    }
+
+    private static string? TryDecodeId(string fileName)
+    {
+        try
+        {
+            return DecodeId(fileName);
+        }
+        catch (FormatException)
+        {
+            // Not a record file
+            return null;
+        }
     }
 
     private static string EncodeId(string realId)
@@ -19,4 +19,20 @@ public class SimpleTextDbConfig
     /// Directory of the text file storage.
     /// </summary>
     public string Directory { get; set; } = "tmp-memory-text";
+
+    /// <summary>
+    /// BM25 term frequency saturation (k1). Higher values give more weight to repeated terms.
+    /// </summary>
+    public double Bm25K1 { get; set; } = 1.2;
+
+    /// <summary>
+    /// BM25 document length normalization (b), from 0 (none) to 1 (full).
+    /// </summary>
+    public double Bm25B { get; set; } = 0.75;
+
+    /// <summary>
+    /// Number of changes after which the index snapshot is saved to the storage.
+    /// On startup, changes not included in the snapshot are recovered from the record files.
+    /// </summary>
+    public int SnapshotInterval { get; set; } = 1000;
 }
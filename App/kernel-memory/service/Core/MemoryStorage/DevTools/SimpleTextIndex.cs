@@ -0,0 +1,255 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+using System.Threading;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// In memory search structures of one SimpleTextDb index: record ids, the tag index used to
+/// evaluate filters, and the BM25 index of the record text. Records are identified by an ordinal,
+/// assigned in insertion order. Deleted and replaced records are marked as deleted, and removed
+/// when the index is compacted.
+/// </summary>
+internal sealed class SimpleTextIndex
+{
+    // Version 2: time of the snapshot, to find the records written after it
+    private const int FormatVersion = 2;
+
+    // Compact the index when at least this many records, and this share of the index, are deleted
+    private const int MinDeletedForCompaction = 1000;
+    private const double MaxDeletedRatio = 0.25;
+
+    private readonly ReaderWriterLockSlim _lock = new();
+    private readonly Dictionary<string, int> _ordinals = new(StringComparer.Ordinal);
+
+    // Tags of the records not deleted
+    private readonly TagIndex _tagIndex = new();
+    private readonly Bm25Index _bm25;
+    private List<string> _ids = new();
+    private List<TagCollection> _tags = new();
+    private List<bool> _deleted = new();
+    private int _deletedCount;
+    private int _changesSinceSnapshot;
+
+    public SimpleTextIndex(SimpleTextDbConfig config)
+    {
+        this._bm25 = new Bm25Index(config.Bm25K1, config.Bm25B);
+    }
+
+    /// <summary>
+    /// When the snapshot the index was loaded from started. The index includes the changes made before
+    /// this time, changes made later may be missing.
+    /// </summary>
+    public DateTimeOffset SnapshotTime { get; private set; }
+
+    /// <summary>
+    /// Number of changes not included in the last snapshot
+    /// </summary>
+    public int ChangesSinceSnapshot => Volatile.Read(ref this._changesSinceSnapshot);
+
+    /// <summary>
+    /// Ids of the records in the index
+    /// </summary>
+    public List<string> GetIds()
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            return this._ordinals.Keys.ToList();
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    public void Upsert(string id, TagCollection tags, string? text)
+    {
+        (string Term, int Frequency)[] terms = Bm25Index.Analyze(text);
+
+        this._lock.EnterWriteLock();
+        try
+        {
+            this.Add(id, tags, terms);
+            this._changesSinceSnapshot++;
+            this.CompactIfNeeded();
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    public bool Remove(string id)
+    {
+        this._lock.EnterWriteLock();
+        try
+        {
+            if (!this._ordinals.Remove(id, out int ordinal)) { return false; }
+
+            this.MarkDeleted(ordinal);
+            this._changesSinceSnapshot++;
+            this.CompactIfNeeded();
+            return true;
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    /// <summary>
+    /// Find the records matching the filters most relevant to the query
+    /// </summary>
+    /// <returns>Record ids and BM25 score, from the most relevant</returns>
+    public List<(string Id, double Score)> Search(string query, ICollection<MemoryFilter>? filters, double minRelevance, int limit)
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            TagBitmap? candidates = this._tagIndex.Match(filters);
+            if (candidates is { Count: 0 }) { return new List<(string, double)>(); }
+
+            return this._bm25.Search(query, candidates, minRelevance, limit)
+                .Select(match => (this._ids[match.Ordinal], match.Score))
+                .ToList();
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    /// <summary>
+    /// List the ids of the records matching the filters, in insertion order
+    /// </summary>
+    public List<string> List(ICollection<MemoryFilter>? filters, int limit)
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            TagBitmap? candidates = this._tagIndex.Match(filters);
+            IEnumerable<int> ordinals = candidates ?? Enumerable.Range(0, this._ids.Count).Where(this.IsLive);
+            return ordinals.Take(limit).Select(ordinal => this._ids[ordinal]).ToList();
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    /// <summary>
+    /// Write the records not deleted, with their tags and terms, resetting the count of changes since the last snapshot
+    /// </summary>
+    public void WriteSnapshot(Stream records)
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            using var writer = new BinaryWriter(records, System.Text.Encoding.UTF8, leaveOpen: true);
+            writer.Write(FormatVersion);
+            writer.Write(DateTimeOffset.UtcNow.UtcTicks);
+            writer.Write(this._ordinals.Count);
+            for (int ordinal = 0; ordinal < this._ids.Count; ordinal++)
+            {
+                if (this._deleted[ordinal]) { continue; }
+
+                writer.Write(this._ids[ordinal]);
+                TagIndex.WriteTags(writer, this._tags[ordinal]);
+                this._bm25.WriteDocument(writer, ordinal);
+            }
+
+            Interlocked.Exchange(ref this._changesSinceSnapshot, 0);
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    public static SimpleTextIndex ReadSnapshot(Stream records, SimpleTextDbConfig config)
+    {
+        var index = new SimpleTextIndex(config);
+        using var reader = new BinaryReader(records, System.Text.Encoding.UTF8, leaveOpen: true);
+        int version = reader.ReadInt32();
+        if (version != FormatVersion) { throw new InvalidDataException($"Unsupported text index format version {version}"); }
+
+        index.SnapshotTime = new DateTimeOffset(reader.ReadInt64(), TimeSpan.Zero);
+        int count = reader.ReadInt32();
+        for (int i = 0; i < count; i++)
+        {
+            string id = reader.ReadString();
+            TagCollection tags = TagIndex.ReadTags(reader);
+            index.Add(id, tags, Bm25Index.ReadDocument(reader));
+        }
+
+        return index;
+    }
+
+    #region private
+
+    private bool IsLive(int ordinal) => !this._deleted[ordinal];
+
+    private void Add(string id, TagCollection tags, (string Term, int Frequency)[] terms)
+    {
+        if (this._ordinals.TryGetValue(id, out int previous))
+        {
+            this.MarkDeleted(previous);
+        }
+
+        int ordinal = this._ids.Count;
+        this._ids.Add(id);
+        this._tags.Add(tags);
+        this._deleted.Add(false);
+        this._ordinals[id] = ordinal;
+        this._tagIndex.Add(ordinal, tags);
+        this._bm25.Add(ordinal, terms);
+    }
+
+    private void MarkDeleted(int ordinal)
+    {
+        if (this._deleted[ordinal]) { return; }
+
+        this._deleted[ordinal] = true;
+        this._deletedCount++;
+        this._tagIndex.Remove(ordinal, this._tags[ordinal]);
+        this._bm25.Remove(ordinal);
+    }
+
+    // Rebuild the index without the deleted records
+    private void CompactIfNeeded()
+    {
+        if (this._deletedCount < MinDeletedForCompaction || this._deletedCount < this._ids.Count * MaxDeletedRatio) { return; }
+
+        var ordinals = new List<int>(this._ordinals.Count);
+        var ids = new List<string>(this._ordinals.Count);
+        var tags = new List<TagCollection>(this._ordinals.Count);
+        for (int ordinal = 0; ordinal < this._ids.Count; ordinal++)
+        {
+            if (this._deleted[ordinal]) { continue; }
+
+            ordinals.Add(ordinal);
+            ids.Add(this._ids[ordinal]);
+            tags.Add(this._tags[ordinal]);
+        }
+
+        this._bm25.Compact(ordinals);
+        this._ids = ids;
+        this._tags = tags;
+        this._deleted = new List<bool>(new bool[ids.Count]);
+        this._deletedCount = 0;
+        this._ordinals.Clear();
+        this._tagIndex.Clear();
+        for (int ordinal = 0; ordinal < ids.Count; ordinal++)
+        {
+            this._ordinals[ids[ordinal]] = ordinal;
+            this._tagIndex.Add(ordinal, tags[ordinal]);
+        }
+    }
+
+    #endregion
+}
@@ -1,8 +1,10 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
 using System;
+using System.Buffers.Binary;
 using System.Collections.Generic;
 using System.Diagnostics.CodeAnalysis;
+using System.Globalization;
 using System.IO;
 using System.Linq;
 using System.Runtime.CompilerServices;
@@ -19,16 +21,43 @@ using Microsoft.KernelMemory.FileSystem.DevTools;
 namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
 
 /// <summary>
-/// Basic vector db implementation, designed for tests and demos only.
-/// When searching, uses brute force comparing against all stored records.
+/// Basic vector db implementation, designed for tests, demos and local deployments.
+/// Records are stored as JSON files, without their vector. Each index is searched through an in
+/// memory HNSW graph, or exhaustively when small, and the search structures are saved as a snapshot
+/// under the index "_index" directory, so they don't need to be rebuilt from the JSON files on startup.
+/// Normalized vectors are stored in a contiguous float32 matrix, "_index/vectors-{generation}.f32"
+/// memory mapped when using disk storage, so searches read them without loading or copying them.
+/// The vectors written after the last snapshot are kept in the vector log, "_index/log", until a
+/// snapshot includes them. Records stored by previous versions, with the vector in the JSON file,
+/// are migrated the first time the directory is used.
+/// The text of the records is also indexed with BM25, to support keyword search.
+/// The in memory structures are shared by the instances using the same directory in the process.
+/// Records written by other processes are only seen when the index is loaded.
 /// </summary>
 [Experimental("KMEXP03")]
-public class SimpleVectorDb : IMemoryDb
+public class SimpleVectorDb : IMemoryDb, IMemoryDbKeywordSearch, IMemoryDbEmbeddingSearch, IDisposable
 {
+    private const string SnapshotDir = "_index";
+    private const string SnapshotRecordsFile = "records.bin";
+    private const string SnapshotGraphFile = "hnsw.bin";
+    private const string SnapshotVectorsFile = "vectors.f32";
+
+    // Memory mapped vectors, one file per generation of the matrix, e.g. "vectors-0.f32"
+    private const string MappedVectorsFilePrefix = "vectors-";
+    private const string MappedVectorsFileExtension = ".f32";
+
+    // Vectors written after the last snapshot, one file per change, named "{sequence}-{encoded id}"
+    private const string VectorLogDir = "_index/log";
+
     private readonly ITextEmbeddingGenerator _embeddingGenerator;
     private readonly IFileSystem _fileSystem;
+    private readonly SimpleVectorDbConfig _config;
     private readonly ILogger<SimpleVectorDb> _log;
 
+    // Search structures of the indexes loaded so far, shared with the instances using the same directory
+    private readonly SharedIndexes<SimpleVectorIndex> _shared;
+    private int _disposed;
+
     /// <summary>
     /// Create new instance
     /// </summary>
@@ -41,6 +70,7 @@ public class SimpleVectorDb : IMemoryDb
         ILoggerFactory? loggerFactory = null)
     {
         this._embeddingGenerator = embeddingGenerator;
+        this._config = config;
 
         if (this._embeddingGenerator == null)
         {
@@ -61,6 +91,8 @@ public class SimpleVectorDb : IMemoryDb
             default:
                 throw new ArgumentException($"Unknown storage type {config.StorageType}");
         }
+
+        this._shared = SharedIndexes<SimpleVectorIndex>.Acquire(config.StorageType, config.Directory);
     }
 
     /// <inheritdoc />
@@ -80,6 +112,10 @@ public class SimpleVectorDb : IMemoryDb
     public Task DeleteIndexAsync(string index, CancellationToken cancellationToken = default)
     {
         index = NormalizeIndexName(index);
+
+        // Release the vector matrix first, its file can't be deleted while mapped
+        if (this._shared.Indexes.TryRemove(index, out SimpleVectorIndex? vectorIndex)) { vectorIndex.Dispose(); }
+
         return this._fileSystem.DeleteVolumeAsync(index, cancellationToken);
     }
 
@@ -88,7 +124,12 @@ public class SimpleVectorDb : IMemoryDb
     {
         // Note: if the index doesn't exist, it's automatically created (the index is just a folder)
         index = NormalizeIndexName(index);
-        await this._fileSystem.WriteFileAsync(index, "", EncodeId(record.Id), JsonSerializer.Serialize(record), cancellationToken).ConfigureAwait(false);
+        SimpleVectorIndex vectorIndex = await this.GetIndexAsync(index, cancellationToken).ConfigureAwait(false);
+        // Index first, so records with invalid vectors are rejected before being stored
+        long sequence = vectorIndex.Upsert(record.Id, record.Vector.Data, record.Tags, SimpleTextDb.GetText(record));
+        await this.LogVectorAsync(index, sequence, record, cancellationToken).ConfigureAwait(false);
+        await this._fileSystem.WriteFileAsync(index, "", EncodeId(record.Id), SerializeWithoutVector(record), cancellationToken).ConfigureAwait(false);
+        await this.SnapshotIfNeededAsync(index, vectorIndex, cancellationToken).ConfigureAwait(false);
         return record.Id;
     }
 
@@ -101,43 +142,67 @@ public class SimpleVectorDb : IMemoryDb
         int limit = 1,
         bool withEmbeddings = false,
         [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        Embedding textEmbedding = await this._embeddingGenerator.GenerateEmbeddingAsync(text, cancellationToken).ConfigureAwait(false);
+        await foreach ((MemoryRecord, double) result in this.GetSimilarListAsync(
+                           index, textEmbedding, filters, minRelevance, limit, withEmbeddings, cancellationToken).ConfigureAwait(false))
+        {
+            yield return result;
+        }
+    }
+
+    /// <inheritdoc />
+    public async IAsyncEnumerable<(MemoryRecord, double)> GetSimilarListAsync(
+        string index,
+        Embedding embedding,
+        ICollection<MemoryFilter>? filters = null,
+        double minRelevance = 0,
+        int limit = 1,
+        bool withEmbeddings = false,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
     {
         if (limit <= 0) { limit = int.MaxValue; }
 
         index = NormalizeIndexName(index);
 
-        var list = this.GetListAsync(index, filters, int.MaxValue, withEmbeddings, cancellationToken);
-        var records = new Dictionary<string, MemoryRecord>();
-        await foreach (MemoryRecord r in list.WithCancellation(cancellationToken).ConfigureAwait(false))
-        {
-            records[r.Id] = r;
-        }
+        // Remove empty filters
+        filters = filters?.Where(f => !f.IsEmpty()).ToList();
 
-        // Calculate all the distances from the given vector
-        // Note: this is a brute force search, very slow, not meant for production use cases
-        var similarity = new Dictionary<string, double>();
-        Embedding textEmbedding = await this._embeddingGenerator.GenerateEmbeddingAsync
-            (text, cancellationToken).ConfigureAwait(false);
-        foreach (var record in records)
+        SimpleVectorIndex vectorIndex = await this.GetIndexAsync(index, cancellationToken).ConfigureAwait(false);
+
+        // Only the records in the result are read from the storage
+        foreach ((string id, double similarity) in vectorIndex.Search(embedding.Data, filters, minRelevance, limit))
         {
-            similarity[record.Value.Id] = textEmbedding.CosineSimilarity(record.Value.Vector);
+            MemoryRecord? record = await this.ReadRecordAsync(index, id, withEmbeddings ? vectorIndex : null, cancellationToken).ConfigureAwait(false);
+            if (record == null) { continue; }
+
+            yield return (record, similarity);
         }
+    }
 
-        // Sort distances, from closest to most distant, and filter out irrelevant results
-        IEnumerable<string> sorted =
-            from entry in similarity
-            where entry.Value >= minRelevance
-            orderby entry.Value descending
-            select entry.Key;
+    /// <inheritdoc />
+    public async IAsyncEnumerable<(MemoryRecord, double)> GetKeywordMatchesAsync(
+        string index,
+        string text,
+        ICollection<MemoryFilter>? filters = null,
+        int limit = 1,
+        bool withEmbeddings = false,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        if (limit <= 0) { limit = int.MaxValue; }
+
+        index = NormalizeIndexName(index);
 
-        // Return <count> vectors, including the calculated distance
-        var count = 0;
-        foreach (string id in sorted)
+        // Remove empty filters
+        filters = filters?.Where(f => !f.IsEmpty()).ToList();
+
+        SimpleVectorIndex vectorIndex = await this.GetIndexAsync(index, cancellationToken).ConfigureAwait(false);
+        foreach ((string id, double score) in vectorIndex.KeywordSearch(text, filters, limit))
         {
-            if (count++ < limit)
-            {
-                yield return (records[id], similarity[id]);
-            }
+            MemoryRecord? record = await this.ReadRecordAsync(index, id, withEmbeddings ? vectorIndex : null, cancellationToken).ConfigureAwait(false);
+            if (record == null) { continue; }
+
+            yield return (record, score);
         }
     }
 
@@ -156,36 +221,62 @@ public class SimpleVectorDb : IMemoryDb
         // Remove empty filters
         filters = filters?.Where(f => !f.IsEmpty()).ToList();
 
-        IDictionary<string, string> list;
-        try
+        SimpleVectorIndex vectorIndex = await this.GetIndexAsync(index, cancellationToken).ConfigureAwait(false);
+        foreach (string id in vectorIndex.List(filters, limit))
         {
-            list = await this._fileSystem.ReadAllFilesAsTextAsync(index, "", cancellationToken).ConfigureAwait(false);
+            MemoryRecord? record = await this.ReadRecordAsync(index, id, withEmbeddings ? vectorIndex : null, cancellationToken).ConfigureAwait(false);
+            if (record == null) { continue; }
+
+            yield return record;
         }
-        catch (DirectoryNotFoundException)
+    }
+
+    /// <inheritdoc />
+    public async Task DeleteAsync(string index, MemoryRecord record, CancellationToken cancellationToken = default)
+    {
+        index = NormalizeIndexName(index);
+        SimpleVectorIndex vectorIndex = await this.GetIndexAsync(index, cancellationToken).ConfigureAwait(false);
+        await this._fileSystem.DeleteFileAsync(index, "", EncodeId(record.Id), cancellationToken).ConfigureAwait(false);
+        if (vectorIndex.Remove(record.Id))
         {
-            // Index doesn't exist
-            list = new Dictionary<string, string>();
+            await this.SnapshotIfNeededAsync(index, vectorIndex, cancellationToken).ConfigureAwait(false);
         }
+    }
 
-        foreach (KeyValuePair<string, string> v in list)
+    /// <summary>
+    /// Load all the indexes, migrating the ones stored by previous versions, which only contain
+    /// the JSON record files, vectors included. The migration runs automatically the first time
+    /// the directory is used, this method allows to run it ahead of time, e.g. on startup.
+    /// </summary>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    public async Task BuildIndexesAsync(CancellationToken cancellationToken = default)
+    {
+        await this._shared.LoadLock.WaitAsync(cancellationToken).ConfigureAwait(false);
+        try
         {
-            var record = JsonSerializer.Deserialize<MemoryRecord>(v.Value);
-            if (record == null) { continue; }
-
-            if (TagsMatchFilters(record.Tags, filters))
-            {
-                if (limit-- <= 0) { yield break; }
-
-                yield return record;
-            }
+            await this.LoadIndexesAsync(cancellationToken).ConfigureAwait(false);
+        }
+        finally
+        {
+            this._shared.LoadLock.Release();
         }
     }
 
     /// <inheritdoc />
-    public Task DeleteAsync(string index, MemoryRecord record, CancellationToken cancellationToken = default)
+    public void Dispose()
     {
-        index = NormalizeIndexName(index);
-        return this._fileSystem.DeleteFileAsync(index, "", EncodeId(record.Id), cancellationToken);
+        this.Dispose(true);
+        GC.SuppressFinalize(this);
+    }
+
+    /// <summary>
+    /// Release the vector matrices of the loaded indexes, unless other instances are using them
+    /// </summary>
+    protected virtual void Dispose(bool disposing)
+    {
+        if (!disposing || Interlocked.Exchange(ref this._disposed, 1) != 0) { return; }
+
+        this._shared.Release();
     }
 
     #region private
@@ -202,29 +293,386 @@ public class SimpleVectorDb : IMemoryDb
         return index.Trim();
     }
 
-    private static bool TagsMatchFilters(TagCollection tags, ICollection<MemoryFilter>? filters)
+    private async Task<SimpleVectorIndex> GetIndexAsync(string index, CancellationToken cancellationToken)
+    {
+        if (this._shared.Indexes.TryGetValue(index, out SimpleVectorIndex? vectorIndex)) { return vectorIndex; }
+
+        await this._shared.LoadLock.WaitAsync(cancellationToken).ConfigureAwait(false);
+        try
+        {
+            if (!this._shared.AllIndexesLoaded) { await this.LoadIndexesAsync(cancellationToken).ConfigureAwait(false); }
+
+            if (this._shared.Indexes.TryGetValue(index, out vectorIndex)) { return vectorIndex; }
+
+            vectorIndex = await this.LoadIndexAsync(index, cancellationToken).ConfigureAwait(false);
+            this._shared.Indexes[index] = vectorIndex;
+            return vectorIndex;
+        }
+        finally
+        {
+            this._shared.LoadLock.Release();
+        }
+    }
+
+    // Load the indexes not loaded yet, the caller must hold the load lock
+    private async Task LoadIndexesAsync(CancellationToken cancellationToken)
+    {
+        foreach (string name in await this.GetIndexesAsync(cancellationToken).ConfigureAwait(false))
+        {
+            string index = NormalizeIndexName(name);
+            if (this._shared.Indexes.ContainsKey(index)) { continue; }
+
+            this._shared.Indexes[index] = await this.LoadIndexAsync(index, cancellationToken).ConfigureAwait(false);
+        }
+
+        this._shared.AllIndexesLoaded = true;
+    }
+
+    // Load the index snapshot, and align it with the record files, which are the source of truth for
+    // the records stored: records deleted are removed, records written after the snapshot are indexed
+    // again with the vectors logged since, and records stored by previous versions are migrated.
+    private async Task<SimpleVectorIndex> LoadIndexAsync(string index, CancellationToken cancellationToken)
     {
-        if (filters == null || filters.Count == 0) { return true; }
+        HashSet<string> storedIds;
+        try
+        {
+            storedIds = await this.GetStoredIdsAsync(index, cancellationToken).ConfigureAwait(false);
+        }
+        catch (DirectoryNotFoundException)
+        {
+            // Index doesn't exist
+            return new SimpleVectorIndex(this._config, this.GetMatrixFactory(index, null));
+        }
+
+        // Indexes stored by previous versions have no snapshot, or an older format, and are rebuilt here
+        SimpleVectorIndex? vectorIndex = await this.ReadSnapshotAsync(index, cancellationToken).ConfigureAwait(false);
+        bool changed = vectorIndex == null;
+        vectorIndex ??= new SimpleVectorIndex(this._config, this.GetMatrixFactory(index, null));
 
-        // Verify that at least one filter matches (OR logic)
-        foreach (MemoryFilter filter in filters)
+        var indexedIds = new HashSet<string>(vectorIndex.GetIds(), StringComparer.Ordinal);
+        foreach (string id in indexedIds.Where(id => !storedIds.Contains(id)))
         {
-            var match = true;
+            changed |= vectorIndex.Remove(id);
+        }
+
+        Dictionary<string, (long Sequence, float[] Vector)> logged = await this.ReadVectorLogAsync(
+            index, vectorIndex.SnapshotLogSequence, cancellationToken).ConfigureAwait(false);
+        var migrated = new List<MemoryRecord>();
+        foreach (string id in storedIds)
+        {
+            bool isLogged = logged.TryGetValue(id, out (long Sequence, float[] Vector) entry);
+            if (!isLogged && indexedIds.Contains(id)) { continue; }
+
+            MemoryRecord? record = await this.ReadRecordAsync(index, id, null, cancellationToken).ConfigureAwait(false);
+            if (record == null) { continue; }
 
-            // Verify that all conditions are met (AND logic)
-            foreach (KeyValuePair<string, List<string?>> condition in filter)
+            // Records stored by previous versions hold their vector in the JSON file
+            if (!isLogged)
             {
-                // Check if the tag name + value is present
-                for (int index = 0; match && index < condition.Value.Count; index++)
+                if (record.Vector.Length == 0)
                 {
-                    match = match && (tags.ContainsKey(condition.Key) && tags[condition.Key].Contains(condition.Value[index]));
+                    this._log.LogWarning("The vector of record {0} in index {1} is missing, the record is not indexed", id, index);
+                    continue;
                 }
+
+                migrated.Add(record);
+            }
+
+            vectorIndex.Upsert(id, isLogged ? entry.Vector : record.Vector.Data, record.Tags, SimpleTextDb.GetText(record));
+            changed = true;
+        }
+
+        long lastLogged = logged.Count > 0 ? logged.Values.Max(x => x.Sequence) : 0;
+        vectorIndex.AdvanceLogSequence(lastLogged);
+        if (changed && storedIds.Count > 0)
+        {
+            await this.WriteSnapshotAsync(index, vectorIndex, cancellationToken).ConfigureAwait(false);
+        }
+        else
+        {
+            // Vectors already in the snapshot, or of records deleted since
+            await this.DeleteVectorLogAsync(index, Math.Max(lastLogged, vectorIndex.SnapshotLogSequence), cancellationToken).ConfigureAwait(false);
+        }
+
+        // The vectors of the migrated records are now stored in the snapshot
+        foreach (MemoryRecord record in migrated)
+        {
+            await this._fileSystem.WriteFileAsync(index, "", EncodeId(record.Id), SerializeWithoutVector(record), cancellationToken).ConfigureAwait(false);
+        }
+
+        return vectorIndex;
+    }
+
+    private async Task<HashSet<string>> GetStoredIdsAsync(string index, CancellationToken cancellationToken)
+    {
+        var result = new HashSet<string>(StringComparer.Ordinal);
+        foreach (string fileName in await this._fileSystem.GetAllFileNamesAsync(index, "", cancellationToken).ConfigureAwait(false))
+        {
+            string? id = TryDecodeId(fileName);
+            if (id != null) { result.Add(id); }
+        }
+
+        return result;
+    }
+
+    // Store the vector of a change until a snapshot includes it
+    private async Task LogVectorAsync(string index, long sequence, MemoryRecord record, CancellationToken cancellationToken)
+    {
+        byte[] data = EncodeVector(record.Vector.Data.Span);
+        string fileName = $"{sequence.ToString(CultureInfo.InvariantCulture)}-{EncodeId(record.Id)}";
+        await this._fileSystem.CreateDirectoryAsync(index, VectorLogDir, cancellationToken).ConfigureAwait(false);
+        await this._fileSystem.WriteFileAsync(index, VectorLogDir, fileName, new MemoryStream(data), cancellationToken).ConfigureAwait(false);
+    }
+
+    // Last vector logged for each record after the given sequence
+    private async Task<Dictionary<string, (long Sequence, float[] Vector)>> ReadVectorLogAsync(
+        string index, long afterSequence, CancellationToken cancellationToken)
+    {
+        var last = new Dictionary<string, (long Sequence, string FileName)>(StringComparer.Ordinal);
+        foreach ((long sequence, string id, string fileName) in await this.ListVectorLogAsync(index, cancellationToken).ConfigureAwait(false))
+        {
+            if (sequence <= afterSequence || (last.TryGetValue(id, out var x) && x.Sequence > sequence)) { continue; }
+
+            last[id] = (sequence, fileName);
+        }
+
+        var result = new Dictionary<string, (long Sequence, float[] Vector)>(StringComparer.Ordinal);
+        foreach (KeyValuePair<string, (long Sequence, string FileName)> entry in last)
+        {
+            BinaryData data = await this._fileSystem.ReadFileAsBinaryAsync(index, VectorLogDir, entry.Value.FileName, cancellationToken).ConfigureAwait(false);
+            result[entry.Key] = (entry.Value.Sequence, DecodeVector(data.ToMemory().Span));
+        }
+
+        return result;
+    }
+
+    // Delete the vectors logged up to the given sequence, e.g. once a snapshot includes them
+    private async Task DeleteVectorLogAsync(string index, long upToSequence, CancellationToken cancellationToken)
+    {
+        foreach ((long sequence, _, string fileName) in await this.ListVectorLogAsync(index, cancellationToken).ConfigureAwait(false))
+        {
+            if (sequence > upToSequence) { continue; }
+
+            await this._fileSystem.DeleteFileAsync(index, VectorLogDir, fileName, cancellationToken).ConfigureAwait(false);
+        }
+    }
+
+    // Logged vectors are stored as little-endian float32 values
+    private static byte[] EncodeVector(ReadOnlySpan<float> vector)
+    {
+        var result = new byte[vector.Length * sizeof(float)];
+        for (int i = 0; i < vector.Length; i++)
+        {
+            BinaryPrimitives.WriteSingleLittleEndian(result.AsSpan(i * sizeof(float)), vector[i]);
+        }
+
+        return result;
+    }
+
+    private static float[] DecodeVector(ReadOnlySpan<byte> data)
+    {
+        var result = new float[data.Length / sizeof(float)];
+        for (int i = 0; i < result.Length; i++)
+        {
+            result[i] = BinaryPrimitives.ReadSingleLittleEndian(data.Slice(i * sizeof(float)));
+        }
+
+        return result;
+    }
+
+    private async Task<List<(long Sequence, string Id, string FileName)>> ListVectorLogAsync(string index, CancellationToken cancellationToken)
+    {
+        var result = new List<(long Sequence, string Id, string FileName)>();
+        IEnumerable<string> fileNames;
+        try
+        {
+            fileNames = await this._fileSystem.GetAllFileNamesAsync(index, VectorLogDir, cancellationToken).ConfigureAwait(false);
+        }
+        catch (DirectoryNotFoundException)
+        {
+            // Nothing logged yet
+            return result;
+        }
+
+        foreach (string fileName in fileNames)
+        {
+            int separator = fileName.IndexOf('-', StringComparison.Ordinal);
+            if (separator <= 0
+                || !long.TryParse(fileName.AsSpan(0, separator), NumberStyles.None, CultureInfo.InvariantCulture, out long sequence))
+            {
+                continue;
             }
 
-            if (match) { return true; }
+            string? id = TryDecodeId(fileName.Substring(separator + 1));
+            if (id != null) { result.Add((sequence, id, fileName)); }
         }
 
-        return false;
+        return result;
+    }
+
+    private async Task<SimpleVectorIndex?> ReadSnapshotAsync(string index, CancellationToken cancellationToken)
+    {
+        try
+        {
+            if (!await this._fileSystem.FileExistsAsync(index, SnapshotDir, SnapshotRecordsFile, cancellationToken).ConfigureAwait(false)
+                || !await this._fileSystem.FileExistsAsync(index, SnapshotDir, SnapshotGraphFile, cancellationToken).ConfigureAwait(false))
+            {
+                return null;
+            }
+
+            BinaryData records = await this._fileSystem.ReadFileAsBinaryAsync(index, SnapshotDir, SnapshotRecordsFile, cancellationToken).ConfigureAwait(false);
+            BinaryData graph = await this._fileSystem.ReadFileAsBinaryAsync(index, SnapshotDir, SnapshotGraphFile, cancellationToken).ConfigureAwait(false);
+            BinaryData? vectors = null;
+            if (!this.UseMemoryMappedVectors
+                && await this._fileSystem.FileExistsAsync(index, SnapshotDir, SnapshotVectorsFile, cancellationToken).ConfigureAwait(false))
+            {
+                vectors = await this._fileSystem.ReadFileAsBinaryAsync(index, SnapshotDir, SnapshotVectorsFile, cancellationToken).ConfigureAwait(false);
+            }
+
+            using Stream recordsStream = records.ToStream();
+            using Stream graphStream = graph.ToStream();
+            return SimpleVectorIndex.ReadSnapshot(recordsStream, graphStream, this._config, this.GetMatrixFactory(index, vectors));
+        }
+        catch (Exception e) when (e is InvalidDataException or EndOfStreamException or IOException)
+        {
+            this._log.LogWarning(e, "Unable to read the snapshot of index {0}, the index will be rebuilt from the records", index);
+            return null;
+        }
+    }
+
+    private async Task SnapshotIfNeededAsync(string index, SimpleVectorIndex vectorIndex, CancellationToken cancellationToken)
+    {
+        if (!vectorIndex.IsSnapshotDue(this._config.SnapshotInterval)) { return; }
+
+        // Skip if another snapshot is being written, the changes will be included in the next one
+        if (!await this._shared.SnapshotLock.WaitAsync(0, cancellationToken).ConfigureAwait(false)) { return; }
+
+        try
+        {
+            await this.WriteSnapshotAsync(index, vectorIndex, cancellationToken).ConfigureAwait(false);
+        }
+        finally
+        {
+            this._shared.SnapshotLock.Release();
+        }
+    }
+
+    private async Task WriteSnapshotAsync(string index, SimpleVectorIndex vectorIndex, CancellationToken cancellationToken)
+    {
+        using var records = new MemoryStream();
+        using var graph = new MemoryStream();
+        using MemoryStream? vectors = this.UseMemoryMappedVectors ? null : new MemoryStream();
+        (long sequence, long generation) = vectorIndex.WriteSnapshot(records, graph, vectors);
+        records.Position = 0;
+        graph.Position = 0;
+
+        await this._fileSystem.CreateDirectoryAsync(index, SnapshotDir, cancellationToken).ConfigureAwait(false);
+        if (vectors != null)
+        {
+            vectors.Position = 0;
+            await this._fileSystem.WriteFileAsync(index, SnapshotDir, SnapshotVectorsFile, vectors, cancellationToken).ConfigureAwait(false);
+        }
+
+        await this._fileSystem.WriteFileAsync(index, SnapshotDir, SnapshotRecordsFile, records, cancellationToken).ConfigureAwait(false);
+        await this._fileSystem.WriteFileAsync(index, SnapshotDir, SnapshotGraphFile, graph, cancellationToken).ConfigureAwait(false);
+
+        // The snapshot includes the logged vectors, and no longer refers to the older vector files
+        await this.DeleteVectorLogAsync(index, sequence, cancellationToken).ConfigureAwait(false);
+        if (this.UseMemoryMappedVectors) { await this.DeleteMappedVectorsAsync(index, generation, cancellationToken).ConfigureAwait(false); }
+    }
+
+    // Delete the memory mapped vectors of the generations before the given one, and the single
+    // file used by previous versions
+    private async Task DeleteMappedVectorsAsync(string index, long beforeGeneration, CancellationToken cancellationToken)
+    {
+        foreach (string fileName in await this._fileSystem.GetAllFileNamesAsync(index, SnapshotDir, cancellationToken).ConfigureAwait(false))
+        {
+            if (fileName != SnapshotVectorsFile && (!TryGetGeneration(fileName, out long generation) || generation >= beforeGeneration)) { continue; }
+
+            await this._fileSystem.DeleteFileAsync(index, SnapshotDir, fileName, cancellationToken).ConfigureAwait(false);
+        }
+    }
+
+    private static string GetMappedVectorsFileName(long generation)
+    {
+        return $"{MappedVectorsFilePrefix}{generation.ToString(CultureInfo.InvariantCulture)}{MappedVectorsFileExtension}";
+    }
+
+    private static bool TryGetGeneration(string mappedVectorsFileName, out long generation)
+    {
+        generation = 0;
+        int length = mappedVectorsFileName.Length - MappedVectorsFilePrefix.Length - MappedVectorsFileExtension.Length;
+        return length > 0
+               && mappedVectorsFileName.StartsWith(MappedVectorsFilePrefix, StringComparison.Ordinal)
+               && mappedVectorsFileName.EndsWith(MappedVectorsFileExtension, StringComparison.Ordinal)
+               && long.TryParse(mappedVectorsFileName.AsSpan(MappedVectorsFilePrefix.Length, length), NumberStyles.None, CultureInfo.InvariantCulture, out generation);
+    }
+
+    // Memory mapped vectors are stored as native floats, so they require a little-endian platform
+    private bool UseMemoryMappedVectors => this._fileSystem is DiskFileSystem && BitConverter.IsLittleEndian;
+
+    // Vectors are memory mapped from the index directory with disk storage, otherwise they are
+    // kept in memory and saved with the snapshot, "storedVectors" being the last one saved.
+    private VectorMatrixFactory GetMatrixFactory(string index, BinaryData? storedVectors)
+    {
+        if (this.UseMemoryMappedVectors)
+        {
+            var disk = (DiskFileSystem)this._fileSystem;
+            string GetPath(long generation) => disk.GetFilePath(index, SnapshotDir, GetMappedVectorsFileName(generation));
+
+            return (dimensions, count, generation) => count == 0
+                ? MemoryMappedVectorMatrix.Create(GetPath, dimensions)
+                : MemoryMappedVectorMatrix.Open(GetPath, dimensions, count, generation);
+        }
+
+        return (dimensions, count, generation) =>
+        {
+            if (count == 0) { return new InMemoryVectorMatrix(dimensions); }
+
+            if (storedVectors == null) { throw new InvalidDataException("The vector matrix is missing"); }
+
+            InMemoryVectorMatrix matrix = InMemoryVectorMatrix.Read(storedVectors.ToMemory().Span, dimensions, count, generation);
+            storedVectors = null;
+            return matrix;
+        };
+    }
+
+    // Read a record, taking its vector from the given index when provided
+    private async Task<MemoryRecord?> ReadRecordAsync(string index, string id, SimpleVectorIndex? vectorIndex, CancellationToken cancellationToken)
+    {
+        try
+        {
+            string json = await this._fileSystem.ReadFileAsTextAsync(index, "", EncodeId(id), cancellationToken).ConfigureAwait(false);
+            MemoryRecord? record = JsonSerializer.Deserialize<MemoryRecord>(json);
+            float[]? vector = vectorIndex?.GetVector(id);
+            if (record != null && vector != null) { record.Vector = new Embedding(vector); }
+
+            return record;
+        }
+        catch (FileNotFoundException)
+        {
+            // Deleted after the search
+            return null;
+        }
+    }
+
+    // Vectors are only stored in the index, see LogVectorAsync
+    private static string SerializeWithoutVector(MemoryRecord record)
+    {
+        return JsonSerializer.Serialize(new MemoryRecord { Id = record.Id, Tags = record.Tags, Payload = record.Payload });
+    }
+
+    private static string? TryDecodeId(string fileName)
+    {
+        try
+        {
+            return DecodeId(fileName);
+        }
+        catch (FormatException)
+        {
+            // Not a record file
+            return null;
+        }
     }
 
     private static string EncodeId(string realId)
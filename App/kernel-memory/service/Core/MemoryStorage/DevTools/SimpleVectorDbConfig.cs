@@ -19,4 +19,36 @@ public class SimpleVectorDbConfig
     /// Directory of the text file storage.
     /// </summary>
     public string Directory { get; set; } = "tmp-memory-vectors";
+
+    /// <summary>
+    /// Max number of links of each node in the HNSW graph (M). Higher values increase recall,
+    /// at the cost of memory and indexing time.
+    /// </summary>
+    public int HnswMaxNeighbors { get; set; } = 16;
+
+    /// <summary>
+    /// Size of the candidate list used when adding records to the HNSW graph.
+    /// Higher values build a better graph, at the cost of indexing time.
+    /// </summary>
+    public int HnswEfConstruction { get; set; } = 200;
+
+    /// <summary>
+    /// Size of the candidate list used when searching the HNSW graph, the main setting
+    /// to trade search latency for recall. The value is raised to the search limit when lower.
+    /// </summary>
+    public int HnswEfSearch { get; set; } = 100;
+
+    /// <summary>
+    /// Collections, or sets of records matching the search filters, with up to this number
+    /// of records are searched exhaustively, with exact results. Set to int.MaxValue to
+    /// always use exact search.
+    /// </summary>
+    public int ExactSearchThreshold { get; set; } = 10000;
+
+    /// <summary>
+    /// Number of changes after which the index snapshot is saved to the storage.
+    /// On startup, changes not included in the snapshot are recovered from the record files and
+    /// the vector log, which holds the vectors written since the last snapshot.
+    /// </summary>
+    public int SnapshotInterval { get; set; } = 1000;
 }
@@ -0,0 +1,495 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+using System.Numerics.Tensors;
+using System.Threading;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Search structures of one SimpleVectorDb index: record ids and tags, the tag index used to
+/// evaluate filters, the HNSW graph, the matrix of normalized vectors with the norm of each one,
+/// and the BM25 index of the record text used for keyword search. Records are identified by an ordinal, assigned in insertion order,
+/// which is also their row in the vector matrix.
+/// Deleted and replaced records are marked as deleted, and removed when the index is compacted.
+/// </summary>
+internal sealed class SimpleVectorIndex : IDisposable
+{
+    // Version 2: vectors moved from the records file to the vector matrix
+    // Version 3: terms of the record text
+    // Version 4: time of the snapshot, to find the records written after it
+    // Version 5: norm of the vectors, and vector log sequence instead of the snapshot time
+    private const int FormatVersion = 5;
+
+    // Compact the index when at least this many records, and this share of the index, are deleted
+    private const int MinDeletedForCompaction = 1000;
+    private const double MaxDeletedRatio = 0.25;
+
+    private readonly SimpleVectorDbConfig _config;
+    private readonly VectorMatrixFactory _matrixFactory;
+    private readonly ReaderWriterLockSlim _lock = new();
+    private readonly Dictionary<string, int> _ordinals = new(StringComparer.Ordinal);
+
+    // Tags of the records not deleted
+    private readonly TagIndex _tagIndex = new();
+    private List<string> _ids = new();
+    private List<TagCollection> _tags = new();
+    private List<float> _norms = new();
+    private IVectorMatrix? _matrix;
+    private List<bool> _deleted = new();
+    private HnswGraph _graph;
+    private Bm25Index _bm25 = NewBm25Index();
+    private int _deletedCount;
+    private int _dimensions;
+    private int _changesSinceSnapshot;
+    private long _logSequence = 1;
+
+    // Set when rows of the vector matrix are moved, until the next snapshot records their new position
+    private bool _compactedSinceSnapshot;
+
+    /// <summary>
+    /// Vector log sequence of the last changes included in the snapshot the index was loaded from.
+    /// Vectors logged with a later sequence may be missing from the index.
+    /// </summary>
+    public long SnapshotLogSequence { get; private set; }
+
+    public SimpleVectorIndex(SimpleVectorDbConfig config, VectorMatrixFactory matrixFactory)
+    {
+        this._config = config;
+        this._matrixFactory = matrixFactory;
+        this._graph = this.NewGraph();
+    }
+
+    /// <summary>
+    /// Whether the index changed enough since the last snapshot to write a new one.
+    /// A snapshot is always due after a compaction, which invalidates the previous one.
+    /// </summary>
+    public bool IsSnapshotDue(int interval)
+    {
+        return Volatile.Read(ref this._compactedSinceSnapshot) || Volatile.Read(ref this._changesSinceSnapshot) >= interval;
+    }
+
+    /// <summary>
+    /// Ids of the records in the index
+    /// </summary>
+    public List<string> GetIds()
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            return this._ordinals.Keys.ToList();
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    /// <summary>
+    /// Add or replace a record
+    /// </summary>
+    /// <returns>Vector log sequence of the change, the vector must be logged with it until a snapshot includes it</returns>
+    public long Upsert(string id, ReadOnlyMemory<float> vector, TagCollection tags, string? text)
+    {
+        (float[] normalized, float norm) = Normalize(vector.Span);
+        (string Term, int Frequency)[] terms = Bm25Index.Analyze(text);
+
+        this._lock.EnterWriteLock();
+        try
+        {
+            if (this._dimensions == 0) { this._dimensions = normalized.Length; }
+
+            this._matrix ??= this._matrixFactory(this._dimensions, 0, 0);
+
+            if (normalized.Length != this._dimensions)
+            {
+                throw new SimpleVectorDbException(
+                    $"Embedding vectors must have the same length. Index vector length: {this._dimensions}; record {id} vector length: {normalized.Length}.");
+            }
+
+            if (this._ordinals.TryGetValue(id, out int previous))
+            {
+                this.MarkDeleted(previous);
+            }
+
+            int ordinal = this._ids.Count;
+            this._ids.Add(id);
+            this._tags.Add(tags);
+            this._norms.Add(norm);
+            this._matrix.Append(normalized);
+            this._deleted.Add(false);
+            this._graph.Add(ordinal);
+            this._bm25.Add(ordinal, terms);
+            this._ordinals[id] = ordinal;
+            this._tagIndex.Add(ordinal, tags);
+            this._changesSinceSnapshot++;
+
+            this.CompactIfNeeded();
+            return this._logSequence;
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    /// <summary>
+    /// Make the next changes use a vector log sequence after the given one, e.g. after replaying
+    /// the vectors logged by a previous run
+    /// </summary>
+    public void AdvanceLogSequence(long sequence)
+    {
+        this._lock.EnterWriteLock();
+        try
+        {
+            this._logSequence = Math.Max(this._logSequence, sequence + 1);
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    /// <summary>
+    /// Vector of a record, as stored by the client, i.e. the normalized vector multiplied by its norm
+    /// </summary>
+    public float[]? GetVector(string id)
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            if (!this._ordinals.TryGetValue(id, out int ordinal)) { return null; }
+
+            float[] vector = this._matrix!.GetRow(ordinal).ToArray();
+            TensorPrimitives.Multiply(vector, this._norms[ordinal], vector);
+            return vector;
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    public bool Remove(string id)
+    {
+        this._lock.EnterWriteLock();
+        try
+        {
+            if (!this._ordinals.Remove(id, out int ordinal)) { return false; }
+
+            this.MarkDeleted(ordinal);
+            this._changesSinceSnapshot++;
+            this.CompactIfNeeded();
+            return true;
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    /// <summary>
+    /// Find the records most similar to the given vector.
+    /// Small collections, and small sets of records matching the filters, are searched exhaustively,
+    /// larger ones through the HNSW graph.
+    /// </summary>
+    /// <returns>Record ids and cosine similarity, from the most similar</returns>
+    public List<(string Id, double Score)> Search(
+        ReadOnlyMemory<float> vector, ICollection<MemoryFilter>? filters, double minRelevance, int limit)
+    {
+        (float[] query, _) = Normalize(vector.Span);
+
+        this._lock.EnterReadLock();
+        try
+        {
+            if (this._ordinals.Count == 0) { return new List<(string, double)>(); }
+
+            if (query.Length != this._dimensions)
+            {
+                throw new InvalidOperationException(
+                    "Embedding vectors must have the same length to calculate cosine similarity. " +
+                    $"Embedding 1 length: {query.Length}; Embedding 2 length: {this._dimensions}.");
+            }
+
+            // Records matching the filters, null when all records match
+            TagBitmap? candidates = this._tagIndex.Match(filters);
+            int candidateCount = candidates?.Count ?? this._ordinals.Count;
+
+            List<(int Ordinal, float Score)> matches;
+            if (candidateCount <= this._config.ExactSearchThreshold || limit >= candidateCount)
+            {
+                // Only the vectors of the matching records are read
+                matches = candidates != null
+                    ? TopKScorer.Search(this._matrix!, query, candidates, limit, (float)minRelevance)
+                    : TopKScorer.Search(this._matrix!, query, limit, (float)minRelevance, this.IsLive);
+            }
+            else
+            {
+                matches = this._graph.Search(query, limit, Math.Max(this._config.HnswEfSearch, limit),
+                    candidates != null ? candidates.Contains : this.IsLive);
+            }
+
+            return (from match in matches
+                    where match.Score >= minRelevance
+                    select (this._ids[match.Ordinal], (double)match.Score)).ToList();
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    /// <summary>
+    /// Find the records whose text is most relevant to the words of the query, using BM25
+    /// </summary>
+    /// <returns>Record ids and BM25 score, from the most relevant</returns>
+    public List<(string Id, double Score)> KeywordSearch(string query, ICollection<MemoryFilter>? filters, int limit)
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            TagBitmap? candidates = this._tagIndex.Match(filters);
+            return (from match in this._bm25.Search(query, candidates, double.MinValue, limit)
+                    select (this._ids[match.Ordinal], match.Score)).ToList();
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    /// <summary>
+    /// List the ids of the records matching the filters, in insertion order
+    /// </summary>
+    public List<string> List(ICollection<MemoryFilter>? filters, int limit)
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            TagBitmap? candidates = this._tagIndex.Match(filters);
+            IEnumerable<int> ordinals = candidates ?? Enumerable.Range(0, this._ids.Count).Where(this.IsLive);
+            return ordinals.Take(limit).Select(ordinal => this._ids[ordinal]).ToList();
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    /// <summary>
+    /// Write the records and the graph, resetting the count of changes since the last snapshot.
+    /// The vector matrix is flushed to its own storage, or written to the vectors stream when provided.
+    /// The changes made later use a new vector log sequence.
+    /// </summary>
+    /// <returns>Vector log sequence of the last changes included, and generation of the vector matrix</returns>
+    public (long LogSequence, long Generation) WriteSnapshot(Stream records, Stream graph, Stream? vectors)
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            // Upserts hold the write lock, so none of them can get the sequence while it changes
+            long sequence = Interlocked.Increment(ref this._logSequence) - 1;
+            long generation = this._matrix?.Generation ?? 0;
+            using (var writer = new BinaryWriter(records, System.Text.Encoding.UTF8, leaveOpen: true))
+            {
+                writer.Write(FormatVersion);
+                writer.Write(sequence);
+                writer.Write(this._ids.Count);
+                writer.Write(this._dimensions);
+                writer.Write(generation);
+                for (int ordinal = 0; ordinal < this._ids.Count; ordinal++)
+                {
+                    writer.Write(this._ids[ordinal]);
+                    writer.Write(this._deleted[ordinal]);
+                    writer.Write(this._norms[ordinal]);
+                    TagIndex.WriteTags(writer, this._tags[ordinal]);
+                    this._bm25.WriteDocument(writer, ordinal);
+                }
+            }
+
+            // Flush the rows before the records referring to them are stored
+            this._matrix?.Flush();
+            if (vectors != null) { this._matrix?.WriteTo(vectors); }
+
+            using (var writer = new BinaryWriter(graph, System.Text.Encoding.UTF8, leaveOpen: true))
+            {
+                this._graph.Write(writer);
+            }
+
+            Interlocked.Exchange(ref this._changesSinceSnapshot, 0);
+            Volatile.Write(ref this._compactedSinceSnapshot, false);
+            return (sequence, generation);
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    /// <summary>
+    /// Load a snapshot. The vector matrix is opened through the factory, which receives the
+    /// number of rows and the generation recorded in the snapshot.
+    /// </summary>
+    public static SimpleVectorIndex ReadSnapshot(Stream records, Stream graph, SimpleVectorDbConfig config, VectorMatrixFactory matrixFactory)
+    {
+        var index = new SimpleVectorIndex(config, matrixFactory);
+        long generation;
+
+        using (var reader = new BinaryReader(records, System.Text.Encoding.UTF8, leaveOpen: true))
+        {
+            int version = reader.ReadInt32();
+            if (version != FormatVersion) { throw new InvalidDataException($"Unsupported vector index format version {version}"); }
+
+            index.SnapshotLogSequence = reader.ReadInt64();
+            index._logSequence = index.SnapshotLogSequence + 1;
+            int count = reader.ReadInt32();
+            index._dimensions = reader.ReadInt32();
+            generation = reader.ReadInt64();
+            for (int ordinal = 0; ordinal < count; ordinal++)
+            {
+                string id = reader.ReadString();
+                bool deleted = reader.ReadBoolean();
+                float norm = reader.ReadSingle();
+                TagCollection tags = TagIndex.ReadTags(reader);
+                (string Term, int Frequency)[] terms = Bm25Index.ReadDocument(reader);
+
+                index._bm25.Add(ordinal, terms);
+                if (deleted) { index._bm25.Remove(ordinal); }
+
+                index._ids.Add(id);
+                index._deleted.Add(deleted);
+                index._tags.Add(tags);
+                index._norms.Add(norm);
+                if (deleted) { index._deletedCount++; }
+                else { index._ordinals[id] = ordinal; }
+            }
+        }
+
+        using (var reader = new BinaryReader(graph, System.Text.Encoding.UTF8, leaveOpen: true))
+        {
+            index._graph = HnswGraph.Read(reader, index.GetVector, config.HnswMaxNeighbors, config.HnswEfConstruction);
+        }
+
+        foreach (int ordinal in index._ordinals.Values)
+        {
+            index._tagIndex.Add(ordinal, index._tags[ordinal]);
+        }
+
+        if (index._graph.Count != index._ids.Count)
+        {
+            throw new InvalidDataException("The HNSW graph doesn't match the index records");
+        }
+
+        if (index._ids.Count > 0)
+        {
+            index._matrix = matrixFactory(index._dimensions, index._ids.Count, generation);
+        }
+
+        return index;
+    }
+
+    /// <summary>
+    /// Release the vector matrix, e.g. to unmap its file before the index is deleted
+    /// </summary>
+    public void Dispose()
+    {
+        this._lock.EnterWriteLock();
+        try
+        {
+            this._matrix?.Dispose();
+            this._matrix = null;
+            this._ids.Clear();
+            this._tags.Clear();
+            this._norms.Clear();
+            this._deleted.Clear();
+            this._ordinals.Clear();
+            this._tagIndex.Clear();
+            this._bm25 = NewBm25Index();
+            this._deletedCount = 0;
+            this._graph = this.NewGraph();
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    #region private
+
+    private HnswGraph NewGraph()
+    {
+        return new HnswGraph(this.GetVector, this._config.HnswMaxNeighbors, this._config.HnswEfConstruction);
+    }
+
+    private static Bm25Index NewBm25Index()
+    {
+        return new Bm25Index(Bm25Index.DefaultK1, Bm25Index.DefaultB);
+    }
+
+    private ReadOnlySpan<float> GetVector(int ordinal) => this._matrix!.GetRow(ordinal);
+
+    private bool IsLive(int ordinal) => !this._deleted[ordinal];
+
+    private void MarkDeleted(int ordinal)
+    {
+        if (this._deleted[ordinal]) { return; }
+
+        this._deleted[ordinal] = true;
+        this._deletedCount++;
+        this._tagIndex.Remove(ordinal, this._tags[ordinal]);
+        this._bm25.Remove(ordinal);
+    }
+
+    // Rebuild the index without the deleted records. Deleted nodes are still used to navigate
+    // the graph, so they can't be dropped one at a time.
+    private void CompactIfNeeded()
+    {
+        if (this._deletedCount < MinDeletedForCompaction || this._deletedCount < this._ids.Count * MaxDeletedRatio) { return; }
+
+        var ids = new List<string>(this._ordinals.Count);
+        var tags = new List<TagCollection>(this._ordinals.Count);
+        var norms = new List<float>(this._ordinals.Count);
+        var rows = new int[this._ordinals.Count];
+        for (int ordinal = 0; ordinal < this._ids.Count; ordinal++)
+        {
+            if (this._deleted[ordinal]) { continue; }
+
+            rows[ids.Count] = ordinal;
+            ids.Add(this._ids[ordinal]);
+            tags.Add(this._tags[ordinal]);
+            norms.Add(this._norms[ordinal]);
+        }
+
+        this._matrix!.Compact(rows);
+        this._bm25.Compact(rows);
+        this._compactedSinceSnapshot = true;
+        this._ids = ids;
+        this._tags = tags;
+        this._norms = norms;
+        this._deleted = new List<bool>(new bool[ids.Count]);
+        this._deletedCount = 0;
+        this._ordinals.Clear();
+        this._tagIndex.Clear();
+        this._graph = this.NewGraph();
+        for (int ordinal = 0; ordinal < ids.Count; ordinal++)
+        {
+            this._ordinals[ids[ordinal]] = ordinal;
+            this._tagIndex.Add(ordinal, tags[ordinal]);
+            this._graph.Add(ordinal);
+        }
+    }
+
+    private static (float[] Vector, float Norm) Normalize(ReadOnlySpan<float> vector)
+    {
+        var result = vector.ToArray();
+        float norm = TensorPrimitives.Norm(vector);
+        if (norm > 0) { TensorPrimitives.Divide(result, norm, result); }
+
+        return (result, norm);
+    }
+
+    #endregion
+}
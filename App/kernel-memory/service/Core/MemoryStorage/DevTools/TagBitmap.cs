@@ -0,0 +1,346 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections;
+using System.Collections.Generic;
+using System.Numerics;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Compressed set of record ordinals, in the style of Roaring bitmaps: ordinals are grouped by their
+/// high 16 bits, and each group is stored as a sorted array when sparse, or as a 65536 bits bitset
+/// when dense. Enumeration returns the ordinals in ascending order.
+/// See "Better bitmap performance with Roaring bitmaps", https://arxiv.org/abs/1402.6407
+/// </summary>
+internal sealed class TagBitmap : IEnumerable<int>
+{
+    // Max number of values of an array container, above this a bitset takes less memory
+    private const int MaxArraySize = 4096;
+    private const int BitsetWords = 65536 / 64;
+
+    private sealed class Container
+    {
+        // Sorted values, when the container is an array
+        public ushort[]? Array;
+
+        // 65536 bits, when the container is a bitset
+        public ulong[]? Bits;
+
+        public int Count;
+
+        public static Container FromValue(ushort value)
+        {
+            return new Container { Array = new ushort[4] { value, 0, 0, 0 }, Count = 1 };
+        }
+
+        public bool Contains(ushort value)
+        {
+            if (this.Bits != null) { return (this.Bits[value >> 6] & (1UL << value)) != 0; }
+
+            return System.Array.BinarySearch(this.Array!, 0, this.Count, value) >= 0;
+        }
+
+        public bool Add(ushort value)
+        {
+            if (this.Bits != null)
+            {
+                ulong mask = 1UL << value;
+                if ((this.Bits[value >> 6] & mask) != 0) { return false; }
+
+                this.Bits[value >> 6] |= mask;
+                this.Count++;
+                return true;
+            }
+
+            int position = System.Array.BinarySearch(this.Array!, 0, this.Count, value);
+            if (position >= 0) { return false; }
+
+            if (this.Count == MaxArraySize)
+            {
+                this.ToBitset();
+                return this.Add(value);
+            }
+
+            position = ~position;
+            if (this.Count == this.Array!.Length) { System.Array.Resize(ref this.Array, Math.Min(2 * this.Count, MaxArraySize)); }
+
+            System.Array.Copy(this.Array, position, this.Array, position + 1, this.Count - position);
+            this.Array[position] = value;
+            this.Count++;
+            return true;
+        }
+
+        public bool Remove(ushort value)
+        {
+            if (this.Bits != null)
+            {
+                ulong mask = 1UL << value;
+                if ((this.Bits[value >> 6] & mask) == 0) { return false; }
+
+                this.Bits[value >> 6] &= ~mask;
+                this.Count--;
+                if (this.Count <= MaxArraySize / 2) { this.ToArray(); }
+
+                return true;
+            }
+
+            int position = System.Array.BinarySearch(this.Array!, 0, this.Count, value);
+            if (position < 0) { return false; }
+
+            System.Array.Copy(this.Array!, position + 1, this.Array!, position, this.Count - position - 1);
+            this.Count--;
+            return true;
+        }
+
+        public Container? And(Container other)
+        {
+            if (this.Bits != null && other.Bits != null)
+            {
+                var bits = new ulong[BitsetWords];
+                int count = 0;
+                for (int i = 0; i < BitsetWords; i++)
+                {
+                    bits[i] = this.Bits[i] & other.Bits[i];
+                    count += BitOperations.PopCount(bits[i]);
+                }
+
+                var result = new Container { Bits = bits, Count = count };
+                if (count <= MaxArraySize) { result.ToArray(); }
+
+                return count == 0 ? null : result;
+            }
+
+            // At least one array: check its values against the other container
+            Container small = this.Bits == null ? this : other;
+            Container large = small == this ? other : this;
+            if (small.Count > large.Count && large.Bits == null) { (small, large) = (large, small); }
+
+            var values = new ushort[small.Count];
+            int size = 0;
+            for (int i = 0; i < small.Count; i++)
+            {
+                if (large.Contains(small.Array![i])) { values[size++] = small.Array[i]; }
+            }
+
+            return size == 0 ? null : new Container { Array = values, Count = size };
+        }
+
+        public Container Or(Container other)
+        {
+            var result = new Container { Bits = new ulong[BitsetWords] };
+            if (this.Bits == null && other.Bits == null && this.Count + other.Count <= MaxArraySize)
+            {
+                result.Bits = null;
+                result.Array = new ushort[this.Count + other.Count];
+            }
+
+            foreach (ushort value in this.Values()) { result.AddUnsorted(value); }
+
+            foreach (ushort value in other.Values()) { result.AddUnsorted(value); }
+
+            if (result.Array != null) { result.SortArray(); }
+
+            return result;
+        }
+
+        public IEnumerable<ushort> Values()
+        {
+            if (this.Bits == null)
+            {
+                for (int i = 0; i < this.Count; i++) { yield return this.Array![i]; }
+
+                yield break;
+            }
+
+            for (int word = 0; word < BitsetWords; word++)
+            {
+                ulong bits = this.Bits[word];
+                while (bits != 0)
+                {
+                    yield return (ushort)((word << 6) + BitOperations.TrailingZeroCount(bits));
+                    bits &= bits - 1;
+                }
+            }
+        }
+
+        private void ToBitset()
+        {
+            var bits = new ulong[BitsetWords];
+            for (int i = 0; i < this.Count; i++) { bits[this.Array![i] >> 6] |= 1UL << this.Array[i]; }
+
+            this.Bits = bits;
+            this.Array = null;
+        }
+
+        private void ToArray()
+        {
+            var values = new ushort[Math.Max(this.Count, 4)];
+            int size = 0;
+            foreach (ushort value in this.Values()) { values[size++] = value; }
+
+            this.Array = values;
+            this.Bits = null;
+        }
+
+        // Used to build the result of Or, values are de-duplicated by SortArray
+        private void AddUnsorted(ushort value)
+        {
+            if (this.Bits != null)
+            {
+                this.Add(value);
+                return;
+            }
+
+            this.Array![this.Count++] = value;
+        }
+
+        private void SortArray()
+        {
+            System.Array.Sort(this.Array!, 0, this.Count);
+            int size = 0;
+            for (int i = 0; i < this.Count; i++)
+            {
+                if (size > 0 && this.Array![size - 1] == this.Array[i]) { continue; }
+
+                this.Array![size++] = this.Array[i];
+            }
+
+            this.Count = size;
+        }
+    }
+
+    // Containers sorted by key, i.e. the high 16 bits of their values
+    private readonly List<ushort> _keys = new();
+    private readonly List<Container> _containers = new();
+
+    /// <summary>
+    /// Number of ordinals in the set
+    /// </summary>
+    public int Count { get; private set; }
+
+    public bool Contains(int ordinal)
+    {
+        int position = this._keys.BinarySearch((ushort)(ordinal >> 16));
+        return position >= 0 && this._containers[position].Contains((ushort)ordinal);
+    }
+
+    public bool Add(int ordinal)
+    {
+        if (ordinal < 0) { throw new ArgumentOutOfRangeException(nameof(ordinal)); }
+
+        ushort key = (ushort)(ordinal >> 16);
+        int position = this._keys.BinarySearch(key);
+        if (position < 0)
+        {
+            this._keys.Insert(~position, key);
+            this._containers.Insert(~position, Container.FromValue((ushort)ordinal));
+            this.Count++;
+            return true;
+        }
+
+        if (!this._containers[position].Add((ushort)ordinal)) { return false; }
+
+        this.Count++;
+        return true;
+    }
+
+    public bool Remove(int ordinal)
+    {
+        int position = this._keys.BinarySearch((ushort)(ordinal >> 16));
+        if (position < 0 || !this._containers[position].Remove((ushort)ordinal)) { return false; }
+
+        if (this._containers[position].Count == 0)
+        {
+            this._keys.RemoveAt(position);
+            this._containers.RemoveAt(position);
+        }
+
+        this.Count--;
+        return true;
+    }
+
+    /// <summary>
+    /// Ordinals contained in both sets
+    /// </summary>
+    public static TagBitmap And(TagBitmap x, TagBitmap y)
+    {
+        var result = new TagBitmap();
+        int i = 0, j = 0;
+        while (i < x._keys.Count && j < y._keys.Count)
+        {
+            int compare = x._keys[i].CompareTo(y._keys[j]);
+            if (compare < 0) { i++; continue; }
+
+            if (compare > 0) { j++; continue; }
+
+            Container? container = x._containers[i].And(y._containers[j]);
+            if (container != null) { result.Append(x._keys[i], container); }
+
+            i++;
+            j++;
+        }
+
+        return result;
+    }
+
+    /// <summary>
+    /// Ordinals contained in at least one of the sets
+    /// </summary>
+    public static TagBitmap Or(TagBitmap x, TagBitmap y)
+    {
+        var result = new TagBitmap();
+        int i = 0, j = 0;
+        while (i < x._keys.Count || j < y._keys.Count)
+        {
+            int compare = i >= x._keys.Count ? 1 : j >= y._keys.Count ? -1 : x._keys[i].CompareTo(y._keys[j]);
+            if (compare < 0)
+            {
+                result.Append(x._keys[i], x._containers[i].Or(s_emptyContainer));
+                i++;
+            }
+            else if (compare > 0)
+            {
+                result.Append(y._keys[j], y._containers[j].Or(s_emptyContainer));
+                j++;
+            }
+            else
+            {
+                result.Append(x._keys[i], x._containers[i].Or(y._containers[j]));
+                i++;
+                j++;
+            }
+        }
+
+        return result;
+    }
+
+    /// <inheritdoc />
+    public IEnumerator<int> GetEnumerator()
+    {
+        for (int i = 0; i < this._keys.Count; i++)
+        {
+            int high = this._keys[i] << 16;
+            foreach (ushort value in this._containers[i].Values()) { yield return high | value; }
+        }
+    }
+
+    /// <inheritdoc />
+    IEnumerator IEnumerable.GetEnumerator()
+    {
+        return this.GetEnumerator();
+    }
+
+    #region private
+
+    private static readonly Container s_emptyContainer = new() { Array = System.Array.Empty<ushort>() };
+
+    private void Append(ushort key, Container container)
+    {
+        this._keys.Add(key);
+        this._containers.Add(container);
+        this.Count += container.Count;
+    }
+
+    #endregion
+}
@@ -0,0 +1,153 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Inverted index of record tags, mapping each "tag name + value" pair to the bitmap of the
+/// ordinals of the records having the tag, so memory filters are evaluated with bitmap
+/// operations, without reading the records.
+/// Tag names are case-insensitive and values case-sensitive, as in <see cref="TagCollection"/>.
+/// Note: the class is not thread safe, callers must synchronize writes with reads.
+/// </summary>
+internal sealed class TagIndex
+{
+    private sealed class TagComparer : IEqualityComparer<(string Name, string? Value)>
+    {
+        public static readonly TagComparer Instance = new();
+
+        public bool Equals((string Name, string? Value) x, (string Name, string? Value) y)
+        {
+            return StringComparer.OrdinalIgnoreCase.Equals(x.Name, y.Name) && string.Equals(x.Value, y.Value, StringComparison.Ordinal);
+        }
+
+        public int GetHashCode((string Name, string? Value) obj)
+        {
+            return HashCode.Combine(StringComparer.OrdinalIgnoreCase.GetHashCode(obj.Name), obj.Value == null ? 0 : StringComparer.Ordinal.GetHashCode(obj.Value));
+        }
+    }
+
+    private readonly Dictionary<(string Name, string? Value), TagBitmap> _bitmaps = new(TagComparer.Instance);
+
+    public void Add(int ordinal, TagCollection tags)
+    {
+        foreach (KeyValuePair<string, List<string?>> tag in tags)
+        {
+            foreach (string? value in tag.Value)
+            {
+                if (!this._bitmaps.TryGetValue((tag.Key, value), out TagBitmap? bitmap))
+                {
+                    bitmap = new TagBitmap();
+                    this._bitmaps[(tag.Key, value)] = bitmap;
+                }
+
+                bitmap.Add(ordinal);
+            }
+        }
+    }
+
+    public void Remove(int ordinal, TagCollection tags)
+    {
+        foreach (KeyValuePair<string, List<string?>> tag in tags)
+        {
+            foreach (string? value in tag.Value)
+            {
+                if (!this._bitmaps.TryGetValue((tag.Key, value), out TagBitmap? bitmap)) { continue; }
+
+                bitmap.Remove(ordinal);
+                if (bitmap.Count == 0) { this._bitmaps.Remove((tag.Key, value)); }
+            }
+        }
+    }
+
+    public void Clear()
+    {
+        this._bitmaps.Clear();
+    }
+
+    /// <summary>
+    /// Ordinals of the records matching at least one filter (OR logic), where a record matches
+    /// a filter when it has all the tags of the filter (AND logic).
+    /// </summary>
+    /// <returns>Matching ordinals, or null when all records match, e.g. when there are no filters. The bitmap
+    /// can be owned by the index, and must not be changed.</returns>
+    public TagBitmap? Match(ICollection<MemoryFilter>? filters)
+    {
+        if (filters == null || filters.Count == 0) { return null; }
+
+        TagBitmap? result = null;
+        foreach (MemoryFilter filter in filters)
+        {
+            TagBitmap? filterMatches = this.Match(filter);
+
+            // A filter without conditions matches all records
+            if (filterMatches == null) { return null; }
+
+            result = result == null ? filterMatches : TagBitmap.Or(result, filterMatches);
+        }
+
+        return result;
+    }
+
+    /// <summary>
+    /// Serialize tags, e.g. in an index snapshot
+    /// </summary>
+    public static void WriteTags(BinaryWriter writer, TagCollection tags)
+    {
+        writer.Write(tags.Count);
+        foreach (KeyValuePair<string, List<string?>> tag in tags)
+        {
+            writer.Write(tag.Key);
+            writer.Write(tag.Value.Count);
+            foreach (string? value in tag.Value)
+            {
+                writer.Write(value != null);
+                if (value != null) { writer.Write(value); }
+            }
+        }
+    }
+
+    public static TagCollection ReadTags(BinaryReader reader)
+    {
+        var tags = new TagCollection();
+        int count = reader.ReadInt32();
+        for (int i = 0; i < count; i++)
+        {
+            string key = reader.ReadString();
+            int valueCount = reader.ReadInt32();
+            var values = new List<string?>(valueCount);
+            for (int j = 0; j < valueCount; j++)
+            {
+                values.Add(reader.ReadBoolean() ? reader.ReadString() : null);
+            }
+
+            tags.Add(key, values);
+        }
+
+        return tags;
+    }
+
+    #region private
+
+    private TagBitmap? Match(MemoryFilter filter)
+    {
+        TagBitmap? result = null;
+        foreach (KeyValuePair<string, List<string?>> condition in filter)
+        {
+            foreach (string? value in condition.Value)
+            {
+                if (!this._bitmaps.TryGetValue((condition.Key, value), out TagBitmap? bitmap)) { return new TagBitmap(); }
+
+                result = result == null ? bitmap : TagBitmap.And(result, bitmap);
+                if (result.Count == 0) { return result; }
+            }
+        }
+
+        return result;
+    }
+
+    #endregion
+}
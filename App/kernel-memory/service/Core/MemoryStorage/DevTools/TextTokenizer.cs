@@ -0,0 +1,36 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Split text into lowercase terms, made of letters, digits and underscores.
+/// </summary>
+internal static class TextTokenizer
+{
+    // Longer tokens, e.g. encoded data, are not useful search terms and are skipped
+    private const int MaxTokenLength = 64;
+
+    public static IEnumerable<string> Tokenize(string? text)
+    {
+        if (string.IsNullOrEmpty(text)) { yield break; }
+
+        int start = -1;
+        for (int i = 0; i <= text.Length; i++)
+        {
+            if (i < text.Length && (char.IsLetterOrDigit(text[i]) || text[i] == '_'))
+            {
+                if (start < 0) { start = i; }
+
+                continue;
+            }
+
+            if (start < 0) { continue; }
+
+            if (i - start <= MaxTokenLength) { yield return text.Substring(start, i - start).ToLowerInvariant(); }
+
+            start = -1;
+        }
+    }
+}
@@ -0,0 +1,95 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Bounded min-heap keeping the k items with the highest score, so ranking n items costs
+/// O(n log k) time and O(k) memory, instead of sorting all of them.
+/// Items with the same score are ranked in insertion order.
+/// </summary>
+internal sealed class TopKHeap<T>
+{
+    // Lowest score first, and among equal scores the latest item first, i.e. the next item to evict
+    private sealed class EvictionOrder : IComparer<(double Score, long Sequence)>
+    {
+        public static readonly EvictionOrder Instance = new();
+
+        public int Compare((double Score, long Sequence) x, (double Score, long Sequence) y)
+        {
+            int result = x.Score.CompareTo(y.Score);
+            return result != 0 ? result : y.Sequence.CompareTo(x.Sequence);
+        }
+    }
+
+    private readonly int _limit;
+    private readonly PriorityQueue<T, (double Score, long Sequence)> _heap;
+    private long _sequence;
+
+    public TopKHeap(int limit)
+    {
+        this._limit = limit;
+        // Don't preallocate for unbounded searches, e.g. limit = int.MaxValue
+        this._heap = new PriorityQueue<T, (double, long)>(limit <= 1024 ? limit : 1024, EvictionOrder.Instance);
+    }
+
+    public int Count => this._heap.Count;
+
+    /// <summary>
+    /// Lowest score an item must exceed to enter the heap, or -infinity while the heap isn't full
+    /// </summary>
+    public double Threshold => this._heap.Count >= this._limit && this._heap.TryPeek(out _, out var lowest)
+        ? lowest.Score
+        : double.NegativeInfinity;
+
+    public void Add(T item, double score)
+    {
+        this.Add(item, score, this._sequence++);
+    }
+
+    /// <summary>
+    /// Add an item with an explicit sequence number, used to rank items with the same score
+    /// </summary>
+    public void Add(T item, double score, long sequence)
+    {
+        if (this._limit <= 0) { return; }
+
+        if (this._heap.Count < this._limit)
+        {
+            this._heap.Enqueue(item, (score, sequence));
+            return;
+        }
+
+        this._heap.TryPeek(out _, out var lowest);
+        if (EvictionOrder.Instance.Compare((score, sequence), lowest) <= 0) { return; }
+
+        this._heap.DequeueEnqueue(item, (score, sequence));
+    }
+
+    /// <summary>
+    /// Add the items of another heap, e.g. to merge the results of parallel searches.
+    /// The items keep their original sequence number, so ties are resolved as in a single heap.
+    /// </summary>
+    public void AddRange(TopKHeap<T> other)
+    {
+        foreach ((T item, (double score, long sequence)) in other._heap.UnorderedItems)
+        {
+            this.Add(item, score, sequence);
+        }
+
+        if (other._sequence > this._sequence) { this._sequence = other._sequence; }
+    }
+
+    /// <summary>
+    /// Remove the items from the heap, returning them from the highest score
+    /// </summary>
+    public List<(T Item, double Score)> ToSortedList()
+    {
+        var result = new List<(T Item, double Score)>(this._heap.Count);
+        while (this._heap.TryDequeue(out T? item, out var priority)) { result.Add((item, priority.Score)); }
+
+        result.Reverse();
+        return result;
+    }
+}
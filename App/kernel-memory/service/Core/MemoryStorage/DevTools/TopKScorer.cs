@@ -0,0 +1,118 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Numerics.Tensors;
+using System.Threading.Tasks;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Exhaustive search over a matrix of normalized vectors: rows are scored in contiguous blocks with
+/// SIMD dot products, keeping the best k in a bounded heap. Large matrices are split in ranges
+/// scored in parallel, whose heaps are then merged.
+/// </summary>
+internal static class TopKScorer
+{
+    // Rows scored per block, reading the block once from the matrix
+    private const int BlockSize = 256;
+
+    // Min number of rows per parallel range, smaller matrices are scored on the calling thread
+    private const int MinRowsPerRange = 16384;
+
+    /// <summary>
+    /// Find the rows most similar to the given normalized vector.
+    /// </summary>
+    /// <param name="matrix">Normalized vectors, one per row</param>
+    /// <param name="query">Normalized query vector</param>
+    /// <param name="limit">Max number of results</param>
+    /// <param name="minScore">Min similarity of the results</param>
+    /// <param name="accept">Optional predicate selecting the rows that can be returned, e.g. to skip deleted rows</param>
+    /// <returns>Rows and similarity, from the most similar</returns>
+    public static List<(int Ordinal, float Score)> Search(
+        IVectorMatrix matrix, float[] query, int limit, float minScore, Func<int, bool>? accept)
+    {
+        int count = matrix.Count;
+        if (count == 0 || limit <= 0) { return new List<(int, float)>(); }
+
+        int ranges = Math.Min(Environment.ProcessorCount, count / MinRowsPerRange);
+        TopKHeap<int> heap;
+        if (ranges <= 1)
+        {
+            heap = new TopKHeap<int>(limit);
+            ScoreRange(matrix, query, 0, count, minScore, accept, heap);
+        }
+        else
+        {
+            var heaps = new TopKHeap<int>[ranges];
+            int rangeSize = (count + ranges - 1) / ranges;
+            Parallel.For(0, ranges, range =>
+            {
+                int start = range * rangeSize;
+                heaps[range] = new TopKHeap<int>(limit);
+                ScoreRange(matrix, query, start, Math.Min(start + rangeSize, count), minScore, accept, heaps[range]);
+            });
+
+            heap = new TopKHeap<int>(limit);
+            foreach (TopKHeap<int> rangeHeap in heaps) { heap.AddRange(rangeHeap); }
+        }
+
+        var result = new List<(int Ordinal, float Score)>(heap.Count);
+        foreach ((int ordinal, double score) in heap.ToSortedList()) { result.Add((ordinal, (float)score)); }
+
+        return result;
+    }
+
+    /// <summary>
+    /// Find the most similar rows among the given ones, e.g. the records matching a filter,
+    /// reading only the vectors of those rows.
+    /// </summary>
+    /// <returns>Rows and similarity, from the most similar</returns>
+    public static List<(int Ordinal, float Score)> Search(
+        IVectorMatrix matrix, float[] query, IEnumerable<int> ordinals, int limit, float minScore)
+    {
+        var heap = new TopKHeap<int>(limit);
+        foreach (int ordinal in ordinals)
+        {
+            float score = TensorPrimitives.Dot(query, matrix.GetRow(ordinal));
+            if (score < minScore) { continue; }
+
+            heap.Add(ordinal, score, ordinal);
+        }
+
+        var result = new List<(int Ordinal, float Score)>(heap.Count);
+        foreach ((int ordinal, double score) in heap.ToSortedList()) { result.Add((ordinal, (float)score)); }
+
+        return result;
+    }
+
+    #region private
+
+    private static void ScoreRange(
+        IVectorMatrix matrix, float[] query, int start, int end, float minScore, Func<int, bool>? accept, TopKHeap<int> heap)
+    {
+        int dimensions = matrix.Dimensions;
+        Span<float> scores = stackalloc float[BlockSize];
+        for (int blockStart = start; blockStart < end; blockStart += BlockSize)
+        {
+            int rows = Math.Min(BlockSize, end - blockStart);
+            ReadOnlySpan<float> block = matrix.GetRows(blockStart, rows);
+            for (int row = 0; row < rows; row++)
+            {
+                scores[row] = TensorPrimitives.Dot(query, block.Slice(row * dimensions, dimensions));
+            }
+
+            double threshold = Math.Max(minScore, heap.Threshold);
+            for (int row = 0; row < rows; row++)
+            {
+                if (scores[row] < threshold || (accept != null && !accept(blockStart + row))) { continue; }
+
+                // Ordinals used as sequence numbers, so ties are ranked in row order across ranges
+                heap.Add(blockStart + row, scores[row], blockStart + row);
+                threshold = Math.Max(minScore, heap.Threshold);
+            }
+        }
+    }
+
+    #endregion
+}
@@ -0,0 +1,49 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Buffers.Binary;
+using System.IO;
+
+namespace Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+/// <summary>
+/// Header of the vector matrix storage format.
+/// </summary>
+internal static class VectorMatrixFormat
+{
+    public const int HeaderSize = 32;
+
+    // "KMVF"
+    private const int Magic = 0x46564D4B;
+    private const int Version = 1;
+
+    public static void WriteHeader(Span<byte> header, int dimensions, long generation)
+    {
+        header.Slice(0, HeaderSize).Clear();
+        BinaryPrimitives.WriteInt32LittleEndian(header, Magic);
+        BinaryPrimitives.WriteInt32LittleEndian(header.Slice(4), Version);
+        BinaryPrimitives.WriteInt32LittleEndian(header.Slice(8), dimensions);
+        BinaryPrimitives.WriteInt64LittleEndian(header.Slice(16), generation);
+    }
+
+    public static (int Dimensions, long Generation) ReadHeader(ReadOnlySpan<byte> header)
+    {
+        if (header.Length < HeaderSize
+            || BinaryPrimitives.ReadInt32LittleEndian(header) != Magic
+            || BinaryPrimitives.ReadInt32LittleEndian(header.Slice(4)) != Version)
+        {
+            throw new InvalidDataException("Invalid vector matrix header");
+        }
+
+        return (BinaryPrimitives.ReadInt32LittleEndian(header.Slice(8)), BinaryPrimitives.ReadInt64LittleEndian(header.Slice(16)));
+    }
+
+    public static void Validate(int dimensions, long generation, int expectedDimensions, long expectedGeneration)
+    {
+        if (dimensions != expectedDimensions || generation != expectedGeneration)
+        {
+            throw new InvalidDataException(
+                $"The vector matrix doesn't match the index: dimensions {dimensions}/{expectedDimensions}, generation {generation}/{expectedGeneration}");
+        }
+    }
+}
@@ -0,0 +1,49 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+using Microsoft.Extensions.DependencyInjection;
+using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.MemoryStorage;
+using Microsoft.KernelMemory.MemoryStorage.FanOut;
+
+// ReSharper disable once CheckNamespace - reduce number of "using" statements
+namespace Microsoft.KernelMemory;
+
+/// <summary>
+/// Kernel Memory builder extensions
+/// </summary>
+public static partial class KernelMemoryBuilderExtensions
+{
+    /// <summary>
+    /// Use multiple memory DBs as a single memory DB, as replicas or shards of the same data.
+    /// To use the same memory DBs also for ingestion, in replicas mode, add them with AddIngestionMemoryDb().
+    /// </summary>
+    /// <param name="builder">Kernel Memory builder</param>
+    /// <param name="memoryDbs">Memory DBs to combine</param>
+    /// <param name="config">Fan out settings</param>
+    public static IKernelMemoryBuilder WithFanOutMemoryDb(
+        this IKernelMemoryBuilder builder,
+        IEnumerable<IMemoryDb> memoryDbs,
+        FanOutMemoryDbConfig? config = null)
+    {
+        builder.Services.AddFanOutAsMemoryDb(memoryDbs, config);
+        return builder;
+    }
+}
+
+/// <summary>
+/// .NET IServiceCollection dependency injection extensions.
+/// </summary>
+public static partial class DependencyInjection
+{
+    public static IServiceCollection AddFanOutAsMemoryDb(
+        this IServiceCollection services,
+        IEnumerable<IMemoryDb> memoryDbs,
+        FanOutMemoryDbConfig? config = null)
+    {
+        return services.AddSingleton<IMemoryDb>(serviceProvider => FanOutMemoryDb.Create(
+            memoryDbs,
+            config,
+            serviceProvider.GetService<ILoggerFactory>()));
+    }
+}
@@ -0,0 +1,50 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+using System.Linq;
+using System.Runtime.CompilerServices;
+using System.Threading;
+using Microsoft.Extensions.Logging;
+
+namespace Microsoft.KernelMemory.MemoryStorage.FanOut;
+
+/// <summary>
+/// Fan out memory DB supporting keyword search, created by <see cref="FanOutMemoryDb.Create"/>
+/// when at least one replica, or all the shards, support keyword search.
+/// Replicas not supporting keyword search are skipped.
+/// </summary>
+internal sealed class FanOutKeywordMemoryDb : FanOutMemoryDb, IMemoryDbKeywordSearch
+{
+    private readonly Member[] _keywordMembers;
+
+    public FanOutKeywordMemoryDb(
+        IEnumerable<IMemoryDb> memoryDbs,
+        FanOutMemoryDbConfig? config = null,
+        ILoggerFactory? loggerFactory = null) : base(memoryDbs, config, loggerFactory)
+    {
+        this._keywordMembers = this.Members.Where(x => x.Db is IMemoryDbKeywordSearch).ToArray();
+    }
+
+    /// <inheritdoc />
+    public async IAsyncEnumerable<(MemoryRecord, double)> GetKeywordMatchesAsync(
+        string index,
+        string text,
+        ICollection<MemoryFilter>? filters = null,
+        int limit = 1,
+        bool withEmbeddings = false,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        IEnumerable<(MemoryRecord, double)> results = await this.ReadMatchesAsync(
+            this._keywordMembers,
+            db => (IMemoryDbKeywordSearch)db,
+            (db, token) => db.GetKeywordMatchesAsync(index, text, filters, limit, withEmbeddings, token),
+            filters,
+            limit,
+            cancellationToken).ConfigureAwait(false);
+
+        foreach ((MemoryRecord, double) result in results)
+        {
+            yield return result;
+        }
+    }
+}
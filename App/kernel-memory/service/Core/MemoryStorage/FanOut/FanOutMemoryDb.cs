@@ -0,0 +1,447 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.Linq;
+using System.Runtime.CompilerServices;
+using System.Runtime.ExceptionServices;
+using System.Text;
+using System.Threading;
+using System.Threading.Tasks;
+using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.Diagnostics;
+
+namespace Microsoft.KernelMemory.MemoryStorage.FanOut;
+
+/// <summary>
+/// Memory DB combining multiple memory DBs, as replicas or as shards of the same data.
+/// With replicas, writes go to all the memory DBs and each read is served by one replica,
+/// rotating across the healthy ones. Reads slower than the recent latency percentile of the
+/// replica are hedged, i.e. sent also to the next replica, using the first response, and
+/// failed reads are retried on the next replica, so latency is bounded by the fastest healthy one.
+/// With shards, records are assigned to a memory DB by document ID, and reads query all the
+/// shards concurrently, merging the top results.
+/// Use <see cref="Create"/> to support also keyword search, when the memory DBs support it.
+/// </summary>
+public class FanOutMemoryDb : IMemoryDb, IMemoryDbUpsertBatch
+{
+    private readonly Member[] _members;
+    private readonly FanOutMemoryDbConfig _config;
+    private readonly ILogger<FanOutMemoryDb> _log;
+
+    // Used to rotate reads across replicas
+    private int _nextReplica = -1;
+
+    /// <summary>
+    /// Create new instance
+    /// </summary>
+    /// <param name="memoryDbs">Memory DBs to combine</param>
+    /// <param name="config">Fan out settings</param>
+    /// <param name="loggerFactory">Application logger factory</param>
+    public FanOutMemoryDb(
+        IEnumerable<IMemoryDb> memoryDbs,
+        FanOutMemoryDbConfig? config = null,
+        ILoggerFactory? loggerFactory = null)
+    {
+        this._config = config ?? new FanOutMemoryDbConfig();
+        this._config.Validate();
+        this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<FanOutMemoryDb>();
+
+        this._members = memoryDbs.Select((db, position) => new Member(db, position, this._config.LatencyWindowSize)).ToArray();
+        if (this._members.Length == 0)
+        {
+            throw new ConfigurationException("Fan out memory DB: at least one memory DB is required");
+        }
+    }
+
+    /// <summary>
+    /// Create new instance, implementing <see cref="IMemoryDbKeywordSearch"/> when the memory DBs
+    /// combined support keyword search, i.e. at least one replica, or all the shards.
+    /// </summary>
+    /// <param name="memoryDbs">Memory DBs to combine</param>
+    /// <param name="config">Fan out settings</param>
+    /// <param name="loggerFactory">Application logger factory</param>
+    public static FanOutMemoryDb Create(
+        IEnumerable<IMemoryDb> memoryDbs,
+        FanOutMemoryDbConfig? config = null,
+        ILoggerFactory? loggerFactory = null)
+    {
+        List<IMemoryDb> list = memoryDbs.ToList();
+        bool keywordSearch = (config?.Mode ?? FanOutMode.Replicas) == FanOutMode.Shards
+            ? list.Count > 0 && list.All(x => x is IMemoryDbKeywordSearch)
+            : list.Any(x => x is IMemoryDbKeywordSearch);
+
+        return keywordSearch
+            ? new FanOutKeywordMemoryDb(list, config, loggerFactory)
+            : new FanOutMemoryDb(list, config, loggerFactory);
+    }
+
+    /// <inheritdoc />
+    public Task CreateIndexAsync(string index, int vectorSize, CancellationToken cancellationToken = default)
+    {
+        return Task.WhenAll(this._members.Select(x => x.Db.CreateIndexAsync(index, vectorSize, cancellationToken)));
+    }
+
+    /// <inheritdoc />
+    public async Task<IEnumerable<string>> GetIndexesAsync(CancellationToken cancellationToken = default)
+    {
+        if (this._config.Mode == FanOutMode.Replicas)
+        {
+            return await this.ReadFromReplicasAsync(
+                this._members, async (db, token) => (await db.GetIndexesAsync(token).ConfigureAwait(false)).ToList(), cancellationToken).ConfigureAwait(false);
+        }
+
+        List<List<string>> results = await this.ReadFromShardsAsync(
+            this._members, async (db, token) => (await db.GetIndexesAsync(token).ConfigureAwait(false)).ToList(), cancellationToken).ConfigureAwait(false);
+
+        return results.SelectMany(x => x).Distinct(StringComparer.Ordinal).ToList();
+    }
+
+    /// <inheritdoc />
+    public Task DeleteIndexAsync(string index, CancellationToken cancellationToken = default)
+    {
+        return Task.WhenAll(this._members.Select(x => x.Db.DeleteIndexAsync(index, cancellationToken)));
+    }
+
+    /// <inheritdoc />
+    public async Task<string> UpsertAsync(string index, MemoryRecord record, CancellationToken cancellationToken = default)
+    {
+        if (this._config.Mode == FanOutMode.Shards)
+        {
+            return await this.GetShard(record).Db.UpsertAsync(index, record, cancellationToken).ConfigureAwait(false);
+        }
+
+        string[] ids = await Task.WhenAll(this._members.Select(x => x.Db.UpsertAsync(index, record, cancellationToken))).ConfigureAwait(false);
+        return ids[0];
+    }
+
+    /// <inheritdoc />
+    public async IAsyncEnumerable<string> UpsertBatchAsync(
+        string index,
+        IEnumerable<MemoryRecord> records,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        List<MemoryRecord> list = records.ToList();
+
+        // Replicas receive all the records, shards only the records of their documents
+        IEnumerable<(Member Member, List<MemoryRecord> Records)> writes = this._config.Mode == FanOutMode.Shards
+            ? list.GroupBy(x => this.GetShard(x)).Select(x => (x.Key, x.ToList()))
+            : this._members.Select(x => (x, list));
+
+        await Task.WhenAll(writes.Select(x => UpsertAllAsync(x.Member.Db, index, x.Records, cancellationToken))).ConfigureAwait(false);
+
+        foreach (MemoryRecord record in list)
+        {
+            yield return record.Id;
+        }
+    }
+
+    /// <inheritdoc />
+    public async IAsyncEnumerable<(MemoryRecord, double)> GetSimilarListAsync(
+        string index,
+        string text,
+        ICollection<MemoryFilter>? filters = null,
+        double minRelevance = 0,
+        int limit = 1,
+        bool withEmbeddings = false,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        IEnumerable<(MemoryRecord, double)> results = await this.ReadMatchesAsync(
+            this._members,
+            db => db,
+            (db, token) => db.GetSimilarListAsync(index, text, filters, minRelevance, limit, withEmbeddings, token),
+            filters,
+            limit,
+            cancellationToken).ConfigureAwait(false);
+
+        foreach ((MemoryRecord, double) result in results)
+        {
+            yield return result;
+        }
+    }
+
+    /// <inheritdoc />
+    public async IAsyncEnumerable<MemoryRecord> GetListAsync(
+        string index,
+        ICollection<MemoryFilter>? filters = null,
+        int limit = 1,
+        bool withEmbeddings = false,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        IEnumerable<MemoryRecord> results;
+        if (this._config.Mode == FanOutMode.Replicas)
+        {
+            results = await this.ReadFromReplicasAsync(
+                this._members,
+                (db, token) => db.GetListAsync(index, filters, limit, withEmbeddings, token).ToListAsync(token).AsTask(),
+                cancellationToken).ConfigureAwait(false);
+        }
+        else
+        {
+            List<List<MemoryRecord>> shardResults = await this.ReadFromShardsAsync(
+                this.GetShards(filters),
+                (db, token) => db.GetListAsync(index, filters, limit, withEmbeddings, token).ToListAsync(token).AsTask(),
+                cancellationToken).ConfigureAwait(false);
+
+            results = shardResults.SelectMany(x => x);
+            if (limit > 0) { results = results.Take(limit); }
+        }
+
+        foreach (MemoryRecord record in results)
+        {
+            yield return record;
+        }
+    }
+
+    /// <inheritdoc />
+    public Task DeleteAsync(string index, MemoryRecord record, CancellationToken cancellationToken = default)
+    {
+        // Records without document ID could be in any shard
+        IEnumerable<Member> members = this._config.Mode == FanOutMode.Shards && TryGetDocumentId(record, out _)
+            ? new[] { this.GetShard(record) }
+            : this._members;
+
+        return Task.WhenAll(members.Select(x => x.Db.DeleteAsync(index, record, cancellationToken)));
+    }
+
+    #region private
+
+    private protected IReadOnlyList<Member> Members => this._members;
+
+    private protected sealed class Member
+    {
+        public IMemoryDb Db { get; }
+        public int Position { get; }
+        public MemoryDbLatencyTracker Latency { get; }
+
+        public Member(IMemoryDb db, int position, int latencyWindowSize)
+        {
+            this.Db = db;
+            this.Position = position;
+            this.Latency = new MemoryDbLatencyTracker(latencyWindowSize);
+        }
+    }
+
+    private protected async Task<IEnumerable<(MemoryRecord, double)>> ReadMatchesAsync<TDb>(
+        IReadOnlyList<Member> members,
+        Func<IMemoryDb, TDb> getDb,
+        Func<TDb, CancellationToken, IAsyncEnumerable<(MemoryRecord, double)>> search,
+        ICollection<MemoryFilter>? filters,
+        int limit,
+        CancellationToken cancellationToken)
+    {
+        if (this._config.Mode == FanOutMode.Replicas)
+        {
+            return await this.ReadFromReplicasAsync(
+                members, (db, token) => search(getDb(db), token).ToListAsync(token).AsTask(), cancellationToken).ConfigureAwait(false);
+        }
+
+        List<List<(MemoryRecord, double)>> shardResults = await this.ReadFromShardsAsync(
+            this.GetShards(filters), (db, token) => search(getDb(db), token).ToListAsync(token).AsTask(), cancellationToken).ConfigureAwait(false);
+
+        // Each shard returns its top results, the top results overall are among them
+        IEnumerable<(MemoryRecord, double)> results = shardResults
+            .SelectMany(x => x)
+            .OrderByDescending(x => x.Item2)
+            .DistinctBy(x => x.Item1.Id);
+
+        return limit > 0 ? results.Take(limit) : results;
+    }
+
+    /// <summary>
+    /// Read from one replica at a time, in order of preference. When the current replica fails
+    /// the read moves immediately to the next one, and when the replica takes longer than its
+    /// usual latency percentile, the read is sent also to the next one, without canceling it.
+    /// The first successful response is returned, and the other reads are canceled.
+    /// </summary>
+    private async Task<T> ReadFromReplicasAsync<T>(
+        IReadOnlyList<Member> members,
+        Func<IMemoryDb, CancellationToken, Task<T>> read,
+        CancellationToken cancellationToken)
+    {
+        Member[] replicas = this.SortReplicas(members);
+
+        using var readSource = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+        var pending = new Dictionary<Task<T>, Member>();
+        Task? hedgingTimer = null;
+        Exception? lastError = null;
+        int next = 0;
+
+        void StartNext()
+        {
+            Member replica = replicas[next++];
+            pending.Add(this.TimeReadAsync(replica, read, readSource.Token), replica);
+            hedgingTimer = this._config.UseHedging && next < replicas.Length
+                ? Task.Delay(this.GetHedgingDelay(replica), readSource.Token)
+                : null;
+        }
+
+        StartNext();
+        while (pending.Count > 0)
+        {
+            var tasks = new List<Task>(pending.Keys);
+            if (hedgingTimer != null) { tasks.Add(hedgingTimer); }
+
+            Task completed = await Task.WhenAny(tasks).ConfigureAwait(false);
+            cancellationToken.ThrowIfCancellationRequested();
+
+            if (completed == hedgingTimer)
+            {
+                this._log.LogDebug("Memory DB read is slow, hedging to replica {0}", replicas[next].Position);
+                StartNext();
+                continue;
+            }
+
+            var readTask = (Task<T>)completed;
+            Member member = pending[readTask];
+            pending.Remove(readTask);
+
+            if (readTask.IsCompletedSuccessfully)
+            {
+                // Cancel the other reads still running
+                readSource.Cancel();
+                return readTask.Result;
+            }
+
+            lastError = readTask.Exception?.InnerException ?? new OperationCanceledException();
+            if (next < replicas.Length)
+            {
+                this._log.LogWarning(lastError, "Memory DB read failed on replica {0}, failing over to replica {1}", member.Position, replicas[next].Position);
+                StartNext();
+            }
+        }
+
+        // All replicas failed, rethrow the last error preserving its stack trace
+        ExceptionDispatchInfo.Throw(lastError!);
+        return default!;
+    }
+
+    /// <summary>
+    /// Read from all the given shards concurrently. Shard failures fail the read, unless
+    /// partial results are allowed and at least one shard responds.
+    /// </summary>
+    private async Task<List<T>> ReadFromShardsAsync<T>(
+        IReadOnlyList<Member> shards,
+        Func<IMemoryDb, CancellationToken, Task<T>> read,
+        CancellationToken cancellationToken)
+    {
+        Task<T>[] reads = shards.Select(x => this.TimeReadAsync(x, read, cancellationToken)).ToArray();
+        try
+        {
+            await Task.WhenAll(reads).ConfigureAwait(false);
+        }
+        catch (Exception e) when (this._config.AllowPartialResults && e is not OperationCanceledException
+                                  && reads.Any(x => x.IsCompletedSuccessfully))
+        {
+            this._log.LogWarning(e, "Memory DB read failed on {0} of {1} shards, using partial results",
+                reads.Count(x => !x.IsCompletedSuccessfully), reads.Length);
+        }
+
+        return reads.Where(x => x.IsCompletedSuccessfully).Select(x => x.Result).ToList();
+    }
+
+    private async Task<T> TimeReadAsync<T>(Member member, Func<IMemoryDb, CancellationToken, Task<T>> read, CancellationToken cancellationToken)
+    {
+        long start = Stopwatch.GetTimestamp();
+        try
+        {
+            T result = await read(member.Db, cancellationToken).ConfigureAwait(false);
+            member.Latency.AddSuccess(Stopwatch.GetElapsedTime(start).TotalMilliseconds);
+            return result;
+        }
+        catch (Exception e) when (e is not OperationCanceledException and not IndexNotFoundException)
+        {
+            member.Latency.AddFailure();
+            throw;
+        }
+    }
+
+    /// <summary>
+    /// Order replicas by preference: a healthy replica in rotation first, to spread the load,
+    /// then the other healthy replicas from the fastest, and last the replicas failing recently.
+    /// </summary>
+    private Member[] SortReplicas(IReadOnlyList<Member> members)
+    {
+        List<Member> healthy = members.Where(x => !x.Latency.FailedWithin(this._config.FailureCooldown)).ToList();
+        IEnumerable<Member> failing = members.Where(x => !healthy.Contains(x));
+        if (healthy.Count == 0) { return failing.ToArray(); }
+
+        Member first = healthy[(int)((uint)Interlocked.Increment(ref this._nextReplica) % healthy.Count)];
+        return healthy
+            .Where(x => x != first)
+            .OrderBy(x => x.Latency.GetPercentile(0.5) ?? TimeSpan.Zero)
+            .Prepend(first)
+            .Concat(failing)
+            .ToArray();
+    }
+
+    private TimeSpan GetHedgingDelay(Member replica)
+    {
+        TimeSpan delay = replica.Latency.GetPercentile(this._config.HedgingPercentile) ?? this._config.InitialHedgingDelay;
+        return delay < this._config.MinHedgingDelay ? this._config.MinHedgingDelay : delay;
+    }
+
+    /// <summary>
+    /// Shards containing the records matching the filters. When each filter selects a document,
+    /// only the shards of those documents are queried, otherwise all shards.
+    /// </summary>
+    private List<Member> GetShards(ICollection<MemoryFilter>? filters)
+    {
+        if (filters == null || filters.Count == 0) { return this._members.ToList(); }
+
+        var shards = new HashSet<Member>();
+        foreach (MemoryFilter filter in filters)
+        {
+            if (!filter.TryGetValue(Constants.ReservedDocumentIdTag, out List<string?>? values)
+                || values.Count == 0 || values[0] == null)
+            {
+                return this._members.ToList();
+            }
+
+            shards.Add(this.GetShard(values[0]!));
+        }
+
+        return shards.ToList();
+    }
+
+    private Member GetShard(MemoryRecord record)
+    {
+        // Records without document ID are assigned by record ID
+        return this.GetShard(TryGetDocumentId(record, out string documentId) ? documentId : record.Id);
+    }
+
+    private Member GetShard(string key)
+    {
+        // FNV-1a, stable across processes, unlike string.GetHashCode()
+        uint hash = 2166136261;
+        foreach (byte b in Encoding.UTF8.GetBytes(key))
+        {
+            hash = (hash ^ b) * 16777619;
+        }
+
+        return this._members[hash % (uint)this._members.Length];
+    }
+
+    private static bool TryGetDocumentId(MemoryRecord record, out string documentId)
+    {
+        documentId = record.GetDocumentId();
+        return !string.IsNullOrEmpty(documentId);
+    }
+
+    private static async Task UpsertAllAsync(IMemoryDb db, string index, List<MemoryRecord> records, CancellationToken cancellationToken)
+    {
+        if (db is IMemoryDbUpsertBatch batchDb)
+        {
+            await batchDb.UpsertBatchAsync(index, records, cancellationToken).ToListAsync(cancellationToken).ConfigureAwait(false);
+            return;
+        }
+
+        foreach (MemoryRecord record in records)
+        {
+            await db.UpsertAsync(index, record, cancellationToken).ConfigureAwait(false);
+        }
+    }
+
+    #endregion
+}
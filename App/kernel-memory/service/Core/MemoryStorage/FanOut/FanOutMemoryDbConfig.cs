@@ -0,0 +1,100 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+
+namespace Microsoft.KernelMemory.MemoryStorage.FanOut;
+
+/// <summary>
+/// Settings of <see cref="FanOutMemoryDb"/>.
+/// </summary>
+public class FanOutMemoryDbConfig
+{
+    /// <summary>
+    /// Whether the memory DBs are replicas of the same data, or shards of it.
+    /// </summary>
+    public FanOutMode Mode { get; set; } = FanOutMode.Replicas;
+
+    /// <summary>
+    /// Memory DBs to combine, e.g. ["AzureAISearch", "Qdrant"], used only when configuring
+    /// the service. When empty, the service uses the memory DBs of the ingestion pipeline,
+    /// i.e. the list of DataIngestion.MemoryDbTypes.
+    /// </summary>
+    public List<string> MemoryDbTypes { get; set; } = new();
+
+    /// <summary>
+    /// Replicas mode: whether to send a read to another replica when the current one
+    /// is slower than usual, using the first response received.
+    /// </summary>
+    public bool UseHedging { get; set; } = true;
+
+    /// <summary>
+    /// Replicas mode: percentile of the recent latency of a replica after which
+    /// a read is hedged, e.g. 0.95 to hedge the 5% slowest reads.
+    /// </summary>
+    public double HedgingPercentile { get; set; } = 0.95;
+
+    /// <summary>
+    /// Replicas mode: min time to wait before hedging a read, to avoid duplicating
+    /// reads that are already fast.
+    /// </summary>
+    public TimeSpan MinHedgingDelay { get; set; } = TimeSpan.FromMilliseconds(20);
+
+    /// <summary>
+    /// Replicas mode: time to wait before hedging a read, until enough latency
+    /// measurements are available for a replica.
+    /// </summary>
+    public TimeSpan InitialHedgingDelay { get; set; } = TimeSpan.FromMilliseconds(500);
+
+    /// <summary>
+    /// Number of recent reads used to measure the latency of each memory DB.
+    /// </summary>
+    public int LatencyWindowSize { get; set; } = 200;
+
+    /// <summary>
+    /// Replicas mode: how long a replica is used only as a last resort, after a failure.
+    /// </summary>
+    public TimeSpan FailureCooldown { get; set; } = TimeSpan.FromSeconds(30);
+
+    /// <summary>
+    /// Shards mode: whether to return the results of the available shards when some
+    /// shards fail. By default reads fail, rather than returning incomplete results.
+    /// </summary>
+    public bool AllowPartialResults { get; set; } = false;
+
+    /// <summary>
+    /// Verify that the current state is valid.
+    /// </summary>
+    public void Validate()
+    {
+        if (this.HedgingPercentile is <= 0 or > 1)
+        {
+            throw new ConfigurationException($"Fan out memory DB: {nameof(this.HedgingPercentile)} must be greater than 0 and not greater than 1");
+        }
+
+        if (this.MinHedgingDelay < TimeSpan.Zero)
+        {
+            throw new ConfigurationException($"Fan out memory DB: {nameof(this.MinHedgingDelay)} cannot be negative");
+        }
+
+        if (this.InitialHedgingDelay < TimeSpan.Zero)
+        {
+            throw new ConfigurationException($"Fan out memory DB: {nameof(this.InitialHedgingDelay)} cannot be negative");
+        }
+
+        if (this.LatencyWindowSize < 1)
+        {
+            throw new ConfigurationException($"Fan out memory DB: {nameof(this.LatencyWindowSize)} cannot be less than 1");
+        }
+
+        if (this.FailureCooldown < TimeSpan.Zero)
+        {
+            throw new ConfigurationException($"Fan out memory DB: {nameof(this.FailureCooldown)} cannot be negative");
+        }
+
+        if (this.MemoryDbTypes.Exists(x => x.Equals("FanOut", StringComparison.OrdinalIgnoreCase)))
+        {
+            throw new ConfigurationException($"Fan out memory DB: {nameof(this.MemoryDbTypes)} cannot contain another fan out memory DB");
+        }
+    }
+}
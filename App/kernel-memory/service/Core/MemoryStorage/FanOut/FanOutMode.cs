@@ -0,0 +1,22 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+namespace Microsoft.KernelMemory.MemoryStorage.FanOut;
+
+/// <summary>
+/// How records are distributed across the memory DBs combined by <see cref="FanOutMemoryDb"/>.
+/// </summary>
+public enum FanOutMode
+{
+    /// <summary>
+    /// Each memory DB contains all the records. Writes go to all the memory DBs,
+    /// reads are served by one memory DB, failing over and hedging to the others.
+    /// </summary>
+    Replicas,
+
+    /// <summary>
+    /// Each memory DB contains a subset of the records, assigned by document ID.
+    /// Writes go to the memory DB owning the document, reads query all the memory DBs
+    /// concurrently and merge the results.
+    /// </summary>
+    Shards,
+}
@@ -0,0 +1,79 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Diagnostics;
+
+namespace Microsoft.KernelMemory.MemoryStorage.FanOut;
+
+/// <summary>
+/// Latency and health of a memory DB, measured over a window of recent reads.
+/// </summary>
+internal sealed class MemoryDbLatencyTracker
+{
+    // Measurements required before using the latency percentiles
+    private const int MinSamples = 20;
+
+    private readonly double[] _samples;
+    private readonly object _lock = new();
+    private int _count;
+    private int _next;
+    private long _lastFailure = long.MinValue;
+
+    public MemoryDbLatencyTracker(int windowSize)
+    {
+        this._samples = new double[windowSize];
+    }
+
+    /// <summary>
+    /// Record the duration of a successful read, in milliseconds.
+    /// </summary>
+    public void AddSuccess(double milliseconds)
+    {
+        lock (this._lock)
+        {
+            this._samples[this._next] = milliseconds;
+            this._next = (this._next + 1) % this._samples.Length;
+            if (this._count < this._samples.Length) { this._count++; }
+        }
+    }
+
+    /// <summary>
+    /// Record a failure, so the memory DB is avoided for a while.
+    /// </summary>
+    public void AddFailure()
+    {
+        lock (this._lock)
+        {
+            this._lastFailure = Stopwatch.GetTimestamp();
+        }
+    }
+
+    /// <summary>
+    /// Whether the memory DB failed within the given time.
+    /// </summary>
+    public bool FailedWithin(TimeSpan time)
+    {
+        lock (this._lock)
+        {
+            return this._lastFailure != long.MinValue && Stopwatch.GetElapsedTime(this._lastFailure) < time;
+        }
+    }
+
+    /// <summary>
+    /// Latency percentile, e.g. 0.95 for p95, or null when there are not enough measurements.
+    /// </summary>
+    public TimeSpan? GetPercentile(double percentile)
+    {
+        double[] samples;
+        lock (this._lock)
+        {
+            if (this._count < Math.Min(MinSamples, this._samples.Length)) { return null; }
+
+            samples = this._samples.AsSpan(0, this._count).ToArray();
+        }
+
+        Array.Sort(samples);
+        int position = Math.Clamp((int)Math.Ceiling(percentile * samples.Length) - 1, 0, samples.Length - 1);
+        return TimeSpan.FromMilliseconds(samples[position]);
+    }
+}
@@ -3,6 +3,7 @@
 using System;
 using System.Collections.Generic;
 using System.Diagnostics.CodeAnalysis;
+using System.Globalization;
 using System.Linq;
 using Microsoft.Extensions.Logging;
 
@@ -98,6 +99,17 @@ public static class MemoryRecordExtensions
         return record.GetPayloadValue(Constants.ReservedPayloadTextField, log)?.ToString() ?? string.Empty;
     }
 
+    /// <summary>
+    /// Get the number of tokens of the partition text, counted during the import,
+    /// or zero if not available, e.g. for records imported by older versions.
+    /// </summary>
+    public static int GetPartitionTokenCount(this MemoryRecord record)
+    {
+        if (!record.Payload.TryGetValue(Constants.ReservedPayloadTokenCountField, out object? value)) { return 0; }
+
+        return int.TryParse(value?.ToString(), NumberStyles.Integer, CultureInfo.InvariantCulture, out int number) ? number : 0;
+    }
+
     /// <summary>
     /// Get file name
     /// </summary>
@@ -31,6 +31,7 @@ public abstract class BaseOrchestrator : IPipelineOrchestrator, IDisposable
     private readonly IDocumentStorage _documentStorage;
     private readonly IMimeTypeDetection _mimeTypeDetection;
     private readonly string? _defaultIndexName;
+    private readonly IPipelineEventBus? _eventBus;
 
     protected ILogger<BaseOrchestrator> Log { get; private set; }
     protected CancellationTokenSource CancellationTokenSource { get; private set; }
@@ -42,7 +43,8 @@ public abstract class BaseOrchestrator : IPipelineOrchestrator, IDisposable
         ITextGenerator textGenerator,
         IMimeTypeDetection? mimeTypeDetection = null,
         KernelMemoryConfig? config = null,
-        ILogger<BaseOrchestrator>? log = null)
+        ILogger<BaseOrchestrator>? log = null,
+        IPipelineEventBus? eventBus = null)
     {
         config ??= new KernelMemoryConfig();
 
@@ -54,6 +56,7 @@ public abstract class BaseOrchestrator : IPipelineOrchestrator, IDisposable
         this._memoryDbs = memoryDbs;
         this._textGenerator = textGenerator;
         this._defaultIndexName = config?.DefaultIndexName;
+        this._eventBus = eventBus;
 
         this._mimeTypeDetection = mimeTypeDetection ?? new MimeTypesDetection();
         this.CancellationTokenSource = new CancellationTokenSource();
@@ -444,6 +447,32 @@ public abstract class BaseOrchestrator : IPipelineOrchestrator, IDisposable
             this.Log.LogWarning(e, "Unable to save pipeline status");
             throw;
         }
+
+        await this.PublishPipelineEventAsync(pipeline, cancellationToken).ConfigureAwait(false);
+    }
+
+    /// <summary>
+    /// Notify the pipeline progress, after the status has been persisted, so that
+    /// clients receiving the event always find a consistent state in storage.
+    /// Failures are logged and ignored, clients can always fall back to reading the status.
+    /// </summary>
+    /// <param name="pipeline">Pipeline data</param>
+    /// <param name="cancellationToken">Task cancellation token</param>
+    protected async Task PublishPipelineEventAsync(DataPipeline pipeline, CancellationToken cancellationToken)
+    {
+        // Nothing to report before the first step completes, e.g. right after uploading files
+        if (this._eventBus == null || (pipeline.CompletedSteps.Count == 0 && !pipeline.Complete)) { return; }
+
+#pragma warning disable CA1031 // notifications are best effort
+        try
+        {
+            await this._eventBus.PublishAsync(new PipelineEvent(pipeline), cancellationToken).ConfigureAwait(false);
+        }
+        catch (Exception e)
+        {
+            this.Log.LogWarning(e, "Unable to publish pipeline event for '{0}/{1}'", pipeline.Index, pipeline.DocumentId);
+        }
+#pragma warning restore CA1031
     }
 
     protected static string ToJson(object data, bool indented = false)
@@ -0,0 +1,40 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using Microsoft.Extensions.DependencyInjection;
+using Microsoft.KernelMemory.Pipeline;
+
+// ReSharper disable once CheckNamespace - reduce number of "using" statements
+namespace Microsoft.KernelMemory;
+
+/// <summary>
+/// Kernel Memory builder extensions
+/// </summary>
+public static partial class KernelMemoryBuilderExtensions
+{
+    /// <summary>
+    /// Reuse the artifacts generated by the ingestion handlers for the same content, e.g. when
+    /// uploading again the same documents, instead of extracting, summarizing and embedding it again.
+    /// </summary>
+    /// <param name="builder">Kernel Memory builder</param>
+    /// <param name="config">Cache settings</param>
+    public static IKernelMemoryBuilder WithPipelineArtifactCache(this IKernelMemoryBuilder builder, PipelineArtifactCacheConfig? config = null)
+    {
+        builder.Services.AddPipelineArtifactCache(config);
+        return builder;
+    }
+}
+
+/// <summary>
+/// .NET IServiceCollection dependency injection extensions.
+/// </summary>
+public static partial class DependencyInjection
+{
+    public static IServiceCollection AddPipelineArtifactCache(this IServiceCollection services, PipelineArtifactCacheConfig? config = null)
+    {
+        config ??= new PipelineArtifactCacheConfig();
+        config.Validate();
+        return services
+            .AddSingleton<PipelineArtifactCacheConfig>(config)
+            .AddSingleton<PipelineArtifactCache, PipelineArtifactCache>();
+    }
+}
@@ -43,6 +43,7 @@ public sealed class DistributedPipelineOrchestrator : BaseOrchestrator
     /// <param name="mimeTypeDetection">Service used to detect a file type</param>
     /// <param name="config">Global KM configuration</param>
     /// <param name="loggerFactory">Application logger factory</param>
+    /// <param name="eventBus">Optional channel used to notify pipeline progress</param>
     public DistributedPipelineOrchestrator(
         QueueClientFactory queueClientFactory,
         IDocumentStorage documentStorage,
@@ -51,8 +52,9 @@ public sealed class DistributedPipelineOrchestrator : BaseOrchestrator
         ITextGenerator textGenerator,
         IMimeTypeDetection? mimeTypeDetection = null,
         KernelMemoryConfig? config = null,
-        ILoggerFactory? loggerFactory = null)
-        : base(documentStorage, embeddingGenerators, memoryDbs, textGenerator, mimeTypeDetection, config, loggerFactory?.CreateLogger<DistributedPipelineOrchestrator>())
+        ILoggerFactory? loggerFactory = null,
+        IPipelineEventBus? eventBus = null)
+        : base(documentStorage, embeddingGenerators, memoryDbs, textGenerator, mimeTypeDetection, config, loggerFactory?.CreateLogger<DistributedPipelineOrchestrator>(), eventBus)
     {
         this._queueClientFactory = queueClientFactory;
     }
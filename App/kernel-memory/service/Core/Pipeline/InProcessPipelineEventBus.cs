@@ -0,0 +1,153 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Threading;
+using System.Threading.Tasks;
+using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.Diagnostics;
+
+namespace Microsoft.KernelMemory.Pipeline;
+
+/// <summary>
+/// Pipeline event bus delivering notifications within the current process,
+/// e.g. from the handlers hosted by the service to the web endpoints of the same service.
+/// </summary>
+public sealed class InProcessPipelineEventBus : IPipelineEventBus
+{
+    private readonly object _lock = new();
+    private readonly List<Action<PipelineEvent>> _subscribers = new();
+    private readonly Dictionary<string, List<TaskCompletionSource<PipelineEvent>>> _waiters = new(StringComparer.Ordinal);
+    private readonly ILogger<InProcessPipelineEventBus> _log;
+
+    public InProcessPipelineEventBus(ILoggerFactory? loggerFactory = null)
+    {
+        this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<InProcessPipelineEventBus>();
+    }
+
+    ///<inheritdoc />
+    public Task PublishAsync(PipelineEvent pipelineEvent, CancellationToken cancellationToken = default)
+    {
+        ArgumentNullExceptionEx.ThrowIfNull(pipelineEvent, nameof(pipelineEvent), "The pipeline event is NULL");
+
+        Action<PipelineEvent>[] subscribers;
+        List<TaskCompletionSource<PipelineEvent>>? waiters = null;
+        lock (this._lock)
+        {
+            subscribers = this._subscribers.ToArray();
+            if (pipelineEvent.Type == PipelineEventTypes.PipelineCompleted)
+            {
+                var key = GetKey(pipelineEvent.Index, pipelineEvent.DocumentId);
+                if (this._waiters.Remove(key, out waiters))
+                {
+                    this._log.LogTrace("Pipeline '{0}' complete, releasing {1} waiters", key, waiters.Count);
+                }
+            }
+        }
+
+        if (waiters != null)
+        {
+            foreach (var waiter in waiters) { waiter.TrySetResult(pipelineEvent); }
+        }
+
+        foreach (var subscriber in subscribers)
+        {
+#pragma warning disable CA1031 // a faulty subscriber must not affect the pipeline
+            try
+            {
+                subscriber(pipelineEvent);
+            }
+            catch (Exception e)
+            {
+                this._log.LogWarning(e, "Pipeline event subscriber failed");
+            }
+#pragma warning restore CA1031
+        }
+
+        return Task.CompletedTask;
+    }
+
+    ///<inheritdoc />
+    public IDisposable Subscribe(Action<PipelineEvent> handler)
+    {
+        ArgumentNullExceptionEx.ThrowIfNull(handler, nameof(handler), "The event handler is NULL");
+
+        lock (this._lock) { this._subscribers.Add(handler); }
+
+        return new Subscription(this, handler);
+    }
+
+    ///<inheritdoc />
+    public Task<PipelineEvent> WaitForCompletionAsync(string index, string documentId, CancellationToken cancellationToken = default)
+    {
+        var key = GetKey(index, documentId);
+        var waiter = new TaskCompletionSource<PipelineEvent>(TaskCreationOptions.RunContinuationsAsynchronously);
+
+        lock (this._lock)
+        {
+            if (!this._waiters.TryGetValue(key, out var list))
+            {
+                list = new List<TaskCompletionSource<PipelineEvent>>();
+                this._waiters[key] = list;
+            }
+
+            list.Add(waiter);
+        }
+
+        if (!cancellationToken.CanBeCanceled) { return waiter.Task; }
+
+        CancellationTokenRegistration registration = cancellationToken.Register(() =>
+        {
+            lock (this._lock)
+            {
+                if (this._waiters.TryGetValue(key, out var list) && list.Remove(waiter) && list.Count == 0)
+                {
+                    this._waiters.Remove(key);
+                }
+            }
+
+            waiter.TrySetCanceled(cancellationToken);
+        });
+
+        return WaitAndUnregisterAsync(waiter.Task, registration);
+    }
+
+    private static async Task<PipelineEvent> WaitAndUnregisterAsync(Task<PipelineEvent> task, CancellationTokenRegistration registration)
+    {
+        try
+        {
+            return await task.ConfigureAwait(false);
+        }
+        finally
+        {
+            await registration.DisposeAsync().ConfigureAwait(false);
+        }
+    }
+
+    private void Unsubscribe(Action<PipelineEvent> handler)
+    {
+        lock (this._lock) { this._subscribers.Remove(handler); }
+    }
+
+    private static string GetKey(string index, string documentId)
+    {
+        return $"{index}/{documentId}";
+    }
+
+    private sealed class Subscription : IDisposable
+    {
+        private InProcessPipelineEventBus? _bus;
+        private readonly Action<PipelineEvent> _handler;
+
+        public Subscription(InProcessPipelineEventBus bus, Action<PipelineEvent> handler)
+        {
+            this._bus = bus;
+            this._handler = handler;
+        }
+
+        public void Dispose()
+        {
+            Interlocked.Exchange(ref this._bus, null)?.Unsubscribe(this._handler);
+        }
+    }
+}
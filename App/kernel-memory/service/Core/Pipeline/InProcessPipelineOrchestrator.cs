@@ -34,6 +34,7 @@ public sealed class InProcessPipelineOrchestrator : BaseOrchestrator
     /// <param name="serviceProvider">Optional service provider to add handlers by type</param>
     /// <param name="config">Global KM configuration</param>
     /// <param name="loggerFactory">Application logger factory</param>
+    /// <param name="eventBus">Optional channel used to notify pipeline progress</param>
     public InProcessPipelineOrchestrator(
         IDocumentStorage documentStorage,
         List<ITextEmbeddingGenerator> embeddingGenerators,
@@ -42,8 +43,9 @@ public sealed class InProcessPipelineOrchestrator : BaseOrchestrator
         IMimeTypeDetection? mimeTypeDetection = null,
         IServiceProvider? serviceProvider = null,
         KernelMemoryConfig? config = null,
-        ILoggerFactory? loggerFactory = null)
-        : base(documentStorage, embeddingGenerators, memoryDbs, textGenerator, mimeTypeDetection, config, loggerFactory?.CreateLogger<InProcessPipelineOrchestrator>())
+        ILoggerFactory? loggerFactory = null,
+        IPipelineEventBus? eventBus = null)
+        : base(documentStorage, embeddingGenerators, memoryDbs, textGenerator, mimeTypeDetection, config, loggerFactory?.CreateLogger<InProcessPipelineOrchestrator>(), eventBus)
     {
         this._serviceProvider = serviceProvider;
     }
@@ -0,0 +1,177 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Buffers.Binary;
+using System.Security.Cryptography;
+using System.Text;
+using System.Threading;
+using System.Threading.Tasks;
+using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.Diagnostics;
+using Microsoft.KernelMemory.DocumentStorage;
+
+namespace Microsoft.KernelMemory.Pipeline;
+
+/// <summary>
+/// Content addressed cache of the artifacts generated by the ingestion handlers, e.g. extracted
+/// text, summaries and embeddings, so the same content is not processed twice, e.g. when uploading
+/// again the same documents. Artifacts are keyed by the SHA-256 hash of the content processed,
+/// and by a fingerprint of the settings of the pipeline step, e.g. the prompt used, so that changing
+/// the settings doesn't reuse artifacts generated differently. Artifacts are saved in the document
+/// storage, under a dedicated index, and shared by all the service instances. Artifacts expire
+/// after the configured time to live, and the artifacts of a content are removed when an expired
+/// one is found.
+/// The cache is best effort: storage errors are logged, and handlers process the content as usual.
+/// </summary>
+public sealed class PipelineArtifactCache
+{
+    // Version 2: artifacts start with their expiration time (Unix ms)
+    private const string FormatVersion = "2";
+
+    private const int HeaderSize = sizeof(long);
+
+    // Storages detect the file type from the extension and reject unknown types.
+    // Artifacts are opaque to the storage, so they all share the same extension.
+    private const string FileExtension = FileExtensions.Json;
+
+    private readonly IDocumentStorage _documentStorage;
+    private readonly PipelineArtifactCacheConfig _config;
+    private readonly ILogger<PipelineArtifactCache> _log;
+
+    /// <summary>
+    /// Create new instance
+    /// </summary>
+    /// <param name="documentStorage">Storage where artifacts are saved</param>
+    /// <param name="config">Cache settings</param>
+    /// <param name="loggerFactory">Application logger factory</param>
+    public PipelineArtifactCache(
+        IDocumentStorage documentStorage,
+        PipelineArtifactCacheConfig? config = null,
+        ILoggerFactory? loggerFactory = null)
+    {
+        this._documentStorage = documentStorage;
+        this._config = config ?? new PipelineArtifactCacheConfig();
+        this._config.Validate();
+        this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<PipelineArtifactCache>();
+    }
+
+    /// <summary>
+    /// SHA-256 hash of the content, used to identify it.
+    /// </summary>
+    public static string GetContentHash(BinaryData content)
+    {
+        return Convert.ToHexString(SHA256.HashData(content.ToMemory().Span)).ToLowerInvariant();
+    }
+
+    /// <summary>
+    /// SHA-256 hash of the content, used to identify it.
+    /// </summary>
+    public static string GetContentHash(string content)
+    {
+        return Convert.ToHexString(SHA256.HashData(Encoding.UTF8.GetBytes(content))).ToLowerInvariant();
+    }
+
+    /// <summary>
+    /// Fingerprint of the settings affecting the output of a pipeline step, e.g. model and prompt.
+    /// </summary>
+    public static string GetFingerprint(params string?[] settings)
+    {
+        return GetContentHash(string.Join('\n', settings))[..16];
+    }
+
+    /// <summary>
+    /// Get an artifact generated for the given content, if available.
+    /// </summary>
+    /// <param name="step">Name of the pipeline step generating the artifact</param>
+    /// <param name="contentHash">Hash of the content processed, see <see cref="GetContentHash(BinaryData)"/></param>
+    /// <param name="fingerprint">Settings of the pipeline step, see <see cref="GetFingerprint"/></param>
+    /// <param name="artifactName">Name of the artifact, when a step generates multiple artifacts</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    /// <returns>Artifact content, or null if not available</returns>
+    public async Task<BinaryData?> GetAsync(
+        string step, string contentHash, string fingerprint, string artifactName, CancellationToken cancellationToken = default)
+    {
+        string fileName = this.GetFileName(step, fingerprint, artifactName);
+        try
+        {
+            using StreamableFileContent file = await this._documentStorage.ReadFileAsync(
+                this._config.Index, contentHash, fileName, logErrIfNotFound: false, cancellationToken).ConfigureAwait(false);
+            BinaryData data = await BinaryData.FromStreamAsync(await file.GetStreamAsync().ConfigureAwait(false), cancellationToken).ConfigureAwait(false);
+            if (data.ToMemory().Length < HeaderSize)
+            {
+                this._log.LogWarning("Invalid {0} artifact '{1}' of content {2}, the artifact will be replaced", step, artifactName, contentHash);
+                return null;
+            }
+
+            var expiration = DateTimeOffset.FromUnixTimeMilliseconds(BinaryPrimitives.ReadInt64LittleEndian(data.ToMemory().Span));
+            if (expiration <= DateTimeOffset.UtcNow)
+            {
+                this._log.LogDebug("The {0} artifact '{1}' of content {2} expired, removing the artifacts of the content", step, artifactName, contentHash);
+                await this.DeleteAsync(contentHash, cancellationToken).ConfigureAwait(false);
+                return null;
+            }
+
+            this._log.LogDebug("Reusing {0} artifact '{1}' of content {2}", step, artifactName, contentHash);
+            return BinaryData.FromBytes(data.ToMemory()[HeaderSize..]);
+        }
+        catch (DocumentStorageFileNotFoundException)
+        {
+            return null;
+        }
+        catch (Exception e) when (e is not OperationCanceledException)
+        {
+            this._log.LogWarning(e, "Unable to read {0} artifact '{1}' of content {2}", step, artifactName, contentHash);
+            return null;
+        }
+    }
+
+    /// <summary>
+    /// Save an artifact generated for the given content.
+    /// </summary>
+    /// <param name="step">Name of the pipeline step generating the artifact</param>
+    /// <param name="contentHash">Hash of the content processed, see <see cref="GetContentHash(BinaryData)"/></param>
+    /// <param name="fingerprint">Settings of the pipeline step, see <see cref="GetFingerprint"/></param>
+    /// <param name="artifactName">Name of the artifact, when a step generates multiple artifacts</param>
+    /// <param name="content">Artifact content</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    public async Task SetAsync(
+        string step, string contentHash, string fingerprint, string artifactName, BinaryData content, CancellationToken cancellationToken = default)
+    {
+        string fileName = this.GetFileName(step, fingerprint, artifactName);
+        ReadOnlyMemory<byte> bytes = content.ToMemory();
+        var data = new byte[HeaderSize + bytes.Length];
+        BinaryPrimitives.WriteInt64LittleEndian(data, (DateTimeOffset.UtcNow + this._config.TimeToLive).ToUnixTimeMilliseconds());
+        bytes.CopyTo(data.AsMemory(HeaderSize));
+
+        try
+        {
+            await this._documentStorage.WriteFileAsync(this._config.Index, contentHash, fileName, BinaryData.FromBytes(data).ToStream(), cancellationToken).ConfigureAwait(false);
+        }
+        catch (Exception e) when (e is not OperationCanceledException)
+        {
+            this._log.LogWarning(e, "Unable to save {0} artifact '{1}' of content {2}", step, artifactName, contentHash);
+        }
+    }
+
+    #region private
+
+    private async Task DeleteAsync(string contentHash, CancellationToken cancellationToken)
+    {
+        // The storage doesn't allow to delete single files, the artifacts of the same content are generated together
+        try
+        {
+            await this._documentStorage.DeleteDocumentDirectoryAsync(this._config.Index, contentHash, cancellationToken).ConfigureAwait(false);
+        }
+        catch (Exception e) when (e is not OperationCanceledException)
+        {
+            this._log.LogWarning(e, "Unable to remove the expired artifacts of content {0}", contentHash);
+        }
+    }
+
+    private string GetFileName(string step, string fingerprint, string artifactName)
+    {
+        return $"{step}.{this._config.Version}.{FormatVersion}.{fingerprint}.{artifactName}{FileExtension}";
+    }
+
+    #endregion
+}
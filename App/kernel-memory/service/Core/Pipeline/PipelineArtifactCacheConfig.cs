@@ -0,0 +1,54 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+
+namespace Microsoft.KernelMemory.Pipeline;
+
+/// <summary>
+/// Settings of the cache of the artifacts generated by the ingestion pipeline.
+/// </summary>
+public class PipelineArtifactCacheConfig
+{
+    /// <summary>
+    /// Whether the ingestion handlers should reuse the artifacts generated for the same content,
+    /// e.g. when uploading again a document. When using KernelMemoryBuilder, the cache is enabled
+    /// by WithPipelineArtifactCache().
+    /// </summary>
+    public bool Enabled { get; set; } = false;
+
+    /// <summary>
+    /// Name of the document storage index where artifacts are stored.
+    /// </summary>
+    public string Index { get; set; } = "km-pipeline-cache";
+
+    /// <summary>
+    /// Value included in the key of all the artifacts. Handlers can't always detect which
+    /// model is in use, so change the value after changing models or deployments, to stop
+    /// reusing artifacts generated by the previous ones.
+    /// </summary>
+    public string Version { get; set; } = "1";
+
+    /// <summary>
+    /// How long artifacts are reused, after being generated. Expired artifacts are removed
+    /// when found. The document storage doesn't allow to list files, so artifacts never reused
+    /// are not removed: use the storage lifecycle rules to remove old files from the index,
+    /// e.g. Azure Blob Storage lifecycle management.
+    /// </summary>
+    public TimeSpan TimeToLive { get; set; } = TimeSpan.FromDays(30);
+
+    /// <summary>
+    /// Verify that the current state is valid.
+    /// </summary>
+    public void Validate()
+    {
+        if (string.IsNullOrWhiteSpace(this.Index))
+        {
+            throw new ConfigurationException($"Pipeline artifact cache: {nameof(this.Index)} cannot be empty");
+        }
+
+        if (this.TimeToLive <= TimeSpan.Zero)
+        {
+            throw new ConfigurationException($"Pipeline artifact cache: {nameof(this.TimeToLive)} must be greater than zero");
+        }
+    }
+}
@@ -0,0 +1,265 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Numerics.Tensors;
+using System.Threading;
+using Microsoft.Extensions.Logging;
+using Microsoft.KernelMemory.Diagnostics;
+
+namespace Microsoft.KernelMemory.Search;
+
+/// <summary>
+/// Cache of the answers generated by SearchClient.AskAsync, reused for questions with a similar
+/// embedding, asked on the same index, with the same filters and settings.
+/// Answers are removed when the handlers saving and deleting memory records change the index,
+/// unless the records changed don't match the filters used to generate the answer. Each index has a
+/// version, incremented on every change, so answers generated while the index changes are not stored.
+/// Note: the cache is local to the process, and invalidated only by the handlers running in the same
+/// process. When handlers run elsewhere, e.g. using distributed queues, answers expire only after
+/// the configured time to live.
+/// </summary>
+public sealed class AnswerCache
+{
+    private readonly int _maxEntries;
+    private readonly TimeSpan _timeToLive;
+    private readonly double _minSimilarity;
+    private readonly ILogger<AnswerCache> _log;
+    private readonly object _lock = new();
+
+    // Answers, from the most recently used
+    private readonly LinkedList<Entry> _entries = new();
+
+    // Answers grouped by index, filters and scope, i.e. the answers a question can reuse
+    private readonly Dictionary<string, List<LinkedListNode<Entry>>> _buckets = new(StringComparer.Ordinal);
+
+    // Version of each index, incremented when the index changes
+    private readonly Dictionary<string, long> _versions = new(StringComparer.OrdinalIgnoreCase);
+
+    private long _hits;
+    private long _misses;
+
+    private sealed record Entry(
+        string Index,
+        ICollection<MemoryFilter>? Filters,
+        string BucketKey,
+        float[] Question,
+        string Answer,
+        DateTimeOffset Expiration);
+
+    /// <summary>
+    /// Create a new instance
+    /// </summary>
+    /// <param name="config">Search client settings</param>
+    /// <param name="loggerFactory">Application logger factory</param>
+    public AnswerCache(SearchClientConfig config, ILoggerFactory? loggerFactory = null)
+    {
+        config.Validate();
+        this._maxEntries = config.AnswerCacheMaxEntries;
+        this._timeToLive = config.AnswerCacheTimeToLive;
+        this._minSimilarity = config.AnswerCacheMinSimilarity;
+        this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<AnswerCache>();
+    }
+
+    /// <summary>
+    /// Number of questions answered from the cache
+    /// </summary>
+    public long Hits => Interlocked.Read(ref this._hits);
+
+    /// <summary>
+    /// Number of questions not found in the cache
+    /// </summary>
+    public long Misses => Interlocked.Read(ref this._misses);
+
+    /// <summary>
+    /// Remove the answers affected by a change to the given index.
+    /// </summary>
+    /// <param name="index">Index changed</param>
+    /// <param name="recordTags">Tags of the memory records saved or deleted. Only the answers
+    /// generated with filters matching at least one of the records are removed.
+    /// When null, all the answers of the index are removed.</param>
+    public void Invalidate(string index, IReadOnlyCollection<TagCollection>? recordTags = null)
+    {
+        int count = 0;
+        lock (this._lock)
+        {
+            this._versions[index] = this.GetVersion(index) + 1;
+
+            LinkedListNode<Entry>? node = this._entries.First;
+            while (node != null)
+            {
+                LinkedListNode<Entry>? next = node.Next;
+                if (string.Equals(node.Value.Index, index, StringComparison.OrdinalIgnoreCase)
+                    && (recordTags == null || recordTags.Any(tags => MatchesFilters(tags, node.Value.Filters))))
+                {
+                    this.Remove(node);
+                    count++;
+                }
+
+                node = next;
+            }
+        }
+
+        if (count > 0) { this._log.LogDebug("{0} cached answers removed, index '{1}' changed", count, index); }
+    }
+
+    /// <summary>
+    /// Current version of an index, to pass to <see cref="Add"/>
+    /// </summary>
+    internal long GetVersion(string index)
+    {
+        lock (this._lock)
+        {
+            return this._versions.GetValueOrDefault(index);
+        }
+    }
+
+    /// <summary>
+    /// Find the answer to the most similar question, if similar enough
+    /// </summary>
+    /// <param name="index">Index searched</param>
+    /// <param name="filters">Filters used to search memories</param>
+    /// <param name="scope">Any other value affecting the answer, e.g. the prompt, compared as is</param>
+    /// <param name="question">Question embedding</param>
+    /// <returns>A copy of the cached answer, or null</returns>
+    internal MemoryAnswer? Get(string index, ICollection<MemoryFilter>? filters, string scope, Embedding question)
+    {
+        float[] query = Normalize(question);
+        string bucketKey = GetBucketKey(index, filters, scope);
+        DateTimeOffset now = DateTimeOffset.UtcNow;
+
+        LinkedListNode<Entry>? best = null;
+        double bestSimilarity = this._minSimilarity;
+        lock (this._lock)
+        {
+            // Only the answers generated with the same index, filters and scope are compared
+            if (this._buckets.TryGetValue(bucketKey, out List<LinkedListNode<Entry>>? bucket))
+            {
+                foreach (LinkedListNode<Entry> node in bucket)
+                {
+                    Entry entry = node.Value;
+                    if (entry.Expiration <= now || entry.Question.Length != query.Length) { continue; }
+
+                    double similarity = TensorPrimitives.Dot(entry.Question, query);
+                    if (similarity >= bestSimilarity)
+                    {
+                        best = node;
+                        bestSimilarity = similarity;
+                    }
+                }
+
+                foreach (LinkedListNode<Entry> node in bucket.Where(x => x.Value.Expiration <= now).ToList())
+                {
+                    this.Remove(node);
+                }
+            }
+
+            if (best != null)
+            {
+                this._entries.Remove(best);
+                this._entries.AddFirst(best);
+            }
+        }
+
+        if (best == null)
+        {
+            Interlocked.Increment(ref this._misses);
+            return null;
+        }
+
+        Interlocked.Increment(ref this._hits);
+        this._log.LogDebug("Answer found in cache, question similarity {0:F3}", bestSimilarity);
+        return new MemoryAnswer().FromJson(best.Value.Answer);
+    }
+
+    /// <summary>
+    /// Store an answer, unless the index changed after the given version
+    /// </summary>
+    /// <param name="index">Index searched</param>
+    /// <param name="filters">Filters used to search memories</param>
+    /// <param name="scope">Any other value affecting the answer, e.g. the prompt, compared as is</param>
+    /// <param name="question">Question embedding</param>
+    /// <param name="version">Version of the index when the answer generation started</param>
+    /// <param name="answer">Answer to cache</param>
+    internal void Add(string index, ICollection<MemoryFilter>? filters, string scope, Embedding question, long version, MemoryAnswer answer)
+    {
+        var entry = new Entry(
+            Index: index,
+            Filters: filters?.Where(f => !f.IsEmpty()).ToList(),
+            BucketKey: GetBucketKey(index, filters, scope),
+            Question: Normalize(question),
+            Answer: answer.ToJson(),
+            Expiration: DateTimeOffset.UtcNow + this._timeToLive);
+
+        lock (this._lock)
+        {
+            if (this.GetVersion(index) != version)
+            {
+                this._log.LogDebug("Index '{0}' changed while generating the answer, the answer is not cached", index);
+                return;
+            }
+
+            LinkedListNode<Entry> node = this._entries.AddFirst(entry);
+            if (!this._buckets.TryGetValue(entry.BucketKey, out List<LinkedListNode<Entry>>? bucket))
+            {
+                bucket = new List<LinkedListNode<Entry>>();
+                this._buckets[entry.BucketKey] = bucket;
+            }
+
+            bucket.Add(node);
+            while (this._entries.Count > this._maxEntries) { this.Remove(this._entries.Last!); }
+        }
+    }
+
+    #region private
+
+    // Note: call while holding the lock
+    private void Remove(LinkedListNode<Entry> node)
+    {
+        this._entries.Remove(node);
+        List<LinkedListNode<Entry>> bucket = this._buckets[node.Value.BucketKey];
+        bucket.Remove(node);
+        if (bucket.Count == 0) { this._buckets.Remove(node.Value.BucketKey); }
+    }
+
+    private static float[] Normalize(Embedding embedding)
+    {
+        float[] result = embedding.Data.ToArray();
+        float norm = TensorPrimitives.Norm(result);
+        if (norm > 0) { TensorPrimitives.Divide(result, norm, result); }
+
+        return result;
+    }
+
+    // Index, filters and scope as a string. Index names are case-insensitive, scopes are compared as is.
+    private static string GetBucketKey(string index, ICollection<MemoryFilter>? filters, string scope)
+    {
+        string filtersKey = GetFiltersKey(filters);
+        return $"{index.Length}:{index.ToUpperInvariant()}{filtersKey.Length}:{filtersKey}{scope}";
+    }
+
+    // Filters as a string, to compare filters regardless of the order of filters and tags
+    private static string GetFiltersKey(ICollection<MemoryFilter>? filters)
+    {
+        if (filters == null) { return string.Empty; }
+
+        return string.Join("|", filters
+            .Where(f => !f.IsEmpty())
+            .Select(f => string.Join("&", f.GetFilters()
+                .Select(x => $"{x.Key.Length}:{x.Key}={x.Value}")
+                .Order(StringComparer.Ordinal)))
+            .Order(StringComparer.Ordinal));
+    }
+
+    // Whether a record with the given tags can be found using the filters, see MemoryFilter
+    private static bool MatchesFilters(TagCollection tags, ICollection<MemoryFilter>? filters)
+    {
+        if (filters == null || filters.Count == 0) { return true; }
+
+        return filters.Any(filter => filter.GetFilters().All(
+            condition => tags.TryGetValue(condition.Key, out List<string?> values) && values.Contains(condition.Value)));
+    }
+
+    #endregion
+}
@@ -0,0 +1,83 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+
+namespace Microsoft.KernelMemory.Search;
+
+/// <summary>
+/// Select the facts to include in a prompt, within a budget of tokens.
+/// </summary>
+internal static class FactPacker
+{
+    // Max size of the knapsack table for each fact. With larger budgets, tokens are
+    // counted in units of multiple tokens, rounding up the size of each fact.
+    private const int MaxCapacityUnits = 2048;
+
+    // Added to the relevance of each fact, so that facts with zero relevance still count
+    private const double MinValue = 1e-6;
+
+    /// <summary>
+    /// Select facts in order, stopping at the first fact exceeding the remaining budget.
+    /// The sizes of the facts after it are not read.
+    /// </summary>
+    /// <param name="facts">Relevance and size of each fact, from the most relevant</param>
+    /// <param name="tokenBudget">Max number of tokens of the facts selected</param>
+    /// <returns>Positions of the facts selected, in the original order</returns>
+    public static List<int> PackInOrder(IReadOnlyList<(double Relevance, int Tokens)> facts, int tokenBudget)
+    {
+        var result = new List<int>();
+        for (int i = 0; i < facts.Count && facts[i].Tokens <= tokenBudget; i++)
+        {
+            result.Add(i);
+            tokenBudget -= facts[i].Tokens;
+        }
+
+        return result;
+    }
+
+    /// <summary>
+    /// Select the facts with the highest total relevance fitting in the budget, solving the 0/1
+    /// knapsack problem. Unlike selecting facts in order, a large fact doesn't stop the selection,
+    /// and smaller facts can be used in its place when together they are more relevant.
+    /// </summary>
+    /// <param name="facts">Relevance and size of each fact, from the most relevant</param>
+    /// <param name="tokenBudget">Max number of tokens of the facts selected</param>
+    /// <returns>Positions of the facts selected, in the original order</returns>
+    public static List<int> PackByRelevance(IReadOnlyList<(double Relevance, int Tokens)> facts, int tokenBudget)
+    {
+        var result = new List<int>();
+        if (facts.Count == 0 || tokenBudget <= 0) { return result; }
+
+        int unit = (int)Math.Ceiling(tokenBudget / (double)MaxCapacityUnits);
+        int capacity = tokenBudget / unit;
+
+        // best[c] = max relevance using up to c units, taken[i, c] = whether fact i is part of it
+        var best = new double[capacity + 1];
+        var taken = new bool[facts.Count, capacity + 1];
+        for (int i = 0; i < facts.Count; i++)
+        {
+            int weight = Math.Max(1, (int)Math.Ceiling(facts[i].Tokens / (double)unit));
+            double value = Math.Max(0, facts[i].Relevance) + MinValue;
+            for (int c = capacity; c >= weight; c--)
+            {
+                double candidate = best[c - weight] + value;
+                if (candidate <= best[c]) { continue; }
+
+                best[c] = candidate;
+                taken[i, c] = true;
+            }
+        }
+
+        for (int i = facts.Count - 1, c = capacity; i >= 0; i--)
+        {
+            if (!taken[i, c]) { continue; }
+
+            result.Add(i);
+            c -= Math.Max(1, (int)Math.Ceiling(facts[i].Tokens / (double)unit));
+        }
+
+        result.Reverse();
+        return result;
+    }
+}
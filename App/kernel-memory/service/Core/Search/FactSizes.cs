@@ -0,0 +1,66 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections;
+using System.Collections.Generic;
+
+namespace Microsoft.KernelMemory.Search;
+
+/// <summary>
+/// Relevance and size of the facts passed to <see cref="FactPacker"/>, counting the tokens of
+/// each fact only when read, once. Packing the facts in order reads the sizes only until the
+/// first fact exceeding the budget, so the facts after it are never tokenized.
+/// </summary>
+internal sealed class FactSizes : IReadOnlyList<(double Relevance, int Tokens)>
+{
+    private readonly IReadOnlyList<double> _relevance;
+    private readonly Func<int, int> _countTokens;
+    private readonly int?[] _tokens;
+
+    /// <summary>
+    /// Create new instance
+    /// </summary>
+    /// <param name="relevance">Relevance of each fact, from the most relevant</param>
+    /// <param name="countTokens">Function counting the tokens of a fact, given its position</param>
+    public FactSizes(IReadOnlyList<double> relevance, Func<int, int> countTokens)
+    {
+        this._relevance = relevance;
+        this._countTokens = countTokens;
+        this._tokens = new int?[relevance.Count];
+    }
+
+    /// <summary>
+    /// Number of facts tokenized so far
+    /// </summary>
+    public int CountedFacts { get; private set; }
+
+    public int Count => this._relevance.Count;
+
+    public (double Relevance, int Tokens) this[int index]
+    {
+        get
+        {
+            if (this._tokens[index] is not int tokens)
+            {
+                tokens = this._countTokens(index);
+                this._tokens[index] = tokens;
+                this.CountedFacts++;
+            }
+
+            return (this._relevance[index], tokens);
+        }
+    }
+
+    public IEnumerator<(double Relevance, int Tokens)> GetEnumerator()
+    {
+        for (int i = 0; i < this.Count; i++)
+        {
+            yield return this[i];
+        }
+    }
+
+    IEnumerator IEnumerable.GetEnumerator()
+    {
+        return this.GetEnumerator();
+    }
+}
@@ -0,0 +1,50 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using Microsoft.KernelMemory.MemoryStorage;
+
+namespace Microsoft.KernelMemory.Search;
+
+/// <summary>
+/// Merge lists of memory records ranked by different searches, e.g. vector and keyword search,
+/// using Reciprocal Rank Fusion: each record scores 1 / (k + rank) in each list where it appears,
+/// so only the rank matters, and scores from different scales don't need to be normalized.
+/// See https://plg.uwaterloo.ca/~gvcormac/cormacksigir09-rrf.pdf
+/// </summary>
+internal static class ReciprocalRankFusion
+{
+    /// <summary>
+    /// Merge the given rankings
+    /// </summary>
+    /// <param name="rankings">Lists of records, each sorted from the most relevant</param>
+    /// <param name="k">RRF constant, added to the rank of each record</param>
+    /// <param name="limit">Max number of records to return</param>
+    /// <returns>Records and RRF score, from the most relevant. Scores are scaled so that
+    /// a record ranked first in all the lists scores 1.</returns>
+    public static List<(MemoryRecord Memory, double Score)> Fuse(
+        IReadOnlyCollection<IReadOnlyList<(MemoryRecord Memory, double Score)>> rankings, int k, int limit)
+    {
+        var records = new Dictionary<string, (MemoryRecord Memory, double Score, int BestRank)>(StringComparer.Ordinal);
+        foreach (IReadOnlyList<(MemoryRecord Memory, double Score)> ranking in rankings)
+        {
+            for (int rank = 1; rank <= ranking.Count; rank++)
+            {
+                MemoryRecord memory = ranking[rank - 1].Memory;
+                double score = 1.0 / (k + rank);
+                records[memory.Id] = records.TryGetValue(memory.Id, out var fused)
+                    ? (fused.Memory, fused.Score + score, Math.Min(fused.BestRank, rank))
+                    : (memory, score, rank);
+            }
+        }
+
+        double maxScore = rankings.Count / (double)(k + 1);
+        return records.Values
+            .OrderByDescending(x => x.Score)
+            .ThenBy(x => x.BestRank)
+            .Take(limit)
+            .Select(x => (x.Memory, x.Score / maxScore))
+            .ToList();
+    }
+}
@@ -5,6 +5,7 @@ using System.Collections.Generic;
 using System.Diagnostics;
 using System.Globalization;
 using System.Linq;
+using System.Runtime.CompilerServices;
 using System.Text;
 using System.Threading;
 using System.Threading.Tasks;
@@ -21,15 +22,20 @@ public sealed class SearchClient : ISearchClient
 {
     private readonly IMemoryDb _memoryDb;
     private readonly ITextGenerator _textGenerator;
+    private readonly ITextEmbeddingGenerator? _embeddingGenerator;
+    private readonly AnswerCache? _answerCache;
     private readonly SearchClientConfig _config;
     private readonly ILogger<SearchClient> _log;
     private readonly string _answerPrompt;
+    private readonly Lazy<int> _answerPromptTokens;
 
     public SearchClient(
         IMemoryDb memoryDb,
         ITextGenerator textGenerator,
         SearchClientConfig? config = null,
         IPromptProvider? promptProvider = null,
+        ITextEmbeddingGenerator? embeddingGenerator = null,
+        AnswerCache? answerCache = null,
         ILoggerFactory? loggerFactory = null)
     {
         this._memoryDb = memoryDb;
@@ -37,8 +43,13 @@ public sealed class SearchClient : ISearchClient
         this._config = config ?? new SearchClientConfig();
         this._config.Validate();
 
+        // The answer cache requires the question embedding
+        this._embeddingGenerator = embeddingGenerator;
+        this._answerCache = this._config.UseAnswerCache && embeddingGenerator != null ? answerCache : null;
+
         promptProvider ??= new EmbeddedPromptProvider();
         this._answerPrompt = promptProvider.ReadPrompt(Constants.PromptNamesAnswerWithFacts);
+        this._answerPromptTokens = new Lazy<int>(() => this._textGenerator.CountTokens(this._answerPrompt));
 
         this._log = (loggerFactory ?? DefaultLogger.Factory).CreateLogger<SearchClient>();
 
@@ -87,13 +98,13 @@ public sealed class SearchClient : ISearchClient
         if (!string.IsNullOrEmpty(query))
         {
             this._log.LogTrace("Fetching relevant memories by similarity, min relevance {0}", minRelevance);
-            IAsyncEnumerable<(MemoryRecord, double)> matches = this._memoryDb.GetSimilarListAsync(
+            IAsyncEnumerable<(MemoryRecord, double)> matches = this.GetRelevantMemoriesAsync(
                 index: index,
                 text: query,
+                embedding: null,
                 filters: filters,
                 minRelevance: minRelevance,
                 limit: limit,
-                withEmbeddings: false,
                 cancellationToken: cancellationToken);
 
             // Memories are sorted by relevance, starting from the most relevant
@@ -210,45 +221,56 @@ public sealed class SearchClient : ISearchClient
             return noAnswerFound;
         }
 
+        // Look for the answer of a similar question, capturing the index version before searching memories
+        Embedding questionEmbedding = default;
+        long indexVersion = 0;
+        string answerScope = string.Empty;
+        if (this._answerCache != null)
+        {
+            indexVersion = this._answerCache.GetVersion(index);
+            questionEmbedding = await this._embeddingGenerator!.GenerateEmbeddingAsync(question, cancellationToken).ConfigureAwait(false);
+            answerScope = string.Join('\n',
+                minRelevance.ToString(CultureInfo.InvariantCulture),
+                context.GetCustomRagMaxTokensOrDefault(this._config.AnswerTokens).ToString(CultureInfo.InvariantCulture),
+                context.GetCustomRagTemperatureOrDefault(this._config.Temperature).ToString(CultureInfo.InvariantCulture),
+                context.GetCustomRagNucleusSamplingOrDefault(this._config.TopP).ToString(CultureInfo.InvariantCulture),
+                emptyAnswer, factTemplate, answerPrompt);
+
+            MemoryAnswer? cachedAnswer = this._answerCache.Get(index, filters, answerScope, questionEmbedding);
+            if (cachedAnswer != null)
+            {
+                cachedAnswer.Question = question;
+                return cachedAnswer;
+            }
+        }
+
         var facts = new StringBuilder();
         var maxTokens = this._config.MaxAskPromptSize > 0
             ? this._config.MaxAskPromptSize
             : this._textGenerator.MaxTokenTotal;
         var tokensAvailable = maxTokens
-                              - this._textGenerator.CountTokens(answerPrompt)
+                              - (answerPrompt == this._answerPrompt ? this._answerPromptTokens.Value : this._textGenerator.CountTokens(answerPrompt))
                               - this._textGenerator.CountTokens(question)
                               - this._config.AnswerTokens;
 
         var factsUsedCount = 0;
-        var factsAvailableCount = 0;
         var answer = noAnswerFound;
 
         this._log.LogTrace("Fetching relevant memories");
-        IAsyncEnumerable<(MemoryRecord, double)> matches = this._memoryDb.GetSimilarListAsync(
+        // Reuse the question embedding generated to look up the answer cache, if any
+        IAsyncEnumerable<(MemoryRecord, double)> matches = this.GetRelevantMemoriesAsync(
             index: index,
             text: question,
+            embedding: this._answerCache != null ? questionEmbedding : null,
             filters: filters,
             minRelevance: minRelevance,
             limit: this._config.MaxMatchesCount,
-            withEmbeddings: false,
             cancellationToken: cancellationToken);
 
         // Memories are sorted by relevance, starting from the most relevant
+        var candidates = new List<(MemoryRecord Memory, double Relevance, string Text)>();
         await foreach ((MemoryRecord memory, double relevance) in matches.ConfigureAwait(false))
         {
-            // Note: a document can be composed by multiple files
-            string documentId = memory.GetDocumentId(this._log);
-
-            // Identify the file in case there are multiple files
-            string fileId = memory.GetFileId(this._log);
-
-            // Note: this is not a URL and perhaps could be dropped. For now it acts as a unique identifier. See also SourceUrl.
-            string linkToFile = $"{index}/{documentId}/{fileId}";
-
-            string fileName = memory.GetFileName(this._log);
-
-            string webPageUrl = memory.GetWebPageUrl(index);
-
             var partitionText = memory.GetPartitionText(this._log).Trim();
             if (string.IsNullOrEmpty(partitionText))
             {
@@ -256,30 +278,62 @@ public sealed class SearchClient : ISearchClient
                 continue;
             }
 
-            factsAvailableCount++;
+            candidates.Add((memory, relevance, partitionText));
 
-            var fact = PromptUtils.RenderFactTemplate(
-                template: factTemplate,
-                factContent: partitionText,
-                source: (fileName == "content.url" ? webPageUrl : fileName),
-                relevance: relevance.ToString("P1", CultureInfo.CurrentCulture),
-                recordId: memory.Id,
-                tags: memory.Tags,
-                metadata: memory.Payload);
-
-            // Use the partition/chunk only if there's room for it
-            var size = this._textGenerator.CountTokens(fact);
-            if (size >= tokensAvailable)
+            // In cases where a buggy storage connector is returning too many records
+            if (candidates.Count >= this._config.MaxMatchesCount)
             {
-                // Stop after reaching the max number of tokens
                 break;
             }
+        }
+
+        // Size of each fact, counted only when the packing needs it. Use the partition size counted
+        // during the import when available, and tokenize legacy partitions without it. The count can
+        // differ slightly when the import used a different tokenizer, the difference is small compared
+        // to the prompt size. The text added by the fact template is tokenized once per distinct text,
+        // e.g. once per file, rendered with the widest relevance value.
+        var templateTokens = new Dictionary<string, int>(StringComparer.Ordinal);
+        var sizes = new FactSizes(candidates.Select(x => x.Relevance).ToList(), position =>
+        {
+            (MemoryRecord memory, _, string partitionText) = candidates[position];
+            string overhead = this.RenderFact(factTemplate, index, memory, 1, string.Empty);
+            if (!templateTokens.TryGetValue(overhead, out int overheadTokens))
+            {
+                overheadTokens = this._textGenerator.CountTokens(overhead);
+                templateTokens[overhead] = overheadTokens;
+            }
+
+            int partitionTokens = memory.GetPartitionTokenCount();
+            return overheadTokens + (partitionTokens > 0 ? partitionTokens : this._textGenerator.CountTokens(partitionText));
+        });
+
+        // Use the partitions/chunks only if there's room for them. The knapsack reads the size of
+        // all the candidates, use it only when no partition needs to be tokenized.
+        var factsAvailableCount = candidates.Count;
+        bool useKnapsack = this._config.UseKnapsackFactPacking && candidates.All(x => x.Memory.GetPartitionTokenCount() > 0);
+        List<int> factsSelected = useKnapsack
+            ? FactPacker.PackByRelevance(sizes, tokensAvailable - 1)
+            : FactPacker.PackInOrder(sizes, tokensAvailable - 1);
+
+        foreach (int position in factsSelected)
+        {
+            (MemoryRecord memory, double relevance, string partitionText) = candidates[position];
+
+            // Note: a document can be composed by multiple files
+            string documentId = memory.GetDocumentId(this._log);
+
+            // Identify the file in case there are multiple files
+            string fileId = memory.GetFileId(this._log);
+
+            // Note: this is not a URL and perhaps could be dropped. For now it acts as a unique identifier. See also SourceUrl.
+            string linkToFile = $"{index}/{documentId}/{fileId}";
+
+            string fileName = memory.GetFileName(this._log);
 
             factsUsedCount++;
             this._log.LogTrace("Adding text {0} with relevance {1}", factsUsedCount, relevance);
 
-            facts.Append(fact);
-            tokensAvailable -= size;
+            facts.Append(this.RenderFact(factTemplate, index, memory, relevance, partitionText));
 
             // If the file is already in the list of citations, only add the partition
             var citation = answer.RelevantSources.FirstOrDefault(x => x.Link == linkToFile);
@@ -307,12 +361,6 @@ public sealed class SearchClient : ISearchClient
                 LastUpdate = memory.GetLastUpdate(),
                 Tags = memory.Tags,
             });
-
-            // In cases where a buggy storage connector is returning too many records
-            if (factsUsedCount >= this._config.MaxMatchesCount)
-            {
-                break;
-            }
         }
 
         if (factsAvailableCount > 0 && factsUsedCount == 0)
@@ -356,11 +404,184 @@ public sealed class SearchClient : ISearchClient
         else
         {
             this._log.LogTrace("Answer generated in {0} msecs", watch.ElapsedMilliseconds);
+            this._answerCache?.Add(index, filters, answerScope, questionEmbedding, indexVersion, answer);
         }
 
         return answer;
     }
 
+    /// <summary>
+    /// Search the memories relevant to the given text, using vector search, combined with
+    /// keyword search when hybrid search is enabled and supported by the memory DB.
+    /// </summary>
+    private IAsyncEnumerable<(MemoryRecord, double)> GetRelevantMemoriesAsync(
+        string index,
+        string text,
+        Embedding? embedding,
+        ICollection<MemoryFilter>? filters,
+        double minRelevance,
+        int limit,
+        CancellationToken cancellationToken)
+    {
+        if (this._config.UseHybridSearch && this._memoryDb is IMemoryDbKeywordSearch keywordSearch)
+        {
+            return this.GetHybridMatchesAsync(keywordSearch, index, text, embedding, filters, minRelevance, limit, cancellationToken);
+        }
+
+        return this.GetSimilarListAsync(index, text, embedding, filters, minRelevance, limit, cancellationToken);
+    }
+
+    /// <summary>
+    /// Vector search, using the embedding of the text when already available and supported by the memory DB
+    /// </summary>
+    private IAsyncEnumerable<(MemoryRecord, double)> GetSimilarListAsync(
+        string index,
+        string text,
+        Embedding? embedding,
+        ICollection<MemoryFilter>? filters,
+        double minRelevance,
+        int limit,
+        CancellationToken cancellationToken)
+    {
+        if (embedding.HasValue && this._memoryDb is IMemoryDbEmbeddingSearch embeddingSearch)
+        {
+            return embeddingSearch.GetSimilarListAsync(
+                index: index,
+                embedding: embedding.Value,
+                filters: filters,
+                minRelevance: minRelevance,
+                limit: limit,
+                withEmbeddings: false,
+                cancellationToken: cancellationToken);
+        }
+
+        return this._memoryDb.GetSimilarListAsync(
+            index: index,
+            text: text,
+            filters: filters,
+            minRelevance: minRelevance,
+            limit: limit,
+            withEmbeddings: false,
+            cancellationToken: cancellationToken);
+    }
+
+    /// <summary>
+    /// Run vector and keyword search concurrently, and merge the results with Reciprocal Rank Fusion.
+    /// If a search times out, or the keyword search fails, the results of the other search are used.
+    /// RRF decides only the order of the results: their relevance is the vector similarity, computed
+    /// from the record embedding for the records found only by keyword search, and the min relevance
+    /// applies to all the results. Keyword results whose similarity can't be computed, e.g. without
+    /// an embedding generator, are dropped when a min relevance is set, and have relevance 0 otherwise.
+    /// </summary>
+    private async IAsyncEnumerable<(MemoryRecord, double)> GetHybridMatchesAsync(
+        IMemoryDbKeywordSearch keywordSearch,
+        string index,
+        string text,
+        Embedding? embedding,
+        ICollection<MemoryFilter>? filters,
+        double minRelevance,
+        int limit,
+        [EnumeratorCancellation] CancellationToken cancellationToken)
+    {
+        // The similarity of the records found only by keyword search is computed from their embedding
+        bool canScoreKeywordMatches = embedding.HasValue || this._embeddingGenerator != null;
+
+        Task<List<(MemoryRecord, double)>?> vectorMatches = this.SearchWithTimeoutAsync(
+            "Vector",
+            token => this.GetSimilarListAsync(index, text, embedding, filters, minRelevance, this._config.HybridVectorSearchLimit, token),
+            this._config.HybridVectorSearchTimeout,
+            ignoreErrors: false,
+            cancellationToken);
+
+        Task<List<(MemoryRecord, double)>?> keywordMatches = this.SearchWithTimeoutAsync(
+            "Keyword",
+            token => keywordSearch.GetKeywordMatchesAsync(
+                index: index,
+                text: text,
+                filters: filters,
+                limit: this._config.HybridKeywordSearchLimit,
+                withEmbeddings: canScoreKeywordMatches,
+                cancellationToken: token),
+            this._config.HybridKeywordSearchTimeout,
+            ignoreErrors: true,
+            cancellationToken);
+
+        List<(MemoryRecord, double)>?[] results = await Task.WhenAll(vectorMatches, keywordMatches).ConfigureAwait(false);
+        var rankings = results.OfType<IReadOnlyList<(MemoryRecord, double)>>().ToList();
+        if (rankings.Count == 0) { yield break; }
+
+        var similarity = new Dictionary<string, double>(StringComparer.Ordinal);
+        if (results[0] != null)
+        {
+            foreach ((MemoryRecord memory, double relevance) in results[0]!)
+            {
+                similarity[memory.Id] = relevance;
+            }
+        }
+
+        // Results below the min relevance are skipped, fuse all the results to fill the limit
+        var count = 0;
+        foreach ((MemoryRecord memory, _) in ReciprocalRankFusion.Fuse(rankings, this._config.RrfK, int.MaxValue))
+        {
+            if (!similarity.TryGetValue(memory.Id, out double relevance))
+            {
+                if (canScoreKeywordMatches && memory.Vector.Length > 0)
+                {
+                    embedding ??= await this._embeddingGenerator!.GenerateEmbeddingAsync(text, cancellationToken).ConfigureAwait(false);
+                    relevance = embedding.Value.CosineSimilarity(memory.Vector);
+                }
+                else if (minRelevance > 0)
+                {
+                    continue;
+                }
+
+                if (relevance < minRelevance) { continue; }
+
+                memory.Vector = new Embedding();
+            }
+
+            yield return (memory, relevance);
+            if (++count >= limit) { yield break; }
+        }
+    }
+
+    /// <summary>
+    /// Collect the results of a search, or return null if the search doesn't complete in time
+    /// </summary>
+    private async Task<List<(MemoryRecord, double)>?> SearchWithTimeoutAsync(
+        string searchType,
+        Func<CancellationToken, IAsyncEnumerable<(MemoryRecord, double)>> search,
+        TimeSpan timeout,
+        bool ignoreErrors,
+        CancellationToken cancellationToken)
+    {
+        using var timeoutSource = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+        timeoutSource.CancelAfter(timeout);
+
+        var watch = Stopwatch.StartNew();
+        var results = new List<(MemoryRecord, double)>();
+        try
+        {
+            await foreach ((MemoryRecord, double) match in search(timeoutSource.Token).WithCancellation(timeoutSource.Token).ConfigureAwait(false))
+            {
+                results.Add(match);
+            }
+        }
+        catch (OperationCanceledException) when (!cancellationToken.IsCancellationRequested)
+        {
+            this._log.LogWarning("{0} search timed out after {1} msecs, using only the other search results", searchType, watch.ElapsedMilliseconds);
+            return null;
+        }
+        catch (Exception e) when (ignoreErrors && e is not OperationCanceledException)
+        {
+            this._log.LogWarning(e, "{0} search failed, using only the other search results", searchType);
+            return null;
+        }
+
+        this._log.LogTrace("{0} search returned {1} results in {2} msecs", searchType, results.Count, watch.ElapsedMilliseconds);
+        return results;
+    }
+
     private IAsyncEnumerable<string> GenerateAnswer(string question, string facts, IContext? context, CancellationToken token)
     {
         string prompt = context.GetCustomRagPromptOrDefault(this._answerPrompt);
@@ -396,6 +617,19 @@ public sealed class SearchClient : ISearchClient
         return this._textGenerator.GenerateTextAsync(prompt, options, token);
     }
 
+    private string RenderFact(string factTemplate, string index, MemoryRecord memory, double relevance, string partitionText)
+    {
+        string fileName = memory.GetFileName(this._log);
+        return PromptUtils.RenderFactTemplate(
+            template: factTemplate,
+            factContent: partitionText,
+            source: (fileName == "content.url" ? memory.GetWebPageUrl(index, this._log) : fileName),
+            relevance: relevance.ToString("P1", CultureInfo.CurrentCulture),
+            recordId: memory.Id,
+            tags: memory.Tags,
+            metadata: memory.Payload);
+    }
+
     private static bool ValueIsEquivalentTo(string value, string target)
     {
         value = value.Trim().Trim('.', '"', '\'', '`', '~', '!', '?', '@', '#', '$', '%', '^', '+', '*', '_', '-', '=', '|', '\\', '/', '(', ')', '[', ']', '{', '}', '<', '>');
@@ -13,12 +13,17 @@ using Microsoft.AspNetCore.Routing;
 using Microsoft.Extensions.Logging;
 using Microsoft.KernelMemory.Context;
 using Microsoft.KernelMemory.DocumentStorage;
+using Microsoft.KernelMemory.Pipeline;
 using Microsoft.KernelMemory.Service.AspNetCore.Models;
 
 namespace Microsoft.KernelMemory.Service.AspNetCore;
 
 public static class WebAPIEndpoints
 {
+    // Default and max time the status wait endpoint holds a request open
+    private const int DefaultStatusWaitSecs = 30;
+    private const int MaxStatusWaitSecs = 120;
+
     public static IEndpointRouteBuilder AddKernelMemoryEndpoints(
         this IEndpointRouteBuilder builder,
         string apiPrefix = "/",
@@ -31,6 +36,7 @@ public static class WebAPIEndpoints
         builder.AddAskEndpoint(apiPrefix, authFilter);
         builder.AddSearchEndpoint(apiPrefix, authFilter);
         builder.AddUploadStatusEndpoint(apiPrefix, authFilter);
+        builder.AddUploadStatusWaitEndpoint(apiPrefix, authFilter);
         builder.AddGetDownloadEndpoint(apiPrefix, authFilter);
 
         return builder;
@@ -316,6 +322,90 @@ public static class WebAPIEndpoints
         if (authFilter != null) { route.AddEndpointFilter(authFilter); }
     }
 
+    public static void AddUploadStatusWaitEndpoint(
+        this IEndpointRouteBuilder builder, string apiPrefix = "/", IEndpointFilter? authFilter = null)
+    {
+        RouteGroupBuilder group = builder.MapGroup(apiPrefix);
+
+        // Document status long polling endpoint: the response is sent as soon as the
+        // ingestion pipeline completes, or when the timeout expires, whichever comes first.
+        var route = group.MapGet(Constants.HttpUploadStatusWaitEndpoint,
+                async Task<IResult> (
+                    [FromQuery(Name = Constants.WebService.IndexField)]
+                    string? index,
+                    [FromQuery(Name = Constants.WebService.DocumentIdField)]
+                    string documentId,
+                    [FromQuery(Name = Constants.WebService.TimeoutField)]
+                    int? timeout,
+                    IKernelMemory memoryClient,
+                    IPipelineEventBus eventBus,
+                    ILogger<KernelMemoryWebAPI> log,
+                    CancellationToken cancellationToken) =>
+                {
+                    log.LogTrace("New document status wait HTTP request");
+                    if (string.IsNullOrEmpty(documentId))
+                    {
+                        return Results.Problem(detail: $"'{Constants.WebService.DocumentIdField}' query parameter is missing or has no value", statusCode: 400);
+                    }
+
+                    DataPipelineStatus? pipeline = await memoryClient.GetDocumentStatusAsync(documentId: documentId, index: index, cancellationToken)
+                        .ConfigureAwait(false);
+                    if (pipeline == null)
+                    {
+                        return Results.Problem(detail: "Document not found", statusCode: 404);
+                    }
+
+                    if (pipeline.Empty)
+                    {
+                        return Results.Problem(detail: "Empty pipeline", statusCode: 404);
+                    }
+
+                    if (pipeline.Completed) { return Results.Ok(pipeline); }
+
+                    var waitTime = TimeSpan.FromSeconds(Math.Clamp(timeout ?? DefaultStatusWaitSecs, 1, MaxStatusWaitSecs));
+                    using var waitCancellation = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+                    waitCancellation.CancelAfter(waitTime);
+
+                    // The waiter is registered before reading the status again, so the completion can't be missed
+                    Task<PipelineEvent> completion = eventBus.WaitForCompletionAsync(pipeline.Index, documentId, waitCancellation.Token);
+                    try
+                    {
+                        pipeline = await memoryClient.GetDocumentStatusAsync(documentId: documentId, index: index, cancellationToken)
+                            .ConfigureAwait(false);
+                        if (pipeline is { Completed: false })
+                        {
+                            try
+                            {
+                                await completion.ConfigureAwait(false);
+                            }
+                            catch (OperationCanceledException) when (!cancellationToken.IsCancellationRequested)
+                            {
+                                log.LogTrace("Document status wait expired after {0} secs", waitTime.TotalSeconds);
+                            }
+
+                            pipeline = await memoryClient.GetDocumentStatusAsync(documentId: documentId, index: index, cancellationToken)
+                                .ConfigureAwait(false);
+                        }
+                    }
+                    finally
+                    {
+                        // Release the waiter in case the pipeline is still running
+                        await waitCancellation.CancelAsync().ConfigureAwait(false);
+                    }
+
+                    return pipeline == null
+                        ? Results.Problem(detail: "Document not found", statusCode: 404)
+                        : Results.Ok(pipeline);
+                })
+            .Produces<DataPipelineStatus>(StatusCodes.Status200OK)
+            .Produces<ProblemDetails>(StatusCodes.Status400BadRequest)
+            .Produces<ProblemDetails>(StatusCodes.Status401Unauthorized)
+            .Produces<ProblemDetails>(StatusCodes.Status403Forbidden)
+            .Produces<ProblemDetails>(StatusCodes.Status404NotFound);
+
+        if (authFilter != null) { route.AddEndpointFilter(authFilter); }
+    }
+
     public static void AddGetDownloadEndpoint(this IEndpointRouteBuilder builder, string apiPrefix = "/", IEndpointFilter? authFilter = null)
     {
         RouteGroupBuilder group = builder.MapGroup(apiPrefix);
@@ -2,6 +2,9 @@
 
 using System;
 using System.Collections.Generic;
+using System.Linq;
+using System.Net.Http;
+using System.Threading;
 using Microsoft.Extensions.Configuration;
 using Microsoft.Extensions.DependencyInjection;
 using Microsoft.KernelMemory.AI;
@@ -11,6 +14,7 @@ using Microsoft.KernelMemory.DocumentStorage.DevTools;
 using Microsoft.KernelMemory.MemoryDb.SQLServer;
 using Microsoft.KernelMemory.MemoryStorage;
 using Microsoft.KernelMemory.MemoryStorage.DevTools;
+using Microsoft.KernelMemory.MemoryStorage.FanOut;
 using Microsoft.KernelMemory.MongoDbAtlas;
 using Microsoft.KernelMemory.Pipeline.Queue.DevTools;
 
@@ -24,6 +28,12 @@ internal sealed class ServiceConfiguration
     // Normalized configuration
     private KernelMemoryConfig _memoryConfiguration;
 
+    // HTTP client used by the AI services, when the AI requests are rate limited
+    private HttpClient? _aiHttpClient;
+
+    // Memory DBs created by type, shared by ingestion and by the fan out memory DB combining them
+    private readonly Dictionary<string, IMemoryDb> _memoryDbInstances = new(StringComparer.OrdinalIgnoreCase);
+
     // appsettings.json root node name
     private const string ConfigRoot = "KernelMemory";
 
@@ -83,6 +93,13 @@ internal sealed class ServiceConfiguration
 
         this.ConfigureTextPartitioning(builder);
 
+        this.ConfigureContentDecoders(builder);
+
+        this.ConfigurePipelineArtifactCache(builder);
+
+        // Note: the rate limiter must be configured before the AI services using its HTTP client
+        this.ConfigureAIRateLimiting(builder);
+
         this.ConfigureQueueDependency(builder);
 
         this.ConfigureStorageDependency(builder);
@@ -102,6 +119,7 @@ internal sealed class ServiceConfiguration
         // The ingestion Memory DBs is a list of DBs where handlers write records to. While it's possible
         // to write to multiple DBs, e.g. for replication purpose, there is only one Memory DB used to
         // read/search, and it doesn't come from this list. See "config.Retrieval.MemoryDbType".
+        // The "FanOut" Memory DB allows to read from multiple DBs, e.g. the replicas in this list.
         // Note: use the aux service collection to avoid mixing ingestion and retrieval dependencies.
 
         this.ConfigureIngestionMemoryDb(builder);
@@ -191,6 +209,32 @@ internal sealed class ServiceConfiguration
         }
     }
 
+    private void ConfigureContentDecoders(IKernelMemoryBuilder builder)
+    {
+        builder.WithPdfDecoderConfig(this._memoryConfiguration.DataIngestion.PdfDecoder);
+        builder.WithMsPowerPointDecoderConfig(this._memoryConfiguration.DataIngestion.MsPowerPointDecoder);
+    }
+
+    private void ConfigurePipelineArtifactCache(IKernelMemoryBuilder builder)
+    {
+        if (this._memoryConfiguration.DataIngestion.ArtifactCache is { Enabled: true })
+        {
+            this._memoryConfiguration.DataIngestion.ArtifactCache.Validate();
+            builder.WithPipelineArtifactCache(this._memoryConfiguration.DataIngestion.ArtifactCache);
+        }
+    }
+
+    private void ConfigureAIRateLimiting(IKernelMemoryBuilder builder)
+    {
+        AdaptiveRateLimiterConfig config = this._memoryConfiguration.AIRateLimiting;
+        if (!config.Enabled) { return; }
+
+        builder.WithAdaptiveRateLimiting(config);
+
+        // Report throttling also for the requests retried by the AI clients. The clients handle timeouts.
+        this._aiHttpClient = new HttpClient(new ThrottlingSignalHttpHandler()) { Timeout = Timeout.InfiniteTimeSpan };
+    }
+
     private void ConfigureMimeTypeDetectionDependency(IKernelMemoryBuilder builder)
     {
         builder.WithDefaultMimeTypeDetection();
@@ -213,20 +257,24 @@ internal sealed class ServiceConfiguration
                 case string x when x.Equals("AzureOpenAI", StringComparison.OrdinalIgnoreCase):
                 case string y when y.Equals("AzureOpenAIEmbedding", StringComparison.OrdinalIgnoreCase):
                 {
+                    var config = this.GetServiceConfig<AzureOpenAIConfig>("AzureOpenAIEmbedding");
                     var instance = this.GetServiceInstance<ITextEmbeddingGenerator>(builder,
                         s => s.AddAzureOpenAIEmbeddingGeneration(
-                            config: this.GetServiceConfig<AzureOpenAIConfig>("AzureOpenAIEmbedding"),
-                            textTokenizer: new GPT4Tokenizer()));
+                            config: config,
+                            textTokenizer: new GPT4Tokenizer(),
+                            httpClient: this._aiHttpClient));
                     builder.AddIngestionEmbeddingGenerator(instance);
                     break;
                 }
 
                 case string x when x.Equals("OpenAI", StringComparison.OrdinalIgnoreCase):
                 {
+                    var config = this.GetServiceConfig<OpenAIConfig>("OpenAI");
                     var instance = this.GetServiceInstance<ITextEmbeddingGenerator>(builder,
                         s => s.AddOpenAITextEmbeddingGeneration(
-                            config: this.GetServiceConfig<OpenAIConfig>("OpenAI"),
-                            textTokenizer: new GPT4Tokenizer()));
+                            config: config,
+                            textTokenizer: new GPT4Tokenizer(),
+                            httpClient: this._aiHttpClient));
                     builder.AddIngestionEmbeddingGenerator(instance);
                     break;
                 }
@@ -236,105 +284,101 @@ internal sealed class ServiceConfiguration
                     break;
             }
         }
+
+        // Cache the embeddings of partitions, to avoid embedding again unchanged chunks
+        EmbeddingCacheConfig cacheConfig = this._memoryConfiguration.DataIngestion.EmbeddingCache;
+        if (cacheConfig.Enabled) { builder.WithPartitionEmbeddingCache(cacheConfig); }
     }
 
     private void ConfigureIngestionMemoryDb(IKernelMemoryBuilder builder)
     {
         foreach (var type in this._memoryConfiguration.DataIngestion.MemoryDbTypes)
         {
-            switch (type)
-            {
-                default:
-                    throw new ConfigurationException(
-                        $"Unknown Memory DB option '{type}'. " +
-                        "To use a custom Memory DB, set the configuration value to an empty string, " +
-                        "and inject the custom implementation using `IKernelMemoryBuilder.WithCustomMemoryDb(...)`");
+            // NOOP - allow custom implementations, via WithCustomMemoryDb()
+            if (type == "") { continue; }
 
-                case "":
-                    // NOOP - allow custom implementations, via WithCustomMemoryDb()
-                    break;
+            builder.AddIngestionMemoryDb(this.GetMemoryDbInstance(builder, type));
+        }
+    }
 
-                case string x when x.Equals("AzureAISearch", StringComparison.OrdinalIgnoreCase):
-                {
-                    var instance = this.GetServiceInstance<IMemoryDb>(builder,
-                        s => s.AddAzureAISearchAsMemoryDb(this.GetServiceConfig<AzureAISearchConfig>("AzureAISearch"))
-                    );
-                    builder.AddIngestionMemoryDb(instance);
-                    break;
-                }
+    private IMemoryDb GetMemoryDbInstance(IKernelMemoryBuilder builder, string type)
+    {
+        if (!this._memoryDbInstances.TryGetValue(type, out IMemoryDb? memoryDb))
+        {
+            memoryDb = this.CreateMemoryDbInstance(builder, type);
+            this._memoryDbInstances[type] = memoryDb;
+        }
 
-                case string x when x.Equals("Elasticsearch", StringComparison.OrdinalIgnoreCase):
-                {
-                    var instance = this.GetServiceInstance<IMemoryDb>(builder,
-                        s => s.AddElasticsearchAsMemoryDb(this.GetServiceConfig<ElasticsearchConfig>("Elasticsearch"))
-                    );
-                    builder.AddIngestionMemoryDb(instance);
-                    break;
-                }
+        return memoryDb;
+    }
 
-                case string x when x.Equals("MongoDbAtlas", StringComparison.OrdinalIgnoreCase):
-                {
-                    var instance = this.GetServiceInstance<IMemoryDb>(builder,
-                        s => s.AddMongoDbAtlasAsMemoryDb(this.GetServiceConfig<MongoDbAtlasConfig>("MongoDbAtlas"))
-                    );
-                    builder.AddIngestionMemoryDb(instance);
-                    break;
-                }
+    private IMemoryDb CreateMemoryDbInstance(IKernelMemoryBuilder builder, string type)
+    {
+        switch (type)
+        {
+            default:
+                throw new ConfigurationException(
+                    $"Unknown Memory DB option '{type}'. " +
+                    "To use a custom Memory DB, set the configuration value to an empty string, " +
+                    "and inject the custom implementation using `IKernelMemoryBuilder.WithCustomMemoryDb(...)`");
 
-                case string x when x.Equals("Postgres", StringComparison.OrdinalIgnoreCase):
-                {
-                    var instance = this.GetServiceInstance<IMemoryDb>(builder,
-                        s => s.AddPostgresAsMemoryDb(this.GetServiceConfig<PostgresConfig>("Postgres"))
-                    );
-                    builder.AddIngestionMemoryDb(instance);
-                    break;
-                }
+            case string x when x.Equals("FanOut", StringComparison.OrdinalIgnoreCase):
+            {
+                // Combine the memory DBs listed in the fan out settings, or else the ingestion memory DBs
+                var config = this.GetServiceConfig<FanOutMemoryDbConfig>("FanOut");
+                List<string> types = config.MemoryDbTypes.Count > 0 ? config.MemoryDbTypes : this._memoryConfiguration.DataIngestion.MemoryDbTypes;
+                List<IMemoryDb> memoryDbs = types
+                    .Where(t => t != "" && !t.Equals("FanOut", StringComparison.OrdinalIgnoreCase))
+                    .Select(t => this.GetMemoryDbInstance(builder, t))
+                    .ToList();
+
+                return this.GetServiceInstance<IMemoryDb>(builder, s => s.AddFanOutAsMemoryDb(memoryDbs, config));
+            }
 
-                case string x when x.Equals("Qdrant", StringComparison.OrdinalIgnoreCase):
-                {
-                    var instance = this.GetServiceInstance<IMemoryDb>(builder,
-                        s => s.AddQdrantAsMemoryDb(this.GetServiceConfig<QdrantConfig>("Qdrant"))
-                    );
-                    builder.AddIngestionMemoryDb(instance);
-                    break;
-                }
+            case string x when x.Equals("AzureAISearch", StringComparison.OrdinalIgnoreCase):
+                return this.GetServiceInstance<IMemoryDb>(builder,
+                    s => s.AddAzureAISearchAsMemoryDb(this.GetServiceConfig<AzureAISearchConfig>("AzureAISearch"))
+                );
 
-                case string x when x.Equals("Redis", StringComparison.OrdinalIgnoreCase):
-                {
-                    var instance = this.GetServiceInstance<IMemoryDb>(builder,
-                        s => s.AddRedisAsMemoryDb(this.GetServiceConfig<RedisConfig>("Redis"))
-                    );
-                    builder.AddIngestionMemoryDb(instance);
-                    break;
-                }
+            case string x when x.Equals("Elasticsearch", StringComparison.OrdinalIgnoreCase):
+                return this.GetServiceInstance<IMemoryDb>(builder,
+                    s => s.AddElasticsearchAsMemoryDb(this.GetServiceConfig<ElasticsearchConfig>("Elasticsearch"))
+                );
 
-                case string x when x.Equals("SimpleVectorDb", StringComparison.OrdinalIgnoreCase):
-                {
-                    var instance = this.GetServiceInstance<IMemoryDb>(builder,
-                        s => s.AddSimpleVectorDbAsMemoryDb(this.GetServiceConfig<SimpleVectorDbConfig>("SimpleVectorDb"))
-                    );
-                    builder.AddIngestionMemoryDb(instance);
-                    break;
-                }
+            case string x when x.Equals("MongoDbAtlas", StringComparison.OrdinalIgnoreCase):
+                return this.GetServiceInstance<IMemoryDb>(builder,
+                    s => s.AddMongoDbAtlasAsMemoryDb(this.GetServiceConfig<MongoDbAtlasConfig>("MongoDbAtlas"))
+                );
 
-                case string x when x.Equals("SimpleTextDb", StringComparison.OrdinalIgnoreCase):
-                {
-                    var instance = this.GetServiceInstance<IMemoryDb>(builder,
-                        s => s.AddSimpleTextDbAsMemoryDb(this.GetServiceConfig<SimpleTextDbConfig>("SimpleTextDb"))
-                    );
-                    builder.AddIngestionMemoryDb(instance);
-                    break;
-                }
+            case string x when x.Equals("Postgres", StringComparison.OrdinalIgnoreCase):
+                return this.GetServiceInstance<IMemoryDb>(builder,
+                    s => s.AddPostgresAsMemoryDb(this.GetServiceConfig<PostgresConfig>("Postgres"))
+                );
 
-                case string x when x.Equals("SqlServer", StringComparison.OrdinalIgnoreCase):
-                {
-                    var instance = this.GetServiceInstance<IMemoryDb>(builder,
-                        s => s.AddSqlServerAsMemoryDb(this.GetServiceConfig<SqlServerConfig>("SqlServer"))
-                    );
-                    builder.AddIngestionMemoryDb(instance);
-                    break;
-                }
-            }
+            case string x when x.Equals("Qdrant", StringComparison.OrdinalIgnoreCase):
+                return this.GetServiceInstance<IMemoryDb>(builder,
+                    s => s.AddQdrantAsMemoryDb(this.GetServiceConfig<QdrantConfig>("Qdrant"))
+                );
+
+            case string x when x.Equals("Redis", StringComparison.OrdinalIgnoreCase):
+                return this.GetServiceInstance<IMemoryDb>(builder,
+                    s => s.AddRedisAsMemoryDb(this.GetServiceConfig<RedisConfig>("Redis"))
+                );
+
+            case string x when x.Equals("SimpleVectorDb", StringComparison.OrdinalIgnoreCase):
+                return this.GetServiceInstance<IMemoryDb>(builder,
+                    s => s.AddSimpleVectorDbAsMemoryDb(this.GetServiceConfig<SimpleVectorDbConfig>("SimpleVectorDb"))
+                );
+
+            case string x when x.Equals("SimpleTextDb", StringComparison.OrdinalIgnoreCase):
+                return this.GetServiceInstance<IMemoryDb>(builder,
+                    s => s.AddSimpleTextDbAsMemoryDb(this.GetServiceConfig<SimpleTextDbConfig>("SimpleTextDb"))
+                );
+
+            case string x when x.Equals("SqlServer", StringComparison.OrdinalIgnoreCase):
+                return this.GetServiceInstance<IMemoryDb>(builder,
+                    s => s.AddSqlServerAsMemoryDb(this.GetServiceConfig<SqlServerConfig>("SqlServer"))
+                );
         }
     }
 
@@ -351,21 +395,33 @@ internal sealed class ServiceConfiguration
         {
             case string x when x.Equals("AzureOpenAI", StringComparison.OrdinalIgnoreCase):
             case string y when y.Equals("AzureOpenAIEmbedding", StringComparison.OrdinalIgnoreCase):
+            {
+                var config = this.GetServiceConfig<AzureOpenAIConfig>("AzureOpenAIEmbedding");
                 builder.Services.AddAzureOpenAIEmbeddingGeneration(
-                    config: this.GetServiceConfig<AzureOpenAIConfig>("AzureOpenAIEmbedding"),
-                    textTokenizer: new GPT4Tokenizer());
+                    config: config,
+                    textTokenizer: new GPT4Tokenizer(),
+                    httpClient: this._aiHttpClient);
                 break;
+            }
 
             case string x when x.Equals("OpenAI", StringComparison.OrdinalIgnoreCase):
+            {
+                var config = this.GetServiceConfig<OpenAIConfig>("OpenAI");
                 builder.Services.AddOpenAITextEmbeddingGeneration(
-                    config: this.GetServiceConfig<OpenAIConfig>("OpenAI"),
-                    textTokenizer: new GPT4Tokenizer());
+                    config: config,
+                    textTokenizer: new GPT4Tokenizer(),
+                    httpClient: this._aiHttpClient);
                 break;
+            }
 
             default:
                 // NOOP - allow custom implementations, via WithCustomEmbeddingGeneration()
                 break;
         }
+
+        // Cache the embeddings of questions and searches
+        EmbeddingCacheConfig cacheConfig = this._memoryConfiguration.Retrieval.EmbeddingCache;
+        if (cacheConfig.Enabled) { builder.WithEmbeddingCache(cacheConfig); }
     }
 
     private void ConfigureRetrievalMemoryDb(IKernelMemoryBuilder builder)
@@ -409,6 +465,10 @@ internal sealed class ServiceConfiguration
                 builder.Services.AddSqlServerAsMemoryDb(this.GetServiceConfig<SqlServerConfig>("SqlServer"));
                 break;
 
+            case string x when x.Equals("FanOut", StringComparison.OrdinalIgnoreCase):
+                builder.Services.AddSingleton<IMemoryDb>(this.GetMemoryDbInstance(builder, x));
+                break;
+
             default:
                 // NOOP - allow custom implementations, via WithCustomMemoryDb()
                 break;
@@ -424,13 +484,15 @@ internal sealed class ServiceConfiguration
             case string y when y.Equals("AzureOpenAIText", StringComparison.OrdinalIgnoreCase):
                 builder.Services.AddAzureOpenAITextGeneration(
                     config: this.GetServiceConfig<AzureOpenAIConfig>("AzureOpenAIText"),
-                    textTokenizer: new GPT4Tokenizer());
+                    textTokenizer: new GPT4Tokenizer(),
+                    httpClient: this._aiHttpClient);
                 break;
 
             case string x when x.Equals("OpenAI", StringComparison.OrdinalIgnoreCase):
                 builder.Services.AddOpenAITextGeneration(
                     config: this.GetServiceConfig<OpenAIConfig>("OpenAI"),
-                    textTokenizer: new GPT4Tokenizer());
+                    textTokenizer: new GPT4Tokenizer(),
+                    httpClient: this._aiHttpClient);
                 break;
 
             case string x when x.Equals("Anthropic", StringComparison.OrdinalIgnoreCase):
@@ -0,0 +1,69 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Diagnostics;
+using System.IO;
+using System.Linq;
+using System.Threading.Tasks;
+using Microsoft.Extensions.Logging.Abstractions;
+using Microsoft.KernelMemory;
+using Microsoft.KernelMemory.AI;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.AI;
+
+public sealed class EmbeddingCacheTest : IDisposable
+{
+    private readonly string _directory = Path.Join(Path.GetTempPath(), "km-embedding-cache-" + Guid.NewGuid().ToString("N"));
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItReusesTheEmbeddingsStoredOnDisk()
+    {
+        // Arrange
+        string key = EmbeddingCache.GetKey("model", "some text");
+        await this.Cache().SetAsync(key, new Embedding(new[] { 0.5f, -1f, 2f }));
+
+        // Act: a new instance, with nothing in memory
+        var cache = this.Cache();
+        Embedding? embedding = await cache.GetAsync(key);
+
+        // Assert
+        Assert.NotNull(embedding);
+        Assert.Equal("0.5,-1,2", string.Join(",", embedding.Value.Data.ToArray()));
+        Assert.Equal(1, cache.Hits);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItRemovesTheStaleTemporaryFiles()
+    {
+        // Arrange: a temporary file left behind by a write that didn't complete, and one being written
+        Directory.CreateDirectory(this._directory);
+        string stale = Path.Join(this._directory, "A1.emb.0001.tmp");
+        string recent = Path.Join(this._directory, "A2.emb.0002.tmp");
+        await File.WriteAllBytesAsync(stale, new byte[4]);
+        await File.WriteAllBytesAsync(recent, new byte[4]);
+        File.SetLastWriteTimeUtc(stale, DateTime.UtcNow.AddDays(-1));
+
+        // Act: the first write starts the cleanup, in the background
+        await this.Cache().SetAsync(EmbeddingCache.GetKey("model", "some text"), new Embedding(new[] { 1f }));
+        var watch = Stopwatch.StartNew();
+        while (File.Exists(stale) && watch.Elapsed < TimeSpan.FromSeconds(10)) { await Task.Delay(10); }
+
+        // Assert
+        Assert.False(File.Exists(stale));
+        Assert.True(File.Exists(recent));
+        Assert.Single(Directory.GetFiles(this._directory, "*.emb"));
+    }
+
+    public void Dispose()
+    {
+        if (Directory.Exists(this._directory)) { Directory.Delete(this._directory, recursive: true); }
+    }
+
+    private EmbeddingCache Cache()
+    {
+        return new EmbeddingCache("test", new EmbeddingCacheConfig { Directory = this._directory }, NullLogger.Instance);
+    }
+}
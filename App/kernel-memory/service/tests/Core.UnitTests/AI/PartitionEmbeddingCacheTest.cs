@@ -0,0 +1,46 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Threading.Tasks;
+using Microsoft.KernelMemory;
+using Microsoft.KernelMemory.AI;
+using Microsoft.KM.Core.UnitTests.Fakes;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.AI;
+
+public class PartitionEmbeddingCacheTest
+{
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItKeysTheEmbeddingsByTheModelOfEachGenerator()
+    {
+        // Arrange
+        var cache = new PartitionEmbeddingCache(new EmbeddingCacheConfig());
+        var small = new FakeEmbeddingGenerator(modelId: "small");
+        var large = new FakeEmbeddingGenerator(modelId: "large");
+        await cache.SetAsync(small, "some text", new Embedding(new[] { 1f }));
+
+        // Act
+        Embedding? sameModel = await cache.GetAsync(new FakeEmbeddingGenerator(modelId: "small"), "some text");
+        Embedding? otherModel = await cache.GetAsync(large, "some text");
+
+        // Assert
+        Assert.NotNull(sameModel);
+        Assert.Null(otherModel);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItPrefersTheModelSetInTheConfig()
+    {
+        // Arrange
+        var cache = new PartitionEmbeddingCache(new EmbeddingCacheConfig { ModelId = "shared" });
+        await cache.SetAsync(new FakeEmbeddingGenerator(modelId: "small"), "some text", new Embedding(new[] { 1f }));
+
+        // Act
+        Embedding? embedding = await cache.GetAsync(new FakeEmbeddingGenerator(modelId: "large"), "some text");
+
+        // Assert
+        Assert.NotNull(embedding);
+    }
+}
@@ -0,0 +1,141 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Threading;
+using System.Threading.Tasks;
+using Microsoft.KernelMemory.DataFormats;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.DataFormats;
+
+public class ParallelPageExtractorTest
+{
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItReturnsThePagesInOrder()
+    {
+        // Arrange: later pages are faster to extract
+        var document = new FakeDocument();
+        var copies = new List<FakeDocument>();
+        var config = new ParallelExtractionConfig { MaxDegreeOfParallelism = 4, PagesPerRange = 2 };
+
+        // Act
+        List<string> pages = await ExtractAsync(document, 10, () => Open(copies), (doc, page) =>
+        {
+            Thread.Sleep(10 - page);
+            return new FileSection(page + 1, $"p{page + 1}", true);
+        }, config);
+
+        // Assert
+        Assert.Equal("p1,p2,p3,p4,p5,p6,p7,p8,p9,p10", string.Join(",", pages));
+        Assert.Equal(3, copies.Count);
+        Assert.True(copies.TrueForAll(x => x.Disposed));
+        Assert.False(document.Disposed);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItSkipsTheEmptyPages()
+    {
+        // Arrange
+        var config = new ParallelExtractionConfig { MaxDegreeOfParallelism = 2, PagesPerRange = 1 };
+
+        // Act
+        List<string> pages = await ExtractAsync(new FakeDocument(), 5, () => new FakeDocument(),
+            (doc, page) => page % 2 == 0 ? new FileSection(page + 1, $"p{page + 1}", true) : null, config);
+
+        // Assert
+        Assert.Equal("p1,p3,p5", string.Join(",", pages));
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItCapsThePagesExtractedAhead()
+    {
+        // Arrange
+        int extracted = 0;
+        int maxAhead = 0;
+        var config = new ParallelExtractionConfig { MaxDegreeOfParallelism = 4, PagesPerRange = 1, MaxBufferedPages = 3 };
+
+        // Act: count the pages extracted but not returned yet
+        int returned = 0;
+        await foreach (FileSection _ in ParallelPageExtractor.ExtractAsync(new FakeDocument(), 20, () => new FakeDocument(), (doc, page) =>
+                       {
+                           int ahead = Interlocked.Increment(ref extracted) - Volatile.Read(ref returned);
+                           InterlockedMax(ref maxAhead, ahead);
+                           return new FileSection(page + 1, "text", true);
+                       }, config))
+        {
+            Interlocked.Increment(ref returned);
+            await Task.Delay(1);
+        }
+
+        // Assert
+        Assert.Equal(20, returned);
+        // The next page is allowed to start just before returning a page, i.e. before it's counted
+        Assert.True(maxAhead <= config.MaxBufferedPages + 1, $"{maxAhead} pages extracted ahead");
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItStopsAtTheFirstError()
+    {
+        // Arrange
+        var copies = new List<FakeDocument>();
+        var config = new ParallelExtractionConfig { MaxDegreeOfParallelism = 3, PagesPerRange = 2 };
+
+        // Act
+        var e = await Assert.ThrowsAsync<InvalidOperationException>(() => ExtractAsync(new FakeDocument(), 12, () => Open(copies), (doc, page) =>
+            page == 5 ? throw new InvalidOperationException("page 6") : new FileSection(page + 1, "text", true), config));
+
+        // Assert
+        Assert.Equal("page 6", e.Message);
+        Assert.True(copies.TrueForAll(x => x.Disposed));
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItRejectsInvalidSettings()
+    {
+        Assert.Throws<Microsoft.KernelMemory.ConfigurationException>(() => new ParallelExtractionConfig { PagesPerRange = 0 }.Validate());
+        Assert.Throws<Microsoft.KernelMemory.ConfigurationException>(() => new ParallelExtractionConfig { MaxDegreeOfParallelism = 0 }.Validate());
+        Assert.Throws<Microsoft.KernelMemory.ConfigurationException>(() => new ParallelExtractionConfig { MaxBufferedPages = 0 }.Validate());
+    }
+
+    private static async Task<List<string>> ExtractAsync(
+        FakeDocument document, int pageCount, Func<FakeDocument> open, Func<FakeDocument, int, FileSection?> extract, ParallelExtractionConfig config)
+    {
+        var result = new List<string>();
+        await foreach (FileSection section in ParallelPageExtractor.ExtractAsync(document, pageCount, open, extract, config))
+        {
+            result.Add(section.Content);
+        }
+
+        return result;
+    }
+
+    private static FakeDocument Open(List<FakeDocument> copies)
+    {
+        var copy = new FakeDocument();
+        lock (copies) { copies.Add(copy); }
+
+        return copy;
+    }
+
+    private static void InterlockedMax(ref int target, int value)
+    {
+        int current;
+        while (value > (current = Volatile.Read(ref target)) && Interlocked.CompareExchange(ref target, value, current) != current) { }
+    }
+
+    private sealed class FakeDocument : IDisposable
+    {
+        public bool Disposed { get; private set; }
+
+        public void Dispose()
+        {
+            this.Disposed = true;
+        }
+    }
+}
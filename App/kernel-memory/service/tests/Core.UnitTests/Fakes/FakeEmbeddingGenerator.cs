@@ -0,0 +1,66 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Threading;
+using System.Threading.Tasks;
+using Microsoft.KernelMemory;
+using Microsoft.KernelMemory.AI;
+
+namespace Microsoft.KM.Core.UnitTests.Fakes;
+
+/// <summary>
+/// Deterministic embedding generator: each word increments one of the vector dimensions,
+/// so texts sharing words are similar. Tokens are the words of the text.
+/// </summary>
+internal sealed class FakeEmbeddingGenerator : ITextEmbeddingGenerator, ITextEmbeddingModelInfo
+{
+    private readonly int _dimensions;
+
+    public FakeEmbeddingGenerator(int dimensions = 32, int maxTokens = 8192, string modelId = "")
+    {
+        this._dimensions = dimensions;
+        this.MaxTokens = maxTokens;
+        this.ModelId = modelId;
+    }
+
+    public int MaxTokens { get; }
+
+    public string ModelId { get; }
+
+    public int CountTokens(string text)
+    {
+        return this.GetTokens(text).Count;
+    }
+
+    public IReadOnlyList<string> GetTokens(string text)
+    {
+        return text.Split(' ', StringSplitOptions.RemoveEmptyEntries);
+    }
+
+    public Task<Embedding> GenerateEmbeddingAsync(string text, CancellationToken cancellationToken = default)
+    {
+        var vector = new float[this._dimensions];
+        foreach (string word in this.GetTokens(text.ToUpperInvariant()))
+        {
+            vector[(int)((uint)StableHash(word) % this._dimensions)] += 1;
+        }
+
+        if (vector.All(x => x == 0)) { vector[0] = 1; }
+
+        return Task.FromResult(new Embedding(vector));
+    }
+
+    // string.GetHashCode is randomized per process
+    private static int StableHash(string value)
+    {
+        unchecked
+        {
+            int hash = 17;
+            foreach (char c in value) { hash = (hash * 31) + c; }
+
+            return hash;
+        }
+    }
+}
@@ -0,0 +1,80 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+using System.Linq;
+using Microsoft.KernelMemory.Handlers;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.Handlers;
+
+public class EmbeddingBatcherTest
+{
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItInterleavesTheDocuments()
+    {
+        // Arrange
+        var items = new[] { ("a", 1, "a1"), ("a", 1, "a2"), ("a", 1, "a3"), ("b", 1, "b1"), ("b", 1, "b2") };
+
+        // Act
+        var batches = CreateBatches(items, maxItems: 2, maxTokens: 100);
+
+        // Assert
+        Assert.Equal("a1,b1|a2,b2|a3", Describe(batches));
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItFillsTheGapsLeftByLargeItems()
+    {
+        // Arrange
+        var items = new[] { ("a", 6, "a1"), ("a", 6, "a2"), ("a", 3, "a3"), ("a", 3, "a4"), ("a", 1, "a5") };
+
+        // Act
+        var batches = CreateBatches(items, maxItems: 10, maxTokens: 10);
+
+        // Assert
+        Assert.Equal("a1,a3,a5|a2,a4", Describe(batches));
+        Assert.Equal("10,9", string.Join(",", batches.Select(b => b.Tokens)));
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItSendsTheItemsLargerThanTheLimitAlone()
+    {
+        // Arrange
+        var items = new[] { ("a", 2, "a1"), ("a", 15, "a2"), ("a", 2, "a3") };
+
+        // Act
+        var batches = CreateBatches(items, maxItems: 10, maxTokens: 10);
+
+        // Assert
+        Assert.Equal("a1,a3|a2", Describe(batches));
+        Assert.Equal("4,15", string.Join(",", batches.Select(b => b.Tokens)));
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItLimitsTheNumberOfItems()
+    {
+        // Arrange
+        var items = Enumerable.Range(1, 7).Select(i => ("a", 1, $"a{i}")).ToArray();
+
+        // Act
+        var batches = CreateBatches(items, maxItems: 3, maxTokens: 100);
+
+        // Assert
+        Assert.Equal("a1,a2,a3|a4,a5,a6|a7", Describe(batches));
+    }
+
+    private static List<((string Doc, int Tokens, string Name)[] Items, int Tokens)> CreateBatches(
+        (string Doc, int Tokens, string Name)[] items, int maxItems, int maxTokens)
+    {
+        return EmbeddingBatcher.CreateBatches(items, x => x.Tokens, x => x.Doc, maxItems, maxTokens);
+    }
+
+    private static string Describe(List<((string Doc, int Tokens, string Name)[] Items, int Tokens)> batches)
+    {
+        return string.Join("|", batches.Select(b => string.Join(",", b.Items.Select(x => x.Name))));
+    }
+}
@@ -0,0 +1,114 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Threading;
+using System.Threading.Tasks;
+using Microsoft.KernelMemory;
+using Microsoft.KernelMemory.FileSystem.DevTools;
+using Microsoft.KernelMemory.MemoryStorage;
+using Microsoft.KernelMemory.MemoryStorage.DevTools;
+using Microsoft.KernelMemory.MemoryStorage.FanOut;
+using Microsoft.KM.Core.UnitTests.Fakes;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.MemoryStorage;
+
+public sealed class FanOutMemoryDbTest : IDisposable
+{
+    private const string Index = "test";
+
+    private readonly FakeEmbeddingGenerator _embeddingGenerator = new();
+    private readonly List<SimpleVectorDb> _memoryDbs = new();
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItSearchesKeywordsOnTheReplicasSupportingIt()
+    {
+        // Arrange
+        FanOutMemoryDb db = FanOutMemoryDb.Create(new IMemoryDb[] { new VectorOnlyMemoryDb(this.NewSimpleVectorDb()), this.NewSimpleVectorDb() });
+        await db.CreateIndexAsync(Index, 32);
+        await db.UpsertAsync(Index, await this.RecordAsync("r1", "red apples"));
+
+        // Act: the first replica is skipped, reads rotate only across the replicas supporting keyword search
+        var keywordSearch = Assert.IsAssignableFrom<IMemoryDbKeywordSearch>(db);
+        var first = await keywordSearch.GetKeywordMatchesAsync(Index, "apples", limit: 10).ToListAsync();
+        var second = await keywordSearch.GetKeywordMatchesAsync(Index, "apples", limit: 10).ToListAsync();
+
+        // Assert
+        Assert.Equal("r1", Assert.Single(first).Item1.Id);
+        Assert.Equal("r1", Assert.Single(second).Item1.Id);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItSupportsKeywordSearchOnlyWhenTheMemoryDbsSupportIt()
+    {
+        // Arrange
+        IMemoryDb vectorOnly = new VectorOnlyMemoryDb(this.NewSimpleVectorDb());
+        IMemoryDb withKeywords = this.NewSimpleVectorDb();
+        var shards = new FanOutMemoryDbConfig { Mode = FanOutMode.Shards };
+
+        // Act + Assert: at least one replica, or all the shards
+        Assert.IsAssignableFrom<IMemoryDbKeywordSearch>(FanOutMemoryDb.Create(new[] { vectorOnly, withKeywords }));
+        Assert.False(FanOutMemoryDb.Create(new[] { vectorOnly, vectorOnly }) is IMemoryDbKeywordSearch);
+        Assert.IsAssignableFrom<IMemoryDbKeywordSearch>(FanOutMemoryDb.Create(new[] { withKeywords, withKeywords }, shards));
+        Assert.False(FanOutMemoryDb.Create(new[] { vectorOnly, withKeywords }, shards) is IMemoryDbKeywordSearch);
+        Assert.False(new FanOutMemoryDb(new[] { withKeywords }) is IMemoryDbKeywordSearch);
+    }
+
+    public void Dispose()
+    {
+        foreach (SimpleVectorDb db in this._memoryDbs) { db.Dispose(); }
+    }
+
+    private SimpleVectorDb NewSimpleVectorDb()
+    {
+        var config = new SimpleVectorDbConfig { StorageType = FileSystemTypes.Volatile, Directory = "fan-out-" + Guid.NewGuid().ToString("N") };
+        var db = new SimpleVectorDb(config, this._embeddingGenerator);
+        this._memoryDbs.Add(db);
+        return db;
+    }
+
+    private async Task<MemoryRecord> RecordAsync(string id, string text)
+    {
+        var record = new MemoryRecord { Id = id, Vector = await this._embeddingGenerator.GenerateEmbeddingAsync(text) };
+        record.Payload[Constants.ReservedPayloadTextField] = text;
+        return record;
+    }
+
+    // Memory DB without keyword search
+    private sealed class VectorOnlyMemoryDb : IMemoryDb
+    {
+        private readonly IMemoryDb _db;
+
+        public VectorOnlyMemoryDb(IMemoryDb db)
+        {
+            this._db = db;
+        }
+
+        public Task CreateIndexAsync(string index, int vectorSize, CancellationToken cancellationToken = default)
+            => this._db.CreateIndexAsync(index, vectorSize, cancellationToken);
+
+        public Task<IEnumerable<string>> GetIndexesAsync(CancellationToken cancellationToken = default)
+            => this._db.GetIndexesAsync(cancellationToken);
+
+        public Task DeleteIndexAsync(string index, CancellationToken cancellationToken = default)
+            => this._db.DeleteIndexAsync(index, cancellationToken);
+
+        public Task<string> UpsertAsync(string index, MemoryRecord record, CancellationToken cancellationToken = default)
+            => this._db.UpsertAsync(index, record, cancellationToken);
+
+        public IAsyncEnumerable<(MemoryRecord, double)> GetSimilarListAsync(string index, string text, ICollection<MemoryFilter>? filters = null,
+            double minRelevance = 0, int limit = 1, bool withEmbeddings = false, CancellationToken cancellationToken = default)
+            => this._db.GetSimilarListAsync(index, text, filters, minRelevance, limit, withEmbeddings, cancellationToken);
+
+        public IAsyncEnumerable<MemoryRecord> GetListAsync(string index, ICollection<MemoryFilter>? filters = null,
+            int limit = 1, bool withEmbeddings = false, CancellationToken cancellationToken = default)
+            => this._db.GetListAsync(index, filters, limit, withEmbeddings, cancellationToken);
+
+        public Task DeleteAsync(string index, MemoryRecord record, CancellationToken cancellationToken = default)
+            => this._db.DeleteAsync(index, record, cancellationToken);
+    }
+}
@@ -0,0 +1,105 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+using System.Threading.Tasks;
+using Microsoft.KernelMemory;
+using Microsoft.KernelMemory.FileSystem.DevTools;
+using Microsoft.KernelMemory.MemoryStorage;
+using Microsoft.KernelMemory.MemoryStorage.DevTools;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.MemoryStorage;
+
+public sealed class SimpleTextDbTest : IDisposable
+{
+    private const string Index = "test";
+
+    private readonly string _directory = Path.Join(Path.GetTempPath(), "km-simple-text-db-" + Guid.NewGuid().ToString("N"));
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItSharesTheIndexWithTheInstancesUsingTheSameDirectory()
+    {
+        // Arrange: the retrieval instance loads the index before the ingestion instance writes to it
+        using var ingestion = new SimpleTextDb(this.Config(FileSystemTypes.Volatile));
+        using var retrieval = new SimpleTextDb(this.Config(FileSystemTypes.Volatile));
+        await ingestion.CreateIndexAsync(Index, 0);
+        await ingestion.UpsertAsync(Index, Record("r1", "red apples", "1"));
+        Assert.Single(await retrieval.GetListAsync(Index, limit: 10).ToListAsync());
+
+        // Act
+        await ingestion.UpsertAsync(Index, Record("r2", "green pears", "1"));
+        await ingestion.DeleteAsync(Index, new MemoryRecord { Id = "r1" });
+
+        // Assert
+        var found = await retrieval.GetSimilarListAsync(Index, "pears", limit: 10).ToListAsync();
+        Assert.Equal("r2", Assert.Single(found).Item1.Id);
+        Assert.Empty(await retrieval.GetSimilarListAsync(Index, "apples", limit: 10).ToListAsync());
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItKeepsTheIndexUntilTheLastInstanceIsDisposed()
+    {
+        // Arrange
+        var first = new SimpleTextDb(this.Config(FileSystemTypes.Volatile));
+        using var second = new SimpleTextDb(this.Config(FileSystemTypes.Volatile));
+        await first.CreateIndexAsync(Index, 0);
+        await first.UpsertAsync(Index, Record("r1", "red apples", "1"));
+
+        // Act
+        first.Dispose();
+        first.Dispose();
+
+        // Assert
+        Assert.Single(await second.GetSimilarListAsync(Index, "apples", limit: 10).ToListAsync());
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItIndexesAgainTheRecordsUpdatedAfterTheSnapshot()
+    {
+        // Arrange: the snapshot is written with the first version of the record...
+        using (var db = new SimpleTextDb(this.Config(FileSystemTypes.Disk, snapshotInterval: 1)))
+        {
+            await db.UpsertAsync(Index, Record("r1", "red apples", "1"));
+        }
+
+        // ...and the record is updated without a new snapshot, e.g. before a crash
+        using (var db = new SimpleTextDb(this.Config(FileSystemTypes.Disk)))
+        {
+            await db.UpsertAsync(Index, Record("r1", "green pears", "2"));
+        }
+
+        // Act
+        using var restarted = new SimpleTextDb(this.Config(FileSystemTypes.Disk));
+        var byTag = await restarted.GetListAsync(Index, new List<MemoryFilter> { MemoryFilters.ByTag("version", "2") }, limit: 10).ToListAsync();
+        var byNewText = await restarted.GetSimilarListAsync(Index, "pears", limit: 10).ToListAsync();
+        var byOldText = await restarted.GetSimilarListAsync(Index, "apples", limit: 10).ToListAsync();
+
+        // Assert
+        Assert.Equal("r1", Assert.Single(byTag).Id);
+        Assert.Equal("r1", Assert.Single(byNewText).Item1.Id);
+        Assert.Empty(byOldText);
+    }
+
+    public void Dispose()
+    {
+        if (Directory.Exists(this._directory)) { Directory.Delete(this._directory, recursive: true); }
+    }
+
+    private SimpleTextDbConfig Config(FileSystemTypes storageType, int snapshotInterval = 1000)
+    {
+        return new SimpleTextDbConfig { StorageType = storageType, Directory = this._directory, SnapshotInterval = snapshotInterval };
+    }
+
+    private static MemoryRecord Record(string id, string text, string version)
+    {
+        var record = new MemoryRecord { Id = id, Tags = new TagCollection { { "version", version } } };
+        record.Payload[Constants.ReservedPayloadTextField] = text;
+        return record;
+    }
+}
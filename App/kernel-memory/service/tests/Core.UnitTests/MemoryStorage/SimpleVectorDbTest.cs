@@ -0,0 +1,165 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+using System.Text;
+using System.Text.Json;
+using System.Threading.Tasks;
+using Microsoft.KM.Core.UnitTests.Fakes;
+using Microsoft.KernelMemory;
+using Microsoft.KernelMemory.AI;
+using Microsoft.KernelMemory.FileSystem.DevTools;
+using Microsoft.KernelMemory.MemoryStorage;
+using Microsoft.KernelMemory.MemoryStorage.DevTools;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.MemoryStorage;
+
+public sealed class SimpleVectorDbTest : IDisposable
+{
+    private const string Index = "test";
+
+    private readonly FakeEmbeddingGenerator _embeddingGenerator = new();
+    private readonly string _directory = Path.Join(Path.GetTempPath(), "km-simple-vector-db-" + Guid.NewGuid().ToString("N"));
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItSharesTheIndexWithTheInstancesUsingTheSameDirectory()
+    {
+        // Arrange: the retrieval instance loads the index before the ingestion instance writes to it
+        using var ingestion = new SimpleVectorDb(this.Config(FileSystemTypes.Volatile), this._embeddingGenerator);
+        using var retrieval = new SimpleVectorDb(this.Config(FileSystemTypes.Volatile), this._embeddingGenerator);
+        await ingestion.CreateIndexAsync(Index, 32);
+        await ingestion.UpsertAsync(Index, await this.RecordAsync("r1", "red apples", "1"));
+        Assert.Single(await retrieval.GetListAsync(Index, limit: 10).ToListAsync());
+
+        // Act
+        await ingestion.UpsertAsync(Index, await this.RecordAsync("r2", "green pears", "1"));
+        await ingestion.DeleteAsync(Index, new MemoryRecord { Id = "r1" });
+
+        // Assert
+        var found = await retrieval.GetSimilarListAsync(Index, "green pears", limit: 10).ToListAsync();
+        Assert.Equal("r2", Assert.Single(found).Item1.Id);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItKeepsTheIndexUntilTheLastInstanceIsDisposed()
+    {
+        // Arrange
+        var first = new SimpleVectorDb(this.Config(FileSystemTypes.Volatile), this._embeddingGenerator);
+        using var second = new SimpleVectorDb(this.Config(FileSystemTypes.Volatile), this._embeddingGenerator);
+        await first.CreateIndexAsync(Index, 32);
+        await first.UpsertAsync(Index, await this.RecordAsync("r1", "red apples", "1"));
+
+        // Act
+        first.Dispose();
+        first.Dispose();
+
+        // Assert
+        Assert.Single(await second.GetSimilarListAsync(Index, "red apples", limit: 10).ToListAsync());
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItIndexesAgainTheRecordsUpdatedAfterTheSnapshot()
+    {
+        // Arrange: the snapshot is written with the first version of the record...
+        using (var db = new SimpleVectorDb(this.Config(FileSystemTypes.Disk, snapshotInterval: 1), this._embeddingGenerator))
+        {
+            await db.UpsertAsync(Index, await this.RecordAsync("r1", "red apples", "1"));
+        }
+
+        // ...and the record is updated without a new snapshot, e.g. before a crash
+        using (var db = new SimpleVectorDb(this.Config(FileSystemTypes.Disk), this._embeddingGenerator))
+        {
+            await db.UpsertAsync(Index, await this.RecordAsync("r1", "green pears", "2"));
+        }
+
+        // Act
+        using var restarted = new SimpleVectorDb(this.Config(FileSystemTypes.Disk), this._embeddingGenerator);
+        var byTag = await restarted.GetListAsync(Index, new List<MemoryFilter> { MemoryFilters.ByTag("version", "2") }, limit: 10).ToListAsync();
+        var oldTag = await restarted.GetListAsync(Index, new List<MemoryFilter> { MemoryFilters.ByTag("version", "1") }, limit: 10).ToListAsync();
+        var byKeyword = await restarted.GetKeywordMatchesAsync(Index, "pears", limit: 10).ToListAsync();
+
+        // Assert
+        Assert.Equal("r1", Assert.Single(byTag).Id);
+        Assert.Empty(oldTag);
+        Assert.Equal("r1", Assert.Single(byKeyword).Item1.Id);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItStoresTheVectorsOnlyInTheIndex()
+    {
+        // Arrange
+        MemoryRecord record = await this.RecordAsync("r1", "red apples", "1");
+        using (var db = new SimpleVectorDb(this.Config(FileSystemTypes.Disk), this._embeddingGenerator))
+        {
+            await db.UpsertAsync(Index, record);
+        }
+
+        // Act
+        using var restarted = new SimpleVectorDb(this.Config(FileSystemTypes.Disk), this._embeddingGenerator);
+        var found = await restarted.GetSimilarListAsync(Index, "red apples", limit: 10, withEmbeddings: true).ToListAsync();
+
+        // Assert
+        string json = await File.ReadAllTextAsync(this.RecordPath("r1"));
+        Assert.Empty(JsonSerializer.Deserialize<MemoryRecord>(json)!.Vector.Data.ToArray());
+        float[] vector = Assert.Single(found).Item1.Vector.Data.ToArray();
+        Assert.Equal(record.Vector.Length, vector.Length);
+        Assert.True(record.Vector.Data.ToArray().Zip(vector).All(x => Math.Abs(x.First - x.Second) < 1e-5));
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItMigratesTheRecordsStoredWithTheirVectorOnFirstUse()
+    {
+        // Arrange: records stored by previous versions, in two indexes
+        MemoryRecord apples = await this.RecordAsync("r1", "red apples", "1");
+        MemoryRecord pears = await this.RecordAsync("r2", "green pears", "1");
+        Directory.CreateDirectory(Path.Join(this._directory, Index));
+        Directory.CreateDirectory(Path.Join(this._directory, "other"));
+        await File.WriteAllTextAsync(this.RecordPath("r1"), JsonSerializer.Serialize(apples));
+        await File.WriteAllTextAsync(this.RecordPath("r2", "other"), JsonSerializer.Serialize(pears));
+
+        // Act
+        using var db = new SimpleVectorDb(this.Config(FileSystemTypes.Disk), this._embeddingGenerator);
+        var found = await db.GetSimilarListAsync(Index, "red apples", limit: 10).ToListAsync();
+
+        // Assert: both indexes are migrated, the vectors are dropped from the JSON files
+        Assert.Equal("r1", Assert.Single(found).Item1.Id);
+        Assert.Empty(JsonSerializer.Deserialize<MemoryRecord>(await File.ReadAllTextAsync(this.RecordPath("r1")))!.Vector.Data.ToArray());
+        Assert.Empty(JsonSerializer.Deserialize<MemoryRecord>(await File.ReadAllTextAsync(this.RecordPath("r2", "other")))!.Vector.Data.ToArray());
+        Assert.Equal("r2", Assert.Single(await db.GetSimilarListAsync("other", "green pears", limit: 10).ToListAsync()).Item1.Id);
+    }
+
+    public void Dispose()
+    {
+        if (Directory.Exists(this._directory)) { Directory.Delete(this._directory, recursive: true); }
+    }
+
+    private SimpleVectorDbConfig Config(FileSystemTypes storageType, int snapshotInterval = 1000)
+    {
+        return new SimpleVectorDbConfig { StorageType = storageType, Directory = this._directory, SnapshotInterval = snapshotInterval };
+    }
+
+    private string RecordPath(string id, string index = Index)
+    {
+        return Path.Join(this._directory, index, Convert.ToBase64String(Encoding.UTF8.GetBytes(id)).Replace('=', '_'));
+    }
+
+    private async Task<MemoryRecord> RecordAsync(string id, string text, string version)
+    {
+        var record = new MemoryRecord
+        {
+            Id = id,
+            Vector = await this._embeddingGenerator.GenerateEmbeddingAsync(text),
+            Tags = new TagCollection { { "version", version } },
+        };
+        record.Payload[Constants.ReservedPayloadTextField] = text;
+        return record;
+    }
+}
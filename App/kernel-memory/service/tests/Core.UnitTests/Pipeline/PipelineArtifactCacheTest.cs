@@ -0,0 +1,63 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System;
+using System.Threading.Tasks;
+using Microsoft.KernelMemory;
+using Microsoft.KernelMemory.DocumentStorage.DevTools;
+using Microsoft.KernelMemory.FileSystem.DevTools;
+using Microsoft.KernelMemory.Pipeline;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.Pipeline;
+
+public class PipelineArtifactCacheTest
+{
+    private const string Step = "summarize";
+
+    private readonly SimpleFileStorage _storage = new(new SimpleFileStorageConfig
+    {
+        StorageType = FileSystemTypes.Volatile,
+        Directory = "artifact-cache-" + Guid.NewGuid().ToString("N")
+    });
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItReusesTheArtifactsWithTheSameContentAndSettings()
+    {
+        // Arrange
+        var cache = new PipelineArtifactCache(this._storage);
+        string hash = PipelineArtifactCache.GetContentHash("some text");
+        string fingerprint = PipelineArtifactCache.GetFingerprint("model", "prompt");
+        await cache.SetAsync(Step, hash, fingerprint, "summary", BinaryData.FromString("a summary"));
+
+        // Act
+        BinaryData? artifact = await cache.GetAsync(Step, hash, fingerprint, "summary");
+        BinaryData? otherSettings = await cache.GetAsync(Step, hash, PipelineArtifactCache.GetFingerprint("other model", "prompt"), "summary");
+
+        // Assert
+        Assert.Equal("a summary", artifact?.ToString());
+        Assert.Null(otherSettings);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public async Task ItRemovesTheExpiredArtifacts()
+    {
+        // Arrange
+        var expiring = new PipelineArtifactCache(this._storage, new PipelineArtifactCacheConfig { TimeToLive = TimeSpan.FromMilliseconds(1) });
+        var cache = new PipelineArtifactCache(this._storage);
+        string hash = PipelineArtifactCache.GetContentHash("some text");
+        string fingerprint = PipelineArtifactCache.GetFingerprint("model", "prompt");
+        await expiring.SetAsync(Step, hash, fingerprint, "summary", BinaryData.FromString("a summary"));
+        await cache.SetAsync(Step, hash, fingerprint, "keywords", BinaryData.FromString("some keywords"));
+        await Task.Delay(10);
+
+        // Act
+        BinaryData? expired = await cache.GetAsync(Step, hash, fingerprint, "summary");
+        BinaryData? sameContent = await cache.GetAsync(Step, hash, fingerprint, "keywords");
+
+        // Assert: the artifacts of the content are removed together
+        Assert.Null(expired);
+        Assert.Null(sameContent);
+    }
+}
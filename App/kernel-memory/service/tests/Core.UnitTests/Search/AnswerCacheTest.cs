@@ -0,0 +1,107 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+using Microsoft.KernelMemory;
+using Microsoft.KernelMemory.Search;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.Search;
+
+public class AnswerCacheTest
+{
+    private const string Scope = "prompt";
+
+    private static readonly Embedding s_question = new(new[] { 1f, 0f, 0f });
+    private static readonly Embedding s_similarQuestion = new(new[] { 1f, 0.01f, 0f });
+    private static readonly Embedding s_otherQuestion = new(new[] { 0f, 1f, 0f });
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItReusesTheAnswersOfSimilarQuestions()
+    {
+        // Arrange
+        var cache = new AnswerCache(new SearchClientConfig());
+        cache.Add("index", null, Scope, s_question, cache.GetVersion("index"), Answer("yes"));
+
+        // Act
+        MemoryAnswer? similar = cache.Get("INDEX", null, Scope, s_similarQuestion);
+        MemoryAnswer? other = cache.Get("index", null, Scope, s_otherQuestion);
+
+        // Assert
+        Assert.Equal("yes", similar?.Result);
+        Assert.Null(other);
+        Assert.Equal(1, cache.Hits);
+        Assert.Equal(1, cache.Misses);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItReusesOnlyTheAnswersWithTheSameFiltersAndScope()
+    {
+        // Arrange
+        var cache = new AnswerCache(new SearchClientConfig());
+        var filters = new List<MemoryFilter> { MemoryFilters.ByTag("user", "u1").ByTag("type", "news"), MemoryFilters.ByTag("user", "u2") };
+        cache.Add("index", filters, Scope, s_question, cache.GetVersion("index"), Answer("yes"));
+
+        // Act
+        var sameFilters = new List<MemoryFilter> { MemoryFilters.ByTag("user", "u2"), MemoryFilters.ByTag("type", "news").ByTag("user", "u1") };
+        MemoryAnswer? reordered = cache.Get("index", sameFilters, Scope, s_question);
+        MemoryAnswer? otherFilters = cache.Get("index", new List<MemoryFilter> { MemoryFilters.ByTag("user", "u2") }, Scope, s_question);
+        MemoryAnswer? otherScope = cache.Get("index", filters, "another prompt", s_question);
+        MemoryAnswer? otherIndex = cache.Get("other", filters, Scope, s_question);
+
+        // Assert
+        Assert.Equal("yes", reordered?.Result);
+        Assert.Null(otherFilters);
+        Assert.Null(otherScope);
+        Assert.Null(otherIndex);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItRemovesTheAnswersMatchingTheRecordsChanged()
+    {
+        // Arrange
+        var cache = new AnswerCache(new SearchClientConfig());
+        var u1 = new List<MemoryFilter> { MemoryFilters.ByTag("user", "u1") };
+        var u2 = new List<MemoryFilter> { MemoryFilters.ByTag("user", "u2") };
+        long version = cache.GetVersion("index");
+        cache.Add("index", u1, Scope, s_question, version, Answer("u1"));
+        cache.Add("index", u2, Scope, s_question, version, Answer("u2"));
+
+        // Act
+        cache.Invalidate("index", new[] { new TagCollection { { "user", "u1" } } });
+
+        // Assert
+        Assert.Null(cache.Get("index", u1, Scope, s_question));
+        Assert.Equal("u2", cache.Get("index", u2, Scope, s_question)?.Result);
+
+        // Answers generated before the change are not stored
+        cache.Add("index", u1, Scope, s_question, version, Answer("u1"));
+        Assert.Null(cache.Get("index", u1, Scope, s_question));
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItRemovesTheLeastRecentlyUsedAnswersWhenFull()
+    {
+        // Arrange
+        var cache = new AnswerCache(new SearchClientConfig { AnswerCacheMaxEntries = 2 });
+        cache.Add("a", null, Scope, s_question, 0, Answer("a"));
+        cache.Add("b", null, Scope, s_question, 0, Answer("b"));
+        cache.Get("a", null, Scope, s_question);
+
+        // Act
+        cache.Add("c", null, Scope, s_question, 0, Answer("c"));
+
+        // Assert
+        Assert.NotNull(cache.Get("a", null, Scope, s_question));
+        Assert.Null(cache.Get("b", null, Scope, s_question));
+        Assert.NotNull(cache.Get("c", null, Scope, s_question));
+    }
+
+    private static MemoryAnswer Answer(string text)
+    {
+        return new MemoryAnswer { Question = "question", Result = text };
+    }
+}
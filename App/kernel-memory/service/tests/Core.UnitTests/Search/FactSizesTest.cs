@@ -0,0 +1,55 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+using Microsoft.KernelMemory.Search;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.Search;
+
+public class FactSizesTest
+{
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItCountsTheFactsOnlyUntilTheBudgetIsExceeded()
+    {
+        // Arrange
+        int[] tokens = { 40, 30, 50, 10, 10 };
+        var counted = new List<int>();
+        var sizes = new FactSizes(new[] { 0.9, 0.8, 0.7, 0.6, 0.5 }, position =>
+        {
+            counted.Add(position);
+            return tokens[position];
+        });
+
+        // Act
+        List<int> selected = FactPacker.PackInOrder(sizes, 100);
+
+        // Assert: the third fact doesn't fit, the following facts are not tokenized
+        Assert.Equal("0,1", string.Join(",", selected));
+        Assert.Equal("0,1,2", string.Join(",", counted));
+        Assert.Equal(3, sizes.CountedFacts);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItCountsEachFactOnce()
+    {
+        // Arrange
+        int calls = 0;
+        var sizes = new FactSizes(new[] { 0.9, 0.8, 0.7 }, position =>
+        {
+            calls++;
+            return 10 * (position + 1);
+        });
+
+        // Act
+        List<int> selected = FactPacker.PackByRelevance(sizes, 40);
+        int total = 0;
+        foreach ((double _, int factTokens) in sizes) { total += factTokens; }
+
+        // Assert
+        Assert.Equal("0,1", string.Join(",", selected));
+        Assert.Equal(60, total);
+        Assert.Equal(3, calls);
+    }
+}
@@ -0,0 +1,70 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Generic;
+using System.Linq;
+using Microsoft.KernelMemory.MemoryStorage;
+using Microsoft.KernelMemory.Search;
+using Xunit;
+
+namespace Microsoft.KM.Core.UnitTests.Search;
+
+public class ReciprocalRankFusionTest
+{
+    private const int K = 60;
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItRanksFirstTheRecordsFoundByBothSearches()
+    {
+        // Arrange: the scores of the two searches have different scales, only the rank matters
+        var vector = Ranking(("a", 0.9), ("b", 0.8), ("c", 0.7));
+        var keyword = Ranking(("c", 12.5), ("a", 3.1), ("d", 2.0));
+
+        // Act
+        var result = ReciprocalRankFusion.Fuse(new[] { vector, keyword }, K, limit: 10);
+
+        // Assert
+        Assert.Equal("a,c,b,d", string.Join(",", result.Select(x => x.Memory.Id)));
+        Assert.Equal((1.0 / (K + 1) + 1.0 / (K + 2)) / (2.0 / (K + 1)), result[0].Score, 6);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItScoresOneTheRecordsRankedFirstByAllSearches()
+    {
+        // Act
+        var result = ReciprocalRankFusion.Fuse(new[] { Ranking(("a", 0.9), ("b", 0.8)), Ranking(("a", 5.0)) }, K, limit: 10);
+
+        // Assert
+        Assert.Equal("a", result[0].Memory.Id);
+        Assert.Equal(1.0, result[0].Score, 6);
+        Assert.True(result[1].Score < 1);
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItReturnsTheBestRecordsUpToTheLimit()
+    {
+        // Act
+        var result = ReciprocalRankFusion.Fuse(new[] { Ranking(("a", 0.9), ("b", 0.8), ("c", 0.7)), Ranking(("c", 1.0)) }, K, limit: 2);
+
+        // Assert
+        Assert.Equal("c,a", string.Join(",", result.Select(x => x.Memory.Id)));
+    }
+
+    [Fact]
+    [Trait("Category", "UnitTest")]
+    public void ItReturnsNothingWithoutResults()
+    {
+        // Act
+        var result = ReciprocalRankFusion.Fuse(new[] { Ranking(), Ranking() }, K, limit: 10);
+
+        // Assert
+        Assert.Empty(result);
+    }
+
+    private static IReadOnlyList<(MemoryRecord Memory, double Score)> Ranking(params (string Id, double Score)[] records)
+    {
+        return records.Select(x => (new MemoryRecord { Id = x.Id }, x.Score)).ToList();
+    }
+}
@@ -0,0 +1,94 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+/*
+ * Measures the wall-clock time of the PDF text extraction, sequential and
+ * in parallel mode, with an increasing number of workers up to the number of cores.
+ *
+ * Usage: dotnet run [folder with PDF files] [iterations]
+ *
+ * Example:
+ *  dotnet run ../../../../Data 3
+ *  run.sh
+ *
+ * Defaults to the PDF files in the Data folder of the repository, 3 iterations per setting,
+ * reporting the fastest run. The text extracted in parallel mode is compared with the
+ * sequential extraction, to verify that pages are returned complete and in order.
+ */
+
+using System.Diagnostics;
+using Microsoft.KernelMemory.DataFormats;
+using Microsoft.KernelMemory.DataFormats.Pdf;
+
+var folder = args.Length > 0 ? args[0] : Path.Join("..", "..", "..", "..", "Data");
+var iterations = args.Length > 1 ? int.Parse(args[1], System.Globalization.CultureInfo.InvariantCulture) : 3;
+
+if (!Directory.Exists(folder))
+{
+    Console.WriteLine($"Folder not found: {folder}");
+    Environment.Exit(-1);
+}
+
+var files = Directory.GetFiles(folder, "*.pdf").OrderBy(x => x, StringComparer.Ordinal).ToArray();
+if (files.Length == 0)
+{
+    Console.WriteLine($"No PDF files found in {folder}");
+    Environment.Exit(-2);
+}
+
+// 1, 2, 4, ... up to the number of cores
+var workers = new List<int>();
+for (int n = 1; n < Environment.ProcessorCount; n *= 2) { workers.Add(n); }
+
+workers.Add(Environment.ProcessorCount);
+
+Console.WriteLine($"Cores: {Environment.ProcessorCount}, iterations: {iterations}");
+Console.WriteLine();
+Console.WriteLine($"{"File",-60} {"Pages",6} {"Workers",8} {"Msecs",8} {"Speedup",8}");
+
+var totals = new double[workers.Count];
+foreach (string file in files)
+{
+    byte[] bytes = await File.ReadAllBytesAsync(file).ConfigureAwait(false);
+
+    // Warm up, and reference output
+    FileContent expected = await DecodeAsync(bytes, 1).ConfigureAwait(false);
+
+    double sequential = 0;
+    for (int w = 0; w < workers.Count; w++)
+    {
+        double best = double.MaxValue;
+        for (int i = 0; i < iterations; i++)
+        {
+            var watch = Stopwatch.StartNew();
+            FileContent content = await DecodeAsync(bytes, workers[w]).ConfigureAwait(false);
+            best = Math.Min(best, watch.Elapsed.TotalMilliseconds);
+
+            if (!content.Sections.Select(x => (x.Number, x.Content)).SequenceEqual(expected.Sections.Select(x => (x.Number, x.Content))))
+            {
+                Console.WriteLine($"Text extracted with {workers[w]} workers differs from the sequential extraction: {file}");
+                Environment.Exit(-3);
+            }
+        }
+
+        if (w == 0) { sequential = best; }
+
+        totals[w] += best;
+        Console.WriteLine($"{Path.GetFileName(file),-60} {expected.Sections.Count,6} {workers[w],8} {best,8:F0} {sequential / best,8:F2}");
+    }
+}
+
+Console.WriteLine();
+for (int w = 0; w < workers.Count; w++)
+{
+    Console.WriteLine($"{"Total",-60} {"",6} {workers[w],8} {totals[w],8:F0} {totals[0] / totals[w],8:F2}");
+}
+
+static Task<FileContent> DecodeAsync(byte[] bytes, int workers)
+{
+    var decoder = new PdfDecoder(new PdfDecoderConfig
+    {
+        ParallelExtraction = new ParallelExtractionConfig { MaxDegreeOfParallelism = workers }
+    });
+
+    return decoder.DecodeAsync(new BinaryData(bytes));
+}
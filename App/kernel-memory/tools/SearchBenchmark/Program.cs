@@ -0,0 +1,99 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+/*
+ * Compares the exhaustive vector search of SimpleVectorDb, scoring the vector matrix in
+ * blocks and keeping the best results in a bounded heap, with the previous implementation,
+ * which scored every record into a dictionary and sorted all the scores.
+ *
+ * Usage: dotnet run -c Release [BenchmarkDotNet arguments]
+ *
+ * Example:
+ *  dotnet run -c Release -- --filter '*'
+ *  run.sh --filter '*'
+ *
+ * Collections of 10k, 100k and 1M random vectors, 384 dimensions, returning the top 5 and top 100.
+ * 1M vectors take about 3 GB of memory, the matrix plus the copy used by the previous implementation.
+ */
+
+using System.Numerics.Tensors;
+using BenchmarkDotNet.Attributes;
+using BenchmarkDotNet.Running;
+using Microsoft.KernelMemory;
+using Microsoft.KernelMemory.MemoryStorage.DevTools;
+
+BenchmarkSwitcher.FromTypes(new[] { typeof(VectorSearchBenchmark) }).Run(args);
+
+[MemoryDiagnoser]
+public class VectorSearchBenchmark
+{
+    private const int Dimensions = 384;
+
+    private Dictionary<string, Embedding> _records = new();
+    private InMemoryVectorMatrix? _matrix;
+    private List<string> _ids = new();
+    private Embedding _query;
+
+    [Params(10_000, 100_000, 1_000_000)]
+    public int Count { get; set; }
+
+    [Params(5, 100)]
+    public int Limit { get; set; }
+
+    [GlobalSetup]
+    public void Setup()
+    {
+        var random = new Random(42);
+        this._matrix = new InMemoryVectorMatrix(Dimensions);
+        this._records = new Dictionary<string, Embedding>(this.Count);
+        this._ids = new List<string>(this.Count);
+        for (int i = 0; i < this.Count; i++)
+        {
+            float[] vector = RandomVector(random);
+            string id = $"record-{i}";
+            this._records[id] = new Embedding(vector);
+            this._ids.Add(id);
+            this._matrix.Append(vector);
+        }
+
+        this._query = new Embedding(RandomVector(random));
+    }
+
+    [GlobalCleanup]
+    public void Cleanup()
+    {
+        this._matrix?.Dispose();
+    }
+
+    [Benchmark(Baseline = true)]
+    public List<(string Id, double Score)> DictionaryAndOrderBy()
+    {
+        var similarity = new Dictionary<string, double>();
+        foreach (KeyValuePair<string, Embedding> record in this._records)
+        {
+            similarity[record.Key] = this._query.CosineSimilarity(record.Value);
+        }
+
+        return (from entry in similarity
+                where entry.Value >= 0
+                orderby entry.Value descending
+                select (entry.Key, entry.Value)).Take(this.Limit).ToList();
+    }
+
+    [Benchmark]
+    public List<(string Id, double Score)> TopKScorer()
+    {
+        return Microsoft.KernelMemory.MemoryStorage.DevTools.TopKScorer.Search(this._matrix!, this._query.Data.ToArray(), this.Limit, 0, null)
+            .Select(x => (this._ids[x.Ordinal], (double)x.Score))
+            .ToList();
+    }
+
+    // Normalized, like the vectors stored in the matrix
+    private static float[] RandomVector(Random random)
+    {
+        var vector = new float[Dimensions];
+        for (int i = 0; i < Dimensions; i++) { vector[i] = (float)(random.NextDouble() * 2 - 1); }
+
+        TensorPrimitives.Divide(vector, TensorPrimitives.Norm(vector), vector);
+        return vector;
+    }
+}
@@ -0,0 +1,13 @@
+#!/usr/bin/env bash
+
+set -e
+
+HERE="$(cd "$(dirname "${BASH_SOURCE[0]:-$0}")" && pwd)"
+cd $HERE
+
+if [ ! -f "bin/Release/net8.0/SearchBenchmark.dll" ]; then
+    echo "Building tool..."
+    dotnet build -c Release --nologo -v q
+fi
+
+dotnet run -c Release --no-build $*
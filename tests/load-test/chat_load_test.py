@@ -0,0 +1,112 @@
+"""Load test for the chat API.
+
+Simulates N concurrent users, each one holding its own chat session for several turns,
+and checks that the sessions stay independent: every answer must come back on the
+session it was asked in, and no user may see the code word given by another user.
+Reports the throughput, overall and per core of the API host.
+
+Usage:
+    python chat_load_test.py --url https://<api-host> --users 20 --turns 3 --server-cores 2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUESTIONS = [
+    "What are the main topics covered by the documents?",
+    "Summarize the most important figures mentioned in the documents.",
+    "Which risks are highlighted in the documents?",
+]
+
+
+def post_chat(url, session_id, question, timeout):
+    body = json.dumps({"chatSessionId": session_id, "question": question}).encode("utf-8")
+    request = urllib.request.Request(
+        f"{url}/chat", data=body, headers={"Content-Type": "application/json"}, method="POST"
+    )
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        payload = json.loads(response.read().decode("utf-8"))
+    return payload, time.perf_counter() - started
+
+
+def run_user(url, turns, timeout):
+    session_id = str(uuid.uuid4())
+    code_word = f"code-{uuid.uuid4().hex[:8]}"
+    result = {"session_id": session_id, "code_word": code_word, "latencies": [], "errors": [], "last_answer": ""}
+
+    questions = [f"Remember the code word {code_word} for the rest of our conversation. {QUESTIONS[0]}"]
+    questions += [QUESTIONS[i % len(QUESTIONS)] for i in range(1, turns - 1)]
+    questions.append("What is the code word I asked you to remember? Answer with the code word only.")
+
+    for question in questions:
+        try:
+            payload, latency = post_chat(url, session_id, question, timeout)
+        except Exception as ex:  # keep going, the error is reported at the end
+            result["errors"].append(f"{type(ex).__name__}: {ex}")
+            continue
+
+        result["latencies"].append(latency)
+        if payload.get("chatSessionId") != session_id:
+            result["errors"].append(f"answer returned on session {payload.get('chatSessionId')}")
+        result["last_answer"] = payload.get("answer") or ""
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent chat sessions load test")
+    parser.add_argument("--url", default=os.getenv("api_url"), help="Base URL of the API host")
+    parser.add_argument("--users", type=int, default=10, help="Number of concurrent users")
+    parser.add_argument("--turns", type=int, default=3, help="Questions per user, the last one checks the session memory")
+    parser.add_argument("--server-cores", type=int, default=1, help="CPU cores of the API host, to report throughput per core")
+    parser.add_argument("--timeout", type=float, default=300, help="Timeout of one request in seconds")
+    args = parser.parse_args()
+
+    if not args.url:
+        parser.error("--url or the api_url environment variable is required")
+    url = args.url.rstrip("/")
+    turns = max(args.turns, 2)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        results = list(executor.map(lambda _: run_user(url, turns, args.timeout), range(args.users)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for r in results for latency in r["latencies"])
+    errors = [(r["session_id"], error) for r in results for error in r["errors"]]
+    all_code_words = {r["code_word"] for r in results}
+
+    leaks = []
+    recalled = 0
+    for r in results:
+        answer = r["last_answer"]
+        recalled += r["code_word"] in answer
+        leaks += [(r["session_id"], other) for other in all_code_words - {r["code_word"]} if other in answer]
+
+    completed = len(latencies)
+    throughput = completed / elapsed if elapsed > 0 else 0
+    print(f"Users: {args.users}, turns per user: {turns}, requests completed: {completed}, errors: {len(errors)}")
+    print(f"Elapsed: {elapsed:.1f}s, throughput: {throughput:.2f} req/s, {throughput / args.server_cores:.2f} req/s per core")
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"Latency p50: {statistics.median(latencies):.2f}s, p95: {p95:.2f}s")
+    print(f"Sessions recalling their own code word: {recalled}/{len(results)}")
+
+    for session_id, error in errors:
+        print(f"ERROR session {session_id}: {error}")
+    for session_id, other in leaks:
+        print(f"LEAK session {session_id} answered with the code word of another session: {other}")
+
+    return 1 if errors or leaks else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())